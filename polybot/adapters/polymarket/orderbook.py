@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
-from polybot.core.models import OrderBook, Level
+from typing import Iterator, List, Optional, Tuple
+from polybot.core.models import OrderBookView, Level, Side
+from polybot.core.ladder import PriceLadder, DEFAULT_TICK_SIZE
+from polybot.core.checksum import checksum_from_sums
 
 
 class OrderbookAssembler:
@@ -11,55 +13,81 @@ class OrderbookAssembler:
     Delta format: {seq:int, bids:[[price,size_delta],...], asks:[[price,size_delta],...]}
     size_delta: set to 0 or negative to remove/decrease; positive to add/increase.
     Prices are floats (tick compliance validated elsewhere).
+
+    Each side is a tick-indexed `PriceLadder`, so best bid/ask are O(1) and
+    depth-N queries are O(N) regardless of book depth.
+
+    `apply_snapshot`/`apply_delta` return the assembler's single `OrderBookView` over
+    the live state instead of copying both sides; call `.freeze()` on it to keep a copy.
+
+    `checksum()` is built from per-side level counts and notional sums the ladders keep
+    up to date on apply, so verifying a delta costs O(levels in the delta). Every
+    `checksum_recompute_every` deltas (and on demand via `exact=True`) the sums are
+    recomputed exactly so float drift cannot accumulate.
     """
 
-    def __init__(self, market_id: str):
+    def __init__(self, market_id: str, tick_size: float = DEFAULT_TICK_SIZE, checksum_recompute_every: int = 1000):
         self.market_id = market_id
-        self._bids: Dict[float, float] = {}
-        self._asks: Dict[float, float] = {}
+        self._bids = PriceLadder("bid", tick_size)
+        self._asks = PriceLadder("ask", tick_size)
         self._seq: int = 0
+        self._view = OrderBookView(self)
+        self.checksum_recompute_every = max(0, int(checksum_recompute_every))
+        self._deltas_since_exact = 0
 
-    def apply_snapshot(self, snapshot: dict) -> OrderBook:
+    def view(self) -> OrderBookView:
+        """Return the read-only view over the current book (no copy, no allocation)."""
+        return self._view
+
+    def apply_snapshot(self, snapshot: dict) -> OrderBookView:
         self._seq = int(snapshot.get("seq", 0))
         self._bids.clear()
         self._asks.clear()
+        self._deltas_since_exact = 0
         for p, s in snapshot.get("bids", []) or []:
             if s > 0:
-                self._bids[float(p)] = float(s)
+                self._bids.set(float(p), float(s))
         for p, s in snapshot.get("asks", []) or []:
             if s > 0:
-                self._asks[float(p)] = float(s)
-        return OrderBook(self.market_id, self._seq, dict(self._bids), dict(self._asks))
+                self._asks.set(float(p), float(s))
+        return self._view
 
-    def apply_delta(self, delta: dict) -> OrderBook:
+    def apply_delta(self, delta: dict) -> OrderBookView:
         next_seq = int(delta.get("seq", self._seq))
         if next_seq <= self._seq:
             # ignore old or duplicate deltas; caller handles resync policy
-            return OrderBook(self.market_id, self._seq, dict(self._bids), dict(self._asks))
+            return self._view
 
         for p, ds in delta.get("bids", []) or []:
-            price = float(p)
-            size = float(ds)
-            new = max(0.0, self._bids.get(price, 0.0) + size)
-            if new == 0.0:
-                self._bids.pop(price, None)
-            else:
-                self._bids[price] = new
+            self._bids.add(float(p), float(ds))
         for p, ds in delta.get("asks", []) or []:
-            price = float(p)
-            size = float(ds)
-            new = max(0.0, self._asks.get(price, 0.0) + size)
-            if new == 0.0:
-                self._asks.pop(price, None)
-            else:
-                self._asks[price] = new
+            self._asks.add(float(p), float(ds))
 
         self._seq = next_seq
-        return OrderBook(self.market_id, self._seq, dict(self._bids), dict(self._asks))
+        self._deltas_since_exact += 1
+        return self._view
+
+    def checksum(self, exact: bool = False) -> str:
+        """Checksum of the current book, same format as `orderbook_checksum`."""
+        bids, asks = self._bids, self._asks
+        if exact or (self.checksum_recompute_every and self._deltas_since_exact >= self.checksum_recompute_every):
+            bids.recompute_notional()
+            asks.recompute_notional()
+            self._deltas_since_exact = 0
+        return checksum_from_sums(len(bids), bids.notional(), len(asks), asks.notional())
 
     def best_bid(self) -> Optional[Level]:
-        return OrderBook(self.market_id, self._seq, self._bids, self._asks).best_bid()
+        top = self._bids.best()
+        return Level(price=top[0], size=top[1]) if top else None
 
     def best_ask(self) -> Optional[Level]:
-        return OrderBook(self.market_id, self._seq, self._bids, self._asks).best_ask()
+        top = self._asks.best()
+        return Level(price=top[0], size=top[1]) if top else None
+
+    def depth(self, side: Side, n: int) -> List[Tuple[float, float]]:
+        """Top `n` (price, size) levels for `side`, best first."""
+        return (self._bids if side == "bid" else self._asks).depth(n)
 
+    def walk(self, side: Side) -> Iterator[Tuple[float, float]]:
+        """Lazily iterate `side` best-first; do not apply messages while iterating."""
+        return (self._bids if side == "bid" else self._asks).walk()
@@ -2,10 +2,10 @@ from __future__ import annotations
 
 from typing import List, Optional, Dict, Any
 
-from .relayer import OrderRequest, OrderAck
+from .relayer import OrderRequest, OrderAck, RelayerCapabilities, RelayerProtocol
 
 
-class PyClobRelayer:
+class PyClobRelayer(RelayerProtocol):
     """Adapter for py-clob-client style relayer.
 
     Expects an injected `client` with:
@@ -19,8 +19,14 @@ class PyClobRelayer:
       - response fields: order_id | orderId, filled_size | filledSize, remaining_size | remainingSize, status
     """
 
-    def __init__(self, client: object):
+    def __init__(self, client: object, max_batch: Optional[int] = None):
         self._client = client
+        self.capabilities = RelayerCapabilities(
+            idempotency=True,
+            max_batch=max_batch,
+            cancel=True,
+            presign=callable(getattr(client, "presign_orders", None)),
+        )
 
     @staticmethod
     def _resp_get(d: Dict[str, Any], *keys: str, default: Any = None) -> Any:
@@ -29,18 +35,28 @@ class PyClobRelayer:
                 return d[k]
         return default
 
+    @staticmethod
+    def _order_payload(r: OrderRequest) -> Dict[str, Any]:
+        return {
+            "market": r.market_id,
+            "outcome": r.outcome_id,
+            "side": r.side,
+            "price": r.price,
+            "size": r.size,
+            "timeInForce": r.tif,
+        }
+
+    def presign_orders(self, reqs: List[OrderRequest]) -> int:
+        """Ask the client to sign likely orders ahead of time (no-op if unsupported)."""
+        if not self.capabilities.presign:
+            return 0
+        return int(self._client.presign_orders([self._order_payload(r) for r in reqs]) or 0)  # type: ignore[attr-defined]
+
     def place_orders(self, reqs: List[OrderRequest], idempotency_prefix: Optional[str] = None) -> List[OrderAck]:
         payload: List[Dict[str, Any]] = []
         client_order_ids: List[str] = []
         for r in reqs:
-            o: Dict[str, Any] = {
-                "market": r.market_id,
-                "outcome": r.outcome_id,
-                "side": r.side,
-                "price": r.price,
-                "size": r.size,
-                "timeInForce": r.tif,
-            }
+            o = self._order_payload(r)
             if r.client_order_id:
                 o["clientOrderId"] = r.client_order_id
                 client_order_ids.append(r.client_order_id)
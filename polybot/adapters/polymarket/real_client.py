@@ -27,11 +27,18 @@ def _map_time_in_force(value: str):
 
 
 class _ClobClientOrderBridge:
-    """Adapter that gives py-clob-client's ClobClient a place_orders/cancel_orders surface."""
+    """Adapter that gives py-clob-client's ClobClient a place_orders/cancel_orders surface.
+
+    Orders are signed through a `SigningPipeline` (serial and inline unless configured with
+    workers); `presign_orders` lets strategies sign likely quotes ahead of time.
+    """
+
+    def __init__(self, client: Any, *, dry_run: bool, signer: Any = None):
+        from .signing import SigningPipeline
 
-    def __init__(self, client: Any, *, dry_run: bool):
         self._client = client
         self._dry_run = dry_run
+        self._signer = signer if signer is not None else SigningPipeline(client)
         self._ensure_creds()
 
     def _ensure_creds(self, force: bool = False) -> None:
@@ -65,15 +72,8 @@ class _ClobClientOrderBridge:
 
         payload: List[Any] = []
         client_order_ids: List[str] = []
-        for order in orders:
-            side = str(order.get("side", "")).upper()
-            args = OrderArgs(
-                token_id=str(order.get("outcome") or order.get("token_id") or ""),
-                price=float(order.get("price", 0.0)),
-                size=float(order.get("size", 0.0)),
-                side=side,
-            )
-            signed = self._client.create_order(args)
+        signed_orders = self._signer.sign_batch([self._order_args(OrderArgs, order) for order in orders])
+        for order, signed in zip(orders, signed_orders):
             tif = _map_time_in_force(str(order.get("timeInForce") or order.get("tif") or "GTC"))
             payload.append(PostOrdersArgs(order=signed, orderType=tif))
             client_order_ids.append(str(order.get("clientOrderId") or order.get("client_order_id") or ""))
@@ -141,6 +141,31 @@ class _ClobClientOrderBridge:
             )
         return acks
 
+    @staticmethod
+    def _order_args(order_args_cls: Any, order: Dict[str, Any]) -> Any:
+        return order_args_cls(
+            token_id=str(order.get("outcome") or order.get("token_id") or ""),
+            price=float(order.get("price", 0.0)),
+            size=float(order.get("size", 0.0)),
+            side=str(order.get("side", "")).upper(),
+        )
+
+    def presign_orders(self, orders: List[Dict[str, Any]]) -> int:
+        """Sign likely orders ahead of time; returns how many were queued (0 in dry-run)."""
+        if self._dry_run:
+            return 0
+        try:
+            from py_clob_client.clob_types import OrderArgs  # type: ignore
+        except Exception:  # pragma: no cover
+            return 0
+        return self._signer.presign([self._order_args(OrderArgs, order) for order in orders])
+
+    def invalidate_presigned(self, token_id: str | None = None) -> int:
+        return self._signer.invalidate(token_id)
+
+    def close(self) -> None:
+        self._signer.close()
+
     def cancel_orders(self, client_order_ids: List[str]) -> List[Dict[str, Any]]:
         if not hasattr(self._client, "cancel_orders"):
             return []
@@ -287,12 +312,28 @@ def make_pyclob_client(base_url: str, private_key: str, dry_run: bool = True, **
     return client
 
 
-def wrap_clob_client(client: Any, *, dry_run: bool) -> Any:
-    """Ensure the given client exposes place_orders/cancel_orders."""
+def wrap_clob_client(
+    client: Any,
+    *,
+    dry_run: bool,
+    signing_workers: int = 0,
+    signing_mode: str = "thread",
+    signer_factory: Any = None,
+) -> Any:
+    """Ensure the given client exposes place_orders/cancel_orders.
+
+    `signing_workers`/`signing_mode` configure the bridge's `SigningPipeline`; process mode
+    needs a picklable `signer_factory` returning a client able to `create_order`.
+    """
     if client is None:
         return None
     if hasattr(client, "place_orders") and callable(getattr(client, "place_orders")):
         return client
     if hasattr(client, "create_order") and hasattr(client, "post_orders"):
-        return _ClobClientOrderBridge(client, dry_run=dry_run)
+        signer = None
+        if signing_workers > 0:
+            from .signing import SigningPipeline
+
+            signer = SigningPipeline(client, workers=signing_workers, mode=signing_mode, signer_factory=signer_factory)
+        return _ClobClientOrderBridge(client, dry_run=dry_run, signer=signer)
     return client
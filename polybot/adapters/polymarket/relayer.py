@@ -1,7 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import List, Literal, Optional, Dict
+from dataclasses import dataclass, replace
+import inspect
+from typing import Any, List, Literal, Optional, Dict, Protocol, runtime_checkable
 
 
 TimeInForce = Literal["IOC", "FOK", "GTC"]
@@ -35,7 +36,58 @@ class CancelAck:
     canceled: bool
 
 
-class FakeRelayer:
+@dataclass(frozen=True)
+class RelayerCapabilities:
+    """What a relayer supports; resolved once per engine instead of per plan.
+
+    - idempotency: `place_orders` accepts `idempotency_prefix`
+    - max_batch: most orders per `place_orders` call (None = unlimited)
+    - async_place / async_cancel: native `place_orders_async` / `cancel_client_orders_async`
+    - cancel: `cancel_client_orders` is available
+    - presign: `presign_orders` can sign likely orders ahead of time
+    """
+
+    idempotency: bool = False
+    max_batch: Optional[int] = None
+    async_place: bool = False
+    async_cancel: bool = False
+    cancel: bool = False
+    presign: bool = False
+
+
+@runtime_checkable
+class RelayerProtocol(Protocol):
+    """Interface the execution engine relies on; relayers declare `capabilities` explicitly."""
+
+    capabilities: RelayerCapabilities
+
+    def place_orders(self, reqs: List[OrderRequest], idempotency_prefix: Optional[str] = None) -> List[OrderAck]: ...
+
+    def cancel_client_orders(self, client_order_ids: List[str]) -> List[CancelAck]: ...
+
+
+def resolve_capabilities(relayer: Any) -> RelayerCapabilities:
+    """Return declared capabilities, or detect them once for duck-typed relayers."""
+    declared = getattr(relayer, "capabilities", None)
+    if isinstance(declared, RelayerCapabilities):
+        return declared
+    place = getattr(relayer, "place_orders", None)
+    idempotency = False
+    if place is not None:
+        try:
+            idempotency = "idempotency_prefix" in inspect.signature(place).parameters
+        except (TypeError, ValueError):
+            idempotency = False
+    return RelayerCapabilities(
+        idempotency=idempotency,
+        async_place=callable(getattr(relayer, "place_orders_async", None)),
+        async_cancel=callable(getattr(relayer, "cancel_client_orders_async", None)),
+        cancel=callable(getattr(relayer, "cancel_client_orders", None)),
+        presign=callable(getattr(relayer, "presign_orders", None)),
+    )
+
+
+class FakeRelayer(RelayerProtocol):
     """A deterministic fake relayer for tests/integration without network.
 
     Rules:
@@ -43,12 +95,14 @@ class FakeRelayer:
     - Can be configured with a fill_ratio to simulate partial fills
     """
 
+    capabilities = RelayerCapabilities(cancel=True)
+
     def __init__(self, fill_ratio: float = 1.0):
         self.fill_ratio = max(0.0, min(1.0, fill_ratio))
         self._seq = 0
         self._open: Dict[str, str] = {}  # client_oid -> order_id
 
-    def place_orders(self, reqs: List[OrderRequest]) -> List[OrderAck]:
+    def place_orders(self, reqs: List[OrderRequest], idempotency_prefix: Optional[str] = None) -> List[OrderAck]:
         acks: List[OrderAck] = []
         for r in reqs:
             self._seq += 1
@@ -74,7 +128,7 @@ class FakeRelayer:
         return acks
 
 
-class RelayerClient:
+class RelayerClient(RelayerProtocol):
     """Adapter for a real Polymarket CLOB client (e.g., py-clob-client-like).
 
     This class depends on an injected client with methods:
@@ -84,8 +138,9 @@ class RelayerClient:
     No network calls are made in tests; pass a stub client implementing these methods.
     """
 
-    def __init__(self, client: object):
+    def __init__(self, client: object, max_batch: Optional[int] = None):
         self._client = client
+        self.capabilities = RelayerCapabilities(idempotency=True, max_batch=max_batch, cancel=True)
 
     def place_orders(self, reqs: List[OrderRequest], idempotency_prefix: Optional[str] = None) -> List[OrderAck]:
         payload = []
@@ -187,11 +242,12 @@ class RelayerClient:
         raise NotImplementedError("update_balance_allowance not available on underlying client")
 
 
-class RetryRelayer:
+class RetryRelayer(RelayerProtocol):
     """Wrapper that adds retry/backoff around place/cancel operations.
 
     Retries on exceptions up to max_retries with optional sleep between attempts.
-    Increments relayer_retries_total on each retry attempt.
+    Increments relayer_retries_total on each retry attempt. Capabilities are the inner
+    relayer's, minus native async support (retries here are synchronous).
     """
 
     def __init__(self, inner, max_retries: int = 0, retry_sleep_ms: int = 0, sleeper=None):
@@ -199,12 +255,15 @@ class RetryRelayer:
         self._max_retries = max(0, int(max_retries))
         self._retry_sleep_ms = max(0, int(retry_sleep_ms))
         self._sleeper = sleeper
+        self.capabilities = replace(resolve_capabilities(inner), async_place=False, async_cancel=False)
 
     def place_orders(self, reqs: List[OrderRequest], idempotency_prefix: Optional[str] = None) -> List[OrderAck]:
         attempt = 0
         while True:
             try:
-                return self._inner.place_orders(reqs, idempotency_prefix=idempotency_prefix)
+                if self.capabilities.idempotency:
+                    return self._inner.place_orders(reqs, idempotency_prefix=idempotency_prefix)
+                return self._inner.place_orders(reqs)
             except Exception:
                 attempt += 1
                 try:
@@ -270,7 +329,7 @@ class RetryRelayer:
         attempt = 0
         while True:
             try:
-                if hasattr(self._inner, "cancel_client_orders"):
+                if self.capabilities.cancel:
                     return self._inner.cancel_client_orders(client_order_ids)
                 return []
             except Exception:
@@ -309,6 +368,17 @@ class RetryRelayer:
         return getattr(self._inner, name)
 
 
+_SIGNING_KWARGS = {"signing_workers", "signing_mode"}
+
+
+def _signing_kwargs(kwargs: Dict[str, object]) -> Dict[str, object]:
+    out: Dict[str, object] = {}
+    if int(kwargs.get("signing_workers", 0) or 0) > 0:  # type: ignore[arg-type]
+        out["signing_workers"] = int(kwargs["signing_workers"])  # type: ignore[arg-type]
+        out["signing_mode"] = str(kwargs.get("signing_mode", "thread"))
+    return out
+
+
 def build_relayer(kind: str, **kwargs):
     kind = (kind or "fake").lower()
     if kind == "fake":
@@ -335,10 +405,18 @@ def build_relayer(kind: str, **kwargs):
                 private_key = str(kwargs.get("private_key", ""))
                 dry_run = bool(kwargs.get("dry_run", True))
                 # forward extra kwargs (e.g., chain_id, timeout_s)
-                extras = {k: v for k, v in kwargs.items() if k not in {"client", "base_url", "private_key", "dry_run"}}
+                extras = {k: v for k, v in kwargs.items() if k not in {"client", "base_url", "private_key", "dry_run"} | _SIGNING_KWARGS}
                 client = make_pyclob_client(base_url=base_url, private_key=private_key, dry_run=dry_run, **extras)
                 if wrap_clob_client is not None:
-                    client = wrap_clob_client(client, dry_run=dry_run)
+                    signing = _signing_kwargs(kwargs)
+                    if signing.get("signing_mode") == "process":
+                        import functools
+
+                        # each signing process builds its own client from the same settings
+                        signing["signer_factory"] = functools.partial(
+                            make_pyclob_client, base_url=base_url, private_key=private_key, dry_run=dry_run, **extras
+                        )
+                    client = wrap_clob_client(client, dry_run=dry_run, **signing)
             except Exception as e:  # noqa: BLE001
                 raise NotImplementedError(
                     "Real relayer requires an injected client instance or install py-clob-client"
@@ -347,7 +425,7 @@ def build_relayer(kind: str, **kwargs):
             try:
                 from .real_client import wrap_clob_client  # type: ignore
 
-                client = wrap_clob_client(client, dry_run=bool(kwargs.get("dry_run", True)))
+                client = wrap_clob_client(client, dry_run=bool(kwargs.get("dry_run", True)), **_signing_kwargs(kwargs))
             except Exception:
                 pass
         # Prefer the py-clob adapter for real clients so that request/response
@@ -0,0 +1,214 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait as futures_wait
+import logging
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from polybot.observability.metrics import histogram, inc
+
+
+_SIGN_US = histogram("relayer_sign_us")
+_log = logging.getLogger("polybot.signing")
+
+# (token_id, side, price, size, nonce window)
+SignKey = Tuple[str, str, float, float, int]
+
+
+def _timed_sign(create_order: Callable[[Any], Any], args: Any) -> Tuple[Any, int]:
+    start = time.perf_counter()
+    signed = create_order(args)
+    return signed, int((time.perf_counter() - start) * 1e6)
+
+
+# Process-pool workers build their own signer once (clients are not picklable).
+_WORKER_SIGNER: Any = None
+
+
+def _worker_init(signer_factory: Callable[[], Any]) -> None:
+    global _WORKER_SIGNER
+    _WORKER_SIGNER = signer_factory()
+
+
+def _worker_sign(args: Any) -> Tuple[Any, int]:
+    return _timed_sign(_WORKER_SIGNER.create_order, args)
+
+
+class SigningPipeline:
+    """Sign py-clob `OrderArgs` for the real client bridge, in parallel and ahead of time.
+
+    `workers=0` signs inline on the caller's thread (the original serial behaviour). With
+    `mode="thread"` a pool shares `client`; with `mode="process"` each worker builds its own
+    signer from the picklable `signer_factory`, which is what actually parallelises the
+    CPU-bound EIP-712 signing.
+
+    `presign` signs likely orders in the background (pools only). Pre-signed orders are
+    cached by (token, side, price, size, nonce window) and each entry is consumed on use,
+    since a signed order carries a unique salt and must not be posted twice. Entries expire
+    when the `nonce_window_ms` bucket rolls over and are dropped by `invalidate()` (call it
+    after a nonce bump/cancel-all or a tick-size change).
+
+    `client` may only be None with process workers, which sign with their own signers. An
+    order whose background signing failed is re-signed inline on `client`, counted in
+    `relayer_sign_fallback` and logged once; without a `client` the failure is raised.
+
+    Metrics: `relayer_sign_us` histogram (`_bucket{le}`, `_sum`, `_count`),
+    `relayer_presign_hits`, `relayer_presign_misses`, `relayer_presign_evicted`,
+    `relayer_sign_fallback`.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        workers: int = 0,
+        mode: str = "thread",
+        signer_factory: Optional[Callable[[], Any]] = None,
+        cache_size: int = 256,
+        nonce_window_ms: int = 60_000,
+        clock: Optional[Callable[[], float]] = None,
+    ):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"unknown signing mode: {mode!r}")
+        if mode == "process" and workers > 0 and signer_factory is None:
+            raise ValueError("process signing requires a signer_factory")
+        if client is None and not (mode == "process" and workers > 0):
+            raise ValueError("signing without a client requires process workers")
+        self._client = client
+        self.workers = max(0, int(workers))
+        self.mode = mode
+        self._signer_factory = signer_factory
+        self.cache_size = max(0, int(cache_size))
+        self.nonce_window_ms = max(1, int(nonce_window_ms))
+        self._clock = clock or time.time
+        self._executor: Optional[Executor] = None
+        self._cache: "OrderedDict[SignKey, Future]" = OrderedDict()
+        self._window = self._current_window()
+        self._lock = threading.Lock()
+        self._fallback_logged = False
+
+    def _current_window(self) -> int:
+        return int(self._clock() * 1000) // self.nonce_window_ms
+
+    def key(self, args: Any, window: Optional[int] = None) -> SignKey:
+        return (
+            str(args.token_id),
+            str(args.side).upper(),
+            round(float(args.price), 6),
+            round(float(args.size), 6),
+            self._current_window() if window is None else window,
+        )
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            if self.mode == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_worker_init, initargs=(self._signer_factory,))
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="polybot-sign")
+        return self._executor
+
+    def _submit(self, args: Any) -> Future:
+        if self.mode == "process":
+            return self._pool().submit(_worker_sign, args)
+        return self._pool().submit(_timed_sign, self._client.create_order, args)
+
+    def _roll_window(self) -> int:
+        # caller holds the lock
+        window = self._current_window()
+        if window != self._window:
+            if self._cache:
+                inc("relayer_presign_evicted", len(self._cache))
+                self._cache.clear()
+            self._window = window
+        return window
+
+    def sign_batch(self, args_list: List[Any]) -> List[Any]:
+        """Return signed orders for `args_list`, using pre-signed entries when available."""
+        pending: List[Any] = [None] * len(args_list)
+        misses: List[int] = []
+        with self._lock:
+            window = self._roll_window()
+            for idx, args in enumerate(args_list):
+                fut = self._cache.pop(self.key(args, window), None)
+                if fut is None:
+                    misses.append(idx)
+                else:
+                    pending[idx] = fut
+        hits = len(args_list) - len(misses)
+        if hits:
+            inc("relayer_presign_hits", hits)
+        if misses:
+            inc("relayer_presign_misses", len(misses))
+        if self.workers > 0 and (len(misses) > 1 or self._client is None):
+            for idx in misses:
+                pending[idx] = self._submit(args_list[idx])
+        out: List[Any] = []
+        for idx, args in enumerate(args_list):
+            item = pending[idx]
+            signed: Any = None
+            if item is not None:
+                try:
+                    signed, us = item.result()
+                except Exception:
+                    # failed pre-sign (or pool error): fall back to signing inline
+                    self._note_fallback()
+                    if self._client is None:
+                        raise
+                    item = None
+            if item is None:
+                signed, us = _timed_sign(self._client.create_order, args)
+            _SIGN_US.record(us)
+            out.append(signed)
+        return out
+
+    def _note_fallback(self) -> None:
+        inc("relayer_sign_fallback", 1)
+        if not self._fallback_logged:
+            self._fallback_logged = True
+            _log.warning("background order signing failed; signing inline on the caller's thread", exc_info=True)
+
+    def presign(self, args_list: List[Any]) -> int:
+        """Start signing `args_list` in the background; returns how many were queued."""
+        if self.workers <= 0 or self.cache_size <= 0:
+            return 0
+        queued = 0
+        with self._lock:
+            window = self._roll_window()
+            for args in args_list:
+                k = self.key(args, window)
+                if k in self._cache:
+                    continue
+                self._cache[k] = self._submit(args)
+                queued += 1
+                while len(self._cache) > self.cache_size:
+                    _, old = self._cache.popitem(last=False)
+                    old.cancel()
+                    inc("relayer_presign_evicted", 1)
+        return queued
+
+    def invalidate(self, token_id: Optional[str] = None) -> int:
+        """Drop pre-signed orders (all, or those for `token_id`); returns the number dropped."""
+        with self._lock:
+            keys = [k for k in self._cache if token_id is None or k[0] == str(token_id)]
+            for k in keys:
+                self._cache.pop(k).cancel()
+        if keys:
+            inc("relayer_presign_evicted", len(keys))
+        return len(keys)
+
+    def cached(self) -> int:
+        return len(self._cache)
+
+    def drain(self, timeout: Optional[float] = None) -> None:
+        """Wait until queued pre-signs have finished (benchmarks/tests)."""
+        with self._lock:
+            pending = list(self._cache.values())
+        futures_wait(pending, timeout=timeout)
+
+    def close(self) -> None:
+        with self._lock:
+            self._cache.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
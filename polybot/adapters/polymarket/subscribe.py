@@ -6,3 +6,6 @@ from typing import Dict, Any
 def build_subscribe_l2(market_id: str) -> Dict[str, Any]:
     return {"op": "subscribe", "channel": "l2", "market": market_id}
 
+
+def build_unsubscribe_l2(market_id: str) -> Dict[str, Any]:
+    return {"op": "unsubscribe", "channel": "l2", "market": market_id}
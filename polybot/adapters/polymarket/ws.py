@@ -1,16 +1,21 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import time
 from dataclasses import dataclass
-from typing import AsyncIterator, Optional, Any, Dict
+from typing import AsyncIterator, Optional, Any, Dict, List
 
 import websockets
 
+from polybot.core.codec import JsonCodec, get_codec
+from polybot.observability.metrics import counter
+from polybot.observability.tracing import DECODE, TraceContext
+
 
 @dataclass
 class WSMessage:
     raw: dict
+    trace: Optional[TraceContext] = None  # stamped at socket receive and decode
 
 
 class OrderbookWSClient:
@@ -18,13 +23,24 @@ class OrderbookWSClient:
 
     This does not encode Polymarket-specific subscription semantics yet.
     It simply connects and yields JSON-decoded messages for tests and ingestion scaffolding.
+
+    Frames are decoded with a pluggable `codec` (orjson by default, see `polybot.core.codec`);
+    bytes frames go to the decoder as-is. Per-connection metrics labelled by `conn` (the
+    `name` argument, default the URL): `ws_bytes_in` (UTF-8 bytes of the frame, for text and
+    bytes frames alike), `ws_decode_us_sum`/`ws_decode_count`,
+    `ws_decode_errors`. Each message carries a `TraceContext` stamped at receive and decode
+    (see `polybot.observability.tracing`).
     """
 
-    def __init__(self, url: str, ping_interval: float = 20.0, subscribe_message: Optional[Dict[str, Any]] = None, max_reconnects: int = 0, backoff_ms: int = 100, enable_ping_task: bool = False, ping_every_ms: int = 15000):
+    def __init__(self, url: str, ping_interval: float = 20.0, subscribe_message: Optional[Dict[str, Any]] = None, max_reconnects: int = 0, backoff_ms: int = 100, enable_ping_task: bool = False, ping_every_ms: int = 15000, codec: Optional[str | JsonCodec] = None, name: Optional[str] = None):
         self.url = url
+        self.codec = get_codec(codec)
+        self._labels = {"conn": name or url}
         self.ping_interval = ping_interval
         self._ws: Optional[websockets.WebSocketClientProtocol] = None
         self._subscribe_message = subscribe_message
+        # every subscription sent on this socket, replayed after a reconnect
+        self._subscriptions: List[Dict[str, Any]] = [subscribe_message] if subscribe_message is not None else []
         self._max_reconnects = max(0, int(max_reconnects))
         self._backoff_ms = max(0, int(backoff_ms))
         self._enable_ping_task = bool(enable_ping_task)
@@ -33,8 +49,8 @@ class OrderbookWSClient:
 
     async def __aenter__(self) -> "OrderbookWSClient":
         self._ws = await websockets.connect(self.url, ping_interval=self.ping_interval)
-        if self._subscribe_message is not None:
-            await self._ws.send(json.dumps(self._subscribe_message))
+        for sub in self._subscriptions:
+            await self._ws.send(self.codec.dumps(sub).decode("utf-8"))
         if self._enable_ping_task:
             self._start_ping_task()
         return self
@@ -50,23 +66,50 @@ class OrderbookWSClient:
                 pass
             self._ping_task = None
 
+    async def subscribe(self, message: Dict[str, Any]) -> None:
+        """Send an additional subscription on this socket (also replayed on reconnect)."""
+        self._subscriptions.append(message)
+        if self._ws is not None:
+            await self._ws.send(self.codec.dumps(message).decode("utf-8"))
+
+    async def unsubscribe(self, message: Dict[str, Any], unsubscribe_message: Optional[Dict[str, Any]] = None) -> None:
+        """Forget a subscription added earlier and optionally tell the server."""
+        try:
+            self._subscriptions.remove(message)
+        except ValueError:
+            pass
+        if unsubscribe_message is not None and self._ws is not None:
+            await self._ws.send(self.codec.dumps(unsubscribe_message).decode("utf-8"))
+
     async def messages(self) -> AsyncIterator[WSMessage]:
         assert self._ws is not None
+        loads = self.codec.loads
+        # pre-registered handles: one indexed add per message instead of a label-tuple lookup
+        decode_errors = counter("ws_decode_errors", **self._labels)
+        bytes_in = counter("ws_bytes_in", **self._labels)
+        decode_us_sum = counter("ws_decode_us_sum", **self._labels)
+        decode_count = counter("ws_decode_count", **self._labels)
         attempts = 0
         while True:
             try:
                 async for msg in self._ws:
-                    if isinstance(msg, (bytes, bytearray)):
-                        try:
-                            payload = json.loads(msg.decode("utf-8"))
-                        except Exception:
-                            continue
-                    else:
-                        try:
-                            payload = json.loads(msg)
-                        except Exception:
-                            continue
-                    yield WSMessage(raw=payload)
+                    start = time.perf_counter_ns()
+                    try:
+                        payload = loads(msg)
+                    except Exception:
+                        decode_errors.inc(1)
+                        continue
+                    # tick-to-trade trace: socket receive and decode stamps
+                    trace = TraceContext(start)
+                    trace.stamp(DECODE)
+                    try:
+                        # text frames: count UTF-8 bytes, not characters (isascii is O(1))
+                        bytes_in.inc(len(msg) if isinstance(msg, bytes) or msg.isascii() else len(msg.encode()))
+                        decode_us_sum.inc((trace.stamps[DECODE] - start) // 1000)
+                        decode_count.inc(1)
+                    except Exception:
+                        pass
+                    yield WSMessage(raw=payload, trace=trace)
                 # Normal closure; stop unless we are allowed to reconnect
                 if attempts >= self._max_reconnects:
                     break
@@ -93,9 +136,11 @@ class OrderbookWSClient:
             pass
         # reconnect and re-subscribe
         self._ws = await websockets.connect(self.url, ping_interval=self.ping_interval)
-        if self._subscribe_message is not None and self._ws is not None:
+        for sub in list(self._subscriptions):
+            if self._ws is None:
+                break
             try:
-                await self._ws.send(json.dumps(self._subscribe_message))
+                await self._ws.send(self.codec.dumps(sub).decode("utf-8"))
             except Exception:
                 pass
         if self._enable_ping_task:
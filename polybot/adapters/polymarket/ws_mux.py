@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+
+from polybot.adapters.polymarket.subscribe import build_subscribe_l2, build_unsubscribe_l2
+from polybot.adapters.polymarket.ws import OrderbookWSClient
+from polybot.adapters.polymarket.ws_translator import translate_polymarket_message
+from polybot.observability.metrics import counter_family, gauge, inc, inc_labelled
+from polybot.observability.tracing import attach as attach_trace
+
+_DROPPED = counter_family("ws_mux_dropped", "market")
+_UNROUTED = counter_family("ws_mux_unrouted", "conn")
+
+
+class _Conn:
+    __slots__ = ("idx", "name", "markets", "client", "task", "subscriptions")
+
+    def __init__(self, idx: int, name: str):
+        self.idx = idx
+        self.name = name
+        self.markets: Set[str] = set()
+        self.client: Optional[OrderbookWSClient] = None
+        self.task: Optional[asyncio.Task] = None
+        self.subscriptions = gauge("ws_mux_subscriptions", conn=name)
+
+
+class WSConnectionManager:
+    """Share a few WebSocket connections across many market L2 subscriptions.
+
+    Markets are subscribed with `build_subscribe_l2` on the least-loaded connection, opening
+    new sockets up to `max_connections`. Translated messages are demultiplexed by their
+    `market` field into bounded per-market `asyncio.Queue`s (a socket carrying a single
+    market also routes messages without that field). When a queue is full the oldest
+    message is dropped; downstream seq-gap detection resyncs the book.
+
+    `rebalance()` moves subscriptions from the busiest to the idlest connection until they
+    differ by at most one market; it runs automatically whenever a market is released.
+
+    Metrics: `ws_mux_subscriptions{conn}` (gauge), `ws_mux_unrouted{conn}`,
+    `ws_mux_dropped{market}`, `ws_mux_errors{conn}`, `ws_mux_rebalance_moves`.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = 1,
+        queue_size: int = 1000,
+        max_reconnects: int = 0,
+        backoff_ms: int = 100,
+        auto_rebalance: bool = True,
+        client_factory: Optional[Callable[[str], OrderbookWSClient]] = None,
+    ):
+        self.url = url
+        self.max_connections = max(1, int(max_connections))
+        self.queue_size = max(1, int(queue_size))
+        self.auto_rebalance = bool(auto_rebalance)
+        self._client_factory = client_factory or (
+            lambda name: OrderbookWSClient(url, max_reconnects=max_reconnects, backoff_ms=backoff_ms, name=name)
+        )
+        self._conns: List[_Conn] = []
+        self._conn_of: Dict[str, _Conn] = {}
+        self._queues: Dict[str, asyncio.Queue] = {}
+
+    async def __aenter__(self) -> "WSConnectionManager":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    # Introspection
+    def assignments(self) -> Dict[int, List[str]]:
+        return {c.idx: sorted(c.markets) for c in self._conns}
+
+    def open_connections(self) -> int:
+        return sum(1 for c in self._conns if c.task is not None and not c.task.done())
+
+    # Subscriptions
+    async def subscribe(self, market_id: str) -> asyncio.Queue:
+        """Subscribe `market_id` (idempotent) and return its message queue."""
+        q = self._queues.get(market_id)
+        if q is not None:
+            return q
+        q = asyncio.Queue(maxsize=self.queue_size)
+        self._queues[market_id] = q
+        await self._attach(self._pick_conn(), market_id)
+        return q
+
+    async def release(self, market_id: str) -> None:
+        """Unsubscribe `market_id`; closes its connection once no markets remain on it."""
+        self._queues.pop(market_id, None)
+        conn = self._conn_of.get(market_id)
+        if conn is not None:
+            await self._detach(conn, market_id)
+        if self.auto_rebalance:
+            await self.rebalance()
+
+    async def messages(self, market_id: str, max_messages: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over translated messages for one market; releases it when done."""
+        q = await self.subscribe(market_id)
+        count = 0
+        try:
+            while True:
+                item = await q.get()
+                if item is None:
+                    break
+                yield item
+                count += 1
+                if max_messages is not None and count >= max_messages:
+                    break
+        finally:
+            await self.release(market_id)
+
+    async def rebalance(self) -> int:
+        """Even out markets per connection; returns the number of subscriptions moved."""
+        total = len(self._conn_of)
+        while len(self._conns) < min(self.max_connections, total):
+            self._new_conn()
+        moves = 0
+        while self._conns:
+            ordered = sorted(self._conns, key=lambda c: (len(c.markets), c.idx))
+            lo, hi = ordered[0], ordered[-1]
+            if len(hi.markets) - len(lo.markets) <= 1:
+                break
+            market_id = max(hi.markets)
+            await self._detach(hi, market_id)
+            await self._attach(lo, market_id)
+            moves += 1
+        if moves:
+            inc("ws_mux_rebalance_moves", moves)
+        return moves
+
+    async def close(self) -> None:
+        tasks = [c.task for c in self._conns if c.task is not None]
+        for c in self._conns:
+            c.task = None
+            c.client = None
+        for t in tasks:
+            t.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for mid in list(self._queues):
+            self._put(mid, None)
+
+    # Internals
+    def _new_conn(self) -> _Conn:
+        conn = _Conn(len(self._conns), f"{self.url}#{len(self._conns)}")
+        self._conns.append(conn)
+        return conn
+
+    def _pick_conn(self) -> _Conn:
+        if self._conns:
+            least = min(self._conns, key=lambda c: (len(c.markets), c.idx))
+            if not least.markets or len(self._conns) >= self.max_connections:
+                return least
+        return self._new_conn()
+
+    async def _attach(self, conn: _Conn, market_id: str) -> None:
+        conn.markets.add(market_id)
+        self._conn_of[market_id] = conn
+        conn.subscriptions.set(len(conn.markets))
+        if conn.task is None or conn.task.done():
+            conn.task = asyncio.create_task(self._run_conn(conn))
+        elif conn.client is not None:
+            await conn.client.subscribe(build_subscribe_l2(market_id))
+        # otherwise the connection task subscribes it once connected
+
+    async def _detach(self, conn: _Conn, market_id: str) -> None:
+        conn.markets.discard(market_id)
+        if self._conn_of.get(market_id) is conn:
+            del self._conn_of[market_id]
+        conn.subscriptions.set(len(conn.markets))
+        if not conn.markets:
+            task, conn.task, conn.client = conn.task, None, None
+            if task is not None:
+                task.cancel()
+            return
+        if conn.client is not None:
+            try:
+                await conn.client.unsubscribe(build_subscribe_l2(market_id), build_unsubscribe_l2(market_id))
+            except Exception:
+                inc_labelled("ws_mux_errors", {"conn": conn.name}, 1)
+
+    def _put(self, market_id: str, item: Optional[Dict[str, Any]]) -> None:
+        q = self._queues.get(market_id)
+        if q is None:
+            return
+        try:
+            q.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                q.get_nowait()
+            except asyncio.QueueEmpty:
+                pass
+            _DROPPED.labels(market_id).inc(1)
+            q.put_nowait(item)
+
+    def _finish(self, market_id: str) -> None:
+        """Queue the end-of-stream marker behind any pending messages (never drops data)."""
+        q = self._queues.get(market_id)
+        if q is None:
+            return
+        try:
+            q.put_nowait(None)
+        except asyncio.QueueFull:
+            asyncio.ensure_future(q.put(None))
+
+    def _route(self, conn: _Conn, msg: Dict[str, Any]) -> None:
+        market_id = msg.get("market")
+        if market_id is None and len(conn.markets) == 1:
+            market_id = next(iter(conn.markets))
+        # only the owning connection delivers (a moved market may linger on the old socket)
+        if market_id is None or self._conn_of.get(market_id) is not conn:
+            _UNROUTED.labels(conn.name).inc(1)
+            return
+        self._put(market_id, msg)
+
+    async def _run_conn(self, conn: _Conn) -> None:
+        client = self._client_factory(conn.name)
+        try:
+            async with client:
+                if conn.task is not asyncio.current_task():
+                    return
+                conn.client = client
+                for market_id in sorted(conn.markets):
+                    if market_id in conn.markets:
+                        await client.subscribe(build_subscribe_l2(market_id))
+                async for m in client.messages():
+                    out = translate_polymarket_message(m.raw)
+                    if out is not None:
+                        self._route(conn, attach_trace(out, m.trace))
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            inc_labelled("ws_mux_errors", {"conn": conn.name}, 1)
+        if conn.task is asyncio.current_task():
+            # stream ended: finish the iterators of markets still on this connection
+            conn.client = None
+            for market_id in list(conn.markets):
+                self._finish(market_id)
@@ -0,0 +1 @@
+# Benchmarks (synthetic L2 streams, full-pipeline replay)
@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict, replace
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+
+from polybot.bench.synthetic import StreamSpec, SyntheticStream, generate_dutch_streams, generate_market_streams
+from polybot.observability import metrics, tracing
+from polybot.observability.metrics import HistogramSnapshot, get_counter_labelled, histogram, list_histograms
+
+
+SCENARIOS: Tuple[str, ...] = ("ingest", "quoter", "dutch")
+
+
+class _Replay:
+    """Async iterator over pre-generated messages with a virtual clock (the message `ts_ms`).
+
+    The time the consumer spends between two `__anext__` calls (i.e. processing a message)
+    is recorded into `bench_msg_us{scenario}`. With `trace=True` each message gets a fresh
+    `TraceContext` so the pipeline's stage stamps land in `trace_stage_us`.
+    """
+
+    def __init__(self, messages: List[Dict[str, Any]], scenario: str, trace: bool = False):
+        self.messages = messages
+        self.trace = trace
+        self.index = -1
+        self.ts_ms = messages[0].get("ts_ms", 0) if messages else 0
+        self._hist = histogram("bench_msg_us", scenario=scenario)
+        self._t = 0
+
+    def now_ms(self) -> int:
+        return self.ts_ms
+
+    def __aiter__(self) -> "_Replay":
+        return self
+
+    async def __anext__(self) -> Dict[str, Any]:
+        now = time.perf_counter_ns()
+        if self._t:
+            self._hist.record((now - self._t) // 1000)
+        self.index += 1
+        if self.index >= len(self.messages):
+            self._t = 0
+            raise StopAsyncIteration
+        msg = self.messages[self.index]
+        self.ts_ms = msg.get("ts_ms", self.ts_ms)
+        if self.trace:
+            msg[tracing.TRACE_KEY] = tracing.TraceContext(now)
+        self._t = time.perf_counter_ns()
+        return msg
+
+
+class _ReplaySnapshots:
+    """Snapshot provider serving the stream's true book at the message being processed."""
+
+    def __init__(self, stream: SyntheticStream, replay: _Replay):
+        self.stream = stream
+        self.replay = replay
+
+    def get_snapshot(self, market_id: str) -> Dict[str, Any]:
+        return dict(self.stream.snapshots[self.replay.index])
+
+
+def _open_db(path: str):
+    from polybot.storage import schema
+    from polybot.storage.db import connect, enable_wal
+
+    con = connect(f"sqlite:///{path}")
+    enable_wal(con)
+    schema.create_all(con)
+    return con
+
+
+def _db_size(path: str) -> int:
+    return sum(os.path.getsize(p) for p in (path, path + "-wal") if os.path.exists(p))
+
+
+def _write_bytes() -> Optional[int]:
+    """Bytes this process passed to write(2) so far (Linux `/proc/self/io` wchar), else None."""
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("wchar:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _merged(name: str, **match: str) -> HistogramSnapshot:
+    """Merge every `name` series whose labels include `match` (e.g. one stage across markets)."""
+    out = HistogramSnapshot(name=name, labels=tuple(sorted(match.items())), counts={})
+    for snap in list_histograms():
+        if snap.name != name or any(dict(snap.labels).get(k) != v for k, v in match.items()):
+            continue
+        for idx, n in snap.counts.items():
+            out.counts[idx] = out.counts.get(idx, 0) + n
+        out.sum += snap.sum
+        out.count += snap.count
+    return out
+
+
+def _summary(snap: HistogramSnapshot) -> Dict[str, Any]:
+    s = snap.summary()
+    s["mean"] = round(s["mean"], 1)
+    return s
+
+
+def _count(name: str, markets: Sequence[str]) -> int:
+    return sum(get_counter_labelled(name, {"market": m}) for m in markets)
+
+
+async def _run_ingest(streams: List[SyntheticStream], con, batch_size: int) -> Tuple[int, Dict[str, int]]:
+    from polybot.ingestion.orderbook import OrderbookIngestor
+    from polybot.ingestion.runner import run_orderbook_stream
+
+    n = 0
+    for s in streams:
+        ingestor = OrderbookIngestor(con, s.market_id, batch_size=batch_size)
+        replay = _Replay(s.messages, "ingest")
+        await run_orderbook_stream(s.market_id, replay, ingestor, _ReplaySnapshots(s, replay), now_ms=replay.now_ms)
+        n += len(s.messages)
+    markets = [s.market_id for s in streams]
+    checks = {
+        "applied": _count("ingestion_msg_applied", markets),
+        "resync_gap": _count("ingestion_resync_gap", markets),
+        "resync_checksum": _count("ingestion_resync_checksum", markets),
+    }
+    return n, checks
+
+
+async def _run_quoter(streams: List[SyntheticStream], con, conflate: bool) -> Tuple[int, Dict[str, int]]:
+    from polybot.adapters.polymarket.relayer import FakeRelayer
+    from polybot.exec.engine import ExecutionEngine
+    from polybot.strategy.quoter_runner import QuoterRunner
+    from polybot.strategy.spread import SpreadParams
+    from polybot.strategy.spread_quoter import SpreadQuoter
+
+    n = 0
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    for s in streams:
+        quoter = SpreadQuoter(s.market_id, f"{s.market_id}-yes", SpreadParams(), engine)
+        replay = _Replay(s.messages, "quoter", trace=True)
+        await QuoterRunner(s.market_id, quoter, conflate=conflate).run(replay, replay.now_ms)
+        n += len(s.messages)
+    markets = [s.market_id for s in streams]
+    return n, {"quotes_placed": _count("quotes_placed", markets), "quotes_canceled": _count("quotes_canceled", markets)}
+
+
+async def _run_dutch(streams: List[Tuple[str, List[str], List[Dict[str, Any]]]], con) -> Tuple[int, Dict[str, int]]:
+    from polybot.adapters.polymarket.relayer import FakeRelayer
+    from polybot.exec.engine import ExecutionEngine
+    from polybot.strategy.dutch_runner import DutchRunner, DutchSpec
+
+    n = 0
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    for market_id, outcomes, messages in streams:
+        replay = _Replay(messages, "dutch", trace=True)
+        await DutchRunner(DutchSpec(market_id, outcomes), engine).run(replay, replay.now_ms)
+        n += len(messages)
+    return n, {"orders_placed": _count("dutch_orders_placed", [m for m, _, _ in streams])}
+
+
+def _measure(run: Callable[[Any], Awaitable[Tuple[int, Dict[str, int]]]], scenario: str, alloc: bool) -> Dict[str, Any]:
+    """Run one scenario against a fresh file-backed DB; optionally repeat it under tracemalloc."""
+    metrics.reset()
+    tracing.SLOWEST.clear()
+    with tempfile.TemporaryDirectory(prefix="polybot-bench-") as tmp:
+        path = os.path.join(tmp, "bench.db")
+        con = _open_db(path)
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        size0, wchar0 = _db_size(path), _write_bytes()
+        start = time.perf_counter()
+        n, checks = asyncio.run(run(con))
+        elapsed = time.perf_counter() - start
+        wchar1 = _write_bytes()
+        con.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        out: Dict[str, Any] = {
+            "messages": n,
+            "seconds": round(elapsed, 4),
+            "msgs_per_sec": round(n / elapsed, 1) if elapsed > 0 else 0.0,
+            "msg_us": _summary(_merged("bench_msg_us", scenario=scenario)),
+            "db_bytes": _db_size(path) - size0,
+            "db_write_bytes": wchar1 - wchar0 if wchar0 is not None and wchar1 is not None else None,
+            "checks": checks,
+        }
+        con.close()
+    if scenario != "ingest":
+        stages = {s: _merged("trace_stage_us", stage=s) for s in tracing.STAGES[1:]}
+        out["stages_us"] = {s: _summary(h) for s, h in stages.items() if h.count}
+        out["tick_to_trade_us"] = _summary(_merged("tick_to_trade_us"))
+    if alloc:
+        with tempfile.TemporaryDirectory(prefix="polybot-bench-") as tmp:
+            con = _open_db(os.path.join(tmp, "bench.db"))
+            tracemalloc.start()
+            try:
+                asyncio.run(run(con))
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+                con.close()
+        out["alloc_peak_bytes"] = peak
+    return out
+
+
+def run_pipeline_benchmark(
+    spec: Optional[StreamSpec] = None,
+    scenarios: Sequence[str] = SCENARIOS,
+    alloc: bool = False,
+    batch_size: int = 0,
+    conflate: bool = False,
+) -> Dict[str, Any]:
+    """Replay synthetic streams through ingestion, the spread quoter and the Dutch runner.
+
+    Each scenario runs on a fresh temporary SQLite file with `FakeRelayer` (no network) and a
+    virtual clock taken from message timestamps, so for a given `spec` the `checks` counts
+    are identical run to run and only timings vary. Resets in-process metrics. With `alloc`
+    every scenario is repeated under `tracemalloc` (kept out of the timed pass) to report
+    peak traced memory.
+    """
+    spec = spec or StreamSpec()
+    unknown = [s for s in scenarios if s not in SCENARIOS]
+    if unknown:
+        raise ValueError(f"unknown bench scenario(s): {', '.join(unknown)}")
+    out: Dict[str, Any] = {
+        "spec": asdict(spec),
+        "options": {"alloc": bool(alloc), "batch_size": int(batch_size), "conflate": bool(conflate)},
+        "python": platform.python_version(),
+        "scenarios": {},
+    }
+    if "ingest" in scenarios or "quoter" in scenarios:
+        streams = generate_market_streams(spec)
+    if "ingest" in scenarios:
+        out["scenarios"]["ingest"] = _measure(lambda con: _run_ingest(streams, con, batch_size), "ingest", alloc)
+    if "quoter" in scenarios:
+        # the quoter has no resync path; feed it the gap-free stream
+        clean = generate_market_streams(replace(spec, gap_rate=0.0, checksum_fail_rate=0.0)) if (spec.gap_rate or spec.checksum_fail_rate) else streams
+        out["scenarios"]["quoter"] = _measure(lambda con: _run_quoter(clean, con, conflate), "quoter", alloc)
+    if "dutch" in scenarios:
+        dutch = generate_dutch_streams(spec)
+        out["scenarios"]["dutch"] = _measure(lambda con: _run_dutch(dutch, con), "dutch", alloc)
+    return out
+
+
+# (path into a scenario result, higher is better)
+_COMPARED: Tuple[Tuple[Tuple[str, ...], bool], ...] = (
+    (("msgs_per_sec",), True),
+    (("msg_us", "p50"), False),
+    (("msg_us", "p99"), False),
+    (("tick_to_trade_us", "p99"), False),
+    (("db_bytes",), False),
+    (("alloc_peak_bytes",), False),
+)
+
+
+def _lookup(d: Dict[str, Any], path: Tuple[str, ...]) -> Any:
+    for k in path:
+        if not isinstance(d, dict) or k not in d:
+            return None
+        d = d[k]
+    return d
+
+
+def compare_results(baseline: Dict[str, Any], current: Dict[str, Any], tolerance: float = 0.1) -> List[str]:
+    """Regressions of `current` against `baseline` (both `run_pipeline_benchmark` results).
+
+    A metric regresses when it is worse by more than `tolerance` (relative); differing
+    `checks` mean the pipeline behaved differently on the same input and are always reported.
+    """
+    out: List[str] = []
+    if baseline.get("spec") != current.get("spec"):
+        out.append("spec differs from baseline; results are not comparable")
+    for name, cur in (current.get("scenarios") or {}).items():
+        base = (baseline.get("scenarios") or {}).get(name)
+        if base is None:
+            continue
+        if base.get("checks") != cur.get("checks"):
+            out.append(f"{name}: checks {base.get('checks')} -> {cur.get('checks')}")
+        for path, higher_better in _COMPARED:
+            b, c = _lookup(base, path), _lookup(cur, path)
+            if not b or c is None:
+                continue
+            change = (c - b) / b
+            if (-change if higher_better else change) > tolerance:
+                out.append(f"{name}: {'.'.join(path)} {b} -> {c} ({change:+.1%})")
+    return out
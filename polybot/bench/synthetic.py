@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, replace
+import random
+from typing import Any, Dict, List, Optional, Tuple
+
+from polybot.core.checksum import orderbook_checksum
+
+
+@dataclass
+class StreamSpec:
+    """Shape of a synthetic L2 stream; the same spec and seed always yield the same messages.
+
+    Every market starts with a `depth`-level snapshot (levels from `half_spread` ticks
+    either side of a random-walking mid) and then emits `deltas` deltas of
+    `levels_per_delta` level changes, `delta_rate` per second (message `ts_ms` advances by
+    1000 / delta_rate). With probability `gap_rate` a delta is dropped from the stream (the
+    next one arrives with a seq gap) and with `checksum_fail_rate` a delta carries a wrong
+    checksum; both make the consumer resync from a snapshot.
+    """
+
+    markets: int = 4
+    deltas: int = 2000
+    depth: int = 10
+    half_spread: int = 3  # ticks from the mid to the innermost level
+    levels_per_delta: int = 2
+    delta_rate: float = 100.0
+    gap_rate: float = 0.0
+    checksum_fail_rate: float = 0.0
+    mid_move_rate: float = 0.1
+    tick_size: float = 0.01
+    outcomes: int = 3  # per market, for the Dutch-book stream
+    seed: int = 0
+    start_ts_ms: int = 1_700_000_000_000
+
+
+@dataclass
+class SyntheticStream:
+    """Messages for one book plus the snapshots a consumer resyncs to.
+
+    `snapshots[i]` is the true book after message `i` and is present wherever the stream
+    forces a resync (the message after a gap, a bad-checksum delta).
+    """
+
+    market_id: str
+    messages: List[Dict[str, Any]]
+    snapshots: Dict[int, Dict[str, Any]]
+    gaps: int = 0
+    checksum_failures: int = 0
+
+
+class _Book:
+    """True book in integer ticks; each side keeps `depth` slots starting `half` ticks from the mid."""
+
+    def __init__(self, rng: random.Random, mid: int, depth: int, half: int, lo: int, hi: int, tick: float):
+        self.rng = rng
+        self.mid = mid
+        self.depth = depth
+        self.half = half
+        self.lo, self.hi = lo, hi
+        self.tick = tick
+        self.bids: Dict[int, int] = {}
+        self.asks: Dict[int, int] = {}
+        for k in range(half, half + depth):
+            if mid - k >= 1:
+                self.bids[mid - k] = rng.randint(1, 100)
+            if mid + k < self.ticks_per_unit:
+                self.asks[mid + k] = rng.randint(1, 100)
+
+    @property
+    def ticks_per_unit(self) -> int:
+        return int(round(1.0 / self.tick))
+
+    def price(self, idx: int) -> float:
+        return round(idx * self.tick, 6)
+
+    def levels(self, side: Dict[int, int]) -> List[List[float]]:
+        return [[self.price(i), float(s)] for i, s in side.items()]
+
+    def snapshot(self, seq: int) -> Dict[str, Any]:
+        return {"type": "snapshot", "seq": seq, "bids": self.levels(self.bids), "asks": self.levels(self.asks)}
+
+    def checksum(self) -> str:
+        return orderbook_checksum({self.price(i): s for i, s in self.bids.items()}, {self.price(i): s for i, s in self.asks.items()})
+
+    def _set(self, side: Dict[int, int], changes: Dict[int, int], idx: int, size: int) -> None:
+        cur = side.get(idx, 0)
+        if size == cur:
+            return
+        changes[idx] = changes.get(idx, 0) + size - cur
+        if size:
+            side[idx] = size
+        else:
+            side.pop(idx, None)
+
+    def step(self, levels: int, mid_move_rate: float) -> Tuple[Dict[int, int], Dict[int, int]]:
+        """Mutate the book; returns per-side size changes {tick index: size delta}."""
+        rng = self.rng
+        bid_changes: Dict[int, int] = {}
+        ask_changes: Dict[int, int] = {}
+        if rng.random() < mid_move_rate:
+            self.mid = min(self.hi, max(self.lo, self.mid + rng.choice((-1, 1))))
+            # drop levels that moved inside the half spread or out of the depth window
+            lo, hi = self.half, self.half + self.depth - 1
+            for i in [i for i in self.bids if not lo <= self.mid - i <= hi]:
+                self._set(self.bids, bid_changes, i, 0)
+            for i in [i for i in self.asks if not lo <= i - self.mid <= hi]:
+                self._set(self.asks, ask_changes, i, 0)
+        for _ in range(levels):
+            k = rng.randint(self.half, self.half + self.depth - 1)
+            if rng.random() < 0.5:
+                side, changes, idx = self.bids, bid_changes, self.mid - k
+            else:
+                side, changes, idx = self.asks, ask_changes, self.mid + k
+            if not 1 <= idx < self.ticks_per_unit:
+                continue
+            self._set(side, changes, idx, 0 if rng.random() < 0.2 else rng.randint(1, 100))
+        return bid_changes, ask_changes
+
+
+def generate_stream(
+    spec: StreamSpec,
+    market_id: str,
+    index: int = 0,
+    mid_ticks: Optional[int] = None,
+    mid_range: int = 0,
+    outcome_id: Optional[str] = None,
+) -> SyntheticStream:
+    """Generate book `index` of `spec` (each index has its own RNG stream).
+
+    The mid starts at `mid_ticks` (default: the middle of the price range) and random-walks
+    within `mid_range` ticks of it (0 = anywhere that keeps `depth` levels in range).
+    """
+    rng = random.Random(f"{spec.seed}:{index}")
+    units = int(round(1.0 / spec.tick_size))
+    mid = mid_ticks if mid_ticks is not None else units // 2
+    depth = max(1, int(spec.depth))
+    half = max(1, int(spec.half_spread))
+    if mid_range > 0:
+        lo, hi = max(half + 1, mid - mid_range), min(units - half - 1, mid + mid_range)
+    else:
+        reach = half + depth
+        lo, hi = min(reach, units // 2), max(units - reach, units // 2)
+    book = _Book(rng, mid, depth, half, lo, hi, spec.tick_size)
+    step_ms = 1000.0 / max(1e-9, float(spec.delta_rate))
+    extra: Dict[str, Any] = {"market": market_id}
+    if outcome_id is not None:
+        extra["outcome_id"] = outcome_id
+
+    first = book.snapshot(1)
+    first.update(extra, ts_ms=spec.start_ts_ms)
+    out = SyntheticStream(market_id=market_id, messages=[first], snapshots={})
+    dropped = False
+    for n in range(1, int(spec.deltas) + 1):
+        seq = n + 1
+        bid_changes, ask_changes = book.step(spec.levels_per_delta, spec.mid_move_rate)
+        if not dropped and n < spec.deltas and rng.random() < spec.gap_rate:
+            dropped = True  # the next emitted delta arrives with a seq gap
+            out.gaps += 1
+            continue
+        checksum = book.checksum()
+        if rng.random() < spec.checksum_fail_rate:
+            checksum = "x" + checksum
+            out.checksum_failures += 1
+            dropped = True
+        msg = {
+            "type": "delta",
+            "seq": seq,
+            "bids": [[book.price(i), float(d)] for i, d in bid_changes.items()],
+            "asks": [[book.price(i), float(d)] for i, d in ask_changes.items()],
+            "checksum": checksum,
+            "ts_ms": spec.start_ts_ms + int(n * step_ms),
+        }
+        msg.update(extra)
+        if dropped:
+            out.snapshots[len(out.messages)] = book.snapshot(seq)
+            dropped = False
+        out.messages.append(msg)
+    return out
+
+
+def generate_market_streams(spec: StreamSpec) -> List[SyntheticStream]:
+    """One binary-market book per `spec.markets` (market ids `bench-m<i>`)."""
+    return [generate_stream(spec, f"bench-m{i}", index=i) for i in range(int(spec.markets))]
+
+
+def generate_dutch_streams(spec: StreamSpec) -> List[Tuple[str, List[str], List[Dict[str, Any]]]]:
+    """Per market: (market id, outcome ids, messages of all outcomes merged by `ts_ms`).
+
+    Outcome asks hover around 1/outcomes with a few ticks of random walk, so baskets
+    occasionally price below 1 and the Dutch runner has something to execute. The Dutch
+    runner has no resync path, so gaps and checksum failures are not generated here.
+    """
+    spec = replace(spec, gap_rate=0.0, checksum_fail_rate=0.0)
+    units = int(round(1.0 / spec.tick_size))
+    n = max(2, int(spec.outcomes))
+    out = []
+    for i in range(int(spec.markets)):
+        market_id = f"bench-d{i}"
+        outcomes = [f"{market_id}-o{k}" for k in range(n)]
+        merged: List[Tuple[int, int, int, Dict[str, Any]]] = []
+        for k, oid in enumerate(outcomes):
+            stream = generate_stream(spec, market_id, index=1000 + i * n + k, mid_ticks=units // n - spec.half_spread, mid_range=4, outcome_id=oid)
+            for j, m in enumerate(stream.messages):
+                merged.append((m["ts_ms"], j, k, m))
+        merged.sort(key=lambda e: e[:3])
+        out.append((market_id, outcomes, [e[3] for e in merged]))
+    return out
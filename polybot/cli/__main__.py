@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import argparse
+from pathlib import Path
+import sys
 
 from .commands import cmd_replay, cmd_ingest_ws
 from .commands import (
@@ -9,6 +11,9 @@ from .commands import (
     cmd_quoter_run_ws_async,
     cmd_health,
     cmd_metrics,
+    cmd_bench_validator,
+    cmd_bench_engine,
+    cmd_bench_pipeline,
     cmd_record_ws_async,
     cmd_quoter_run_replay_async,
     cmd_mock_ws_async,
@@ -16,6 +21,8 @@ from .commands import (
     cmd_metrics_serve,
     cmd_migrate,
     cmd_dutch_run_replay_async,
+    cmd_negrisk_scan_replay_async,
+    cmd_negrisk_scan_ws_async,
     cmd_relayer_dry_run,
     cmd_status_top,
     cmd_tgbot_run_local,
@@ -25,16 +32,27 @@ from .commands import (
     cmd_builder_health,
 )
 from polybot.cli.commands import cmd_run_service_from_config_async
+from polybot.core.codec import available_codecs, set_default_codec
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(prog="polybot")
+    parser.add_argument("--json-codec", choices=available_codecs(), help="JSON codec for WS decode and JSONL recording/replay (default: orjson when installed)")
+    parser.add_argument("--profile-out", help="Sample the command's stacks and write collapsed (flamegraph) output to this file")
+    parser.add_argument("--profile-interval-ms", type=float, default=5.0, help="Sampling interval for --profile-out")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
     p_replay = sub.add_parser("replay", help="Replay JSONL orderbook events into DB")
     p_replay.add_argument("file")
     p_replay.add_argument("market_id")
     p_replay.add_argument("--db-url", default=":memory:")
+    p_replay.add_argument("--batch-size", type=int, default=0, help="Group-commit rows per transaction (0 = commit per message)")
+    p_replay.add_argument("--flush-interval-ms", type=int, default=0)
+    p_replay.add_argument("--event-log", dest="event_log_dir", help="Append orderbook events to mmap segments in this directory instead of the orderbook_events table")
+    p_replay.add_argument("--storage-writer", action="store_true", help="Write rows on a background writer thread (file-backed --db-url only)")
+    p_replay.add_argument("--from-event-log", action="store_true", help="Read events from the event log directory given as `file` (catalog in --db-url) instead of JSONL")
+    p_replay.add_argument("--start-ts-ms", type=int, help="With --from-event-log: first event timestamp to replay")
+    p_replay.add_argument("--end-ts-ms", type=int, help="With --from-event-log: last event timestamp to replay")
 
     p_ws = sub.add_parser("ingest-ws", help="Ingest WebSocket stream of orderbook messages")
     p_ws.add_argument("url")
@@ -42,6 +60,9 @@ def main() -> None:
     p_ws.add_argument("--snapshot-json")
     p_ws.add_argument("--db-url", default=":memory:")
     p_ws.add_argument("--max-messages", type=int)
+    p_ws.add_argument("--batch-size", type=int, default=0, help="Group-commit rows per transaction (0 = commit per message)")
+    p_ws.add_argument("--flush-interval-ms", type=int, default=0)
+    p_ws.add_argument("--storage-writer", action="store_true", help="Write rows on a background writer thread (file-backed --db-url only)")
 
     p_status = sub.add_parser("status", help="Show market ingestion status")
     p_status.add_argument("--db-url", default=":memory:")
@@ -120,6 +141,28 @@ def main() -> None:
     p_health.add_argument("--json", action="store_true")
 
     sub.add_parser("metrics", help="Print in-process metrics counters")
+    p_bval = sub.add_parser("bench-validator", help="Benchmark fast vs pydantic message validation on a JSONL recording")
+    p_bval.add_argument("file")
+    p_bval.add_argument("--rounds", type=int, default=1000)
+    p_beng = sub.add_parser("bench-engine", help="Benchmark per-plan execution engine overhead (no network)")
+    p_beng.add_argument("--rounds", type=int, default=10000)
+    p_beng.add_argument("--intents", type=int, default=2)
+    p_bpipe = sub.add_parser("bench-pipeline", help="Benchmark ingestion, quoter and Dutch runner on deterministic synthetic L2 streams")
+    p_bpipe.add_argument("--scenarios", default="ingest,quoter,dutch")
+    p_bpipe.add_argument("--markets", type=int, default=4)
+    p_bpipe.add_argument("--deltas", type=int, default=2000, help="Deltas per market (per outcome for dutch)")
+    p_bpipe.add_argument("--depth", type=int, default=10)
+    p_bpipe.add_argument("--delta-rate", type=float, default=100.0, help="Deltas per second (spaces message ts_ms)")
+    p_bpipe.add_argument("--gap-rate", type=float, default=0.0)
+    p_bpipe.add_argument("--checksum-fail-rate", type=float, default=0.0)
+    p_bpipe.add_argument("--outcomes", type=int, default=3)
+    p_bpipe.add_argument("--seed", type=int, default=0)
+    p_bpipe.add_argument("--batch-size", type=int, default=0, help="Ingestor group-commit rows (0 = commit per message)")
+    p_bpipe.add_argument("--conflate", action="store_true", help="Run the quoter in conflating mode")
+    p_bpipe.add_argument("--alloc", action="store_true", help="Repeat each scenario under tracemalloc for peak memory")
+    p_bpipe.add_argument("--out", help="Also write the JSON result to this file")
+    p_bpipe.add_argument("--baseline", help="Earlier --out file to compare against")
+    p_bpipe.add_argument("--tolerance", type=float, default=0.1, help="Relative slack before a metric counts as a regression")
     sub.add_parser("metrics-export", help="Print Prometheus text exposition of metrics")
     sub.add_parser("metrics-reset", help="Reset in-process metrics (testing/diagnostics)")
     sub.add_parser("metrics-json", help="Print metrics counters as JSON")
@@ -155,6 +198,7 @@ def main() -> None:
     p_qrep.add_argument("market_id")
     p_qrep.add_argument("outcome_yes_id")
     p_qrep.add_argument("--db-url", default=":memory:")
+    p_qrep.add_argument("--speed", type=float, default=0.0, help="Pace at this multiple of recorded time (0 = jump event to event)")
 
     p_mws = sub.add_parser("mock-ws", help="Run a simple mock WS server emitting Polymarket-like messages")
     p_mws.add_argument("--file")
@@ -188,6 +232,28 @@ def main() -> None:
     p_dutch.add_argument("--slippage-ticks", type=int, default=0)
     p_dutch.add_argument("--allow-other", action="store_true")
     p_dutch.add_argument("--verbose", action="store_true")
+    p_dutch.add_argument("--depth-sizing", action="store_true", help="Size baskets from full ask depth instead of --default-size")
+    p_dutch.add_argument("--speed", type=float, default=0.0, help="Pace at this multiple of recorded time (0 = jump event to event)")
+
+    p_negrisk = sub.add_parser("negrisk-scan-replay", help="Scan neg-risk groups for basket arbitrage from multi-token JSONL events")
+    p_negrisk.add_argument("file")
+    p_negrisk.add_argument("--db-url", default=":memory:")
+    p_negrisk.add_argument("--min-profit-usdc", type=float, default=0.02)
+    p_negrisk.add_argument("--default-size", type=float, default=1.0)
+    p_negrisk.add_argument("--kinds", help="Comma-separated basket kinds (buy_yes,buy_no,sell_yes); default all")
+    p_negrisk.add_argument("--max-groups-per-cycle", type=int, default=256)
+    p_negrisk.add_argument("--exposure-cap", type=float, help="Max position per outcome; default 10x --default-size")
+
+    p_negrisk_ws = sub.add_parser("negrisk-scan", help="Scan every neg-risk group for basket arbitrage from live WS books")
+    p_negrisk_ws.add_argument("url")
+    p_negrisk_ws.add_argument("--db-url", default=":memory:")
+    p_negrisk_ws.add_argument("--min-profit-usdc", type=float, default=0.02)
+    p_negrisk_ws.add_argument("--default-size", type=float, default=1.0)
+    p_negrisk_ws.add_argument("--kinds", help="Comma-separated basket kinds (buy_yes,buy_no,sell_yes); default all")
+    p_negrisk_ws.add_argument("--max-groups-per-cycle", type=int, default=256)
+    p_negrisk_ws.add_argument("--exposure-cap", type=float, help="Max position per outcome; default 10x --default-size")
+    p_negrisk_ws.add_argument("--ws-connections", type=int, default=1, help="Shared sockets carrying all token subscriptions")
+    p_negrisk_ws.add_argument("--max-messages", type=int)
 
     p_rdry = sub.add_parser("relayer-dry-run", help="Dry-run a single order via configured 'real' relayer")
     p_rdry.add_argument("market_id")
@@ -306,16 +372,76 @@ def main() -> None:
     p_tg.add_argument("--db-url", default=":memory:")
 
     args = parser.parse_args()
+    if args.json_codec:
+        set_default_codec(args.json_codec)
+    if not args.profile_out:
+        _run(args)
+        return
+    # sample this (the event-loop) thread for the whole command, e.g. a replay run
+    from polybot.observability.profiler import SamplingProfiler
+
+    with SamplingProfiler(interval_s=args.profile_interval_ms / 1000.0) as prof:
+        try:
+            _run(args)
+        finally:
+            prof.stop()
+            Path(args.profile_out).write_text(prof.collapsed(), encoding="utf-8")
+            print(f"profile: {prof.samples} samples -> {args.profile_out}", file=sys.stderr)
+
+
+def _run(args: argparse.Namespace) -> None:
     if args.cmd == "replay":
-        cmd_replay(args.file, args.market_id, db_url=args.db_url)
+        cmd_replay(
+            args.file,
+            args.market_id,
+            db_url=args.db_url,
+            batch_size=args.batch_size,
+            flush_interval_ms=args.flush_interval_ms,
+            event_log_dir=args.event_log_dir,
+            storage_writer=args.storage_writer,
+            from_event_log=args.from_event_log,
+            start_ts_ms=args.start_ts_ms,
+            end_ts_ms=args.end_ts_ms,
+        )
     elif args.cmd == "ingest-ws":
-        cmd_ingest_ws(args.url, args.market_id, snapshot_json=args.snapshot_json, db_url=args.db_url, max_messages=args.max_messages)
+        cmd_ingest_ws(
+            args.url,
+            args.market_id,
+            snapshot_json=args.snapshot_json,
+            db_url=args.db_url,
+            max_messages=args.max_messages,
+            batch_size=args.batch_size,
+            flush_interval_ms=args.flush_interval_ms,
+            storage_writer=args.storage_writer,
+        )
     elif args.cmd == "status":
         cmd_status(db_url=args.db_url, verbose=args.verbose, as_json=args.json)
     elif args.cmd == "health":
         cmd_health(db_url=args.db_url, staleness_threshold_ms=args.staleness_ms, as_json=args.json)
     elif args.cmd == "metrics":
         cmd_metrics()
+    elif args.cmd == "bench-validator":
+        cmd_bench_validator(args.file, rounds=args.rounds)
+    elif args.cmd == "bench-engine":
+        cmd_bench_engine(rounds=args.rounds, intents=args.intents)
+    elif args.cmd == "bench-pipeline":
+        cmd_bench_pipeline(
+            args.scenarios,
+            out_file=args.out,
+            baseline_file=args.baseline,
+            tolerance=args.tolerance,
+            alloc=args.alloc,
+            batch_size=args.batch_size,
+            conflate=args.conflate,
+            markets=args.markets,
+            deltas=args.deltas,
+            depth=args.depth,
+            delta_rate=args.delta_rate,
+            gap_rate=args.gap_rate,
+            checksum_fail_rate=args.checksum_fail_rate,
+            outcomes=args.outcomes,
+            seed=args.seed,
+        )
     elif args.cmd == "metrics-export":
         cmd_metrics_export()
     elif args.cmd == "metrics-serve":
@@ -452,7 +578,7 @@ def main() -> None:
         asyncio.run(cmd_record_ws_async(args.url, args.outfile, max_messages=args.max_messages, subscribe=args.subscribe, translate=not args.no_translate))
     elif args.cmd == "quoter-run-replay":
         import asyncio
-        asyncio.run(cmd_quoter_run_replay_async(args.file, args.market_id, args.outcome_yes_id, db_url=args.db_url))
+        asyncio.run(cmd_quoter_run_replay_async(args.file, args.market_id, args.outcome_yes_id, db_url=args.db_url, speed=args.speed))
     elif args.cmd == "mock-ws":
         import asyncio
         asyncio.run(cmd_mock_ws_async(messages_file=args.file, host=args.host, port=args.port))
@@ -479,6 +605,36 @@ def main() -> None:
                 slippage_ticks=args.slippage_ticks,
                 allow_other=args.allow_other,
                 verbose=args.verbose,
+                depth_sizing=args.depth_sizing,
+                speed=args.speed,
+            )
+        )
+    elif args.cmd == "negrisk-scan-replay":
+        import asyncio
+        asyncio.run(
+            cmd_negrisk_scan_replay_async(
+                args.file,
+                db_url=args.db_url,
+                min_profit_usdc=args.min_profit_usdc,
+                default_size=args.default_size,
+                kinds_csv=args.kinds,
+                max_groups_per_cycle=args.max_groups_per_cycle,
+                exposure_cap=args.exposure_cap,
+            )
+        )
+    elif args.cmd == "negrisk-scan":
+        import asyncio
+        asyncio.run(
+            cmd_negrisk_scan_ws_async(
+                args.url,
+                db_url=args.db_url,
+                min_profit_usdc=args.min_profit_usdc,
+                default_size=args.default_size,
+                kinds_csv=args.kinds,
+                max_groups_per_cycle=args.max_groups_per_cycle,
+                ws_connections=args.ws_connections,
+                max_messages=args.max_messages,
+                exposure_cap=args.exposure_cap,
             )
         )
     elif args.cmd == "relayer-approve-usdc":
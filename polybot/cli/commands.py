@@ -6,7 +6,7 @@ from pathlib import Path
 from typing import Optional, Dict, Tuple, Any
 from types import SimpleNamespace
 
-from polybot.storage.db import connect_sqlite, enable_wal, connect
+from polybot.storage.db import connect_sqlite, enable_wal, connect, parse_db_url
 from polybot.storage import schema as schema_mod
 from polybot.ingestion.orderbook import OrderbookIngestor
 from polybot.observability.recording import read_jsonl
@@ -29,7 +29,8 @@ from polybot.exec.engine import ExecutionEngine
 from polybot.adapters.polymarket.relayer import FakeRelayer
 from polybot.adapters.polymarket.relayer import build_relayer
 from polybot.observability.health import check_staleness
-from polybot.observability.metrics import list_counters, list_counters_labelled, get_counter_labelled
+from polybot.core.clock import VirtualClock, replay_events
+from polybot.observability.metrics import HistogramSnapshot, list_counters, list_counters_labelled, list_histograms, get_counter_labelled
 from polybot.observability.prometheus import export_text as prometheus_export_text
 from polybot.service.config import load_service_config
 from polybot.service.runner import ServiceRunner
@@ -63,6 +64,15 @@ def init_db(db_url: str):
     return con
 
 
+def _ingest_writer(db_url: str, enabled: bool, block_when_full: bool = False):
+    """Background `StorageWriter` for ingestion commands; None when disabled or the DB is in-memory."""
+    if not enabled or parse_db_url(db_url)[1] == ":memory:":
+        return None
+    from polybot.storage.writer import StorageWriter
+
+    return StorageWriter(db_url, block_when_full=block_when_full)
+
+
 def _builder_kwargs_from_env() -> Dict[str, str]:
     env = os.environ
     out: Dict[str, str] = {}
@@ -339,12 +349,54 @@ def _resolve_market_choice(
     return entry
 
 
-def cmd_replay(file: str, market_id: str, db_url: str = ":memory:") -> None:
+def cmd_replay(
+    file: str,
+    market_id: str,
+    db_url: str = ":memory:",
+    batch_size: int = 0,
+    flush_interval_ms: int = 0,
+    event_log_dir: str | None = None,
+    storage_writer: bool = False,
+    from_event_log: bool = False,
+    start_ts_ms: int | None = None,
+    end_ts_ms: int | None = None,
+) -> None:
+    """Replay orderbook events for `market_id` into the DB.
+
+    Events come from JSONL `file`, or with `from_event_log` from the columnar event log in
+    directory `file` (its catalog lives in `db_url`), optionally limited to
+    `[start_ts_ms, end_ts_ms]`; event-log messages keep their recorded `ts_ms`.
+    """
+    from polybot.storage.eventlog import EventLog
+
     setup_logging()
     con = init_db(db_url)
-    ing = OrderbookIngestor(con, market_id)
-    for event in read_jsonl(file):
-        ing.process(event)
+    source_log = None
+    if from_event_log:
+        if event_log_dir and Path(event_log_dir).resolve() == Path(file).resolve():
+            raise ValueError("cannot replay an event log into itself")
+        source_log = EventLog(file, con)
+    event_log = EventLog(event_log_dir, con) if event_log_dir else None
+    # a plain loop, not the event loop: waiting for queue space beats dropping rows
+    writer = _ingest_writer(db_url, storage_writer, block_when_full=True)
+    ing = OrderbookIngestor(con, market_id, batch_size=batch_size, flush_interval_ms=flush_interval_ms, writer=writer, event_log=event_log)
+    try:
+        if source_log is not None:
+            for event in source_log.iter_messages(market_id, start_ts_ms, end_ts_ms):
+                ing.process(event, event["ts_ms"])
+        else:
+            for event in read_jsonl(file):
+                ing.process(event)
+        ing.flush()
+        if writer is not None:
+            writer.flush()
+    finally:
+        if writer is not None:
+            writer.close()
+        if event_log is not None:
+            event_log.close()
+        if source_log is not None:
+            source_log.close()
 
 
 def cmd_markets_list(db_url: str = ":memory:", limit: int = 10, as_json: bool = False) -> str:
@@ -395,6 +447,23 @@ def cmd_markets_list(db_url: str = ":memory:", limit: int = 10, as_json: bool =
     return out
 
 
+def _market_histograms() -> Dict[Tuple[str, str], HistogramSnapshot]:
+    """Merged per-market histograms keyed by (name, market)."""
+    out: Dict[Tuple[str, str], HistogramSnapshot] = {}
+    for h in list_histograms():
+        if len(h.labels) == 1 and h.labels[0][0] == "market":
+            out[(h.name, h.labels[0][1])] = h
+    return out
+
+
+def _hist(hists: Dict[Tuple[str, str], HistogramSnapshot], name: str, market: str) -> HistogramSnapshot:
+    return hists.get((name, market)) or HistogramSnapshot(name=name, labels=(("market", market),), counts={})
+
+
+def _pcts(h: HistogramSnapshot, prefix: str) -> str:
+    return f"{prefix}_p50_us={h.percentile(0.5)} {prefix}_p99_us={h.percentile(0.99)} {prefix}_p999_us={h.percentile(0.999)}"
+
+
 def cmd_status(db_url: str = ":memory:", verbose: bool = False, as_json: bool = False) -> str:
     """Return a human-readable status summary string for markets in DB."""
     con = connect_sqlite(db_url)
@@ -405,6 +474,7 @@ def cmd_status(db_url: str = ":memory:", verbose: bool = False, as_json: bool =
         out = "No market status available."
         print(out)
         return out
+    hists = _market_histograms() if verbose else {}
     if as_json:
         import json as _json
         items = []
@@ -435,6 +505,11 @@ def cmd_status(db_url: str = ":memory:", verbose: bool = False, as_json: bool =
                 item["relayer_rate_limited_events"] = get_counter_labelled("relayer_rate_limited_events", {"market": mkt})
                 item["relayer_timeouts_events"] = get_counter_labelled("relayer_timeouts_events", {"market": mkt})
                 item["relayer_builder_errors"] = get_counter_labelled("relayer_builder_errors", {"market": mkt})
+                item["latency_us"] = {
+                    "place_call": _hist(hists, "engine_place_call_us", mkt).summary(),
+                    "ack": _hist(hists, "engine_ack_us", mkt).summary(),
+                    "runtime": _hist(hists, "service_market_runtime_us", mkt).summary(),
+                }
             items.append(item)
         out = _json.dumps(items)
         print(out)
@@ -466,9 +541,9 @@ def cmd_status(db_url: str = ":memory:", verbose: bool = False, as_json: bool =
             ems = get_counter_labelled("engine_execute_plan_ms_sum", {"market": mkt})
             ec = get_counter_labelled("engine_execute_plan_count", {"market": mkt})
             avg_ms = (ems / ec) if ec else 0
-            ack_sum = get_counter_labelled("engine_ack_ms_sum", {"market": mkt})
-            ack_cnt = get_counter_labelled("engine_ack_count", {"market": mkt})
-            ack_avg = (ack_sum / ack_cnt) if ack_cnt else 0
+            place_h = _hist(hists, "engine_place_call_us", mkt)
+            ack_h = _hist(hists, "engine_ack_us", mkt)
+            ack_avg = ack_h.mean() / 1000.0
             # global relayer limits/timeouts are process-wide; include as context
             from polybot.observability.metrics import get_counter
             rl = get_counter("relayer_rate_limited_total")
@@ -480,6 +555,7 @@ def cmd_status(db_url: str = ":memory:", verbose: bool = False, as_json: bool =
             rrl = get_counter_labelled("relayer_rate_limited_events", {"market": mkt})
             rto = get_counter_labelled("relayer_timeouts_events", {"market": mkt})
             lines.append(f"  relayer: acks_accepted={rak_ok} acks_rejected={rak_rej} rate_limited_total={rl} timeouts_total={to} per_market_rl={rrl} per_market_to={rto} builder_errors={rbe}")
+            lines.append(f"  latency: {_pcts(place_h, 'place')} {_pcts(ack_h, 'ack')}")
             lines.append(f"  dutch: placed={dplaced} rulehash_changed={drh}")
             lines.append(f"  resyncs: total={total_resyncs} ratio={resync_ratio:.3f}")
     out = "\n".join(lines)
@@ -530,6 +606,7 @@ def cmd_status_summary(db_url: str = ":memory:", as_json: bool = False) -> str:
     """
     con = connect_sqlite(db_url)
     rows = con.execute("SELECT market_id FROM market_status ORDER BY market_id").fetchall()
+    hists = _market_histograms()
     if as_json:
         import json as _json
         items = []
@@ -542,9 +619,8 @@ def cmd_status_summary(db_url: str = ":memory:", as_json: bool = False) -> str:
             resync_ratio = (total_resyncs / max(1, applied)) if applied else 0
             rejects = get_counter_labelled("relayer_acks_rejected", {"market": mkt})
             place_errs = get_counter_labelled("relayer_place_errors", {"market": mkt})
-            rt_sum = get_counter_labelled("service_market_runtime_ms_sum", {"market": mkt})
-            rt_cnt = get_counter_labelled("service_market_runtime_count", {"market": mkt})
-            rt_avg = (rt_sum / rt_cnt) if rt_cnt else 0
+            rt = _hist(hists, "service_market_runtime_us", mkt)
+            rt_avg = rt.mean() / 1000.0
             builder_errs = get_counter_labelled("relayer_builder_errors", {"market": mkt})
             items.append({
                 "market_id": mkt,
@@ -553,6 +629,9 @@ def cmd_status_summary(db_url: str = ":memory:", as_json: bool = False) -> str:
                 "place_errors": place_errs,
                 "builder_errors": builder_errs,
                 "runtime_avg_ms": rt_avg,
+                "runtime_p50_us": rt.percentile(0.5),
+                "runtime_p99_us": rt.percentile(0.99),
+                "runtime_p999_us": rt.percentile(0.999),
                 "quotes_cancel_rate_limited": get_counter_labelled("quotes_cancel_rate_limited", {"market": mkt}),
                 "quotes_rate_limited": get_counter_labelled("quotes_rate_limited", {"market": mkt}),
             })
@@ -570,9 +649,8 @@ def cmd_status_summary(db_url: str = ":memory:", as_json: bool = False) -> str:
         rejects = get_counter_labelled("relayer_acks_rejected", {"market": mkt})
         place_errs = get_counter_labelled("relayer_place_errors", {"market": mkt})
         builder_errs = get_counter_labelled("relayer_builder_errors", {"market": mkt})
-        rt_sum = get_counter_labelled("service_market_runtime_ms_sum", {"market": mkt})
-        rt_cnt = get_counter_labelled("service_market_runtime_count", {"market": mkt})
-        rt_avg = (rt_sum / rt_cnt) if rt_cnt else 0
+        rt = _hist(hists, "service_market_runtime_us", mkt)
+        rt_avg = rt.mean() / 1000.0
         lines.append(f"{mkt} {resync_ratio:.3f} {rejects} {place_errs} {builder_errs} {rt_avg:.1f}")
     out = "\n".join(lines)
     print(out)
@@ -678,6 +756,54 @@ def cmd_health(db_url: str = ":memory:", staleness_threshold_ms: int = 30000, as
     return out
 
 
+def cmd_bench_validator(file: str, rounds: int = 1000) -> str:
+    """Compare the fast message validator with the pydantic path on a JSONL recording."""
+    from polybot.ingestion.validator import benchmark_validators
+
+    res = benchmark_validators(read_jsonl(file), rounds=rounds)
+    out = _json.dumps(res)
+    print(out)
+    return out
+
+
+def cmd_bench_engine(rounds: int = 10000, intents: int = 2) -> str:
+    """Measure per-plan engine overhead with per-call reflection vs cached relayer capabilities."""
+    from polybot.exec.engine import benchmark_plan_overhead
+
+    res = benchmark_plan_overhead(rounds=rounds, intents=intents)
+    out = _json.dumps(res)
+    print(out)
+    return out
+
+
+def cmd_bench_pipeline(
+    scenarios_csv: str = "ingest,quoter,dutch",
+    out_file: Optional[str] = None,
+    baseline_file: Optional[str] = None,
+    tolerance: float = 0.1,
+    alloc: bool = False,
+    batch_size: int = 0,
+    conflate: bool = False,
+    **spec_kwargs: Any,
+) -> str:
+    """Replay synthetic L2 streams through ingestion, quoter and Dutch runner; print JSON results.
+
+    With `baseline_file` (an earlier `--out`) the result carries a `regressions` list.
+    """
+    from polybot.bench.pipeline import compare_results, run_pipeline_benchmark
+    from polybot.bench.synthetic import StreamSpec
+
+    scenarios = [s.strip() for s in scenarios_csv.split(",") if s.strip()]
+    res = run_pipeline_benchmark(StreamSpec(**spec_kwargs), scenarios=scenarios, alloc=alloc, batch_size=batch_size, conflate=conflate)
+    if baseline_file:
+        res["regressions"] = compare_results(_json.loads(Path(baseline_file).read_text(encoding="utf-8")), res, tolerance=tolerance)
+    out = _json.dumps(res)
+    if out_file:
+        Path(out_file).write_text(out + "\n", encoding="utf-8")
+    print(out)
+    return out
+
+
 def cmd_metrics() -> str:
     parts = ["counters:"]
     for name, val in list_counters():
@@ -1045,19 +1171,43 @@ async def cmd_run_service_from_config_async(config_path: str, summary_json_outpu
         "max_retries": cfg.relayer_max_retries,
         "retry_sleep_ms": cfg.relayer_retry_sleep_ms,
     }
+    if cfg.relayer_signing_workers > 0:
+        rel_kwargs["signing_workers"] = cfg.relayer_signing_workers
+        rel_kwargs["signing_mode"] = cfg.relayer_signing_mode
     builder_kwargs = _builder_kwargs_from_cfg(cfg)
     env_builder = _builder_kwargs_from_env()
     builder_kwargs.update(env_builder)
     rel_kwargs.update(builder_kwargs)
-    sr = ServiceRunner(
+    runner_kwargs = dict(
         db_url=cfg.db_url,
         params=cfg.default_spread,
         relayer_type=cfg.relayer_type,
         relayer_kwargs=rel_kwargs,
         engine_max_retries=cfg.engine_max_retries,
         engine_retry_sleep_ms=cfg.engine_retry_sleep_ms,
+        storage_writer=cfg.storage_writer,
+        storage_writer_queue=cfg.storage_writer_queue,
+        ws_connections=cfg.ws_connections,
+        conflate_books=cfg.conflate_books,
+        engine_async=cfg.engine_async,
+        engine_threads=cfg.engine_threads,
+        ledger_reconcile_ms=cfg.ledger_reconcile_ms,
     )
-    await sr.run_markets(cfg.markets)
+    if cfg.shards > 1:
+        from polybot.service.shards import ShardSupervisor
+
+        sup = ShardSupervisor(
+            runner_kwargs,
+            shards=cfg.shards,
+            by=cfg.shard_by,
+            max_restarts=cfg.shard_max_restarts,
+            exposure_cap=cfg.shard_exposure_cap,
+            metrics_capacity=cfg.shard_metrics_capacity,
+        )
+        await sup.run(cfg.markets)
+    else:
+        sr = ServiceRunner(**runner_kwargs)
+        await sr.run_markets(cfg.markets)
     # After completion, print a concise per-market summary for operator visibility
     try:
         cmd_status_summary(db_url=cfg.db_url)
@@ -1089,6 +1239,9 @@ async def cmd_record_ws_async(url: str, outfile: str, max_messages: Optional[int
                 data = translate_polymarket_message(data)
             if data is None:
                 continue
+            if translate:
+                # receive time for upstream messages without one, so replays keep the pacing
+                data.setdefault("ts_ms", int(time.time() * 1000))
             events.append(data)
             count += 1
             if max_messages is not None and count >= max_messages:
@@ -1096,20 +1249,27 @@ async def cmd_record_ws_async(url: str, outfile: str, max_messages: Optional[int
     write_jsonl(outfile, events)
 
 
-async def cmd_quoter_run_replay_async(file: str, market_id: str, outcome_yes_id: str, db_url: str = ":memory:", params: Optional[SpreadParams] = None) -> None:
+async def cmd_quoter_run_replay_async(
+    file: str,
+    market_id: str,
+    outcome_yes_id: str,
+    db_url: str = ":memory:",
+    params: Optional[SpreadParams] = None,
+    speed: float = 0.0,
+) -> None:
+    """Replay a JSONL recording through the spread quoter on a virtual clock.
+
+    Quoter time, its rate limiters and engine retry back-off follow the recorded `ts_ms`,
+    jumping from event to event (`speed > 0` paces the replay at that multiple of real time).
+    """
     setup_logging()
     con = init_db(db_url)
-    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    clock = VirtualClock()
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con, sleeper=clock.advance_ms)
     params = params or SpreadParams()
-    quoter = SpreadQuoter(market_id, outcome_yes_id, params, engine)
+    quoter = SpreadQuoter(market_id, outcome_yes_id, params, engine, clock=clock)
     runner = QuoterRunner(market_id, quoter)
-
-    async def _aiter():
-        for e in read_jsonl(file):
-            yield e
-
-    now_ms = lambda: int(time.time() * 1000)
-    await runner.run(_aiter(), now_ms)
+    await runner.run(replay_events(read_jsonl(file), clock, speed=speed), clock.now_ms)
 
 
 async def cmd_dutch_run_replay_async(
@@ -1124,10 +1284,14 @@ async def cmd_dutch_run_replay_async(
     slippage_ticks: int = 0,
     allow_other: bool = False,
     verbose: bool = False,
+    depth_sizing: bool = False,
+    speed: float = 0.0,
 ) -> None:
     setup_logging()
     con = init_db(db_url)
-    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    # virtual clock: recorded ts_ms drive time; engine retry back-off advances it (see quoter replay)
+    clock = VirtualClock()
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con, sleeper=clock.advance_ms)
     if outcomes_csv:
         outcomes = [o.strip() for o in outcomes_csv.split(",") if o.strip()]
     else:
@@ -1147,6 +1311,7 @@ async def cmd_dutch_run_replay_async(
         fee_bps=fee_bps,
         slippage_ticks=slippage_ticks,
         allow_other=allow_other,
+        depth_sizing=depth_sizing,
     )
 
     # Preload events to both run detection and compute final margin if verbose
@@ -1167,8 +1332,7 @@ async def cmd_dutch_run_replay_async(
                     assemblers[oid].apply_delta(e)
         outs: list[OutcomeQuote] = []
         for oid, asm in assemblers.items():
-            ob = asm.apply_delta({"seq": asm._seq})
-            ba = ob.best_ask()
+            ba = asm.best_ask()
             if not ba:
                 continue
             # Pull metadata from DB when available
@@ -1190,12 +1354,82 @@ async def cmd_dutch_run_replay_async(
             )
             print(f"diagnostic: total_ask={total_ask:.6f} margin={margin:.6f} plan={'yes' if eff_plan else 'no'}")
 
+    await runner.run(replay_events(events, clock, speed=speed), clock.now_ms)
+
+
+def _negrisk_scanner(
+    db_url: str,
+    min_profit_usdc: float,
+    default_size: float,
+    kinds_csv: str | None,
+    max_groups_per_cycle: int,
+    exposure_cap: Optional[float] = None,
+):
+    """(scanner, groups) over every neg-risk group in `db_url`; None when there are none."""
+    from polybot.strategy.negrisk import BASKET_KINDS, NegRiskScanner, load_neg_risk_groups
+
+    con = init_db(db_url)
+    groups = load_neg_risk_groups(con)
+    if not groups:
+        print("no neg-risk groups with binary markets found; nothing to do")
+        return None
+    kinds = tuple(k.strip() for k in kinds_csv.split(",") if k.strip()) if kinds_csv else BASKET_KINDS
+    # the engine's ledger starts from recorded fills, so sell_yes baskets only sell held inventory
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    scanner = NegRiskScanner(
+        groups, engine=engine, min_profit_usdc=min_profit_usdc, default_size=default_size, kinds=kinds,
+        max_groups_per_cycle=max_groups_per_cycle, exposure_cap=exposure_cap,
+    )
+    return scanner, groups
+
+
+async def cmd_negrisk_scan_replay_async(
+    file: str,
+    db_url: str = ":memory:",
+    min_profit_usdc: float = 0.02,
+    default_size: float = 1.0,
+    kinds_csv: str | None = None,
+    max_groups_per_cycle: int = 256,
+    exposure_cap: Optional[float] = None,
+) -> Dict[str, int]:
+    """Replay multi-token JSONL events through the neg-risk group scanner; returns opportunity counts per kind."""
+    setup_logging()
+    built = _negrisk_scanner(db_url, min_profit_usdc, default_size, kinds_csv, max_groups_per_cycle, exposure_cap)
+    if built is None:
+        return {}
+    scanner, groups = built
     async def _aiter():
-        for e in events:
+        for e in read_jsonl(file):
             yield e
 
-    now_ms = lambda: int(time.time() * 1000)
-    await runner.run(_aiter(), now_ms)
+    await scanner.run(_aiter())
+    print(f"groups={len(groups)} tokens={len(scanner.tokens())} " + " ".join(f"{k}={v}" for k, v in scanner.found.items()))
+    return dict(scanner.found)
+
+
+async def cmd_negrisk_scan_ws_async(
+    url: str,
+    db_url: str = ":memory:",
+    min_profit_usdc: float = 0.02,
+    default_size: float = 1.0,
+    kinds_csv: str | None = None,
+    max_groups_per_cycle: int = 256,
+    ws_connections: int = 1,
+    max_messages: Optional[int] = None,
+    exposure_cap: Optional[float] = None,
+) -> Dict[str, int]:
+    """Scan every neg-risk group live: subscribe all their tokens over `ws_connections` shared sockets."""
+    from polybot.adapters.polymarket.ws_mux import WSConnectionManager
+
+    setup_logging()
+    built = _negrisk_scanner(db_url, min_profit_usdc, default_size, kinds_csv, max_groups_per_cycle, exposure_cap)
+    if built is None:
+        return {}
+    scanner, groups = built
+    async with WSConnectionManager(url, max_connections=ws_connections) as manager:
+        await scanner.run_ws(manager, max_messages=max_messages)
+    print(f"groups={len(groups)} tokens={len(scanner.tokens())} " + " ".join(f"{k}={v}" for k, v in scanner.found.items()))
+    return dict(scanner.found)
 
 
 async def cmd_mock_ws_async(messages_file: Optional[str] = None, host: str = "127.0.0.1", port: int = 9000) -> None:
@@ -1238,10 +1472,20 @@ async def _aiter_from_ws(url: str, max_messages: Optional[int] = None):
                 break
 
 
-async def cmd_ingest_ws_async(url: str, market_id: str, snapshot_json: Optional[str] = None, db_url: str = ":memory:", max_messages: Optional[int] = None) -> None:
+async def cmd_ingest_ws_async(
+    url: str,
+    market_id: str,
+    snapshot_json: Optional[str] = None,
+    db_url: str = ":memory:",
+    max_messages: Optional[int] = None,
+    batch_size: int = 0,
+    flush_interval_ms: int = 0,
+    storage_writer: bool = False,
+) -> None:
     setup_logging()
     con = init_db(db_url)
-    ing = OrderbookIngestor(con, market_id)
+    writer = _ingest_writer(db_url, storage_writer)
+    ing = OrderbookIngestor(con, market_id, batch_size=batch_size, flush_interval_ms=flush_interval_ms, writer=writer)
     provider: SnapshotProvider
     if snapshot_json:
         import json
@@ -1251,11 +1495,35 @@ async def cmd_ingest_ws_async(url: str, market_id: str, snapshot_json: Optional[
     else:
         provider = FakeSnapshotProvider({"type": "snapshot", "seq": 0, "bids": [], "asks": []})
 
-    await run_orderbook_stream(market_id, _aiter_from_ws(url, max_messages=max_messages), ing, provider)
+    try:
+        await run_orderbook_stream(market_id, _aiter_from_ws(url, max_messages=max_messages), ing, provider)
+    finally:
+        if writer is not None:
+            writer.close()
 
 
-def cmd_ingest_ws(url: str, market_id: str, snapshot_json: Optional[str] = None, db_url: str = ":memory:", max_messages: Optional[int] = None) -> None:
-    asyncio.run(cmd_ingest_ws_async(url, market_id, snapshot_json=snapshot_json, db_url=db_url, max_messages=max_messages))
+def cmd_ingest_ws(
+    url: str,
+    market_id: str,
+    snapshot_json: Optional[str] = None,
+    db_url: str = ":memory:",
+    max_messages: Optional[int] = None,
+    batch_size: int = 0,
+    flush_interval_ms: int = 0,
+    storage_writer: bool = False,
+) -> None:
+    asyncio.run(
+        cmd_ingest_ws_async(
+            url,
+            market_id,
+            snapshot_json=snapshot_json,
+            db_url=db_url,
+            max_messages=max_messages,
+            batch_size=batch_size,
+            flush_interval_ms=flush_interval_ms,
+            storage_writer=storage_writer,
+        )
+    )
 
 
 def cmd_metrics_serve(host: str = "127.0.0.1", port: int = 0) -> int:
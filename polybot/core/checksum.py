@@ -3,18 +3,18 @@ from __future__ import annotations
 from typing import Dict
 
 
+def checksum_from_sums(bcount: int, bsum: float, acount: int, asum: float) -> str:
+    """Format the book checksum from per-side level counts and notional sums."""
+    # reduce float noise
+    return f"b{bcount}a{acount}v{round(bsum, 6) + round(asum, 6)}"
+
+
 def orderbook_checksum(bids: Dict[float, float], asks: Dict[float, float]) -> str:
     # Simple deterministic checksum: counts + rounded sum(price*size) per side
     def agg(side: Dict[float, float]) -> float:
         total = 0.0
         for p, s in side.items():
             total += float(p) * float(s)
-        # reduce float noise
-        return round(total, 6)
-
-    bcount = len(bids)
-    acount = len(asks)
-    bsum = agg(bids)
-    asum = agg(asks)
-    return f"b{bcount}a{acount}v{bsum+asum}"
+        return total
 
+    return checksum_from_sums(len(bids), agg(bids), len(asks), agg(asks))
@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, AsyncIterator, Iterable, List, Optional, Tuple
+
+
+class WallClock:
+    """Real time: `now_ms` is epoch milliseconds and `sleep` is `asyncio.sleep`."""
+
+    def now_ms(self) -> int:
+        return int(time.time() * 1000)
+
+    async def sleep(self, seconds: float) -> None:
+        await asyncio.sleep(seconds)
+
+    def advance_ms(self, ms: int) -> None:
+        """Block for `ms` (the wall-clock counterpart of `VirtualClock.advance_ms`)."""
+        time.sleep(max(0, ms) / 1000.0)
+
+
+WALL_CLOCK = WallClock()
+
+
+class VirtualClock:
+    """Replay time that only moves when told to.
+
+    `advance_to(ts_ms)` (driven by `replay_events`) jumps to the next event timestamp and on
+    the way wakes every `sleep`er whose deadline has passed, in deadline order and with
+    `now_ms` set to that deadline, so periodic tasks fire exactly as often as they would
+    have live. `advance_ms` moves time forward inline, e.g. as an engine retry `sleeper`:
+    the back-off costs virtual time instead of wall time. Time never goes backwards.
+    """
+
+    def __init__(self, start_ms: Optional[int] = None):
+        self._now = int(start_ms) if start_ms is not None else 0
+        self._timers: List[Tuple[int, int, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def now_ms(self) -> int:
+        return self._now
+
+    def advance_ms(self, ms: int) -> None:
+        self._now += max(0, int(ms))
+
+    async def sleep(self, seconds: float) -> None:
+        if seconds <= 0:
+            await asyncio.sleep(0)
+            return
+        fut = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._timers, (self._now + int(seconds * 1000), next(self._seq), fut))
+        await fut
+
+    async def advance_to(self, ts_ms: int) -> None:
+        timers = self._timers
+        while timers and timers[0][0] <= ts_ms:
+            deadline, _, fut = heapq.heappop(timers)
+            if fut.done():  # sleeper was cancelled
+                continue
+            self._now = max(self._now, deadline)
+            fut.set_result(None)
+            # let the woken task run (and re-arm its next timer) at its own deadline
+            await asyncio.sleep(0)
+        self._now = max(self._now, int(ts_ms))
+
+
+async def replay_events(events: Iterable[dict[str, Any]], clock: VirtualClock, speed: float = 0.0) -> AsyncIterator[dict[str, Any]]:
+    """Yield recorded `events` with `clock` advanced to each event's `ts_ms` first.
+
+    With `speed <= 0` (default) the replay jumps straight from one event to the next, so
+    recorded hours replay in seconds; `speed > 0` paces the gaps at `speed` x real time.
+    Events without `ts_ms` keep the current time. An unstarted clock (0) starts at the first
+    timestamp seen, or at wall time if the first event has none.
+    """
+    for e in events:
+        ts = e.get("ts_ms")
+        if clock.now_ms() == 0:
+            await clock.advance_to(int(ts) if ts else WALL_CLOCK.now_ms())
+        # like a socket read, yield to the loop once per event so newly started tasks
+        # (e.g. periodic snapshots) arm their timers at the current replay time
+        await asyncio.sleep(0)
+        if ts:
+            if speed > 0 and ts > clock.now_ms():
+                await asyncio.sleep((ts - clock.now_ms()) / 1000.0 / speed)
+            await clock.advance_to(int(ts))
+        yield e
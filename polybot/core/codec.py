@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Optional, Union
+
+
+Data = Union[bytes, bytearray, memoryview, str]
+
+
+class JsonCodec:
+    """JSON encode/decode pair used by WS decode, JSONL recording and replay.
+
+    `loads` accepts bytes or str (bytes frames are decoded without an intermediate
+    `.decode("utf-8")`); `dumps` always returns UTF-8 bytes.
+    """
+
+    __slots__ = ("name", "loads", "dumps")
+
+    def __init__(self, name: str, loads: Callable[[Data], Any], dumps: Callable[[Any], bytes]):
+        self.name = name
+        self.loads = loads
+        self.dumps = dumps
+
+    def __repr__(self) -> str:
+        return f"JsonCodec({self.name!r})"
+
+
+def _std_loads(data: Data) -> Any:
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def _std_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+STDLIB_JSON = JsonCodec("json", _std_loads, _std_dumps)
+
+_CODECS: Dict[str, JsonCodec] = {"json": STDLIB_JSON}
+
+try:  # orjson is a declared dependency, but keep stdlib as a fallback
+    import orjson as _orjson
+
+    _CODECS["orjson"] = JsonCodec("orjson", _orjson.loads, _orjson.dumps)
+except Exception:  # pragma: no cover - depends on environment
+    _orjson = None
+
+_default: JsonCodec = _CODECS.get("orjson", STDLIB_JSON)
+
+
+def register_codec(codec: JsonCodec) -> None:
+    _CODECS[codec.name] = codec
+
+
+def available_codecs() -> list[str]:
+    return sorted(_CODECS)
+
+
+def get_codec(codec: Optional[Union[str, JsonCodec]] = None) -> JsonCodec:
+    """Resolve a codec by name (or pass one through); None returns the process default."""
+    if codec is None:
+        return _default
+    if isinstance(codec, JsonCodec):
+        return codec
+    try:
+        return _CODECS[codec]
+    except KeyError:
+        raise ValueError(f"unknown JSON codec: {codec!r} (available: {', '.join(available_codecs())})") from None
+
+
+def set_default_codec(codec: Union[str, JsonCodec]) -> JsonCodec:
+    global _default
+    _default = get_codec(codec)
+    return _default
@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections.abc import Mapping
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from polybot.core.models import Side
+
+
+# Finest tick Polymarket lists (0.1/0.01/0.001/0.0001); coarser books index fine on this grid.
+DEFAULT_TICK_SIZE = 0.0001
+
+
+class PriceLadder(Mapping):
+    """One side of an orderbook indexed by integer tick.
+
+    Levels live in a dict keyed by tick index (price -> size lookups are O(1)) plus a
+    sorted list of occupied ticks, so the top of book is simply the first/last entry and
+    depth-N walks are O(N). Inserts/removals are a bisect + list memmove.
+
+    The ladder is also a read-only Mapping of price -> size, so existing callers that
+    treat a book side as a dict (`items()`, `in`, `[]`, `len`) keep working.
+
+    The side's notional (sum of price*size) is maintained incrementally on every change;
+    `recompute_notional()` replaces it with an exact sum to shed accumulated float drift.
+    """
+
+    __slots__ = ("side", "tick_size", "_inv_tick", "_sizes", "_prices", "_ticks", "_notional")
+
+    def __init__(self, side: Side, tick_size: float = DEFAULT_TICK_SIZE):
+        if tick_size <= 0:
+            raise ValueError("tick_size must be positive")
+        self.side = side
+        self.tick_size = float(tick_size)
+        self._inv_tick = 1.0 / self.tick_size
+        self._sizes: Dict[int, float] = {}
+        self._prices: Dict[int, float] = {}  # tick -> price as first seen (keeps float keys stable)
+        self._ticks: List[int] = []  # ascending
+        self._notional = 0.0
+
+    def tick_of(self, price: float) -> int:
+        return int(round(price * self._inv_tick))
+
+    def clear(self) -> None:
+        self._sizes.clear()
+        self._prices.clear()
+        self._ticks.clear()
+        self._notional = 0.0
+
+    def set(self, price: float, size: float) -> float:
+        """Set the absolute size at `price`; sizes <= 0 remove the level."""
+        t = self.tick_of(price)
+        if size <= 0.0:
+            self._remove(t)
+            return 0.0
+        old = self._sizes.get(t)
+        if old is None:
+            self._insert(t, price)
+            old = 0.0
+        self._sizes[t] = size
+        self._notional += self._prices[t] * (size - old)
+        return size
+
+    def add(self, price: float, size_delta: float) -> float:
+        """Apply a size delta at `price` (clamped at zero) and return the new size."""
+        t = self.tick_of(price)
+        cur = self._sizes.get(t, 0.0)
+        new = max(0.0, cur + size_delta)
+        if new == 0.0:
+            self._remove(t)
+            return 0.0
+        if t not in self._sizes:
+            self._insert(t, price)
+        self._sizes[t] = new
+        self._notional += self._prices[t] * (new - cur)
+        return new
+
+    def _insert(self, t: int, price: float) -> None:
+        ticks = self._ticks
+        # Fast path: most inserts land at or beyond the current extremes.
+        if not ticks or t > ticks[-1]:
+            ticks.append(t)
+        else:
+            ticks.insert(bisect_left(ticks, t), t)
+        self._prices[t] = price
+
+    def _remove(self, t: int) -> None:
+        size = self._sizes.pop(t, None)
+        if size is None:
+            return
+        self._notional -= self._prices.pop(t) * size
+        ticks = self._ticks
+        if ticks[-1] == t:
+            ticks.pop()
+        elif ticks[0] == t:
+            del ticks[0]
+        else:
+            del ticks[bisect_left(ticks, t)]
+
+    def best(self) -> Optional[Tuple[float, float]]:
+        """Return (price, size) of the top level in O(1), or None when empty."""
+        if not self._ticks:
+            return None
+        t = self._ticks[-1] if self.side == "bid" else self._ticks[0]
+        return self._prices[t], self._sizes[t]
+
+    def best_price(self) -> Optional[float]:
+        if not self._ticks:
+            return None
+        return self._prices[self._ticks[-1] if self.side == "bid" else self._ticks[0]]
+
+    def depth(self, n: int) -> List[Tuple[float, float]]:
+        """Return up to `n` levels best-first as (price, size) pairs in O(n)."""
+        if n <= 0 or not self._ticks:
+            return []
+        if self.side == "bid":
+            sel = self._ticks[: -n - 1 : -1] if n < len(self._ticks) else self._ticks[::-1]
+        else:
+            sel = self._ticks[:n]
+        prices = self._prices
+        sizes = self._sizes
+        return [(prices[t], sizes[t]) for t in sel]
+
+    def walk(self) -> Iterator[Tuple[float, float]]:
+        """Yield (price, size) levels best-first, lazily (consumers that stop early pay for what they read)."""
+        prices = self._prices
+        sizes = self._sizes
+        for t in (reversed(self._ticks) if self.side == "bid" else self._ticks):
+            yield prices[t], sizes[t]
+
+    def notional(self) -> float:
+        """Running sum of price*size over all levels (O(1))."""
+        return self._notional
+
+    def recompute_notional(self) -> float:
+        """Recompute the notional exactly from the levels, reset the running sum, return it."""
+        prices = self._prices
+        total = 0.0
+        for t, s in self._sizes.items():
+            total += prices[t] * s
+        self._notional = total
+        return total
+
+    # Mapping interface (price -> size)
+    def __getitem__(self, price: float) -> float:
+        return self._sizes[self.tick_of(price)]
+
+    def __contains__(self, price: object) -> bool:
+        try:
+            return self.tick_of(price) in self._sizes  # type: ignore[arg-type]
+        except TypeError:
+            return False
+
+    def __iter__(self) -> Iterator[float]:
+        return iter(self._prices.values())
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def items(self):  # type: ignore[override]
+        prices = self._prices
+        return [(prices[t], s) for t, s in self._sizes.items()]
+
+    def __repr__(self) -> str:
+        return f"PriceLadder(side={self.side!r}, levels={len(self._sizes)}, best={self.best()!r})"
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Literal, Optional
+from typing import Dict, List, Literal, Mapping, Optional, Tuple
 
 
 Side = Literal["bid", "ask"]
@@ -52,3 +52,51 @@ class OrderBook:
         p = min(self.asks.keys())
         return Level(price=p, size=self.asks[p])
 
+
+
+class OrderBookView:
+    """Read-only view over an assembler's live book state (no per-message copies).
+
+    `bids`/`asks` are the live price->size ladders and `seq` tracks the owner, so the
+    view always reflects the latest applied message. Consumers that need a stable
+    picture across later deltas must call `freeze()` to get a plain `OrderBook` copy.
+    """
+
+    __slots__ = ("_owner",)
+
+    def __init__(self, owner) -> None:
+        object.__setattr__(self, "_owner", owner)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("OrderBookView is read-only")
+
+    @property
+    def market_id(self) -> str:
+        return self._owner.market_id
+
+    @property
+    def seq(self) -> int:
+        return self._owner._seq
+
+    @property
+    def bids(self) -> Mapping[float, float]:
+        return self._owner._bids
+
+    @property
+    def asks(self) -> Mapping[float, float]:
+        return self._owner._asks
+
+    def best_bid(self) -> Optional[Level]:
+        top = self._owner._bids.best()
+        return Level(price=top[0], size=top[1]) if top else None
+
+    def best_ask(self) -> Optional[Level]:
+        top = self._owner._asks.best()
+        return Level(price=top[0], size=top[1]) if top else None
+
+    def depth(self, side: Side, n: int) -> List[Tuple[float, float]]:
+        return (self._owner._bids if side == "bid" else self._owner._asks).depth(n)
+
+    def freeze(self) -> OrderBook:
+        """Copy the current state into an independent `OrderBook`."""
+        return OrderBook(self.market_id, self.seq, dict(self.bids.items()), dict(self.asks.items()))
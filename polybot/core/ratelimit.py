@@ -1,7 +1,9 @@
 from __future__ import annotations
 
-import time
 from dataclasses import dataclass
+from typing import Any, Optional
+
+from polybot.core.clock import WALL_CLOCK
 
 
 @dataclass
@@ -10,6 +12,7 @@ class TokenBucket:
     refill_per_sec: float
     tokens: float = 0.0
     last_refill_ms: int = 0
+    clock: Optional[Any] = None  # `now_ms()` source when `allow` gets no now_ms (default: wall clock)
 
     def _refill(self, now_ms: int) -> None:
         if self.last_refill_ms == 0:
@@ -23,7 +26,7 @@ class TokenBucket:
         self.last_refill_ms = now_ms
 
     def allow(self, amount: float = 1.0, now_ms: int | None = None) -> bool:
-        now_ms = now_ms or int(time.time() * 1000)
+        now_ms = now_ms or (self.clock or WALL_CLOCK).now_ms()
         self._refill(now_ms)
         if self.tokens >= amount:
             self.tokens -= amount
@@ -1,16 +1,33 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
+import functools
 import json
 import time
-from typing import List, Optional, Callable
+from typing import Any, Dict, List, Optional, Callable, Tuple
 import uuid
 import inspect
 
-from polybot.exec.planning import ExecutionPlan
-from polybot.adapters.polymarket.relayer import OrderRequest, FakeRelayer, OrderAck
-from polybot.storage.orders import persist_orders_and_fills, mark_canceled_by_client_oids
-from polybot.observability.metrics import inc, inc_labelled, Timer
+from polybot.exec.ledger import PositionLedger
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.adapters.polymarket.relayer import OrderRequest, OrderAck, RelayerCapabilities, RelayerProtocol, resolve_capabilities
+from polybot.storage.orders import mark_canceled_by_client_oids, persist_orders_and_fills, update_canceled_by_client_oids, write_orders_and_fills
+from polybot.storage.db import is_memory_db
+from polybot.observability import tracing
+from polybot.observability.metrics import Histogram, counter_family, histogram, inc, inc_labelled
+
+
+# per-plan labelled counters, cached per market (registered on first use)
+_ORDERS_PLACED = counter_family("orders_placed", "market")
+_ORDERS_FILLED = counter_family("orders_filled", "market")
+_RELAYER_ACKS = counter_family("relayer_acks", "market", "status")
+_ACKS_ACCEPTED = counter_family("relayer_acks_accepted", "market")
+_ACKS_REJECTED = counter_family("relayer_acks_rejected", "market")
+_PLAN_MS_SUM = counter_family("engine_execute_plan_ms_sum", "market")
+_PLAN_COUNT = counter_family("engine_execute_plan_count", "market")
+_PLACE_MS_SUM = counter_family("engine_place_ms_sum", "market")
 
 
 @dataclass
@@ -19,22 +36,87 @@ class ExecutionResult:
     fully_filled: bool
 
 
+def insert_exec_audit(con, row: tuple) -> None:
+    """Insert one exec_audit row (ts_ms, plan_id, duration_ms, place_call_ms, ack_latency_ms, request_id, rationale, profit, intents_json, acks_json) without committing."""
+    try:
+        con.execute(
+            "INSERT INTO exec_audit (ts_ms, plan_id, duration_ms, place_call_ms, ack_latency_ms, request_id, plan_rationale, expected_profit, intents_json, acks_json) VALUES (?,?,?,?,?,?,?,?,?,?)",
+            row,
+        )
+    except Exception:
+        # Fallback to old schema if new columns are not present
+        con.execute(
+            "INSERT INTO exec_audit (ts_ms, plan_id, duration_ms, place_call_ms, ack_latency_ms, plan_rationale, expected_profit, intents_json, acks_json) VALUES (?,?,?,?,?,?,?,?,?)",
+            row[:5] + row[6:],
+        )
+
+
+def write_exec_audit(con, row: tuple) -> None:
+    """Insert one exec_audit row (see `insert_exec_audit`) and commit."""
+    insert_exec_audit(con, row)
+    con.commit()
+
+
 class ExecutionEngine:
-    def __init__(self, relayer: FakeRelayer, audit_db=None, max_retries: int = 0, retry_sleep_ms: int = 0, sleeper: Optional[Callable[[int], None]] = None):
+    """Place plans through a relayer and persist orders/fills/audit rows.
+
+    With a `writer` (`polybot.storage.writer.StorageWriter`) persistence is queued to the
+    background writer thread instead of running inline on `audit_db`; `audit_db` stays the
+    read connection used by strategies for metadata and risk checks.
+
+    Relayer capabilities (`RelayerCapabilities`) are resolved when the relayer is assigned,
+    so the placement path does no reflection; requests are split into `max_batch` chunks.
+
+    `ledger` (a `PositionLedger`, rebuilt from `audit_db` when not given) is updated from
+    every ack and is what strategies' exposure checks read.
+    """
+
+    def __init__(self, relayer: RelayerProtocol, audit_db=None, max_retries: int = 0, retry_sleep_ms: int = 0, sleeper: Optional[Callable[[int], None]] = None, writer=None, ledger: Optional[PositionLedger] = None):
         self.relayer = relayer
         self.audit_db = audit_db
+        self.writer = writer
+        if ledger is None:
+            ledger = PositionLedger()
+            if audit_db is not None:
+                try:
+                    ledger.rebuild(audit_db)
+                except Exception:
+                    pass
+        self.ledger = ledger
         self.max_retries = max(0, int(max_retries))
         self.retry_sleep_ms = max(0, int(retry_sleep_ms))
         self._sleeper = sleeper
+        self._execute_plan_us = histogram("engine_execute_plan_us")
+        # market -> (engine_place_call_us, engine_ack_us) histogram handles
+        self._call_hists: Dict[str, Tuple[Histogram, Histogram]] = {}
 
-    def execute_plan(self, plan: ExecutionPlan) -> ExecutionResult:
+    @property
+    def relayer(self) -> RelayerProtocol:
+        return self._relayer
+
+    @relayer.setter
+    def relayer(self, relayer: RelayerProtocol) -> None:
+        self._relayer = relayer
+        self.capabilities: RelayerCapabilities = resolve_capabilities(relayer)
+
+    def _batches(self, reqs: List[OrderRequest]) -> List[List[OrderRequest]]:
+        n = self.capabilities.max_batch
+        if not n or len(reqs) <= n:
+            return [reqs]
+        return [reqs[i : i + n] for i in range(0, len(reqs), n)]
+
+    def _prepare(self, plan: ExecutionPlan) -> tuple[str, List[OrderRequest]]:
         # Ensure plan_id for idempotency/audit
         plan_id = plan.plan_id or uuid.uuid4().hex
         # Populate client_order_id if missing
         for idx, it in enumerate(plan.intents):
             if not it.client_order_id:
                 it.client_order_id = f"p-{plan_id[:8]}-{idx}-{it.side[0]}-{it.outcome_id}"
-        reqs = [
+        return plan_id, self._requests(plan.intents)
+
+    @staticmethod
+    def _requests(intents: List[OrderIntent]) -> List[OrderRequest]:
+        return [
             OrderRequest(
                 market_id=i.market_id,
                 outcome_id=i.outcome_id,
@@ -44,130 +126,173 @@ class ExecutionEngine:
                 tif=i.tif,  # type: ignore[arg-type]
                 client_order_id=i.client_order_id,
             )
-            for i in plan.intents
+            for i in intents
         ]
-        start_perf = time.perf_counter()
-        with Timer("engine_execute_plan"):
-            # Pass idempotency_prefix if relayer supports it
-            acks: List[OrderAck]
-            attempt = 0
-            last_call_dur_ms = 0
-            while True:
-                try:
-                    call_start = time.perf_counter()
-                    sig = inspect.signature(self.relayer.place_orders)  # type: ignore[attr-defined]
-                    if "idempotency_prefix" in sig.parameters:
-                        acks = self.relayer.place_orders(reqs, idempotency_prefix=plan_id)  # type: ignore[arg-type]
-                    else:
-                        acks = self.relayer.place_orders(reqs)  # type: ignore[call-arg]
-                    call_dur_ms = int((time.perf_counter() - call_start) * 1000)
-                    last_call_dur_ms = call_dur_ms
-                    # labelled duration per market for the relayer call itself
-                    for mid in set(i.market_id for i in plan.intents):
-                        inc_labelled("engine_place_call_ms_sum", {"market": mid}, call_dur_ms)
-                        inc_labelled("engine_place_call_count", {"market": mid}, 1)
-                        # ack latency (in this synchronous model equals call duration)
-                        inc_labelled("engine_ack_ms_sum", {"market": mid}, call_dur_ms)
-                        inc_labelled("engine_ack_count", {"market": mid}, 1)
-                    break
-                except (TypeError, ValueError, AttributeError):
-                    call_start = time.perf_counter()
-                    acks = self.relayer.place_orders(reqs)  # type: ignore[call-arg]
-                    call_dur_ms = int((time.perf_counter() - call_start) * 1000)
-                    last_call_dur_ms = call_dur_ms
-                    for mid in set(i.market_id for i in plan.intents):
-                        inc_labelled("engine_place_call_ms_sum", {"market": mid}, call_dur_ms)
-                        inc_labelled("engine_place_call_count", {"market": mid}, 1)
-                        inc_labelled("engine_ack_ms_sum", {"market": mid}, call_dur_ms)
-                        inc_labelled("engine_ack_count", {"market": mid}, 1)
-                    break
-                except Exception:
-                    attempt += 1
-                    for mid in set(i.market_id for i in plan.intents):
-                        inc_labelled("engine_retries", {"market": mid}, 1)
-                    if attempt > self.max_retries:
-                        # count error per market(s)
-                        for mid in set(i.market_id for i in plan.intents):
-                            inc_labelled("engine_errors", {"market": mid}, 1)
-                        raise
-                    if self._sleeper:
-                        try:
-                            self._sleeper(self.retry_sleep_ms)
-                        except Exception:
-                            pass
-                    else:
-                        import time as _t
 
-                        _t.sleep(self.retry_sleep_ms / 1000.0)
+    def presign_orders(self, intents: List[OrderIntent]) -> int:
+        """Hand likely next orders to a relayer that can sign ahead of time; returns how many were queued."""
+        if not self.capabilities.presign:
+            return 0
+        try:
+            return int(self._relayer.presign_orders(self._requests(intents)) or 0)  # type: ignore[attr-defined]
+        except Exception:
+            inc("engine_presign_errors", 1)
+            return 0
+
+    def _place(self, reqs: List[OrderRequest], plan_id: str, acks: Optional[List[OrderAck]] = None) -> List[OrderAck]:
+        """Place `reqs` batch by batch, appending to `acks`.
+
+        Requests already acked in `acks` (from an earlier attempt) are skipped, so a retry
+        re-sends only the batch that failed and the ones after it.
+        """
+        place = self._relayer.place_orders
+        idem = self.capabilities.idempotency
+        if acks is None:
+            acks = []
+        for batch in self._batches(reqs[len(acks) :]):
+            # Pass idempotency_prefix only if the relayer supports it
+            acks.extend(place(batch, idempotency_prefix=plan_id) if idem else place(batch))  # type: ignore[call-arg]
+        return acks
+
+    def _record_call(self, plan: ExecutionPlan, call_dur_us: int) -> None:
+        # per-market latency histograms for the relayer call itself
+        for mid in set(i.market_id for i in plan.intents):
+            hists = self._call_hists.get(mid)
+            if hists is None:
+                hists = self._call_hists[mid] = (histogram("engine_place_call_us", market=mid), histogram("engine_ack_us", market=mid))
+            hists[0].record(call_dur_us)
+            # ack latency (in this synchronous model equals call duration)
+            hists[1].record(call_dur_us)
+
+    def _record_failure(self, plan: ExecutionPlan, attempt: int) -> bool:
+        """Count a failed attempt; returns True when retries are exhausted."""
+        for mid in set(i.market_id for i in plan.intents):
+            inc_labelled("engine_retries", {"market": mid}, 1)
+        if attempt > self.max_retries:
+            # count error per market(s)
+            for mid in set(i.market_id for i in plan.intents):
+                inc_labelled("engine_errors", {"market": mid}, 1)
+            return True
+        return False
+
+    def _finish(self, plan: ExecutionPlan, reqs: List[OrderRequest], acks: List[OrderAck], start_perf: float) -> ExecutionResult:
         fully = all(a.remaining_size == 0.0 and a.accepted for a in acks)
+        self.ledger.apply_acks(plan.intents, acks)
         inc("orders_placed", len(reqs))
         inc("orders_filled", sum(1 for a in acks if a.remaining_size == 0.0 and a.accepted))
         # labelled per-market counters
         for it, ack in zip(plan.intents, acks):
-            inc_labelled("orders_placed", {"market": it.market_id}, 1)
+            mid = it.market_id
+            _ORDERS_PLACED.labels(mid).inc(1)
             if ack.remaining_size == 0.0 and ack.accepted:
-                inc_labelled("orders_filled", {"market": it.market_id}, 1)
+                _ORDERS_FILLED.labels(mid).inc(1)
             # Relayer ack metrics by status and acceptance
             try:
-                inc_labelled("relayer_acks", {"market": it.market_id, "status": str(ack.status)}, 1)
+                _RELAYER_ACKS.labels(mid, str(ack.status)).inc(1)
                 if ack.accepted:
-                    inc_labelled("relayer_acks_accepted", {"market": it.market_id}, 1)
+                    _ACKS_ACCEPTED.labels(mid).inc(1)
                 else:
-                    inc_labelled("relayer_acks_rejected", {"market": it.market_id}, 1)
+                    _ACKS_REJECTED.labels(mid).inc(1)
             except Exception:
                 pass
         # labelled duration per market (same duration applied to all intents' markets in this simple model)
         dur_ms = int((time.perf_counter() - start_perf) * 1000)
         seen_markets = set(i.market_id for i in plan.intents)
         for mid in seen_markets:
-            inc_labelled("engine_execute_plan_ms_sum", {"market": mid}, dur_ms)
-            inc_labelled("engine_execute_plan_count", {"market": mid}, 1)
-            inc_labelled("engine_place_ms_sum", {"market": mid}, dur_ms)
-        result = ExecutionResult(acks=acks, fully_filled=fully)
+            _PLAN_MS_SUM.labels(mid).inc(dur_ms)
+            _PLAN_COUNT.labels(mid).inc(1)
+            _PLACE_MS_SUM.labels(mid).inc(dur_ms)
+        return ExecutionResult(acks=acks, fully_filled=fully)
+
+    def _acked_part(self, plan: ExecutionPlan, reqs: List[OrderRequest], acks: List[OrderAck]) -> tuple[ExecutionPlan, List[OrderRequest]]:
+        """The prefix of `plan` that was acked before retries ran out (batches that succeeded)."""
+        for mid in set(i.market_id for i in plan.intents):
+            inc_labelled("engine_partial_plans", {"market": mid}, 1)
+        return replace(plan, intents=plan.intents[: len(acks)]), reqs[: len(acks)]
+
+    def _persist(self, plan: ExecutionPlan, plan_id: str, acks: List[OrderAck], start_perf: float, last_call_dur_ms: int) -> None:
+        if self.writer is None and self.audit_db is None:
+            return
         # persist orders/fills if DB configured
-        if self.audit_db is not None:
-            try:
+        try:
+            if self.writer is not None:
+                self.writer.submit("orders", write_orders_and_fills, list(plan.intents), list(acks))
+            else:
                 persist_orders_and_fills(self.audit_db, plan.intents, acks)
-            except Exception:
-                pass
+        except Exception:
+            pass
         # optional audit persistence
-        if self.audit_db is not None:
-            try:
-                ts_ms = int(time.time() * 1000)
-                duration_ms = int((time.perf_counter() - start_perf) * 1000)
-                intents_json = json.dumps([i.__dict__ for i in plan.intents])
-                acks_json = json.dumps([a.__dict__ for a in acks])
-                req_id = uuid.uuid4().hex
+        try:
+            ts_ms = int(time.time() * 1000)
+            duration_ms = int((time.perf_counter() - start_perf) * 1000)
+            intents_json = json.dumps([i.__dict__ for i in plan.intents])
+            acks_json = json.dumps([a.__dict__ for a in acks])
+            req_id = uuid.uuid4().hex
+            row = (
+                ts_ms,
+                plan_id,
+                duration_ms,
+                last_call_dur_ms,
+                last_call_dur_ms,
+                req_id,
+                plan.rationale,
+                plan.expected_profit,
+                intents_json,
+                acks_json,
+            )
+            if self.writer is not None:
+                self.writer.submit("exec_audit", insert_exec_audit, row)
+            else:
+                write_exec_audit(self.audit_db, row)
+        except Exception:
+            pass
+
+    def execute_plan(self, plan: ExecutionPlan) -> ExecutionResult:
+        plan_id, reqs = self._prepare(plan)
+        start_perf = time.perf_counter()
+        start_ns = time.perf_counter_ns()
+        try:
+            # acks accumulate across attempts: a retry resumes at the first unacked batch
+            acks: List[OrderAck] = []
+            attempt = 0
+            last_call_dur_ms = 0
+            while True:
                 try:
-                    self.audit_db.execute(
-                        "INSERT INTO exec_audit (ts_ms, plan_id, duration_ms, place_call_ms, ack_latency_ms, request_id, plan_rationale, expected_profit, intents_json, acks_json) VALUES (?,?,?,?,?,?,?,?,?,?)",
-                        (
-                            ts_ms,
-                            plan_id,
-                            duration_ms,
-                            last_call_dur_ms,
-                            last_call_dur_ms,
-                            req_id,
-                            plan.rationale,
-                            plan.expected_profit,
-                            intents_json,
-                            acks_json,
-                        ),
-                    )
+                    tracing.stamp(tracing.SEND)
+                    call_start = time.perf_counter()
+                    self._place(reqs, plan_id, acks)
+                    tracing.stamp(tracing.ACK)
+                    call_dur_us = int((time.perf_counter() - call_start) * 1e6)
+                    last_call_dur_ms = call_dur_us // 1000
+                    self._record_call(plan, call_dur_us)
+                    break
                 except Exception:
-                    # Fallback to old schema if new columns are not present
-                    self.audit_db.execute(
-                        "INSERT INTO exec_audit (ts_ms, plan_id, duration_ms, place_call_ms, ack_latency_ms, plan_rationale, expected_profit, intents_json, acks_json) VALUES (?,?,?,?,?,?,?,?,?)",
-                        (ts_ms, plan_id, duration_ms, last_call_dur_ms, last_call_dur_ms, plan.rationale, plan.expected_profit, intents_json, acks_json),
-                    )
-                self.audit_db.commit()
-            except Exception:
-                pass
+                    attempt += 1
+                    if self._record_failure(plan, attempt):
+                        if acks:
+                            # orders from batches that did go through are live: keep them
+                            part, part_reqs = self._acked_part(plan, reqs, acks)
+                            self._finish(part, part_reqs, acks, start_perf)
+                            self._persist(part, plan_id, acks, start_perf, last_call_dur_ms)
+                        raise
+                    if self._sleeper:
+                        try:
+                            self._sleeper(self.retry_sleep_ms)
+                        except Exception:
+                            pass
+                    else:
+                        import time as _t
+
+                        _t.sleep(self.retry_sleep_ms / 1000.0)
+        finally:
+            self._execute_plan_us.record((time.perf_counter_ns() - start_ns) // 1000)
+        result = self._finish(plan, reqs, acks, start_perf)
+        self._persist(plan, plan_id, acks, start_perf, last_call_dur_ms)
         return result
 
     def cancel_client_orders(self, client_order_ids: List[str]) -> None:
         # call relayer cancel if available
-        if hasattr(self.relayer, "cancel_client_orders"):
+        if self.capabilities.cancel:
             try:
                 import time as _t
                 from polybot.observability.metrics import inc
@@ -180,8 +305,188 @@ class ExecutionEngine:
             except Exception:
                 pass
         # update DB statuses
-        if self.audit_db is not None:
+        if self.writer is not None:
+            try:
+                self.writer.submit("orders", update_canceled_by_client_oids, list(client_order_ids))
+            except Exception:
+                pass
+        elif self.audit_db is not None:
             try:
                 mark_canceled_by_client_oids(self.audit_db, client_order_ids)
             except Exception:
                 pass
+
+
+
+class _NullRelayer:
+    capabilities = RelayerCapabilities(idempotency=True, cancel=True)
+
+    def place_orders(self, reqs: List[OrderRequest], idempotency_prefix: Optional[str] = None) -> List[OrderAck]:
+        return [OrderAck(order_id="b", accepted=True, remaining_size=r.size, client_order_id=r.client_order_id) for r in reqs]
+
+    def cancel_client_orders(self, client_order_ids: List[str]) -> list:
+        return []
+
+
+def benchmark_plan_overhead(rounds: int = 10000, intents: int = 2) -> Dict[str, Any]:
+    """Per-plan relayer dispatch cost: per-call `inspect.signature` vs capabilities resolved once.
+
+    Uses a no-op relayer so only engine overhead is measured; `execute_plan_ns` is the whole
+    `execute_plan` (metrics included) with the cached dispatch.
+    """
+    rounds = max(1, int(rounds))
+    engine = ExecutionEngine(_NullRelayer())
+    plan = ExecutionPlan(
+        intents=[OrderIntent(market_id="bench", outcome_id=f"o{i}", side="buy", price=0.5, size=1.0) for i in range(max(1, int(intents)))],
+        expected_profit=0.0,
+        rationale="bench",
+    )
+    plan_id, reqs = engine._prepare(plan)
+    relayer = engine.relayer
+
+    def _reflect() -> List[OrderAck]:
+        # the per-plan detection previously done on every execute_plan
+        if "idempotency_prefix" in inspect.signature(relayer.place_orders).parameters:
+            return relayer.place_orders(reqs, idempotency_prefix=plan_id)
+        return relayer.place_orders(reqs)
+
+    out: Dict[str, Any] = {"rounds": rounds, "intents": len(reqs)}
+    for name, fn in (("reflect", _reflect), ("cached", lambda: engine._place(reqs, plan_id))):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            fn()
+        out[f"{name}_ns_per_plan"] = int((time.perf_counter() - start) * 1e9 / rounds)
+    start = time.perf_counter()
+    for _ in range(rounds):
+        engine.execute_plan(plan)
+    out["execute_plan_ns"] = int((time.perf_counter() - start) * 1e9 / rounds)
+    out["dispatch_speedup"] = round(out["reflect_ns_per_plan"] / max(1, out["cached_ns_per_plan"]), 2)
+    return out
+
+
+class AsyncExecutionEngine(ExecutionEngine):
+    """`ExecutionEngine` whose relayer I/O never blocks the event loop.
+
+    Relayer calls go to `place_orders_async`/`cancel_client_orders_async` when the relayer
+    provides them, otherwise to a bounded thread pool (`max_workers`; relayers must then
+    tolerate that many concurrent calls). Retry back-off uses `asyncio.sleep` (or an
+    injected `sleeper`, which may be a coroutine function). Order/fill/audit persistence is
+    queued to `writer`, whose thread does the SQL, so a file-backed `audit_db` requires a
+    `StorageWriter` (`ValueError` otherwise). An in-memory `audit_db` (tests, replays) cannot
+    be shared with another thread; its writes are deferred with `loop.call_soon` until after
+    the result is returned and still run on the loop. Metrics are the same as
+    `ExecutionEngine.execute_plan`. The synchronous `execute_plan`/`cancel_client_orders`
+    remain available.
+    """
+
+    def __init__(self, relayer: RelayerProtocol, audit_db=None, max_retries: int = 0, retry_sleep_ms: int = 0, sleeper: Optional[Callable[[int], Any]] = None, writer=None, max_workers: int = 4, ledger: Optional[PositionLedger] = None):
+        if writer is None and audit_db is not None and not is_memory_db(audit_db):
+            raise ValueError("AsyncExecutionEngine needs a StorageWriter for a file-backed audit_db")
+        super().__init__(relayer, audit_db=audit_db, max_retries=max_retries, retry_sleep_ms=retry_sleep_ms, sleeper=sleeper, writer=writer, ledger=ledger)
+        self.max_workers = max(1, int(max_workers))
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="polybot-engine")
+        return self._executor
+
+    async def _run_io(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(), functools.partial(fn, *args, **kwargs))
+
+    async def _place_async(self, reqs: List[OrderRequest], plan_id: str, acks: Optional[List[OrderAck]] = None) -> List[OrderAck]:
+        if acks is None:
+            acks = []
+        if not self.capabilities.async_place:
+            return await self._run_io(self._place, reqs, plan_id, acks)
+        native = self._relayer.place_orders_async  # type: ignore[attr-defined]
+        idem = self.capabilities.idempotency
+        for batch in self._batches(reqs[len(acks) :]):
+            acks.extend(await native(batch, idempotency_prefix=plan_id) if idem else await native(batch))
+        return acks
+
+    async def _retry_sleep(self) -> None:
+        if self._sleeper:
+            try:
+                out = self._sleeper(self.retry_sleep_ms)
+                if inspect.isawaitable(out):
+                    await out
+            except Exception:
+                pass
+        else:
+            await asyncio.sleep(self.retry_sleep_ms / 1000.0)
+
+    async def execute_plan_async(self, plan: ExecutionPlan) -> ExecutionResult:
+        plan_id, reqs = self._prepare(plan)
+        start_perf = time.perf_counter()
+        start_ns = time.perf_counter_ns()
+        try:
+            acks: List[OrderAck] = []
+            attempt = 0
+            last_call_dur_ms = 0
+            while True:
+                try:
+                    tracing.stamp(tracing.SEND)
+                    call_start = time.perf_counter()
+                    await self._place_async(reqs, plan_id, acks)
+                    tracing.stamp(tracing.ACK)
+                    call_dur_us = int((time.perf_counter() - call_start) * 1e6)
+                    last_call_dur_ms = call_dur_us // 1000
+                    self._record_call(plan, call_dur_us)
+                    break
+                except Exception:
+                    attempt += 1
+                    if self._record_failure(plan, attempt):
+                        if acks:
+                            part, part_reqs = self._acked_part(plan, reqs, acks)
+                            self._finish(part, part_reqs, acks, start_perf)
+                            self._persist_soon(part, plan_id, acks, start_perf, last_call_dur_ms)
+                        raise
+                    await self._retry_sleep()
+        finally:
+            self._execute_plan_us.record((time.perf_counter_ns() - start_ns) // 1000)
+        result = self._finish(plan, reqs, acks, start_perf)
+        self._persist_soon(plan, plan_id, acks, start_perf, last_call_dur_ms)
+        return result
+
+    def _persist_soon(self, plan: ExecutionPlan, plan_id: str, acks: List[OrderAck], start_perf: float, last_call_dur_ms: int) -> None:
+        if self.writer is not None:
+            # queueing is cheap; doing it now keeps writer order aligned with the ledger
+            self._persist(plan, plan_id, acks, start_perf, last_call_dur_ms)
+        elif self.audit_db is not None:
+            # in-memory only (see __init__): the connection is bound to the loop thread
+            asyncio.get_running_loop().call_soon(self._persist, plan, plan_id, acks, start_perf, last_call_dur_ms)
+
+    async def cancel_client_orders_async(self, client_order_ids: List[str]) -> None:
+        caps = self.capabilities
+        if caps.async_cancel or caps.cancel:
+            try:
+                _start = time.perf_counter()
+                if caps.async_cancel:
+                    await self._relayer.cancel_client_orders_async(client_order_ids)  # type: ignore[attr-defined]
+                else:
+                    await self._run_io(self._relayer.cancel_client_orders, client_order_ids)
+                dur_ms = int((time.perf_counter() - _start) * 1000)
+                inc("relayer_cancel_count", len(client_order_ids))
+                inc("relayer_cancel_ms_sum", dur_ms)
+            except Exception:
+                pass
+        if self.writer is not None:
+            try:
+                self.writer.submit("orders", update_canceled_by_client_oids, list(client_order_ids))
+            except Exception:
+                pass
+        elif self.audit_db is not None:
+            asyncio.get_running_loop().call_soon(self._mark_canceled, list(client_order_ids))
+
+    def _mark_canceled(self, client_order_ids: List[str]) -> None:
+        try:
+            mark_canceled_by_client_oids(self.audit_db, client_order_ids)
+        except Exception:
+            pass
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from polybot.observability.metrics import inc, inc_labelled
+
+
+Key = Tuple[str, str]  # (market_id, outcome_id)
+
+
+def compute_positions(con: sqlite3.Connection) -> Dict[Key, float]:
+    """Net filled size per (market, outcome) from the orders/fills tables, in one pass."""
+    rows = con.execute(
+        """
+        SELECT o.market_id, o.outcome_id, SUM(CASE WHEN o.side='buy' THEN f.size ELSE -f.size END)
+        FROM fills f JOIN orders o ON f.order_id=o.order_id
+        GROUP BY o.market_id, o.outcome_id
+        """
+    ).fetchall()
+    return {(str(m), str(o)): float(v or 0.0) for m, o, v in rows}
+
+
+class PositionLedger:
+    """Incrementally maintained net position per (market, outcome).
+
+    Updated from execution acks as they arrive, so risk checks cost O(intents) instead of
+    aggregating the whole fills history. `rebuild` loads positions from the DB (startup);
+    `reconcile` compares with the DB, corrects drifted outcomes and reports them (see
+    `reconcile_ledger` for reconciling while persistence is still in flight).
+
+    Metrics: `ledger_rebuild_ms_sum`/`ledger_rebuild_count`, `ledger_reconcile_runs`,
+    `ledger_reconcile_drift{market}` (outcomes whose position had drifted).
+    """
+
+    def __init__(self, positions: Dict[Key, float] | None = None):
+        self._pos: Dict[Key, float] = dict(positions or {})
+
+    @classmethod
+    def from_db(cls, con: sqlite3.Connection) -> "PositionLedger":
+        ledger = cls()
+        ledger.rebuild(con)
+        return ledger
+
+    def rebuild(self, con: sqlite3.Connection) -> None:
+        start = time.perf_counter()
+        self._pos = compute_positions(con)
+        inc("ledger_rebuild_ms_sum", int((time.perf_counter() - start) * 1000))
+        inc("ledger_rebuild_count", 1)
+
+    def position(self, market_id: str, outcome_id: str) -> float:
+        return self._pos.get((market_id, outcome_id), 0.0)
+
+    def positions(self) -> Dict[Key, float]:
+        return dict(self._pos)
+
+    def apply_fill(self, market_id: str, outcome_id: str, side: str, size: float) -> None:
+        key = (market_id, outcome_id)
+        self._pos[key] = self._pos.get(key, 0.0) + (size if side == "buy" else -size)
+
+    def apply_acks(self, intents: Iterable, acks: Iterable) -> None:
+        """Apply the fills reported in `acks` (paired with their `OrderIntent`s)."""
+        for intent, ack in zip(intents, acks):
+            if ack.filled_size and ack.filled_size > 0:
+                self.apply_fill(intent.market_id, intent.outcome_id, intent.side, ack.filled_size)
+
+    def correct(self, snapshot: Dict[Key, float], db: Dict[Key, float], tolerance: float = 1e-9) -> List[Tuple[Key, float, float]]:
+        """Shift positions by `db - snapshot` where they differ; returns `(key, snapshot, db)` per drifted outcome.
+
+        `snapshot` must be the ledger's positions at the point `db` was read, so fills applied
+        since then are kept.
+        """
+        drift: List[Tuple[Key, float, float]] = []
+        for key in set(db) | set(snapshot):
+            mine = snapshot.get(key, 0.0)
+            theirs = db.get(key, 0.0)
+            if abs(mine - theirs) > tolerance:
+                drift.append((key, mine, theirs))
+                self._pos[key] = self._pos.get(key, 0.0) + (theirs - mine)
+                inc_labelled("ledger_reconcile_drift", {"market": key[0]}, 1)
+        inc("ledger_reconcile_runs", 1)
+        return sorted(drift)
+
+    def reconcile(self, con: sqlite3.Connection, tolerance: float = 1e-9) -> List[Tuple[Key, float, float]]:
+        """Adopt the DB's positions; returns `(key, ledger_value, db_value)` for drifted outcomes."""
+        return self.correct(self.positions(), compute_positions(con), tolerance)
+
+
+async def reconcile_ledger(ledger: PositionLedger, con: sqlite3.Connection, writer=None, tolerance: float = 1e-9) -> List[Tuple[Key, float, float]]:
+    """Reconcile without mistaking in-flight persistence for drift.
+
+    With a `StorageWriter` the DB read is queued behind every write submitted before the
+    snapshot (same connection, FIFO). Without one, yielding once lets deferred inline writes
+    (`AsyncExecutionEngine`) for the snapshotted fills land first.
+    """
+    snapshot = ledger.positions()
+    if writer is not None:
+        db = await writer.submit_async("ledger", compute_positions)
+    else:
+        await asyncio.sleep(0)
+        db = compute_positions(con)
+    return ledger.correct(snapshot, db, tolerance)
@@ -19,7 +19,8 @@ def compute_inventory(con: sqlite3.Connection, market_id: str, outcome_id: str)
     return float(row[0] if row and row[0] is not None else 0.0)
 
 
-def will_exceed_exposure(con: sqlite3.Connection, plan: ExecutionPlan, cap_per_outcome: float) -> Tuple[bool, float]:
+def will_exceed_exposure(con: sqlite3.Connection, plan: ExecutionPlan, cap_per_outcome: float, ledger=None) -> Tuple[bool, float]:
+    """Check per-outcome exposure after `plan`; positions come from `ledger` (a `PositionLedger`) when given, else SQL."""
     # Aggregate intents by outcome with sign (buy +, sell -)
     pend: dict[Tuple[str, str], float] = {}
     for it in plan.intents:
@@ -28,7 +29,7 @@ def will_exceed_exposure(con: sqlite3.Connection, plan: ExecutionPlan, cap_per_o
         pend[key] = pend.get(key, 0.0) + signed
     # Check each outcome
     for (mid, oid), delta in pend.items():
-        inv = compute_inventory(con, mid, oid)
+        inv = ledger.position(mid, oid) if ledger is not None else compute_inventory(con, mid, oid)
         if abs(inv + delta) > cap_per_outcome:
             return True, inv
     return False, 0.0
@@ -2,11 +2,41 @@ from __future__ import annotations
 
 import time
 from dataclasses import dataclass
-from typing import Any, Dict
+from typing import Any, Dict, List, Tuple
 
 import sqlite3
 
 from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+from polybot.observability.metrics import inc_labelled
+
+
+_INSERT_EVENT = "INSERT INTO orderbook_events (market_id, seq, ts_ms, side, price, size_delta, op) VALUES (?,?,?,?,?,?,?)"
+_INSERT_SNAPSHOT = "INSERT INTO orderbook_snapshots (market_id, ts_ms, seq, best_bid, best_ask, mid, checksum) VALUES (?,?,?,?,?,?,?)"
+_UPSERT_STATUS = """
+    INSERT INTO market_status (market_id, last_seq, last_update_ts_ms, snapshots, deltas)
+    VALUES (?, ?, ?, ?, ?)
+    ON CONFLICT(market_id) DO UPDATE SET
+        last_seq=excluded.last_seq,
+        last_update_ts_ms=excluded.last_update_ts_ms,
+        snapshots=market_status.snapshots + (excluded.snapshots - market_status.snapshots),
+        deltas=market_status.deltas + (excluded.deltas - market_status.deltas)
+    """
+
+
+def _insert_rows(con: sqlite3.Connection, events: List[Tuple[Any, ...]], snapshots: List[Tuple[Any, ...]], status: Tuple[Any, ...] | None) -> None:
+    # no commit: the StorageWriter commits each drained batch once, `_write_rows` commits inline
+    if events:
+        con.executemany(_INSERT_EVENT, events)
+    if snapshots:
+        con.executemany(_INSERT_SNAPSHOT, snapshots)
+    if status is not None:
+        # Update market_status once per transaction with the latest state
+        con.execute(_UPSERT_STATUS, status)
+
+
+def _write_rows(con: sqlite3.Connection, events: List[Tuple[Any, ...]], snapshots: List[Tuple[Any, ...]], status: Tuple[Any, ...] | None) -> None:
+    _insert_rows(con, events, snapshots, status)
+    con.commit()
 
 
 @dataclass
@@ -16,89 +46,169 @@ class IngestionStats:
 
 
 class OrderbookIngestor:
-    def __init__(self, con: sqlite3.Connection, market_id: str):
+    """Apply orderbook messages to the assembler and persist events/snapshots.
+
+    By default every message is written and committed immediately. With `batch_size > 0`
+    or `flush_interval_ms > 0` the ingestor runs in group-commit mode: event and snapshot
+    rows are buffered and written with `executemany` in one transaction (plus a single
+    `market_status` upsert) once either threshold is reached. Call `flush()` on shutdown;
+    `prune_events_before` and `persist_snapshot_now` flush first.
+
+    With a `writer` (`polybot.storage.writer.StorageWriter`) each flush is handed to the
+    background writer thread instead of executing on `con`, so the event loop never waits
+    on SQLite; use `prune_events_before_async` from async code in that mode.
+
+    With an `event_log` (`polybot.storage.eventlog.EventLog`) snapshot and delta levels are
+    appended to its mmap segments instead of `orderbook_events`; SQLite then only receives
+    snapshot summaries and `market_status`, and pruning drops aged-out log segments. Only
+    messages the assembler accepted are logged, so replaying the log rebuilds the live book.
+    """
+
+    def __init__(self, con: sqlite3.Connection, market_id: str, batch_size: int = 0, flush_interval_ms: int = 0, writer=None, event_log=None):
         self.con = con
+        self.writer = writer
+        self.event_log = event_log
         self.market_id = market_id
         self.assembler = OrderbookAssembler(market_id)
         self.last_update_ts_ms: int = 0
         self.stats = IngestionStats()
+        self.batch_size = max(0, int(batch_size))
+        self.flush_interval_ms = max(0, int(flush_interval_ms))
+        self._event_rows: List[Tuple[Any, ...]] = []
+        self._snapshot_rows: List[Tuple[Any, ...]] = []
+        self._status_dirty = False
+        self._last_flush_perf = time.perf_counter()
+
+    @property
+    def buffered(self) -> bool:
+        return self.batch_size > 0 or self.flush_interval_ms > 0
+
+    def pending_rows(self) -> int:
+        return len(self._event_rows) + len(self._snapshot_rows)
 
     def process(self, msg: Dict[str, Any], ts_ms: int | None = None) -> None:
         ts_ms = ts_ms or int(time.time() * 1000)
         typ = msg.get("type")
         if typ == "snapshot":
             book = self.assembler.apply_snapshot(msg)
+            if self.event_log is not None:
+                self.event_log.append_message(self.market_id, msg, ts_ms)
             bb = book.best_bid()
             ba = book.best_ask()
             best_bid = bb.price if bb else None
             best_ask = ba.price if ba else None
             mid = (best_bid + best_ask) / 2.0 if (best_bid is not None and best_ask is not None) else None
             checksum = f"b{len(msg.get('bids') or [])}a{len(msg.get('asks') or [])}"
-            self.con.execute(
-                "INSERT INTO orderbook_snapshots (market_id, ts_ms, seq, best_bid, best_ask, mid, checksum) VALUES (?,?,?,?,?,?,?)",
-                (self.market_id, ts_ms, book.seq, best_bid, best_ask, mid, checksum),
-            )
+            self._snapshot_rows.append((self.market_id, ts_ms, book.seq, best_bid, best_ask, mid, checksum))
             self.stats.snapshots += 1
         elif typ == "delta":
+            prev_seq = self.assembler._seq
             book = self.assembler.apply_delta(msg)
-            # Persist each bid/ask change in msg to events table
-            for side in ("bids", "asks"):
-                for price, size_delta in msg.get(side, []) or []:
-                    self.con.execute(
-                        "INSERT INTO orderbook_events (market_id, seq, ts_ms, side, price, size_delta, op) VALUES (?,?,?,?,?,?,?)",
-                        (
-                            self.market_id,
-                            book.seq,
-                            ts_ms,
-                            "bid" if side == "bids" else "ask",
-                            float(price),
-                            float(size_delta),
-                            None,
-                        ),
-                    )
+            if self.event_log is not None:
+                # log only what the book accepted: a stale or duplicate delta would be applied on replay
+                if book.seq != prev_seq:
+                    self.event_log.append_message(self.market_id, msg, ts_ms)
+            else:
+                # Persist each bid/ask change in msg to events table
+                seq = book.seq
+                for side, side_tag in (("bids", "bid"), ("asks", "ask")):
+                    for price, size_delta in msg.get(side, []) or []:
+                        self._event_rows.append((self.market_id, seq, ts_ms, side_tag, float(price), float(size_delta), None))
             self.stats.applied += 1
         else:
             # ignore unknown types
             return
         self.last_update_ts_ms = ts_ms
-        # Update market_status
-        self.con.execute(
-            """
-            INSERT INTO market_status (market_id, last_seq, last_update_ts_ms, snapshots, deltas)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(market_id) DO UPDATE SET
-                last_seq=excluded.last_seq,
-                last_update_ts_ms=excluded.last_update_ts_ms,
-                snapshots=market_status.snapshots + (excluded.snapshots - market_status.snapshots),
-                deltas=market_status.deltas + (excluded.deltas - market_status.deltas)
-            """,
-            (
+        self._status_dirty = True
+        if not self.buffered:
+            self._write_pending()
+            return
+        if self.batch_size and self.pending_rows() >= self.batch_size:
+            self.flush()
+        elif self.flush_interval_ms and (time.perf_counter() - self._last_flush_perf) * 1000 >= self.flush_interval_ms:
+            self.flush()
+
+    def _write_pending(self) -> int:
+        rows = len(self._event_rows) + len(self._snapshot_rows)
+        status = None
+        if self._status_dirty:
+            status = (
                 self.market_id,
                 self.assembler._seq,
                 self.last_update_ts_ms,
                 self.stats.snapshots,
                 self.stats.applied,
-            ),
-        )
-        self.con.commit()
+            )
+            self._status_dirty = False
+        events, snapshots = self._event_rows, self._snapshot_rows
+        self._event_rows, self._snapshot_rows = [], []
+        if self.writer is not None:
+            self.writer.submit("orderbook_events", _insert_rows, events, snapshots, status)
+        else:
+            _write_rows(self.con, events, snapshots, status)
+        return rows
+
+    def flush(self) -> int:
+        """Write all buffered rows in a single transaction; returns the number of rows flushed."""
+        self._last_flush_perf = time.perf_counter()
+        if not self._status_dirty and not self._event_rows and not self._snapshot_rows:
+            return 0
+        start = time.perf_counter()
+        rows = self._write_pending()
+        dur_ms = int((time.perf_counter() - start) * 1000)
+        labels = {"market": self.market_id}
+        inc_labelled("ingestion_flush_count", labels, 1)
+        inc_labelled("ingestion_flush_ms_sum", labels, dur_ms)
+        inc_labelled("ingestion_flush_rows_sum", labels, rows)
+        return rows
 
     def persist_snapshot_now(self, ts_ms: int) -> None:
-        book = self.assembler
         # derive best levels from current state
-        ob = book.apply_delta({"seq": book._seq})  # no-op delta to materialize current OrderBook
+        ob = self.assembler.view()
         bb = ob.best_bid()
         ba = ob.best_ask()
         best_bid = bb.price if bb else None
         best_ask = ba.price if ba else None
         mid = (best_bid + best_ask) / 2.0 if (best_bid is not None and best_ask is not None) else None
-        self.con.execute(
-            "INSERT INTO orderbook_snapshots (market_id, ts_ms, seq, best_bid, best_ask, mid, checksum) VALUES (?,?,?,?,?,?,?)",
-            (self.market_id, ts_ms, ob.seq, best_bid, best_ask, mid, None),
-        )
+        self._snapshot_rows.append((self.market_id, ts_ms, ob.seq, best_bid, best_ask, mid, None))
         self.stats.snapshots += 1
-        self.con.commit()
+        if self.buffered:
+            self.flush()
+            return
+        snapshots, self._snapshot_rows = self._snapshot_rows, []
+        if self.writer is not None:
+            self.writer.submit("orderbook_snapshots", _insert_rows, [], snapshots, None)
+        else:
+            _write_rows(self.con, [], snapshots, None)
 
-    def prune_events_before(self, ts_ms_threshold: int) -> int:
-        cur = self.con.execute("DELETE FROM orderbook_events WHERE ts_ms < ? AND market_id = ?", (ts_ms_threshold, self.market_id))
-        self.con.commit()
+    def _delete_events(self, con: sqlite3.Connection, ts_ms_threshold: int) -> int:
+        cur = con.execute("DELETE FROM orderbook_events WHERE ts_ms < ? AND market_id = ?", (ts_ms_threshold, self.market_id))
         return cur.rowcount
+
+    def _prune(self, con: sqlite3.Connection, ts_ms_threshold: int) -> int:
+        n = self._delete_events(con, ts_ms_threshold)
+        con.commit()
+        return n
+
+    def prune_events_before(self, ts_ms_threshold: int) -> int:
+        # buffered events must land before the retention cut so they are pruned consistently
+        self.flush()
+        if self.event_log is not None:
+            return self.event_log.prune_before(ts_ms_threshold)
+        if self.writer is not None:
+            return self.writer.submit("orderbook_events", self._delete_events, ts_ms_threshold, block=True).result()
+        return self._prune(self.con, ts_ms_threshold)
+
+    async def prune_events_before_async(self, ts_ms_threshold: int) -> int:
+        """Like `prune_events_before`, but awaits the background writer instead of blocking."""
+        if self.writer is None or self.event_log is not None:
+            return self.prune_events_before(ts_ms_threshold)
+        self.flush()
+        return await self.writer.submit_async("orderbook_events", self._delete_events, ts_ms_threshold)
+
+    async def flush_async(self) -> int:
+        """`flush`, then (with a writer) wait until the writer has committed everything queued."""
+        rows = self.flush()
+        if self.writer is not None:
+            await self.writer.flush_async()
+        return rows
@@ -1,12 +1,38 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 from typing import AsyncIterator, Dict, Any, Optional, Callable
 
+from polybot.core.clock import WALL_CLOCK
 from .orderbook import OrderbookIngestor
 from .snapshot import SnapshotProvider
-from polybot.core.checksum import orderbook_checksum
 from .validator import validate_message
-from polybot.observability.metrics import inc, inc_labelled
+from polybot.observability.metrics import counter, inc, inc_labelled
+
+
+def _checksum_matches(ingestor: OrderbookIngestor, expected: Any) -> bool:
+    """Compare against the assembler's incremental checksum (O(1) per delta).
+
+    On a mismatch the sums are recomputed exactly once before declaring the book out of
+    sync, so accumulated float drift never triggers a resync on its own.
+    """
+    asm = ingestor.assembler
+    if asm.checksum() == expected:
+        return True
+    inc_labelled("ingestion_checksum_exact_recompute", {"market": ingestor.market_id}, 1)
+    return asm.checksum(exact=True) == expected
+
+
+async def _periodic_flush(ingestor: OrderbookIngestor, interval_ms: int, clock=WALL_CLOCK) -> None:
+    """Flush the group-commit buffer every `interval_ms`, so a quiet market's rows and
+    `market_status` land without waiting for its next message."""
+    try:
+        while True:
+            await clock.sleep(interval_ms / 1000.0)
+            ingestor.flush()
+    except asyncio.CancelledError:
+        return
 
 
 async def run_orderbook_stream(
@@ -15,6 +41,7 @@ async def run_orderbook_stream(
     ingestor: OrderbookIngestor,
     snapshot_provider: SnapshotProvider,
     now_ms: Optional[Callable[[], int]] = None,
+    clock=None,
 ) -> None:
     """Process an async stream of orderbook messages with resync logic.
 
@@ -22,63 +49,72 @@ async def run_orderbook_stream(
     - If first message is delta or when a seq gap is detected, obtain a fresh snapshot
       and apply it before continuing.
     - Duplicate/older seq deltas are ignored (assembler handles monotonic checks).
+    - Buffered (group-commit) ingestors are flushed when the stream ends; with a storage
+      writer the call returns once the writer has committed them. With `flush_interval_ms`
+      a timer task (sleeping on `clock`) also flushes while no messages arrive.
     """
 
     first_seen = True
-    async for msg in messages:
-        typ = msg.get("type")
-        if typ not in ("snapshot", "delta"):
-            continue
-        # If a market field exists and doesn't match, ignore this message.
-        if msg.get("market") not in (None, market_id):
-            continue
-        ok, reason = validate_message(msg)
-        if not ok:
-            inc("ingestion_msg_invalid")
-            inc_labelled("ingestion_msg_invalid", {"market": market_id})
-            continue
-
-        if first_seen and typ != "snapshot":
-            snap = snapshot_provider.get_snapshot(market_id)
-            snap.setdefault("type", "snapshot")
-            ts = now_ms() if now_ms else None
-            ingestor.process(snap, ts_ms=ts)
-            inc("ingestion_resync_first_delta")
-            inc_labelled("ingestion_resync_first_delta", {"market": market_id})
-            first_seen = False
+    applied, applied_market = counter("ingestion_msg_applied"), counter("ingestion_msg_applied", market=market_id)
+    flush_task = None
+    if ingestor.flush_interval_ms > 0:
+        flush_task = asyncio.create_task(_periodic_flush(ingestor, ingestor.flush_interval_ms, clock or WALL_CLOCK))
+    try:
+        async for msg in messages:
+            typ = msg.get("type")
+            if typ not in ("snapshot", "delta"):
+                continue
+            # If a market field exists and doesn't match, ignore this message.
+            if msg.get("market") not in (None, market_id):
+                continue
+            ok, reason = validate_message(msg)
+            if not ok:
+                inc("ingestion_msg_invalid")
+                inc_labelled("ingestion_msg_invalid", {"market": market_id})
+                continue
 
-        if typ == "delta":
-            # check seq gap
-            delta_seq = int(msg.get("seq", 0))
-            cur_seq = ingestor.assembler._seq  # internal state; safe for our use
-            if cur_seq and delta_seq != cur_seq + 1:
+            if first_seen and typ != "snapshot":
                 snap = snapshot_provider.get_snapshot(market_id)
                 snap.setdefault("type", "snapshot")
                 ts = now_ms() if now_ms else None
                 ingestor.process(snap, ts_ms=ts)
-                inc("ingestion_resync_gap")
-                inc_labelled("ingestion_resync_gap", {"market": market_id})
-
-        ts = now_ms() if now_ms else None
-        ingestor.process(msg, ts_ms=ts)
-        inc("ingestion_msg_applied")
-        inc_labelled("ingestion_msg_applied", {"market": market_id})
-        # Optional checksum verification on delta messages
-        if typ == "delta" and "checksum" in msg:
-            book = ingestor.assembler
-            # materialize current OrderBook
-            ob = book.apply_delta({"seq": book._seq})
-            bb = ob.bids
-            aa = ob.asks
-            local = orderbook_checksum(bb, aa)
-            if local != msg.get("checksum"):
-                snap = snapshot_provider.get_snapshot(market_id)
-                snap.setdefault("type", "snapshot")
-                ts2 = now_ms() if now_ms else None
-                ingestor.process(snap, ts_ms=ts2)
-                inc("ingestion_resync_checksum")
-                inc_labelled("ingestion_resync_checksum", {"market": market_id})
-        first_seen = False
+                inc("ingestion_resync_first_delta")
+                inc_labelled("ingestion_resync_first_delta", {"market": market_id})
+                first_seen = False
+
+            if typ == "delta":
+                # check seq gap
+                delta_seq = int(msg.get("seq", 0))
+                cur_seq = ingestor.assembler._seq  # internal state; safe for our use
+                if cur_seq and delta_seq != cur_seq + 1:
+                    snap = snapshot_provider.get_snapshot(market_id)
+                    snap.setdefault("type", "snapshot")
+                    ts = now_ms() if now_ms else None
+                    ingestor.process(snap, ts_ms=ts)
+                    inc("ingestion_resync_gap")
+                    inc_labelled("ingestion_resync_gap", {"market": market_id})
+
+            ts = now_ms() if now_ms else None
+            ingestor.process(msg, ts_ms=ts)
+            applied.inc()
+            applied_market.inc()
+            # Optional checksum verification on delta messages
+            if typ == "delta" and "checksum" in msg:
+                if not _checksum_matches(ingestor, msg.get("checksum")):
+                    snap = snapshot_provider.get_snapshot(market_id)
+                    snap.setdefault("type", "snapshot")
+                    ts2 = now_ms() if now_ms else None
+                    ingestor.process(snap, ts_ms=ts2)
+                    inc("ingestion_resync_checksum")
+                    inc_labelled("ingestion_resync_checksum", {"market": market_id})
+            first_seen = False
+    finally:
+        if flush_task is not None:
+            flush_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError, Exception):
+                await flush_task
+        # drain any group-commit buffer so nothing is lost when the stream ends
+        await ingestor.flush_async()
 
 
 async def run_orderbook_stream_with_reconnect(
@@ -98,6 +134,7 @@ async def run_orderbook_stream_with_reconnect(
     - If `snapshot_throttle_ms` is set, repeated resyncs within the window coalesce to a single snapshot fetch.
     """
     last_snapshot_ts: Optional[int] = None
+    applied, applied_market = counter("ingestion_msg_applied"), counter("ingestion_msg_applied", market=market_id)
 
     def throttled_snapshot() -> None:
         nonlocal last_snapshot_ts
@@ -133,13 +170,10 @@ async def run_orderbook_stream_with_reconnect(
                         inc_labelled("ingestion_resync_gap", {"market": market_id})
                 ts = now_ms() if now_ms else None
                 ingestor.process(msg, ts_ms=ts)
-                inc("ingestion_msg_applied")
-                inc_labelled("ingestion_msg_applied", {"market": market_id})
+                applied.inc()
+                applied_market.inc()
                 if typ == "delta" and "checksum" in msg:
-                    book = ingestor.assembler
-                    ob = book.apply_delta({"seq": book._seq})
-                    local = orderbook_checksum(ob.bids, ob.asks)
-                    if local != msg.get("checksum"):
+                    if not _checksum_matches(ingestor, msg.get("checksum")):
                         throttled_snapshot()
                         inc("ingestion_resync_checksum")
                         inc_labelled("ingestion_resync_checksum", {"market": market_id})
@@ -155,3 +189,4 @@ async def run_orderbook_stream_with_reconnect(
                 import time as _t
 
                 _t.sleep((backoff_ms * attempts) / 1000.0)
+    await ingestor.flush_async()
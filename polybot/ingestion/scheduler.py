@@ -2,29 +2,29 @@ from __future__ import annotations
 
 import asyncio
 import contextlib
-import time
 from typing import AsyncIterator, Dict, Any, Optional, Callable
 
+from polybot.core.clock import WALL_CLOCK
 from .orderbook import OrderbookIngestor
 from .runner import run_orderbook_stream
 from .snapshot import SnapshotProvider
 
 
-async def _periodic_snapshot(ing: OrderbookIngestor, interval_ms: int, now_ms: Callable[[], int]) -> None:
+async def _periodic_snapshot(ing: OrderbookIngestor, interval_ms: int, now_ms: Callable[[], int], clock=WALL_CLOCK) -> None:
     try:
         while True:
-            await asyncio.sleep(interval_ms / 1000.0)
+            await clock.sleep(interval_ms / 1000.0)
             ing.persist_snapshot_now(ts_ms=now_ms())
     except asyncio.CancelledError:
         return
 
 
-async def _periodic_prune(ing: OrderbookIngestor, interval_ms: int, retention_ms: int, now_ms: Callable[[], int]) -> None:
+async def _periodic_prune(ing: OrderbookIngestor, interval_ms: int, retention_ms: int, now_ms: Callable[[], int], clock=WALL_CLOCK) -> None:
     try:
         while True:
-            await asyncio.sleep(interval_ms / 1000.0)
+            await clock.sleep(interval_ms / 1000.0)
             threshold = now_ms() - retention_ms
-            ing.prune_events_before(threshold)
+            await ing.prune_events_before_async(threshold)
     except asyncio.CancelledError:
         return
 
@@ -39,26 +39,33 @@ async def run_ingestion_session(
     retention_ms: int = 5 * 60_000,
     now_ms: Optional[Callable[[], int]] = None,
     messages_now_ms: Optional[Callable[[], int]] = None,
+    clock=None,
 ) -> None:
     """Run an ingestion session with periodic snapshot and pruning tasks.
 
-    Terminates when the message stream ends; background tasks are cancelled.
+    Terminates when the message stream ends; background tasks are cancelled. The periodic
+    tasks sleep on `clock` (wall clock by default); with a `VirtualClock` fed by
+    `replay_events` they fire on replayed time, and `now_ms` defaults to `clock.now_ms`.
     """
-    now_ms = now_ms or (lambda: int(time.time() * 1000))
-    snap_task = asyncio.create_task(_periodic_snapshot(ingestor, snapshot_interval_ms, now_ms))
-    prune_task = asyncio.create_task(_periodic_prune(ingestor, prune_interval_ms, retention_ms, now_ms))
+    clock = clock or WALL_CLOCK
+    now_ms = now_ms or clock.now_ms
+    snap_task = asyncio.create_task(_periodic_snapshot(ingestor, snapshot_interval_ms, now_ms, clock))
+    prune_task = asyncio.create_task(_periodic_prune(ingestor, prune_interval_ms, retention_ms, now_ms, clock))
     try:
-        await run_orderbook_stream(market_id, messages, ingestor, snapshot_provider, now_ms=messages_now_ms or now_ms)
+        await run_orderbook_stream(market_id, messages, ingestor, snapshot_provider, now_ms=messages_now_ms or now_ms, clock=clock)
     finally:
         snap_task.cancel()
         prune_task.cancel()
-        with contextlib.suppress(Exception):
+        # a task cancelled before its first step raises CancelledError here
+        with contextlib.suppress(asyncio.CancelledError, Exception):
             await snap_task
-        with contextlib.suppress(Exception):
+        with contextlib.suppress(asyncio.CancelledError, Exception):
             await prune_task
         # Final prune pass to enforce retention before exit
         try:
             threshold = now_ms() - retention_ms
-            ingestor.prune_events_before(threshold)
+            await ingestor.prune_events_before_async(threshold)
         except Exception:
             pass
+        with contextlib.suppress(Exception):
+            await ingestor.flush_async()
@@ -1,12 +1,66 @@
 from __future__ import annotations
 
-from typing import Dict, Any, Tuple
+import time
+from typing import Any, Dict, Iterable, List, Tuple
 from pydantic import ValidationError
 
 from polybot.adapters.polymarket.schemas import SnapshotMsg, DeltaMsg
+from polybot.observability.metrics import inc
 
 
-def validate_message(msg: Dict[str, Any]) -> Tuple[bool, str]:
+def _levels_ok(levels: Any) -> bool:
+    if type(levels) is not list:
+        return False
+    for lvl in levels:
+        if type(lvl) is not list or len(lvl) != 2:
+            return False
+        tp = type(lvl[0])
+        ts = type(lvl[1])
+        # exact type checks: bools and other int/float subclasses go to the slow path
+        if (tp is not float and tp is not int) or (ts is not float and ts is not int):
+            return False
+    return True
+
+
+_STR_OR_NONE = (str, type(None))
+
+
+def fast_validate(msg: Dict[str, Any]) -> bool:
+    """Structural check for the common, well-formed case; no models are built.
+
+    Only returns True for messages `SnapshotMsg`/`DeltaMsg` would accept as-is. Anything
+    it is unsure about (coercible strings, tuples, bools, unknown types) returns False so
+    the caller can defer to the pydantic slow path for the authoritative verdict.
+    """
+    get = msg.get
+    seq = get("seq")
+    if type(seq) is not int or seq < 0:
+        return False
+    t = get("type")
+    if t == "delta":
+        bids = get("bids")
+        if bids is not None and not _levels_ok(bids):
+            return False
+        asks = get("asks")
+        if asks is not None and not _levels_ok(asks):
+            return False
+        if type(get("checksum")) not in _STR_OR_NONE:
+            return False
+    elif t == "snapshot":
+        if "bids" in msg and not _levels_ok(msg["bids"]):
+            return False
+        if "asks" in msg and not _levels_ok(msg["asks"]):
+            return False
+    else:
+        return False
+    if type(get("channel")) not in _STR_OR_NONE or type(get("market")) not in _STR_OR_NONE:
+        return False
+    ts = get("ts_ms")
+    return ts is None or (type(ts) is int and ts >= 0)
+
+
+def validate_message_slow(msg: Dict[str, Any]) -> Tuple[bool, str]:
+    """Full pydantic validation; used for diagnostics and whenever the fast path declines."""
     t = msg.get("type")
     try:
         if t == "snapshot":
@@ -19,3 +73,27 @@ def validate_message(msg: Dict[str, Any]) -> Tuple[bool, str]:
     except ValidationError as e:
         return False, f"validation_error:{e.errors()[0]['loc']}"
 
+
+def validate_message(msg: Dict[str, Any]) -> Tuple[bool, str]:
+    if fast_validate(msg):
+        return True, ""
+    inc("ingestion_validate_slow_path")
+    return validate_message_slow(msg)
+
+
+def benchmark_validators(messages: Iterable[Dict[str, Any]], rounds: int = 1000) -> Dict[str, Any]:
+    """Time `validate_message` (fast path) against `validate_message_slow` on the same messages."""
+    msgs: List[Dict[str, Any]] = list(messages)
+    rounds = max(1, int(rounds))
+    out: Dict[str, Any] = {"messages": len(msgs), "rounds": rounds}
+    if not msgs:
+        return out
+    for name, fn in (("fast", validate_message), ("pydantic", validate_message_slow)):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for m in msgs:
+                fn(m)
+        elapsed = time.perf_counter() - start
+        out[f"{name}_ns_per_msg"] = int(elapsed * 1e9 / (rounds * len(msgs)))
+    out["speedup"] = round(out["pydantic_ns_per_msg"] / max(1, out["fast_ns_per_msg"]), 2)
+    return out
@@ -1,56 +1,211 @@
 from __future__ import annotations
 
+import math
 import time
 from dataclasses import dataclass
-from typing import Dict, Tuple, List
+from typing import Dict, List, Optional, Tuple
 
+from polybot.observability.registry import GAUGE_LABEL, HIST_LABEL, Counter, Gauge, Histogram, MetricsRegistry, SegmentReader, bucket_upper, merge
 
-_COUNTERS: Dict[str, int] = {}
-_COUNTERS_LABELLED: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int] = {}
+
+# Every counter (labelled or not) and histogram lives in one registry; `inc`/`inc_labelled`
+# resolve a handle per call, hot paths hold the handle from `counter(...)`/`histogram(...)`,
+# or from `counter_family(...)` when the label values are only known at call time.
+_REGISTRY = MetricsRegistry()
+_SEGMENTS: Dict[str, SegmentReader] = {}
+
+
+def counter(name: str, **labels: str) -> Counter:
+    """Pre-registered counter handle (`counter("x", market="m1").inc()`)."""
+    return _REGISTRY.counter(name, **labels)
+
+
+class CounterFamily:
+    """Counter handles of one name, cached per label values and registered on first use.
+
+    `counter_family("orders_placed", "market").labels("m1").inc()` costs one dict lookup
+    per call instead of the label sort and key build of `inc_labelled`.
+    """
+
+    __slots__ = ("name", "label_names", "_handles")
+
+    def __init__(self, name: str, *label_names: str):
+        self.name = name
+        self.label_names = label_names
+        self._handles: Dict[Tuple[str, ...], Counter] = {}
+
+    def labels(self, *values: str) -> Counter:
+        h = self._handles.get(values)
+        if h is None:
+            h = self._handles[values] = _REGISTRY.counter(self.name, **dict(zip(self.label_names, values)))
+        return h
+
+
+def counter_family(name: str, *label_names: str) -> CounterFamily:
+    """Lazily registered labelled counter handles (see `CounterFamily`)."""
+    return CounterFamily(name, *label_names)
+
+
+def histogram(name: str, **labels: str) -> Histogram:
+    """Pre-registered microsecond histogram handle (`histogram("x_us", market="m1").record(us)`)."""
+    return _REGISTRY.histogram(name, **labels)
+
+
+def gauge(name: str, **labels: str) -> Gauge:
+    """Pre-registered gauge handle (`gauge("x_depth", table="orders").set(n)`)."""
+    return _REGISTRY.gauge(name, **labels)
+
+
+def get_gauge(name: str, labels: Optional[Dict[str, str]] = None) -> int:
+    """Current level of a gauge, summed over attached shard segments (0 when unknown)."""
+    key = tuple(sorted((k, str(v)) for k, v in (labels or {}).items())) + ((GAUGE_LABEL, ""),)
+    return _aggregate().get((name, key), 0)
 
 
 def inc(name: str, value: int = 1) -> None:
-    _COUNTERS[name] = _COUNTERS.get(name, 0) + value
+    _REGISTRY.handle(name).inc(value)
 
 
 def get_counter(name: str) -> int:
-    return _COUNTERS.get(name, 0)
+    return _REGISTRY.value(name)
 
 
 def inc_labelled(name: str, labels: Dict[str, str], value: int = 1) -> None:
-    key = (name, tuple(sorted(labels.items())))
-    _COUNTERS_LABELLED[key] = _COUNTERS_LABELLED.get(key, 0) + value
+    _REGISTRY.handle(name, tuple(sorted(labels.items()))).inc(value)
 
 
 def get_counter_labelled(name: str, labels: Dict[str, str]) -> int:
-    key = (name, tuple(sorted(labels.items())))
-    return _COUNTERS_LABELLED.get(key, 0)
+    return _REGISTRY.value(name, tuple(sorted(labels.items())))
+
+
+def share(name: str, capacity: int = 4096, create: bool = True) -> None:
+    """Move this process's counters into shared-memory segment `name` (see `MetricsRegistry.share`)."""
+    _REGISTRY.share(name, capacity=capacity, create=create)
+
+
+def attach_segment(name: str) -> None:
+    """Include another process's shared segment in `list_counters*` (and so in exports)."""
+    if name not in _SEGMENTS:
+        _SEGMENTS[name] = SegmentReader(name)
+
+
+def detach_segments(names: Optional[List[str]] = None, fold: bool = True, unlink: bool = False) -> None:
+    """Stop reading attached segments (default: all); with `fold`, their final values are added to local counters."""
+    for name in list(_SEGMENTS) if names is None else names:
+        reader = _SEGMENTS.pop(name, None)
+        if reader is None:
+            continue
+        if fold:
+            # a gone shard's gauge levels are not carried over
+            _REGISTRY.fold(reader.items())
+        reader.close(unlink=unlink)
+
+
+def _aggregate() -> Dict[Tuple[str, Tuple[Tuple[str, str], ...]], int]:
+    lists = [_REGISTRY.items()]
+    lists.extend(r.items() for r in list(_SEGMENTS.values()))
+    return merge(lists)
 
 
 def list_counters() -> List[Tuple[str, int]]:
-    return sorted(_COUNTERS.items())
+    return sorted((name, val) for (name, labels), val in _aggregate().items() if not labels)
 
 
 def list_counters_labelled() -> List[Tuple[str, Tuple[Tuple[str, str], ...], int]]:
-    return sorted((name, labels, val) for (name, labels), val in _COUNTERS_LABELLED.items())
+    """Labelled counters; histogram storage (see `list_histograms`) and gauges are excluded."""
+    return sorted((name, labels, val) for (name, labels), val in _aggregate().items() if labels and labels[-1][0] not in (HIST_LABEL, GAUGE_LABEL))
+
+
+def list_gauges() -> List[Tuple[str, Tuple[Tuple[str, str], ...], int]]:
+    """Gauges as (name, labels without the gauge marker, level summed over shards)."""
+    return sorted((name, labels[:-1], val) for (name, labels), val in _aggregate().items() if labels and labels[-1][0] == GAUGE_LABEL)
+
+
+@dataclass
+class HistogramSnapshot:
+    """Merged view of one histogram series: `counts` maps bucket index to count."""
+
+    name: str
+    labels: Tuple[Tuple[str, str], ...]
+    counts: Dict[int, int]
+    sum: int = 0
+    count: int = 0
+
+    def percentile(self, q: float) -> int:
+        """Upper bound of the bucket holding the `q` quantile (0 when empty)."""
+        if self.count <= 0:
+            return 0
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        idx = 0
+        for idx in sorted(self.counts):
+            seen += self.counts[idx]
+            if seen >= rank:
+                break
+        return bucket_upper(idx)
+
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def summary(self) -> Dict[str, float]:
+        return {"count": self.count, "mean": self.mean(), "p50": self.percentile(0.5), "p99": self.percentile(0.99), "p999": self.percentile(0.999)}
+
+    def cumulative(self) -> List[Tuple[int, int]]:
+        """(le, cumulative count) for every non-empty bucket, ascending."""
+        out: List[Tuple[int, int]] = []
+        seen = 0
+        for idx in sorted(self.counts):
+            if self.counts[idx]:
+                seen += self.counts[idx]
+                out.append((bucket_upper(idx), seen))
+        return out
+
+
+def list_histograms() -> List[HistogramSnapshot]:
+    by_key: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], HistogramSnapshot] = {}
+    for (name, labels), val in _aggregate().items():
+        if not labels or labels[-1][0] != HIST_LABEL:
+            continue
+        base, part = labels[:-1], labels[-1][1]
+        snap = by_key.get((name, base))
+        if snap is None:
+            snap = by_key[(name, base)] = HistogramSnapshot(name=name, labels=base, counts={})
+        if part == "sum":
+            snap.sum += val
+        elif part == "count":
+            snap.count += val
+        else:
+            snap.counts[int(part)] = snap.counts.get(int(part), 0) + val
+    return [by_key[k] for k in sorted(by_key)]
+
+
+def get_histogram(name: str, labels: Optional[Dict[str, str]] = None) -> HistogramSnapshot:
+    base = tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+    for snap in list_histograms():
+        if snap.name == name and snap.labels == base:
+            return snap
+    return HistogramSnapshot(name=name, labels=base, counts={})
 
 
 @dataclass
 class Timer:
+    """Context manager recording its duration into histogram `<name>_us`.
+
+    Convenient for cold paths; it is one object per measurement. Hot paths keep a
+    `histogram()` handle and record `time.perf_counter_ns()` deltas into it directly.
+    """
+
     name: str
-    start: float = 0.0
+    start_ns: int = 0
 
     def __enter__(self):
-        self.start = time.perf_counter()
+        self.start_ns = time.perf_counter_ns()
         return self
 
     def __exit__(self, exc_type, exc, tb):
-        dur_ms = int((time.perf_counter() - self.start) * 1000)
-        inc(f"{self.name}_ms_sum", dur_ms)
-        inc(f"{self.name}_count", 1)
+        _REGISTRY.histogram(f"{self.name}_us").record((time.perf_counter_ns() - self.start_ns) // 1000)
 
 
 def reset() -> None:
-    """Reset all in-process metrics (for tests)."""
-    _COUNTERS.clear()
-    _COUNTERS_LABELLED.clear()
+    """Reset all in-process metrics (for tests); registered handles stay valid."""
+    _REGISTRY.reset()
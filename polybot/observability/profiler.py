@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import asyncio.tasks
+import os
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+MAX_PROFILE_SECONDS = 300.0
+
+
+class SamplingProfiler:
+    """Wall-clock sampling profiler for one thread (by default the main/event-loop thread).
+
+    A daemon thread reads the target thread's Python stack every `interval_s` via
+    `sys._current_frames()` and counts collapsed stacks. The asyncio task running on that
+    thread at sample time (e.g. `market:<id>`, see `ServiceRunner`) becomes the root frame,
+    so stacks are grouped per market task; `collapsed()` returns flamegraph.pl/speedscope
+    compatible lines (`root;frame;...;leaf count`). Nothing is installed in the target
+    thread, so the overhead there is limited to the GIL hand-offs of the sampler.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, interval_s: float = 0.005, max_depth: int = 128):
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.interval_s = max(0.0005, float(interval_s))
+        self.max_depth = max(1, int(max_depth))
+        self.samples = 0
+        self._counts: Dict[Tuple[str, ...], int] = {}
+        self._labels: Dict[Any, str] = {}  # code object -> frame label
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _label(self, code) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = self._labels[code] = f"{code.co_qualname} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+        return label
+
+    def _task_tag(self) -> str:
+        """Root frame of a sample: `task:<name>`, `task:-` outside a task, `task:?` if unknown.
+
+        asyncio has no public way to ask for another thread's current task, so this reads its
+        bookkeeping (`asyncio.tasks._current_tasks`, `loop._thread_id`) from the sampler
+        thread. Those are private and may change between Python versions or mid-read; any
+        failure falls back to `task:?` and counts `profiler_task_tag_errors`, never an error.
+        """
+        try:
+            current = asyncio.tasks._current_tasks  # type: ignore[attr-defined]
+            for loop, task in list(current.items()):
+                if getattr(loop, "_thread_id", None) == self.thread_id and task is not None:
+                    return f"task:{task.get_name()}"
+        except Exception:
+            try:
+                from polybot.observability.metrics import inc
+
+                inc("profiler_task_tag_errors", 1)
+            except Exception:
+                pass
+            return "task:?"
+        return "task:-"
+
+    def sample(self) -> None:
+        frame = sys._current_frames().get(self.thread_id)
+        if frame is None:
+            return
+        stack: List[str] = []
+        while frame is not None and len(stack) < self.max_depth:
+            stack.append(self._label(frame.f_code))
+            frame = frame.f_back
+        stack.append(self._task_tag())
+        key = tuple(reversed(stack))
+        self._counts[key] = self._counts.get(key, 0) + 1
+        self.samples += 1
+
+    def _run(self) -> None:
+        wait = self._stop.wait
+        while not wait(self.interval_s):
+            self.sample()
+
+    def start(self) -> "SamplingProfiler":
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="polybot-profiler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self
+
+    def __enter__(self) -> "SamplingProfiler":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+    def collapsed(self) -> str:
+        """Collapsed stacks, heaviest first."""
+        rows = sorted(self._counts.items(), key=lambda kv: (-kv[1], kv[0]))
+        return "".join(f"{';'.join(stack)} {n}\n" for stack, n in rows)
+
+
+_ACTIVE = threading.Lock()  # one capture at a time
+_TARGET_THREAD: Optional[int] = None
+
+
+def set_target_thread(thread_id: Optional[int] = None) -> None:
+    """Make `thread_id` (default: the calling thread) the default profiling target."""
+    global _TARGET_THREAD
+    _TARGET_THREAD = thread_id if thread_id is not None else threading.get_ident()
+
+
+def profile_for(seconds: float, thread_id: Optional[int] = None, interval_s: float = 0.005) -> Optional[str]:
+    """Sample `thread_id` for `seconds` (capped at MAX_PROFILE_SECONDS) and return collapsed stacks.
+
+    `thread_id` defaults to the thread registered with `set_target_thread` (the service's
+    event loop), else the main thread. Returns None if another capture is already running.
+    """
+    if not _ACTIVE.acquire(blocking=False):
+        return None
+    try:
+        with SamplingProfiler(thread_id if thread_id is not None else _TARGET_THREAD, interval_s=interval_s) as prof:
+            time.sleep(min(max(0.0, float(seconds)), MAX_PROFILE_SECONDS))
+        return prof.collapsed()
+    finally:
+        _ACTIVE.release()
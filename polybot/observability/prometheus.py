@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from typing import List
 
-from .metrics import list_counters, list_counters_labelled
+from .metrics import list_counters, list_counters_labelled, list_gauges, list_histograms
 
 
 def _escape_label_value(val: str) -> str:
@@ -11,10 +11,14 @@ def _escape_label_value(val: str) -> str:
 
 
 def export_text() -> str:
-    """Render in-process counters to Prometheus text exposition format.
+    """Render in-process counters (plus attached shard segments) to Prometheus text exposition format.
 
     - Unlabelled counters are exported as `<name> <value>` with a `# TYPE` header once per metric name.
     - Labelled counters are exported as `<name>{k="v",...} <value>` with a corresponding `# TYPE` header once.
+    - Gauges are exported as `<name>{...} <level>` under `# TYPE <name> gauge`, including zero
+      levels (a drained queue must read 0, not disappear).
+    - Histograms are exported as `<name>_bucket{...,le="<us>"}` (cumulative, one line per
+      non-empty log bucket plus `+Inf`), `<name>_sum` and `<name>_count`.
     - Only non-zero counters are emitted to keep output concise.
     """
     lines: List[str] = []
@@ -39,5 +43,28 @@ def export_text() -> str:
         label_str = ",".join(f"{k}=\"{_escape_label_value(v)}\"" for k, v in labels)
         lines.append(f"{name}{{{label_str}}} {val}")
 
+    # Gauges
+    for name, labels, val in list_gauges():
+        if name not in emitted_type:
+            lines.append(f"# TYPE {name} gauge")
+            emitted_type.add(name)
+        label_str = ",".join(f"{k}=\"{_escape_label_value(v)}\"" for k, v in labels)
+        lines.append(f"{name}{{{label_str}}} {val}" if label_str else f"{name} {val}")
+
+    # Histograms
+    for h in list_histograms():
+        if h.count == 0:
+            continue
+        if h.name not in emitted_type:
+            lines.append(f"# TYPE {h.name} histogram")
+            emitted_type.add(h.name)
+        base = "".join(f"{k}=\"{_escape_label_value(v)}\"," for k, v in h.labels)
+        for le, cum in h.cumulative():
+            lines.append(f"{h.name}_bucket{{{base}le=\"{le}\"}} {cum}")
+        lines.append(f"{h.name}_bucket{{{base}le=\"+Inf\"}} {h.count}")
+        label_str = f"{{{base[:-1]}}}" if base else ""
+        lines.append(f"{h.name}_sum{label_str} {h.sum}")
+        lines.append(f"{h.name}_count{label_str} {h.count}")
+
     return "\n".join(lines) + ("\n" if lines else "")
 
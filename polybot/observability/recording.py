@@ -1,24 +1,26 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
-from typing import Any, Iterable, Iterator
+from typing import Any, Iterable, Iterator, Optional
 
+from polybot.core.codec import JsonCodec, get_codec
 
-def write_jsonl(path: str | Path, events: Iterable[dict[str, Any]]) -> None:
+
+def write_jsonl(path: str | Path, events: Iterable[dict[str, Any]], codec: Optional[str | JsonCodec] = None) -> None:
+    dumps = get_codec(codec).dumps
     p = Path(path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    with p.open("w", encoding="utf-8") as f:
+    with p.open("wb") as f:
         for e in events:
-            f.write(json.dumps(e, ensure_ascii=False) + "\n")
+            f.write(dumps(e) + b"\n")
 
 
-def read_jsonl(path: str | Path) -> Iterator[dict[str, Any]]:
+def read_jsonl(path: str | Path, codec: Optional[str | JsonCodec] = None) -> Iterator[dict[str, Any]]:
+    loads = get_codec(codec).loads
     p = Path(path)
-    with p.open("r", encoding="utf-8") as f:
+    with p.open("rb") as f:
         for line in f:
             line = line.strip()
             if not line:
                 continue
-            yield json.loads(line)
-
+            yield loads(line)
@@ -0,0 +1,404 @@
+from __future__ import annotations
+
+import json
+import logging
+from multiprocessing import shared_memory
+import threading
+from typing import Dict, List, MutableSequence, Optional, Sequence, Tuple
+
+
+LabelKey = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, LabelKey]
+
+# Shared segment layout: a header of int64 words, then fixed-size slots of
+# [key bytes (utf-8 JSON, NUL padded) | int64 value]. A histogram is one block of
+# _HIST_SLOTS contiguous slots: a key slot (JSON key with a third "hist" element) whose
+# value word starts _HIST_WORDS int64s [count, sum, bucket 0 .. bucket N-1] running on
+# through the raw slots after it.
+_MAGIC = 0x504F4C594D455452  # "POLYMETR"
+_HEADER_BYTES = 64  # words: magic, capacity, used, overflow
+_OVERFLOW_WORD = 3
+_SLOT_BYTES = 512
+_KEY_BYTES = _SLOT_BYTES - 8
+
+# Histogram buckets (HDR-style, integer values such as microseconds): exact below
+# 2 * _SUB, then _SUB linear sub-buckets per power of two (<= 1/16 relative error);
+# values above bucket_upper(HIST_BUCKETS - 1) (~25 days in us) land in the last bucket.
+# `items()` lists a histogram's count, sum and non-empty buckets as counters whose label
+# tuple ends with (HIST_LABEL, "<bucket index>" | "sum" | "count"), so they merge like
+# any other counter.
+HIST_LABEL = "__hist"
+# Gauges are counter slots whose label tuple ends with (GAUGE_LABEL, ""); they hold a
+# level that is `set` rather than accumulated, and shards' levels add up when merged.
+GAUGE_LABEL = "__gauge"
+# Registrations that did not fit the shared segment (full, or key too long); kept in the
+# segment header so the supervisor sees every worker's overflow.
+OVERFLOW_COUNTER = "metrics_registry_overflow"
+
+_log = logging.getLogger("polybot.metrics")
+_SUB_BITS = 4
+_SUB = 1 << _SUB_BITS
+_MAX_SHIFT = 36
+HIST_BUCKETS = (_MAX_SHIFT + 2) * _SUB
+_HIST_WORDS = HIST_BUCKETS + 2
+_HIST_SLOTS = 1 + -(-(_HIST_WORDS - 1) * 8 // _SLOT_BYTES)
+
+
+def _encode_key(key: MetricKey) -> bytes:
+    return json.dumps([key[0], [list(kv) for kv in key[1]]], separators=(",", ":")).encode("utf-8")
+
+
+def _encode_hist_key(key: MetricKey) -> bytes:
+    return json.dumps([key[0], [list(kv) for kv in key[1]], "hist"], separators=(",", ":")).encode("utf-8")
+
+
+def _decode_key(raw: bytes) -> Tuple[MetricKey, bool]:
+    """(key, is histogram block) of a slot's key bytes."""
+    name, labels, *kind = json.loads(raw.rstrip(b"\0").decode("utf-8"))
+    return (name, tuple((str(k), str(v)) for k, v in labels)), bool(kind)
+
+
+class Counter:
+    """Pre-registered counter handle: `inc` is one indexed add, no key hashing or label sorting."""
+
+    __slots__ = ("name", "labels", "_values", "_idx")
+
+    def __init__(self, name: str, labels: LabelKey, values: MutableSequence[int], idx: int):
+        self.name = name
+        self.labels = labels
+        self._values = values
+        self._idx = idx
+
+    def inc(self, value: int = 1) -> None:
+        self._values[self._idx] += value
+
+    @property
+    def value(self) -> int:
+        return self._values[self._idx]
+
+
+class Gauge(Counter):
+    """Pre-registered gauge handle: `set` overwrites the slot (`inc` still adjusts it)."""
+
+    __slots__ = ()
+
+    def set(self, value: int) -> None:
+        self._values[self._idx] = value
+
+
+def bucket_index(value: int) -> int:
+    if value < 2 * _SUB:
+        return value if value > 0 else 0
+    shift = value.bit_length() - _SUB_BITS - 1
+    if shift > _MAX_SHIFT:
+        return HIST_BUCKETS - 1
+    return (shift + 1) * _SUB + (value >> shift) - _SUB
+
+
+def bucket_upper(index: int) -> int:
+    """Largest value that lands in bucket `index` (the Prometheus `le` bound)."""
+    if index < 2 * _SUB:
+        return index
+    shift = index // _SUB - 1
+    return ((index % _SUB + _SUB + 1) << shift) - 1
+
+
+class Histogram:
+    """Pre-registered log-bucketed histogram handle.
+
+    The whole series (count, sum, every bucket) is one contiguous block of words, so
+    `record` is three indexed adds and a series costs the same slots however many of its
+    buckets are hit.
+    """
+
+    __slots__ = ("name", "labels", "_values", "_idx")
+
+    def __init__(self, name: str, labels: LabelKey, values: MutableSequence[int], idx: int):
+        self.name = name
+        self.labels = labels
+        self._values = values
+        self._idx = idx
+
+    def record(self, value: int) -> None:
+        if value < 0:
+            value = 0
+        values, idx = self._values, self._idx
+        values[idx] += 1
+        values[idx + 1] += value
+        values[idx + 2 + bucket_index(value)] += 1
+
+    @property
+    def count(self) -> int:
+        return self._values[self._idx]
+
+    def words(self) -> List[int]:
+        """[count, sum, bucket 0 .. bucket N-1]."""
+        return list(self._values[self._idx : self._idx + _HIST_WORDS])
+
+
+def _hist_items(name: str, labels: LabelKey, words: Sequence[int]) -> List[Tuple[str, LabelKey, int]]:
+    out = [(name, labels + ((HIST_LABEL, "count"),), int(words[0])), (name, labels + ((HIST_LABEL, "sum"),), int(words[1]))]
+    for i, c in enumerate(words[2:]):
+        if c:
+            out.append((name, labels + ((HIST_LABEL, str(i)),), int(c)))
+    return out
+
+
+class MetricsRegistry:
+    """Counter storage behind `polybot.observability.metrics`.
+
+    `counter(name, **labels)` returns the same `Counter` handle for the same name/labels, so
+    hot paths register once and increment through the handle. Values live in a local list
+    by default; `share(name)` moves them into a named shared-memory segment (one writer
+    process per segment) so another process can read them with `SegmentReader` without
+    any IPC. Slots beyond the segment's capacity stay process-local: each such registration
+    counts `metrics_registry_overflow` and the first one logs a warning.
+    """
+
+    def __init__(self) -> None:
+        self._handles: Dict[MetricKey, Counter] = {}
+        self._histograms: Dict[MetricKey, Histogram] = {}
+        self._local: List[int] = []
+        self._shm: Optional[shared_memory.SharedMemory] = None
+        self._words: Optional[memoryview] = None
+        self._capacity = 0
+        self._used = 0
+        self._warned = False
+        self._lock = threading.Lock()
+        self._overflow = self.handle(OVERFLOW_COUNTER)
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        return self.handle(name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def histogram(self, name: str, **labels: str) -> Histogram:
+        return self.histogram_handle(name, tuple(sorted((k, str(v)) for k, v in labels.items())))
+
+    def histogram_handle(self, name: str, labels: LabelKey = ()) -> Histogram:
+        """Histogram handle for an already-normalized (sorted) label tuple."""
+        key = (name, labels)
+        h = self._histograms.get(key)
+        if h is not None:
+            return h
+        with self._lock:
+            h = self._histograms.get(key)
+            if h is None:
+                values, idx = self._allocate_block(key, [0] * _HIST_WORDS)
+                h = self._histograms[key] = Histogram(name, labels, values, idx)
+        return h
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        labels_key = tuple(sorted((k, str(v)) for k, v in labels.items())) + ((GAUGE_LABEL, ""),)
+        return self.handle(name, labels_key, kind=Gauge)  # type: ignore[return-value]
+
+    def handle(self, name: str, labels: LabelKey = (), kind: type = Counter) -> Counter:
+        """Handle for an already-normalized (sorted) label tuple."""
+        key = (name, labels)
+        h = self._handles.get(key)
+        if h is not None:
+            return h
+        with self._lock:
+            h = self._handles.get(key)
+            if h is None:
+                values, idx = self._allocate(key, 0)
+                h = self._handles[key] = kind(name, labels, values, idx)
+        return h
+
+    def value(self, name: str, labels: LabelKey = ()) -> int:
+        """Current value without registering a handle (0 when unknown)."""
+        h = self._handles.get((name, labels))
+        return h.value if h is not None else 0
+
+    def _allocate(self, key: MetricKey, initial: int) -> Tuple[MutableSequence[int], int]:
+        # caller holds the lock
+        if self._shm is not None:
+            raw = _encode_key(key)
+            if self._used < self._capacity and len(raw) <= _KEY_BYTES:
+                slot = self._used
+                off = _HEADER_BYTES + slot * _SLOT_BYTES
+                buf = self._shm.buf
+                buf[off : off + _KEY_BYTES] = raw.ljust(_KEY_BYTES, b"\0")
+                idx = (off + _KEY_BYTES) // 8
+                self._words[idx] = initial
+                self._used += 1
+                self._words[2] = self._used  # publish after the slot is complete
+                return self._words, idx
+            self._note_overflow(key)
+        self._local.append(initial)
+        return self._local, len(self._local) - 1
+
+    def _allocate_block(self, key: MetricKey, initial: List[int]) -> Tuple[MutableSequence[int], int]:
+        # caller holds the lock; `initial` is the block's _HIST_WORDS starting words
+        if self._shm is not None:
+            raw = _encode_hist_key(key)
+            if self._used + _HIST_SLOTS <= self._capacity and len(raw) <= _KEY_BYTES:
+                off = _HEADER_BYTES + self._used * _SLOT_BYTES
+                self._shm.buf[off : off + _KEY_BYTES] = raw.ljust(_KEY_BYTES, b"\0")
+                idx = (off + _KEY_BYTES) // 8
+                words = self._words
+                for i, v in enumerate(initial):
+                    words[idx + i] = v
+                self._used += _HIST_SLOTS
+                words[2] = self._used  # publish after the block is complete
+                return words, idx
+            self._note_overflow(key)
+        idx = len(self._local)
+        self._local.extend(initial)
+        return self._local, idx
+
+    def _note_overflow(self, key: MetricKey) -> None:
+        self._overflow.inc(1)
+        if not self._warned:
+            self._warned = True
+            _log.warning(
+                "metrics segment %s has no room for %s (%d/%d slots used, or key too long): it and later overflow stay process-local",
+                self._shm.name if self._shm is not None else "?",
+                key[0],
+                self._used,
+                self._capacity,
+            )
+
+    def share(self, name: str, capacity: int = 4096, create: bool = True) -> None:
+        """Move every counter (and future registrations) into shared-memory segment `name`.
+
+        Existing handles are rebound in place, so references held by other modules stay valid.
+        With `create=False` an existing segment is reused and its counts continue (restarts).
+        """
+        with self._lock:
+            if self._shm is not None:
+                raise RuntimeError("metrics registry is already shared")
+            size = _HEADER_BYTES + int(capacity) * _SLOT_BYTES
+            try:
+                shm = shared_memory.SharedMemory(name=name, create=create, size=size)
+            except FileExistsError:
+                shm = shared_memory.SharedMemory(name=name)
+            words = shm.buf.cast("q")
+            if words[0] != _MAGIC:
+                words[1] = int(capacity)
+                words[2] = 0
+                words[_OVERFLOW_WORD] = 0
+                words[0] = _MAGIC
+            self._shm, self._words = shm, words
+            self._capacity = int(words[1])
+            existing = {(key, hist): off + _KEY_BYTES for off, key, hist in _scan(shm.buf, 0, int(words[2]))}
+            self._used = int(words[2])
+            old_local, self._local = self._local, []
+            for key, h in self._handles.items():
+                value = old_local[h._idx] if h._values is old_local else h.value
+                if h is self._overflow:
+                    words[_OVERFLOW_WORD] += value
+                    h._values, h._idx = words, _OVERFLOW_WORD
+                elif (key, False) in existing:
+                    idx = existing[(key, False)] // 8
+                    words[idx] += value
+                    h._values, h._idx = words, idx
+                else:
+                    h._values, h._idx = self._allocate(key, value)
+            for key, hist in self._histograms.items():
+                block = old_local[hist._idx : hist._idx + _HIST_WORDS]
+                if (key, True) in existing:
+                    idx = existing[(key, True)] // 8
+                    for i, v in enumerate(block):
+                        words[idx + i] += v
+                    hist._values, hist._idx = words, idx
+                else:
+                    hist._values, hist._idx = self._allocate_block(key, block)
+
+    @property
+    def shared_name(self) -> Optional[str]:
+        return self._shm.name if self._shm is not None else None
+
+    def items(self) -> List[Tuple[str, LabelKey, int]]:
+        out = [(h.name, h.labels, h.value) for h in list(self._handles.values())]
+        for hist in list(self._histograms.values()):
+            out.extend(_hist_items(hist.name, hist.labels, hist.words()))
+        return out
+
+    def fold(self, items: List[Tuple[str, LabelKey, int]]) -> None:
+        """Add `items` (e.g. a gone shard's final values) into this registry; gauges are skipped."""
+        for name, labels, val in items:
+            if not val or (labels and labels[-1][0] == GAUGE_LABEL):
+                continue
+            if labels and labels[-1][0] == HIST_LABEL:
+                hist = self.histogram_handle(name, labels[:-1])
+                part = labels[-1][1]
+                pos = 0 if part == "count" else 1 if part == "sum" else 2 + int(part)
+                hist._values[hist._idx + pos] += val
+            else:
+                self.handle(name, labels).inc(val)
+
+    def reset(self) -> None:
+        """Zero every counter and histogram; handles stay registered and valid."""
+        for h in list(self._handles.values()):
+            h._values[h._idx] = 0
+        for hist in list(self._histograms.values()):
+            for i in range(hist._idx, hist._idx + _HIST_WORDS):
+                hist._values[i] = 0
+
+
+def _scan(buf: memoryview, start: int, used: int) -> List[Tuple[int, MetricKey, bool]]:
+    """(offset, key, is histogram) of every key slot in slots [start, used), skipping block bodies."""
+    out = []
+    slot = start
+    while slot < used:
+        off = _HEADER_BYTES + slot * _SLOT_BYTES
+        key, hist = _decode_key(bytes(buf[off : off + _KEY_BYTES]))
+        out.append((off, key, hist))
+        slot += _HIST_SLOTS if hist else 1
+    return out
+
+
+class SegmentReader:
+    """Read-only view of another process's shared metrics segment (decoded keys are cached)."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._shm = shared_memory.SharedMemory(name=name)
+        self._words = self._shm.buf.cast("q")
+        self._keys: List[Tuple[int, MetricKey, bool]] = []
+        self._scanned = 0
+
+    def items(self) -> List[Tuple[str, LabelKey, int]]:
+        words = self._words
+        if words[0] != _MAGIC:
+            return []
+        used = int(words[2])
+        if used > self._scanned:
+            self._keys.extend(_scan(self._shm.buf, self._scanned, used))
+            self._scanned = used
+        out = []
+        for off, (name, labels), hist in self._keys:
+            idx = (off + _KEY_BYTES) // 8
+            if hist:
+                out.extend(_hist_items(name, labels, words[idx : idx + _HIST_WORDS].tolist()))
+            else:
+                out.append((name, labels, int(words[idx])))
+        if words[_OVERFLOW_WORD]:
+            out.append((OVERFLOW_COUNTER, (), int(self._words[_OVERFLOW_WORD])))
+        return out
+
+    def close(self, unlink: bool = False) -> None:
+        self._words.release()
+        self._shm.close()
+        if unlink:
+            self._shm.unlink()
+
+
+def create_segment(name: str, capacity: int = 4096) -> None:
+    """Create (and initialise) an empty segment for a worker to `share` into later."""
+    shm = shared_memory.SharedMemory(name=name, create=True, size=_HEADER_BYTES + int(capacity) * _SLOT_BYTES)
+    words = shm.buf.cast("q")
+    words[1] = int(capacity)
+    words[2] = 0
+    words[_OVERFLOW_WORD] = 0
+    words[0] = _MAGIC
+    words.release()
+    shm.close()
+
+
+def merge(items_lists: List[List[Tuple[str, LabelKey, int]]]) -> Dict[MetricKey, int]:
+    out: Dict[MetricKey, int] = {}
+    for items in items_lists:
+        for name, labels, val in items:
+            out[(name, labels)] = out.get((name, labels), 0) + val
+    return out
+
@@ -5,7 +5,14 @@ from typing import Iterable, Dict, Any
 from polybot.adapters.polymarket.orderbook import OrderbookAssembler
 
 
-def apply_orderbook_events(market_id: str, events: Iterable[Dict[str, Any]]):
+def apply_orderbook_events(market_id: str, events: Iterable[Dict[str, Any]] | Any):
+    """Replay snapshot/delta messages into a fresh assembler and return the final book.
+
+    `events` may also be a `polybot.storage.eventlog.EventLog`; its records are then read
+    straight from the mapped segments for `market_id`.
+    """
+    if hasattr(events, "iter_messages"):
+        events = events.iter_messages(market_id)
     ob = OrderbookAssembler(market_id)
     last = None
     for e in events:
@@ -15,4 +22,3 @@ def apply_orderbook_events(market_id: str, events: Iterable[Dict[str, Any]]):
         elif etype == "delta":
             last = ob.apply_delta(e)
     return last
-
@@ -1,15 +1,18 @@
 from __future__ import annotations
 
-from http.server import BaseHTTPRequestHandler, HTTPServer
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
 from threading import Thread
 from typing import Optional, Tuple
 
 from .prometheus import export_text
-from .metrics import list_counters, list_counters_labelled
+from .metrics import list_counters, list_counters_labelled, list_gauges, list_histograms
 
 
 class _MetricsHandler(BaseHTTPRequestHandler):
     def do_GET(self):  # noqa: N802
+        if self.path.startswith("/debug/profile"):
+            self._profile()
+            return
         if self.path == "/metrics":
             body = export_text().encode("utf-8")
             self.send_response(200)
@@ -39,6 +42,12 @@ class _MetricsHandler(BaseHTTPRequestHandler):
                     }
                     for (name, labels, val) in list_counters_labelled()
                 ],
+                "gauges": [{"name": name, "labels": {k: v for k, v in labels}, "value": val} for (name, labels, val) in list_gauges()],
+                # latency histograms (microseconds) summarized as count/mean/p50/p99/p999
+                "histograms": [
+                    {"name": h.name, "labels": {k: v for k, v in h.labels}, **h.summary()}
+                    for h in list_histograms()
+                ],
             }
             body = _json.dumps(data).encode("utf-8")
             self.send_response(200)
@@ -47,16 +56,55 @@ class _MetricsHandler(BaseHTTPRequestHandler):
             self.end_headers()
             self.wfile.write(body)
             return
+        if self.path == "/traces/slow":
+            import json as _json
+            from .tracing import SLOWEST
+
+            # slowest completed tick-to-trade traces in this process, slowest first
+            body = _json.dumps({"traces": SLOWEST.snapshot()}).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
         self.send_response(404)
         self.end_headers()
 
+    def _profile(self) -> None:
+        """`/debug/profile?seconds=N[&interval_ms=M]`: sample the loop thread, reply with collapsed stacks."""
+        from urllib.parse import parse_qs, urlsplit
+        from .profiler import profile_for
+
+        try:
+            q = parse_qs(urlsplit(self.path).query)
+            seconds = float(q.get("seconds", ["10"])[0])
+            interval_s = float(q.get("interval_ms", ["5"])[0]) / 1000.0
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+        out = profile_for(seconds, interval_s=interval_s)
+        if out is None:
+            self.send_response(409)  # another capture is running
+            self.end_headers()
+            return
+        body = out.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
     def log_message(self, format, *args):  # noqa: A003
         # Suppress default stdout logging
         return
 
 
 def start_metrics_server(host: str = "127.0.0.1", port: int = 0) -> Tuple[HTTPServer, Thread]:
-    server = HTTPServer((host, port), _MetricsHandler)
+    # threaded: a running /debug/profile capture must not block /metrics scrapes
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
     th = Thread(target=server.serve_forever, daemon=True)
     th.start()
     return server, th
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+from contextvars import ContextVar
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from polybot.observability.metrics import Histogram, histogram
+
+
+# Tick-to-trade stages, in pipeline order. A stage's histogram measures the time from the
+# previous stamped stage to it, e.g. `trace_stage_us{stage="apply"}` is validate -> book apply.
+STAGES: Tuple[str, ...] = ("recv", "decode", "validate", "apply", "decide", "send", "ack")
+RECV, DECODE, VALIDATE, APPLY, DECIDE, SEND, ACK = range(len(STAGES))
+
+# key under which a trace rides along in translated message dicts
+TRACE_KEY = "_trace"
+
+
+class TraceContext:
+    """Monotonic (`perf_counter_ns`) stamps for one inbound message; 0 = stage not reached."""
+
+    __slots__ = ("market", "stamps")
+
+    def __init__(self, recv_ns: Optional[int] = None):
+        self.market: Optional[str] = None
+        self.stamps = [0] * len(STAGES)
+        self.stamps[RECV] = recv_ns if recv_ns is not None else time.perf_counter_ns()
+
+    def stamp(self, stage: int) -> None:
+        self.stamps[stage] = time.perf_counter_ns()
+
+    def breakdown(self) -> Dict[str, int]:
+        """Microseconds spent reaching each stamped stage from the previous stamped one."""
+        out: Dict[str, int] = {}
+        prev = self.stamps[RECV]
+        for i in range(1, len(STAGES)):
+            t = self.stamps[i]
+            if t:
+                out[STAGES[i]] = (t - prev) // 1000
+                prev = t
+        return out
+
+
+_CURRENT: ContextVar[Optional[TraceContext]] = ContextVar("polybot_trace", default=None)
+
+
+def current() -> Optional[TraceContext]:
+    return _CURRENT.get()
+
+
+def activate(trace: Optional[TraceContext]) -> Any:
+    """Make `trace` the current task's trace (read by the engine); returns a token for `deactivate`."""
+    return _CURRENT.set(trace)
+
+
+def deactivate(token: Any) -> None:
+    _CURRENT.reset(token)
+
+
+def stamp(stage: int) -> None:
+    """Stamp `stage` on the current trace, if any."""
+    trace = _CURRENT.get()
+    if trace is not None:
+        trace.stamp(stage)
+
+
+def attach(msg: Dict[str, Any], trace: Optional[TraceContext]) -> Dict[str, Any]:
+    """Stamp validate on `trace` and carry it in translated message `msg`."""
+    if trace is not None:
+        trace.stamp(VALIDATE)
+        msg[TRACE_KEY] = trace
+    return msg
+
+
+class SlowTraces:
+    """The `capacity` slowest completed tick-to-trade traces (min-heap, O(log n) per offer)."""
+
+    def __init__(self, capacity: int = 32):
+        self.capacity = max(1, int(capacity))
+        self._heap: List[Tuple[int, int, Dict[str, Any]]] = []
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def offer(self, total_us: int, trace: TraceContext) -> None:
+        heap = self._heap
+        if len(heap) >= self.capacity and total_us <= heap[0][0]:
+            return
+        entry = (total_us, next(self._seq), {"market": trace.market, "total_us": total_us, "stages_us": trace.breakdown(), "ts_ms": int(time.time() * 1000)})
+        with self._lock:
+            if len(heap) < self.capacity:
+                heapq.heappush(heap, entry)
+            elif total_us > heap[0][0]:
+                heapq.heapreplace(heap, entry)
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        """Slowest first."""
+        with self._lock:
+            entries = sorted(self._heap, key=lambda e: (-e[0], e[1]))
+        return [e[2] for e in entries]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+
+
+SLOWEST = SlowTraces()
+_HISTS: Dict[str, Tuple[List[Histogram], Histogram]] = {}
+
+
+def _market_hists(market: str) -> Tuple[List[Histogram], Histogram]:
+    hists = _HISTS.get(market)
+    if hists is None:
+        hists = _HISTS[market] = ([histogram("trace_stage_us", market=market, stage=s) for s in STAGES[1:]], histogram("tick_to_trade_us", market=market))
+    return hists
+
+
+def finish(trace: Optional[TraceContext], market: Optional[str] = None) -> None:
+    """Record `trace`'s stage breakdown into per-market histograms.
+
+    Traces that reached `ack` also record `tick_to_trade_us{market}` (recv -> ack) and are
+    offered to `SLOWEST`. Safe to call with None (untraced sources such as replays).
+    """
+    if trace is None:
+        return
+    if market is not None:
+        trace.market = market
+    stages, total = _market_hists(trace.market or "")
+    stamps = trace.stamps
+    prev = stamps[RECV]
+    for i in range(1, len(STAGES)):
+        t = stamps[i]
+        if t:
+            stages[i - 1].record((t - prev) // 1000)
+            prev = t
+    if stamps[ACK]:
+        us = (stamps[ACK] - stamps[RECV]) // 1000
+        total.record(us)
+        SLOWEST.offer(us, trace)
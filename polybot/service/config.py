@@ -30,11 +30,25 @@ class ServiceConfig:
     relayer_private_key: str = ""
     relayer_chain_id: int = 137
     relayer_timeout_s: float = 10.0
+    relayer_signing_workers: int = 0
+    relayer_signing_mode: str = "thread"
     engine_max_retries: int = 0
     engine_retry_sleep_ms: int = 0
     relayer_max_retries: int = 0
     relayer_retry_sleep_ms: int = 0
     relayer_builder: Optional[RelayerBuilderConfig] = None
+    storage_writer: bool = False
+    storage_writer_queue: int = 10000
+    ws_connections: int = 0
+    conflate_books: bool = False
+    engine_async: bool = False
+    engine_threads: int = 4
+    ledger_reconcile_ms: int = 60000
+    shards: int = 0
+    shard_by: str = "hash"
+    shard_max_restarts: int = 3
+    shard_exposure_cap: float = 0.0
+    shard_metrics_capacity: int = 16384
 
 
 def _parse_spread(obj: dict | None) -> SpreadParams:
@@ -49,6 +63,7 @@ def _parse_spread(obj: dict | None) -> SpreadParams:
         min_quote_lifetime_ms=int(obj.get("min_quote_lifetime_ms", 0)),
         max_inventory=float(obj.get("max_inventory", 100.0)),
         rebalance_ratio=float(obj.get("rebalance_ratio", 0.5)),
+        presign_levels=int(obj.get("presign_levels", 0)),
     )
 
 
@@ -116,6 +131,7 @@ def load_service_config(path: str | Path) -> ServiceConfig:
                 subscribe=bool(m.get("subscribe", True)),
                 max_messages=int(m.get("max_messages", 0)) or None,
                 spread_params=sp,
+                weight=float(m.get("weight", 1.0)),
             )
         )
     return ServiceConfig(
@@ -128,9 +144,23 @@ def load_service_config(path: str | Path) -> ServiceConfig:
         relayer_private_key=str(relayer_private_key),
         relayer_chain_id=relayer_chain_id,
         relayer_timeout_s=relayer_timeout_s,
+        relayer_signing_workers=int(rel.get("signing_workers", 0)),
+        relayer_signing_mode=str(rel.get("signing_mode", "thread")),
         engine_max_retries=engine_max_retries,
         engine_retry_sleep_ms=engine_retry_sleep_ms,
         relayer_max_retries=relayer_max_retries,
         relayer_retry_sleep_ms=relayer_retry_sleep_ms,
         relayer_builder=builder_cfg,
+        storage_writer=bool(svc.get("storage_writer", False)),
+        storage_writer_queue=int(svc.get("storage_writer_queue", 10000)),
+        ws_connections=int(svc.get("ws_connections", 0)),
+        conflate_books=bool(svc.get("conflate_books", False)),
+        engine_async=bool(svc.get("engine_async", False)),
+        engine_threads=int(svc.get("engine_threads", 4)),
+        ledger_reconcile_ms=int(svc.get("ledger_reconcile_ms", 60000)),
+        shards=int(svc.get("shards", 0)),
+        shard_by=str(svc.get("shard_by", "hash")),
+        shard_max_restarts=int(svc.get("shard_max_restarts", 3)),
+        shard_exposure_cap=float(svc.get("shard_exposure_cap", 0.0)),
+        shard_metrics_capacity=int(svc.get("shard_metrics_capacity", 16384)),
     )
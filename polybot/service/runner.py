@@ -6,11 +6,15 @@ from dataclasses import dataclass
 from typing import Any, AsyncIterator, Dict, List, Optional
 
 from polybot.adapters.polymarket.ws import OrderbookWSClient
+from polybot.adapters.polymarket.ws_mux import WSConnectionManager
 from polybot.adapters.polymarket.ws_translator import translate_polymarket_message
+from polybot.observability.profiler import set_target_thread as set_profiler_target
+from polybot.observability.tracing import attach as attach_trace
 from polybot.adapters.polymarket.subscribe import build_subscribe_l2
-from polybot.exec.engine import ExecutionEngine
+from polybot.exec.engine import AsyncExecutionEngine, ExecutionEngine
 from polybot.adapters.polymarket.relayer import FakeRelayer, build_relayer
-from polybot.storage.db import connect, enable_wal
+from polybot.storage.db import connect, enable_wal, parse_db_url
+from polybot.storage.writer import StorageWriter
 from polybot.storage import schema as schema_mod
 from polybot.strategy.spread import SpreadParams
 from polybot.strategy.spread_quoter import SpreadQuoter
@@ -25,6 +29,7 @@ class MarketSpec:
     subscribe: bool = True
     max_messages: Optional[int] = None
     spread_params: Optional[SpreadParams] = None
+    weight: float = 1.0  # relative load, used by weighted sharding
 
 
 async def _aiter_translated_ws(url: str, max_messages: Optional[int] = None, subscribe_message: Optional[dict] = None) -> AsyncIterator[Dict[str, Any]]:
@@ -34,15 +39,40 @@ async def _aiter_translated_ws(url: str, max_messages: Optional[int] = None, sub
             out = translate_polymarket_message(m.raw)
             if out is None:
                 continue
-            yield out
+            yield attach_trace(out, m.trace)
             count += 1
             if max_messages is not None and count >= max_messages:
                 break
 
 
 class ServiceRunner:
-    def __init__(self, db_url: str, params: Optional[SpreadParams] = None, relayer_type: str = "fake", relayer_kwargs: Optional[dict] = None, engine_max_retries: int = 0, engine_retry_sleep_ms: int = 0):
+    def __init__(
+        self,
+        db_url: str,
+        params: Optional[SpreadParams] = None,
+        relayer_type: str = "fake",
+        relayer_kwargs: Optional[dict] = None,
+        engine_max_retries: int = 0,
+        engine_retry_sleep_ms: int = 0,
+        storage_writer: bool = False,
+        storage_writer_queue: int = 10000,
+        ws_connections: int = 0,
+        conflate_books: bool = False,
+        engine_async: bool = False,
+        engine_threads: int = 4,
+        ledger_reconcile_ms: int = 60000,
+    ):
         self.db_url = db_url
+        # 0 keeps one socket per market; N > 0 multiplexes markets sharing a ws_url over N sockets
+        self.ws_connections = max(0, int(ws_connections))
+        self.conflate_books = bool(conflate_books)
+        # async engine: relayer calls on a bounded thread pool, retries via asyncio.sleep
+        self.engine_async = bool(engine_async)
+        self.engine_threads = max(1, int(engine_threads))
+        # periodic check of the in-memory position ledger against orders/fills (0 disables)
+        self.ledger_reconcile_ms = max(0, int(ledger_reconcile_ms))
+        self.storage_writer = bool(storage_writer)
+        self.storage_writer_queue = max(1, int(storage_writer_queue))
         self.params = params or SpreadParams()
         self.relayer_type = relayer_type
         self.relayer_kwargs = relayer_kwargs or {}
@@ -52,36 +82,77 @@ class ServiceRunner:
         enable_wal(self.con)
         schema_mod.create_all(self.con)
 
-    async def run_markets(self, markets: List[MarketSpec]) -> None:
-        engine = ExecutionEngine(
+    def _build_writer(self) -> Optional[StorageWriter]:
+        # the async engine persists file-backed DBs only through a writer
+        if not (self.storage_writer or self.engine_async):
+            return None
+        if parse_db_url(self.db_url)[1] == ":memory:":
+            # a second connection would see a different in-memory DB; keep inline writes
+            return None
+        return StorageWriter(self.db_url, max_queue=self.storage_writer_queue)
+
+    async def _reconcile_ledger_loop(self, engine, writer: Optional[StorageWriter]) -> None:
+        from polybot.exec.ledger import reconcile_ledger
+        from polybot.observability.metrics import inc
+
+        while True:
+            await asyncio.sleep(self.ledger_reconcile_ms / 1000.0)
+            try:
+                await reconcile_ledger(engine.ledger, self.con, writer=writer)
+            except Exception:
+                inc("ledger_reconcile_errors", 1)
+
+    def _build_engine(self, writer: Optional[StorageWriter]) -> ExecutionEngine:
+        engine_kwargs: Dict[str, Any] = {"writer": writer} if writer is not None else {}
+        engine_cls = ExecutionEngine
+        if self.engine_async:
+            engine_cls = AsyncExecutionEngine
+            engine_kwargs["max_workers"] = self.engine_threads
+        return engine_cls(
             build_relayer(self.relayer_type, **self.relayer_kwargs),
             audit_db=self.con,
             max_retries=self.engine_max_retries,
             retry_sleep_ms=self.engine_retry_sleep_ms,
+            **engine_kwargs,
         )
+
+    async def run_markets(self, markets: List[MarketSpec], engine: Any = None) -> None:
+        """Run every market to completion; `engine` overrides the locally built one (sharded workers)."""
+        writer = self._build_writer() if engine is None else None
+        if engine is None:
+            engine = self._build_engine(writer)
+        set_profiler_target()  # /debug/profile samples this event-loop thread
         tasks: List[asyncio.Task] = []
+        managers: Dict[str, WSConnectionManager] = {}
+        if self.ws_connections > 0:
+            for ms in markets:
+                if ms.ws_url not in managers:
+                    managers[ms.ws_url] = WSConnectionManager(ms.ws_url, max_connections=self.ws_connections)
 
         async def _wrap_market(ms: MarketSpec) -> None:
             import time as _t
             start = _t.perf_counter()
             sp = ms.spread_params or self.params
             quoter = SpreadQuoter(ms.market_id, ms.outcome_yes_id, sp, engine)
-            runner = QuoterRunner(ms.market_id, quoter)
-            sub = build_subscribe_l2(ms.market_id) if ms.subscribe else None
+            if self.conflate_books:
+                runner = QuoterRunner(ms.market_id, quoter, conflate=True)
+            else:
+                runner = QuoterRunner(ms.market_id, quoter)
             now_ms = lambda: int(time.time() * 1000)
+            mgr = managers.get(ms.ws_url)
+            if mgr is not None:
+                source = mgr.messages(ms.market_id, max_messages=ms.max_messages)
+            else:
+                sub = build_subscribe_l2(ms.market_id) if ms.subscribe else None
+                source = _aiter_translated_ws(ms.ws_url, max_messages=ms.max_messages, subscribe_message=sub)
             try:
-                await runner.run(
-                    _aiter_translated_ws(ms.ws_url, max_messages=ms.max_messages, subscribe_message=sub),
-                    now_ms,
-                )
+                await runner.run(source, now_ms)
                 # mark completion for observability
                 try:
-                    from polybot.observability.metrics import inc_labelled
+                    from polybot.observability.metrics import histogram, inc_labelled
 
                     inc_labelled("service_market_done", {"market": ms.market_id}, 1)
-                    dur_ms = int((_t.perf_counter() - start) * 1000)
-                    inc_labelled("service_market_runtime_ms_sum", {"market": ms.market_id}, dur_ms)
-                    inc_labelled("service_market_runtime_count", {"market": ms.market_id}, 1)
+                    histogram("service_market_runtime_us", market=ms.market_id).record(int((_t.perf_counter() - start) * 1e6))
                 except Exception:
                     pass
             except Exception:
@@ -92,6 +163,24 @@ class ServiceRunner:
                 return
 
         for ms in markets:
-            tasks.append(asyncio.create_task(_wrap_market(ms)))
-        if tasks:
-            await asyncio.gather(*tasks, return_exceptions=True)
+            # task names tag profiler samples (`polybot.observability.profiler`) per market
+            tasks.append(asyncio.create_task(_wrap_market(ms), name=f"market:{ms.market_id}"))
+        reconciler: Optional[asyncio.Task] = None
+        if self.ledger_reconcile_ms > 0 and getattr(engine, "ledger", None) is not None:
+            reconciler = asyncio.create_task(self._reconcile_ledger_loop(engine, writer), name="ledger-reconcile")
+        try:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            if reconciler is not None:
+                reconciler.cancel()
+                await asyncio.gather(reconciler, return_exceptions=True)
+            for mgr in managers.values():
+                await mgr.close()
+            if isinstance(engine, AsyncExecutionEngine):
+                # let deferred audit writes run before the writer is drained
+                await asyncio.sleep(0)
+                engine.close()
+            if writer is not None:
+                await writer.flush_async()
+                writer.close()
@@ -0,0 +1,308 @@
+from __future__ import annotations
+
+import asyncio
+from concurrent.futures import Future
+import itertools
+import multiprocessing as mp
+import os
+import threading
+import uuid
+import zlib
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from polybot.exec.engine import ExecutionEngine, ExecutionResult
+from polybot.exec.ledger import PositionLedger
+from polybot.exec.planning import ExecutionPlan
+from polybot.exec.risk import will_exceed_exposure
+from polybot.observability.metrics import attach_segment, detach_segments, inc, inc_labelled, share as share_metrics
+from polybot.observability.registry import create_segment
+from polybot.service.runner import MarketSpec, ServiceRunner
+from polybot.storage.db import connect, parse_db_url
+
+
+def assign_shards(markets: List[MarketSpec], shards: int, by: str = "hash") -> List[List[MarketSpec]]:
+    """Split `markets` over `shards` workers.
+
+    `by="hash"` is stable across restarts and config reorderings (crc32 of the market id);
+    `by="weight"` balances `MarketSpec.weight` greedily (heaviest first onto the least
+    loaded shard).
+    """
+    shards = max(1, int(shards))
+    out: List[List[MarketSpec]] = [[] for _ in range(shards)]
+    if by == "hash":
+        for ms in markets:
+            out[zlib.crc32(ms.market_id.encode("utf-8")) % shards].append(ms)
+    elif by == "weight":
+        load = [0.0] * shards
+        for ms in sorted(markets, key=lambda m: (-m.weight, m.market_id)):
+            i = min(range(shards), key=lambda k: (load[k], k))
+            out[i].append(ms)
+            load[i] += ms.weight
+    else:
+        raise ValueError(f"unknown shard assignment: {by!r}")
+    return out
+
+
+class CoordinatorEngine:
+    """Engine stand-in inside a shard worker: plans and cancels go to the shared coordinator.
+
+    `audit_db` is the worker's own connection to the shared database (metadata reads). Each
+    market runs in exactly one shard, so the worker keeps its own `ledger` for its markets:
+    rebuilt from `audit_db` at start and updated from every execute reply, so strategy risk
+    checks read memory rather than SQL and see fills as soon as the coordinator acks them.
+    A plan that fails after partial fills is picked up by the service's ledger reconcile.
+    The global `exposure_cap` is still enforced by the coordinator. A reader thread
+    resolves replies by request id.
+    """
+
+    def __init__(self, shard_id: int, incarnation: int, requests: Any, responses: Any, audit_db=None, timeout_s: float = 30.0):
+        self.shard_id = shard_id
+        self.incarnation = incarnation
+        self.audit_db = audit_db
+        self.timeout_s = float(timeout_s)
+        self.ledger = PositionLedger()
+        if audit_db is not None:
+            try:
+                self.ledger.rebuild(audit_db)
+            except Exception:
+                pass
+        self._requests = requests
+        self._responses = responses
+        self._ids = itertools.count()
+        self._pending: Dict[Tuple[int, int], Future] = {}
+        self._lock = threading.Lock()
+        self._reader = threading.Thread(target=self._read, name=f"polybot-shard{shard_id}-replies", daemon=True)
+        self._reader.start()
+
+    def _read(self) -> None:
+        while True:
+            msg = self._responses.get()
+            if msg is None:
+                return
+            key, ok, value = msg
+            with self._lock:
+                fut = self._pending.pop(key, None)
+            if fut is None:
+                continue  # reply to a previous incarnation
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(RuntimeError(f"coordinator error: {value}"))
+
+    def _submit(self, op: str, payload: Any) -> Future:
+        key = (self.incarnation, next(self._ids))
+        fut: Future = Future()
+        with self._lock:
+            self._pending[key] = fut
+        self._requests.put((self.shard_id, key, op, payload))
+        return fut
+
+    def execute_plan(self, plan: ExecutionPlan) -> ExecutionResult:
+        res = self._submit("execute", plan).result(self.timeout_s)
+        self.ledger.apply_acks(plan.intents, res.acks)
+        return res
+
+    async def execute_plan_async(self, plan: ExecutionPlan) -> ExecutionResult:
+        res = await asyncio.wait_for(asyncio.wrap_future(self._submit("execute", plan)), self.timeout_s)
+        self.ledger.apply_acks(plan.intents, res.acks)
+        return res
+
+    def cancel_client_orders(self, client_order_ids: List[str]) -> None:
+        self._submit("cancel", list(client_order_ids)).result(self.timeout_s)
+
+    async def cancel_client_orders_async(self, client_order_ids: List[str]) -> None:
+        await asyncio.wait_for(asyncio.wrap_future(self._submit("cancel", list(client_order_ids))), self.timeout_s)
+
+    def close(self) -> None:
+        self._responses.put(None)
+        self._reader.join(timeout=1.0)
+
+
+class ShardCoordinator:
+    """Single execution/risk point for all shards, on a thread in the supervisor process.
+
+    Owns the one `ExecutionEngine` (and its position ledger) and serves shard requests in
+    arrival order, so the optional global `exposure_cap` check and the fills it guards are
+    never interleaved across shards.
+
+    Metrics: `shard_coordinator_requests{op}`, `shard_coordinator_errors`,
+    `shard_exposure_blocked`.
+    """
+
+    def __init__(self, requests: Any, responses: Dict[int, Any], engine_factory: Callable[[], ExecutionEngine], exposure_cap: float = 0.0):
+        self._requests = requests
+        self._responses = responses
+        self._engine_factory = engine_factory
+        self.exposure_cap = float(exposure_cap)
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._serve, name="polybot-shard-coordinator", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._requests.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _handle(self, engine: ExecutionEngine, op: str, payload: Any) -> Any:
+        if op == "execute":
+            if self.exposure_cap > 0 and engine.audit_db is not None:
+                blocked, _ = will_exceed_exposure(engine.audit_db, payload, cap_per_outcome=self.exposure_cap, ledger=engine.ledger)
+                if blocked:
+                    inc("shard_exposure_blocked", 1)
+                    return ExecutionResult(acks=[], fully_filled=False)
+            return engine.execute_plan(payload)
+        if op == "cancel":
+            engine.cancel_client_orders(payload)
+            return None
+        raise ValueError(f"unknown coordinator op: {op!r}")
+
+    def _serve(self) -> None:
+        # the engine (and its SQLite connection) is created on, and only used from, this thread
+        engine = self._engine_factory()
+        self._ready.set()
+        try:
+            while True:
+                msg = self._requests.get()
+                if msg is None:
+                    return
+                shard_id, key, op, payload = msg
+                inc_labelled("shard_coordinator_requests", {"op": op}, 1)
+                try:
+                    reply = (key, True, self._handle(engine, op, payload))
+                except Exception as e:  # noqa: BLE001
+                    inc("shard_coordinator_errors", 1)
+                    reply = (key, False, repr(e))
+                self._responses[shard_id].put(reply)
+        finally:
+            if engine.audit_db is not None:
+                engine.audit_db.close()
+
+
+async def _shard_async(shard_id: int, incarnation: int, markets: List[MarketSpec], runner_kwargs: Dict[str, Any], requests: Any, responses: Any, metrics_segment: Optional[str]) -> None:
+    if metrics_segment:
+        # counters live in the supervisor-created segment; a restarted incarnation continues them
+        share_metrics(metrics_segment, create=False)
+    runner = ServiceRunner(**runner_kwargs)
+    engine = CoordinatorEngine(shard_id, incarnation, requests, responses, audit_db=runner.con)
+    try:
+        await runner.run_markets(markets, engine=engine)
+    finally:
+        engine.close()
+
+
+def shard_main(shard_id: int, incarnation: int, markets: List[MarketSpec], runner_kwargs: Dict[str, Any], requests: Any, responses: Any, metrics_segment: Optional[str] = None) -> None:
+    """Worker process entry point: run this shard's markets with their own sockets and books."""
+    asyncio.run(_shard_async(shard_id, incarnation, markets, runner_kwargs, requests, responses, metrics_segment))
+
+
+class ShardSupervisor:
+    """Run `MarketSpec`s across worker processes with one shared execution coordinator.
+
+    Each shard is a process running a `ServiceRunner` over its markets (own WS connections,
+    books and DB connection) whose engine is a `CoordinatorEngine`. The supervisor restarts
+    shards that exit abnormally (up to `max_restarts` each). Every shard keeps its counters in
+    a shared-memory segment the supervisor created and attached, so status/metrics endpoints
+    here report service-wide totals without any IPC; on shutdown the final shard totals are
+    folded into this process's counters. `metrics_capacity` is the slot count of each shard's
+    segment (a counter takes one slot, a histogram series 11, so the 16384 default holds
+    ~100 markets' per-market histograms); metrics registered past it stay in the worker
+    and count `metrics_registry_overflow`. Needs a file-backed database shared by all processes.
+
+    Metrics: `shard_restarts{shard}`, `shard_failed{shard}` (gave up after `max_restarts`).
+    """
+
+    def __init__(
+        self,
+        runner_kwargs: Dict[str, Any],
+        shards: int = 2,
+        by: str = "hash",
+        max_restarts: int = 3,
+        exposure_cap: float = 0.0,
+        poll_interval_s: float = 0.1,
+        start_method: str = "spawn",
+        worker_target: Callable[..., None] = shard_main,
+        metrics_capacity: int = 16384,
+    ):
+        if parse_db_url(runner_kwargs.get("db_url", ":memory:"))[1] == ":memory:":
+            raise ValueError("sharded service requires a file-backed db_url")
+        self.runner_kwargs = dict(runner_kwargs)
+        self.shards = max(1, int(shards))
+        self.by = by
+        self.max_restarts = max(0, int(max_restarts))
+        self.exposure_cap = float(exposure_cap)
+        self.poll_interval_s = float(poll_interval_s)
+        self.metrics_capacity = max(1, int(metrics_capacity))
+        self._ctx = mp.get_context(start_method)
+        self._target = worker_target
+        self.restarts: Dict[int, int] = {}
+        self._segments: Dict[int, str] = {}
+
+    def _coordinator_engine(self) -> ExecutionEngine:
+        from polybot.adapters.polymarket.relayer import build_relayer
+
+        kw = self.runner_kwargs
+        return ExecutionEngine(
+            build_relayer(kw.get("relayer_type", "fake"), **(kw.get("relayer_kwargs") or {})),
+            audit_db=connect(kw["db_url"]),
+            max_retries=int(kw.get("engine_max_retries", 0)),
+            retry_sleep_ms=int(kw.get("engine_retry_sleep_ms", 0)),
+        )
+
+    def _spawn(self, shard_id: int, incarnation: int, markets: List[MarketSpec], queues) -> Any:
+        requests, responses = queues
+        proc = self._ctx.Process(
+            target=self._target,
+            args=(shard_id, incarnation, markets, self.runner_kwargs, requests, responses[shard_id], self._segments[shard_id]),
+            name=f"polybot-shard-{shard_id}",
+            daemon=True,
+        )
+        proc.start()
+        return proc
+
+    async def run(self, markets: List[MarketSpec]) -> None:
+        # create the schema once before workers and the coordinator open their connections
+        ServiceRunner(db_url=self.runner_kwargs["db_url"]).con.close()
+        assignment = [shard for shard in assign_shards(markets, self.shards, self.by) if shard]
+        requests = self._ctx.Queue()
+        responses = {i: self._ctx.Queue() for i in range(len(assignment))}
+        tag = uuid.uuid4().hex[:8]
+        for i in range(len(assignment)):
+            name = f"pbm{os.getpid()}_{tag}_{i}"
+            create_segment(name, capacity=self.metrics_capacity)
+            attach_segment(name)
+            self._segments[i] = name
+        coordinator = ShardCoordinator(requests, responses, self._coordinator_engine, exposure_cap=self.exposure_cap)
+        coordinator.start()
+        queues = (requests, responses)
+        running: Dict[int, Tuple[int, Any]] = {}
+        for i, shard_markets in enumerate(assignment):
+            running[i] = (0, self._spawn(i, 0, shard_markets, queues))
+        try:
+            while running:
+                await asyncio.sleep(self.poll_interval_s)
+                for i, (incarnation, proc) in list(running.items()):
+                    if proc.is_alive():
+                        continue
+                    proc.join()
+                    if proc.exitcode == 0:
+                        del running[i]
+                        continue
+                    if self.restarts.get(i, 0) >= self.max_restarts:
+                        inc_labelled("shard_failed", {"shard": str(i)}, 1)
+                        del running[i]
+                        continue
+                    self.restarts[i] = self.restarts.get(i, 0) + 1
+                    inc_labelled("shard_restarts", {"shard": str(i)}, 1)
+                    running[i] = (incarnation + 1, self._spawn(i, incarnation + 1, assignment[i], queues))
+        finally:
+            for _, proc in running.values():
+                proc.terminate()
+                proc.join()
+            detach_segments(list(self._segments.values()), fold=True, unlink=True)
+            self._segments.clear()
+            coordinator.stop()
@@ -22,6 +22,17 @@ def connect_sqlite(url: str) -> sqlite3.Connection:
     return con
 
 
+def is_memory_db(con: sqlite3.Connection) -> bool:
+    """True when `con`'s main database is in-memory (private to that connection)."""
+    try:
+        for _seq, name, file in con.execute("PRAGMA database_list").fetchall():
+            if name == "main":
+                return not file
+    except sqlite3.Error:
+        pass
+    return True
+
+
 def enable_wal(con: sqlite3.Connection) -> None:
     try:
         con.execute("PRAGMA journal_mode = WAL;")
@@ -0,0 +1,386 @@
+from __future__ import annotations
+
+import mmap
+import os
+import sqlite3
+import struct
+from bisect import bisect_right
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from polybot.core.ladder import DEFAULT_TICK_SIZE
+from polybot.observability.metrics import counter_family, inc
+
+
+# Record: market_idx u32, side u8, op u8, pad, seq i64, ts_ms i64, price tick i64, size f64
+RECORD = struct.Struct("<IBBxxqqqd")
+RECORD_SIZE = RECORD.size
+# Header: magic, version, record size, count, min ts, max ts, price scale, capacity
+_HEADER = struct.Struct("<4sHHQqqqQ")
+HEADER_SIZE = 64
+_MAGIC = b"PBEL"
+_VERSION = 2
+# Time index entry: (max ts of all records before `record_no`, record_no)
+_INDEX = struct.Struct("<qQ")
+_RECORDS_APPENDED = counter_family("eventlog_records_appended", "market")
+
+SIDE_BID = 0
+SIDE_ASK = 1
+OP_DELTA = 0
+OP_SNAPSHOT_LEVEL = 1
+# Message boundary: one per appended message, before its levels. `side` holds the kind
+# (KIND_DELTA / KIND_SNAPSHOT), `tick` the number of level records that follow.
+OP_MESSAGE = 2
+KIND_DELTA = 0
+KIND_SNAPSHOT = 1
+
+_SIDE_CODES = {"bid": SIDE_BID, "bids": SIDE_BID, "ask": SIDE_ASK, "asks": SIDE_ASK}
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS event_log_markets (
+    market_idx INTEGER PRIMARY KEY,
+    market_id TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS event_log_segments (
+    segment_no INTEGER PRIMARY KEY,
+    path TEXT NOT NULL,
+    records INTEGER NOT NULL DEFAULT 0,
+    min_ts_ms INTEGER,
+    max_ts_ms INTEGER,
+    sealed INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+_TS_MAX = (1 << 63) - 1
+_TS_MIN = -(1 << 63)
+
+
+class _Segment:
+    """One fixed-capacity, memory-mapped segment file plus its sparse time index."""
+
+    def __init__(self, path: Path, segment_no: int, capacity: int, scale: int, index_stride: int):
+        self.path = path
+        self.index_path = path.with_suffix(".idx")
+        self.segment_no = segment_no
+        self.index_stride = index_stride
+        fresh = not path.exists()
+        size = HEADER_SIZE + capacity * RECORD_SIZE
+        self._fh = open(path, "r+b" if not fresh else "w+b")
+        if fresh:
+            self._fh.truncate(size)
+        else:
+            size = os.fstat(self._fh.fileno()).st_size
+        self._mm = mmap.mmap(self._fh.fileno(), size)
+        if fresh:
+            self.count, self.min_ts, self.max_ts, self.scale, self.capacity = 0, _TS_MAX, _TS_MIN, scale, capacity
+            self._write_header()
+        else:
+            magic, version, rec_size, count, mn, mx, sc, cap = _HEADER.unpack_from(self._mm, 0)
+            if magic != _MAGIC or version != _VERSION or rec_size != RECORD_SIZE:
+                self.close()
+                raise ValueError(f"not a polybot event log segment: {path}")
+            self.count, self.min_ts, self.max_ts, self.scale, self.capacity = count, mn, mx, sc, cap
+        self._index_ts: List[int] = []
+        self._index_rec: List[int] = []
+        if not fresh and self.index_path.exists():
+            data = self.index_path.read_bytes()
+            for ts, rec in _INDEX.iter_unpack(data[: len(data) - len(data) % _INDEX.size]):
+                if rec <= self.count:
+                    self._index_ts.append(ts)
+                    self._index_rec.append(rec)
+        self._index_fh = open(self.index_path, "ab")
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def _write_header(self) -> None:
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, RECORD_SIZE, self.count, self.min_ts, self.max_ts, self.scale, self.capacity)
+
+    def append(self, market_idx: int, side: int, op: int, seq: int, ts_ms: int, tick: int, size: float) -> None:
+        n = self.count
+        if n % self.index_stride == 0:
+            self._index_ts.append(self.max_ts)
+            self._index_rec.append(n)
+            self._index_fh.write(_INDEX.pack(self.max_ts, n))
+        RECORD.pack_into(self._mm, HEADER_SIZE + n * RECORD_SIZE, market_idx, side, op, seq, ts_ms, tick, size)
+        self.count = n + 1
+        if ts_ms < self.min_ts:
+            self.min_ts = ts_ms
+        if ts_ms > self.max_ts:
+            self.max_ts = ts_ms
+        # header is rewritten per append so a crashed writer loses at most the OS page cache
+        self._write_header()
+
+    def start_record(self, start_ts_ms: Optional[int]) -> int:
+        """First record that may have ts >= start (every earlier record is strictly older)."""
+        if start_ts_ms is None or not self._index_ts:
+            return 0
+        i = bisect_right(self._index_ts, start_ts_ms - 1) - 1
+        return self._index_rec[i] if i >= 0 else 0
+
+    def view(self, first: int = 0) -> memoryview:
+        """Zero-copy view over records `[first, count)`."""
+        return memoryview(self._mm)[HEADER_SIZE + first * RECORD_SIZE: HEADER_SIZE + self.count * RECORD_SIZE]
+
+    def flush(self) -> None:
+        self._mm.flush()
+        self._index_fh.flush()
+
+    def close(self) -> None:
+        try:
+            self._mm.flush()
+            self._mm.close()
+        except (ValueError, OSError):
+            pass
+        self._fh.close()
+        idx = getattr(self, "_index_fh", None)
+        if idx is not None:
+            idx.close()
+
+
+class EventLog:
+    """Append-only columnar store for orderbook events in rolling mmap segments.
+
+    Each record is a fixed-width `RECORD` (market index, side, op, seq, ts_ms, price tick,
+    size). Segments are preallocated files of `segment_records` records under `root`; when
+    one fills up it is sealed and the next is opened. A sparse per-segment time index
+    (every `index_stride` records) lets reads start near a timestamp instead of at the
+    beginning, and pruning drops whole segments whose newest record is older than the cut.
+
+    SQLite (`con`) only holds metadata: the market_id <-> market index mapping and the
+    segment catalog. Every message is an `OP_MESSAGE` boundary record (kind, seq, ts, level
+    count) followed by its levels, so `iter_messages` rebuilds exactly the appended
+    snapshot/delta stream, empty messages and repeated seqs included.
+    """
+
+    def __init__(
+        self,
+        root: str | Path,
+        con: sqlite3.Connection,
+        segment_records: int = 1 << 18,
+        index_stride: int = 256,
+        tick_size: float = DEFAULT_TICK_SIZE,
+    ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.con = con
+        self.segment_records = max(1, int(segment_records))
+        self.index_stride = max(1, int(index_stride))
+        self.scale = int(round(1.0 / tick_size))
+        con.executescript(_DDL)
+        con.commit()
+        self._market_idx: Dict[str, int] = {}
+        self._market_ids: Dict[int, str] = {}
+        for idx, mid in con.execute("SELECT market_idx, market_id FROM event_log_markets"):
+            self._market_idx[mid] = int(idx)
+            self._market_ids[int(idx)] = mid
+        self._segments: List[_Segment] = []
+        for path in sorted(self.root.glob("seg-*.log")):
+            self._segments.append(_Segment(path, int(path.stem[4:]), self.segment_records, self.scale, self.index_stride))
+        if self._segments and self._segments[-1].scale != self.scale:
+            raise ValueError("event log tick size does not match existing segments")
+        self._next_no = self._segments[-1].segment_no + 1 if self._segments else 0
+
+    # Metadata
+    def market_index(self, market_id: str) -> int:
+        idx = self._market_idx.get(market_id)
+        if idx is None:
+            self.con.execute("INSERT OR IGNORE INTO event_log_markets (market_id) VALUES (?)", (market_id,))
+            self.con.commit()
+            row = self.con.execute("SELECT market_idx FROM event_log_markets WHERE market_id = ?", (market_id,)).fetchone()
+            idx = int(row[0])
+            self._market_idx[market_id] = idx
+            self._market_ids[idx] = market_id
+        return idx
+
+    def _catalog(self, seg: _Segment, sealed: bool) -> None:
+        self.con.execute(
+            """
+            INSERT INTO event_log_segments (segment_no, path, records, min_ts_ms, max_ts_ms, sealed)
+            VALUES (?,?,?,?,?,?)
+            ON CONFLICT(segment_no) DO UPDATE SET
+                records=excluded.records, min_ts_ms=excluded.min_ts_ms,
+                max_ts_ms=excluded.max_ts_ms, sealed=excluded.sealed
+            """,
+            (
+                seg.segment_no,
+                seg.path.name,
+                seg.count,
+                seg.min_ts if seg.count else None,
+                seg.max_ts if seg.count else None,
+                1 if sealed else 0,
+            ),
+        )
+        self.con.commit()
+
+    # Writing
+    def _active(self) -> _Segment:
+        if self._segments and not self._segments[-1].full:
+            return self._segments[-1]
+        if self._segments:
+            sealed = self._segments[-1]
+            sealed.flush()
+            self._catalog(sealed, sealed=True)
+            inc("eventlog_segments_rolled")
+        no = self._next_no
+        self._next_no += 1
+        seg = _Segment(self.root / f"seg-{no:08d}.log", no, self.segment_records, self.scale, self.index_stride)
+        self._segments.append(seg)
+        self._catalog(seg, sealed=False)
+        return seg
+
+    def append(self, market_id: str, seq: int, ts_ms: int, side: str, price: float, size: float, op: int = OP_DELTA) -> None:
+        self._active().append(
+            self.market_index(market_id),
+            _SIDE_CODES[side],
+            op,
+            int(seq),
+            int(ts_ms),
+            int(round(float(price) * self.scale)),
+            float(size),
+        )
+
+    def append_message(self, market_id: str, msg: Dict[str, Any], ts_ms: int) -> int:
+        """Append a snapshot or delta message; returns the number of records written."""
+        typ = msg.get("type")
+        if typ not in ("snapshot", "delta"):
+            return 0
+        midx = self.market_index(market_id)
+        seq = int(msg.get("seq", 0))
+        ts_ms = int(ts_ms)
+        bids = msg.get("bids") or []
+        asks = msg.get("asks") or []
+        kind, op = (KIND_SNAPSHOT, OP_SNAPSHOT_LEVEL) if typ == "snapshot" else (KIND_DELTA, OP_DELTA)
+        self._active().append(midx, kind, OP_MESSAGE, seq, ts_ms, len(bids) + len(asks), 0.0)
+        n = 1
+        for levels, side in ((bids, SIDE_BID), (asks, SIDE_ASK)):
+            for price, size in levels:
+                self._active().append(midx, side, op, seq, ts_ms, int(round(float(price) * self.scale)), float(size))
+                n += 1
+        _RECORDS_APPENDED.labels(market_id).inc(n)
+        return n
+
+    # Reading
+    def records(
+        self,
+        market_id: Optional[str] = None,
+        start_ts_ms: Optional[int] = None,
+        end_ts_ms: Optional[int] = None,
+    ) -> Iterator[Tuple[int, int, int, int, int, int, float]]:
+        """Yield raw `(market_idx, side, op, seq, ts_ms, tick, size)` tuples in append order.
+
+        Records are unpacked straight from the mapped segments (no intermediate copies);
+        segments outside `[start_ts_ms, end_ts_ms]` are skipped using their header bounds.
+        """
+        want = None
+        if market_id is not None:
+            want = self._market_idx.get(market_id)
+            if want is None:
+                return
+        lo = _TS_MIN if start_ts_ms is None else int(start_ts_ms)
+        hi = _TS_MAX if end_ts_ms is None else int(end_ts_ms)
+        for seg in list(self._segments):
+            if seg.count == 0 or seg.max_ts < lo or seg.min_ts > hi:
+                continue
+            view = seg.view(seg.start_record(start_ts_ms))
+            it = RECORD.iter_unpack(view)
+            try:
+                for rec in it:
+                    if want is not None and rec[0] != want:
+                        continue
+                    if rec[4] < lo or rec[4] > hi:
+                        continue
+                    yield rec
+            finally:
+                del it
+                view.release()
+
+    def iter_messages(
+        self,
+        market_id: str,
+        start_ts_ms: Optional[int] = None,
+        end_ts_ms: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Rebuild the appended snapshot/delta messages for one market, one per boundary record.
+
+        Each message carries the `ts_ms` it was appended with, so replays keep recorded time.
+        A message with fewer levels than its boundary announced (writer died mid-append) is
+        skipped and counted in `eventlog_torn_messages`.
+        """
+        scale = float(self.scale)
+        cur: Optional[Dict[str, Any]] = None
+        want = 0
+        for _midx, side, op, seq, ts, tick, size in self.records(market_id, start_ts_ms, end_ts_ms):
+            if op == OP_MESSAGE:
+                if cur is not None:
+                    if want:
+                        inc("eventlog_torn_messages")
+                    else:
+                        yield cur
+                cur = {"type": "snapshot" if side == KIND_SNAPSHOT else "delta", "seq": seq, "bids": [], "asks": [], "ts_ms": ts}
+                want = tick
+                continue
+            if cur is None:
+                continue
+            cur["bids" if side == SIDE_BID else "asks"].append([tick / scale, size])
+            want -= 1
+        if cur is not None:
+            if want:
+                inc("eventlog_torn_messages")
+            else:
+                yield cur
+
+    def count(self) -> int:
+        return sum(seg.count for seg in self._segments)
+
+    def segments(self) -> List[Dict[str, Any]]:
+        return [
+            {
+                "segment_no": seg.segment_no,
+                "path": str(seg.path),
+                "records": seg.count,
+                "min_ts_ms": seg.min_ts if seg.count else None,
+                "max_ts_ms": seg.max_ts if seg.count else None,
+            }
+            for seg in self._segments
+        ]
+
+    # Retention
+    def prune_before(self, ts_ms_threshold: int) -> int:
+        """Drop whole segments whose newest record is older than the threshold.
+
+        Retention is segment-granular: records older than the cut that share a segment
+        with newer ones are kept until that segment ages out. The active segment is only
+        dropped once it is full. Returns the number of records removed.
+        """
+        removed = 0
+        keep: List[_Segment] = []
+        for i, seg in enumerate(self._segments):
+            active = i == len(self._segments) - 1 and not seg.full
+            if not active and seg.count and seg.max_ts < ts_ms_threshold:
+                removed += seg.count
+                seg.close()
+                for p in (seg.path, seg.index_path):
+                    try:
+                        p.unlink()
+                    except FileNotFoundError:
+                        pass
+                self.con.execute("DELETE FROM event_log_segments WHERE segment_no = ?", (seg.segment_no,))
+                inc("eventlog_segments_pruned")
+            else:
+                keep.append(seg)
+        self.con.commit()
+        self._segments = keep
+        return removed
+
+    def flush(self) -> None:
+        for seg in self._segments[-1:]:
+            seg.flush()
+            self._catalog(seg, sealed=seg.full)
+
+    def close(self) -> None:
+        self.flush()
+        for seg in self._segments:
+            seg.close()
+        self._segments = []
@@ -3,13 +3,18 @@ from __future__ import annotations
 import sqlite3
 from typing import List, Dict, Any
 
+from polybot.storage.metadata import metadata_cache
+
 
 def upsert_markets(con: sqlite3.Connection, markets: List[Dict[str, Any]]) -> None:
     cur = con.cursor()
     for m in markets:
         cur.execute(
             "INSERT INTO markets (market_id, title, status, condition_id, neg_risk_group, rule_hash) VALUES (?,?,?,?,?,?)\n"
-            "ON CONFLICT(market_id) DO UPDATE SET title=excluded.title, status=excluded.status",
+            "ON CONFLICT(market_id) DO UPDATE SET title=excluded.title, status=excluded.status,\n"
+            "condition_id=COALESCE(excluded.condition_id, markets.condition_id),\n"
+            "neg_risk_group=COALESCE(excluded.neg_risk_group, markets.neg_risk_group),\n"
+            "rule_hash=COALESCE(excluded.rule_hash, markets.rule_hash)",
             (m.get("market_id"), m.get("title"), m.get("status"), m.get("condition_id"), m.get("neg_risk_group"), m.get("rule_hash")),
         )
         for o in m.get("outcomes", []) or []:
@@ -19,4 +24,6 @@ def upsert_markets(con: sqlite3.Connection, markets: List[Dict[str, Any]]) -> No
                 (o.get("outcome_id"), m.get("market_id"), o.get("name"), o.get("tick_size", 0.01), o.get("min_size", 1.0)),
             )
     con.commit()
+    # refresh cached metadata for the markets just written (bumps the cache version)
+    metadata_cache(con).refresh(con, [str(m.get("market_id")) for m in markets])
 
@@ -0,0 +1,237 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from polybot.observability.metrics import inc
+
+
+@dataclass(frozen=True)
+class OutcomeMeta:
+    outcome_id: str
+    market_id: str
+    name: Optional[str]
+    tick_size: float
+    min_size: float
+
+
+@dataclass(frozen=True)
+class MarketMeta:
+    market_id: str
+    title: Optional[str]
+    status: Optional[str]
+    condition_id: Optional[str]
+    neg_risk_group: Optional[str]
+    rule_hash: Optional[str]
+    outcomes: Tuple[OutcomeMeta, ...]
+    version: int  # cache version the entry was loaded at
+
+
+class MetadataCache:
+    """Read-mostly cache of market/outcome metadata for one database.
+
+    Readers get immutable `MarketMeta`/`OutcomeMeta` entries from a snapshot dict that is
+    replaced wholesale on every change (copy-on-write), so lookups take no lock. Misses load
+    the market from the DB; ids the DB does not know are remembered too, so unknown ids do
+    not query on every lookup. `refresh` (called by `upsert_markets`, i.e. market sync/refresh)
+    reloads markets and bumps `version`; `invalidate` drops entries after out-of-band writes.
+    `check` compares the DB-side `metadata_version` row (bumped by triggers on any write to
+    markets/outcomes, from any connection or process) with the one entries were loaded at
+    and invalidates everything when it moved.
+
+    Metrics: `metadata_cache_hits`, `metadata_cache_misses`,
+    `metadata_cache_refresh_ms_sum`/`metadata_cache_refresh_count`, `metadata_cache_invalidations`.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self._markets: Dict[str, MarketMeta] = {}
+        self._outcomes: Dict[str, OutcomeMeta] = {}
+        # ids looked up but absent from the DB (negative entries)
+        self._no_markets: FrozenSet[str] = frozenset()
+        self._no_outcomes: FrozenSet[str] = frozenset()
+        self._db_version: Optional[int] = None  # metadata_version the entries were loaded at
+        self._lock = threading.Lock()
+
+    def market(self, con: sqlite3.Connection, market_id: str) -> Optional[MarketMeta]:
+        meta = self._markets.get(market_id)
+        if meta is not None or market_id in self._no_markets:
+            inc("metadata_cache_hits", 1)
+            return meta
+        inc("metadata_cache_misses", 1)
+        self._load(con, [market_id])
+        return self._markets.get(market_id)
+
+    def outcome(self, con: sqlite3.Connection, outcome_id: str) -> Optional[OutcomeMeta]:
+        meta = self._outcomes.get(outcome_id)
+        if meta is not None or outcome_id in self._no_outcomes:
+            inc("metadata_cache_hits", 1)
+            return meta
+        inc("metadata_cache_misses", 1)
+        row = con.execute("SELECT market_id FROM outcomes WHERE outcome_id=?", (outcome_id,)).fetchone()
+        if row is not None:
+            self._load(con, [str(row[0])])
+        meta = self._outcomes.get(outcome_id)
+        if meta is None:
+            with self._lock:
+                self._no_outcomes = self._no_outcomes | {outcome_id}
+        return meta
+
+    def check(self, con: sqlite3.Connection) -> bool:
+        """Invalidate everything if markets/outcomes changed in the DB since entries were loaded.
+
+        Catches writes from other connections and processes as well as raw SQL on this one;
+        costs one single-row read. Returns True when entries were dropped.
+        """
+        v = _db_version(con)
+        if v is None or self._db_version is None or v == self._db_version:
+            return False
+        with self._lock:
+            if self._db_version is None or v == self._db_version:
+                return False
+            self.version += 1
+            self._clear_locked()
+            self._db_version = v
+        inc("metadata_cache_invalidations", 1)
+        return True
+
+    def snapshot(self) -> Dict[str, MarketMeta]:
+        """Current market entries; treat as read-only (it is replaced, never mutated)."""
+        return self._markets
+
+    def refresh(self, con: sqlite3.Connection, market_ids: Optional[Iterable[str]] = None) -> int:
+        """Reload `market_ids` (default: every market) and bump the version; returns the new version."""
+        start = time.perf_counter()
+        with self._lock:
+            self.version += 1
+            if market_ids is None:
+                self._clear_locked()
+            self._load_locked(con, None if market_ids is None else list(market_ids), bump=False)
+            version = self.version
+        inc("metadata_cache_refresh_ms_sum", int((time.perf_counter() - start) * 1000))
+        inc("metadata_cache_refresh_count", 1)
+        return version
+
+    def invalidate(self, market_id: Optional[str] = None) -> int:
+        """Drop cached entries (all, or one market) so the next read reloads; returns the new version."""
+        with self._lock:
+            self.version += 1
+            if market_id is None:
+                self._clear_locked()
+            else:
+                self._markets = {k: v for k, v in self._markets.items() if k != market_id}
+                self._outcomes = {k: v for k, v in self._outcomes.items() if v.market_id != market_id}
+                self._no_markets = self._no_markets - {market_id}
+                self._no_outcomes = frozenset()
+            version = self.version
+        inc("metadata_cache_invalidations", 1)
+        return version
+
+    def _clear_locked(self) -> None:
+        self._markets, self._outcomes = {}, {}
+        self._no_markets, self._no_outcomes = frozenset(), frozenset()
+
+    def _load(self, con: sqlite3.Connection, market_ids: List[str]) -> None:
+        with self._lock:
+            self._load_locked(con, market_ids)
+
+    def _load_locked(self, con: sqlite3.Connection, market_ids: Optional[List[str]], bump: bool = True) -> None:
+        # read the DB version first: a write racing the SELECTs is caught by the next check
+        v = _db_version(con)
+        if v is not None:
+            if self._db_version is not None and v != self._db_version:
+                # loading into entries from an older DB version would mix the two: start over
+                if bump:
+                    self.version += 1
+                self._clear_locked()
+            self._db_version = v
+        if market_ids is None:
+            mrows = con.execute("SELECT market_id, title, status, condition_id, neg_risk_group, rule_hash FROM markets").fetchall()
+            orows = con.execute("SELECT outcome_id, market_id, name, tick_size, min_size FROM outcomes ORDER BY outcome_id").fetchall()
+        else:
+            if not market_ids:
+                return
+            marks = ",".join("?" for _ in market_ids)
+            mrows = con.execute(
+                f"SELECT market_id, title, status, condition_id, neg_risk_group, rule_hash FROM markets WHERE market_id IN ({marks})",
+                market_ids,
+            ).fetchall()
+            orows = con.execute(
+                f"SELECT outcome_id, market_id, name, tick_size, min_size FROM outcomes WHERE market_id IN ({marks}) ORDER BY outcome_id",
+                market_ids,
+            ).fetchall()
+        by_market: Dict[str, List[OutcomeMeta]] = {}
+        outcomes = dict(self._outcomes)
+        if market_ids is not None:
+            loaded = set(market_ids)
+            outcomes = {k: v for k, v in outcomes.items() if v.market_id not in loaded}
+        for oid, mid, name, tick, mn in orows:
+            o = OutcomeMeta(outcome_id=str(oid), market_id=str(mid), name=name, tick_size=float(tick or 0.0), min_size=float(mn or 0.0))
+            outcomes[o.outcome_id] = o
+            by_market.setdefault(o.market_id, []).append(o)
+        markets = dict(self._markets)
+        if market_ids is not None:
+            for mid in market_ids:
+                markets.pop(mid, None)
+        for mid, title, status, cond, group, rule_hash in mrows:
+            markets[str(mid)] = MarketMeta(
+                market_id=str(mid),
+                title=title,
+                status=status,
+                condition_id=cond,
+                neg_risk_group=group,
+                rule_hash=rule_hash,
+                outcomes=tuple(by_market.get(str(mid), ())),
+                version=self.version,
+            )
+        # publish: readers see either the old or the new dicts, never a partial update
+        self._outcomes = outcomes
+        self._markets = markets
+        if market_ids is not None:
+            self._no_markets = (self._no_markets - set(market_ids)) | {m for m in market_ids if m not in markets}
+        # a (re)loaded market may bring outcomes that were missing before
+        self._no_outcomes = self._no_outcomes - {str(r[0]) for r in orows}
+
+
+def _db_version(con: sqlite3.Connection) -> Optional[int]:
+    """The `metadata_version` counter, or None on databases created before it existed."""
+    try:
+        row = con.execute("SELECT v FROM metadata_version WHERE id=0").fetchone()
+    except sqlite3.Error:
+        return None
+    return int(row[0]) if row else None
+
+
+_CACHES: Dict[str, MetadataCache] = {}
+_CACHES_LOCK = threading.Lock()
+
+
+def _scope(con: sqlite3.Connection) -> str:
+    for _, name, path in con.execute("PRAGMA database_list").fetchall():
+        if name == "main" and path:
+            return f"file:{path}"
+    # in-memory database: tag the connection with a uniquely named temp table (DDL only, so
+    # no transaction is left open on the caller's connection)
+    row = con.execute("SELECT name FROM sqlite_temp_master WHERE type='table' AND name LIKE 'polybot_meta_scope_%'").fetchone()
+    if row is None:
+        name = f"polybot_meta_scope_{uuid.uuid4().hex}"
+        con.execute(f"CREATE TEMP TABLE {name} (x INTEGER)")
+        return f"mem:{name}"
+    return f"mem:{row[0]}"
+
+
+def metadata_cache(con: sqlite3.Connection) -> MetadataCache:
+    """Process-wide cache for the database behind `con` (shared by every connection to the same file).
+
+    Resolving the scope costs a query, so callers should keep the returned cache.
+    """
+    key = _scope(con)
+    with _CACHES_LOCK:
+        cache = _CACHES.get(key)
+        if cache is None:
+            cache = _CACHES[key] = MetadataCache()
+        return cache
@@ -9,7 +9,8 @@ from polybot.adapters.polymarket.relayer import OrderAck
 from polybot.exec.planning import OrderIntent
 
 
-def persist_orders_and_fills(con: sqlite3.Connection, intents: List[OrderIntent], acks: List[OrderAck]) -> None:
+def write_orders_and_fills(con: sqlite3.Connection, intents: List[OrderIntent], acks: List[OrderAck]) -> None:
+    """Upsert order rows and insert fills without committing (the `StorageWriter` job)."""
     ts_ms = int(time.time() * 1000)
     for i, ack in enumerate(acks):
         intent = intents[i]
@@ -40,6 +41,10 @@ def persist_orders_and_fills(con: sqlite3.Connection, intents: List[OrderIntent]
                 "INSERT INTO fills (fill_id, order_id, ts_ms, price, size, fee) VALUES (?,?,?,?,?,?)",
                 (fill_id, ack.order_id, ts_ms, intent.price, ack.filled_size, 0.0),
             )
+
+
+def persist_orders_and_fills(con: sqlite3.Connection, intents: List[OrderIntent], acks: List[OrderAck]) -> None:
+    write_orders_and_fills(con, intents, acks)
     con.commit()
 
 
@@ -85,11 +90,17 @@ def persist_orders_and_fills_bulk(con: sqlite3.Connection, intents: List[OrderIn
     con.commit()
 
 
-def mark_canceled_by_client_oids(con: sqlite3.Connection, client_oids: List[str]) -> int:
+def update_canceled_by_client_oids(con: sqlite3.Connection, client_oids: List[str]) -> int:
+    """Mark orders canceled without committing (the `StorageWriter` job); returns rows updated."""
     ts_ms = int(time.time() * 1000)
     cur = con.execute(
         f"UPDATE orders SET status='canceled', updated_ts_ms=? WHERE client_oid IN ({','.join(['?']*len(client_oids))})",
         (ts_ms, *client_oids),
     )
-    con.commit()
     return cur.rowcount
+
+
+def mark_canceled_by_client_oids(con: sqlite3.Connection, client_oids: List[str]) -> int:
+    n = update_canceled_by_client_oids(con, client_oids)
+    con.commit()
+    return n
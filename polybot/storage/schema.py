@@ -29,6 +29,22 @@ DDL = {
         CREATE INDEX IF NOT EXISTS idx_outcomes_market ON outcomes(market_id);
         """
     ),
+    # bumped by any write to markets/outcomes, from any connection; MetadataCache.check reads it
+    "metadata_version": (
+        """
+        CREATE TABLE IF NOT EXISTS metadata_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            v INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO metadata_version (id, v) VALUES (0, 0);
+        CREATE TRIGGER IF NOT EXISTS trg_markets_ins_version AFTER INSERT ON markets BEGIN UPDATE metadata_version SET v = v + 1 WHERE id = 0; END;
+        CREATE TRIGGER IF NOT EXISTS trg_markets_upd_version AFTER UPDATE ON markets BEGIN UPDATE metadata_version SET v = v + 1 WHERE id = 0; END;
+        CREATE TRIGGER IF NOT EXISTS trg_markets_del_version AFTER DELETE ON markets BEGIN UPDATE metadata_version SET v = v + 1 WHERE id = 0; END;
+        CREATE TRIGGER IF NOT EXISTS trg_outcomes_ins_version AFTER INSERT ON outcomes BEGIN UPDATE metadata_version SET v = v + 1 WHERE id = 0; END;
+        CREATE TRIGGER IF NOT EXISTS trg_outcomes_upd_version AFTER UPDATE ON outcomes BEGIN UPDATE metadata_version SET v = v + 1 WHERE id = 0; END;
+        CREATE TRIGGER IF NOT EXISTS trg_outcomes_del_version AFTER DELETE ON outcomes BEGIN UPDATE metadata_version SET v = v + 1 WHERE id = 0; END;
+        """
+    ),
     "orderbook_events": (
         """
         CREATE TABLE IF NOT EXISTS orderbook_events (
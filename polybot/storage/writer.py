@@ -0,0 +1,228 @@
+from __future__ import annotations
+
+import asyncio
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from polybot.observability.metrics import Gauge, gauge, inc, inc_labelled
+from polybot.storage.db import connect, enable_wal, parse_db_url
+
+
+@dataclass
+class _Job:
+    table: str
+    fn: Optional[Callable[..., Any]]
+    args: tuple = ()
+    future: Future = field(default_factory=Future)
+
+
+class StorageWriter:
+    """Dedicated SQLite writer thread with a soft-limited job queue.
+
+    Jobs are `fn(con, *args)` callables (e.g. `write_orders_and_fills`) executed on the
+    writer's own connection. Jobs must not commit: each drained batch is one transaction
+    committed once (group commit), and each job runs in its own savepoint so a failing job
+    is rolled back without losing the rest of the batch.
+
+    No job is ever dropped: orders, fills and ingestion rows are all data, not telemetry.
+    `max_queue` is a soft limit on jobs not yet committed. `submit` never blocks (it is
+    called from the event loop): past the limit it still enqueues and counts
+    `storage_writer_over_limit`. Producers on plain threads wait for room instead with
+    `block=True` (or `block_when_full=True` for every submit), and `submit_async` awaits it;
+    waiting producers count `storage_writer_backpressure`.
+
+    Metrics (labelled by table): `storage_writer_queue_depth` (gauge of queued jobs),
+    `storage_writer_commit_ms_sum`/`_count`, `storage_writer_errors`, `storage_writer_over_limit`,
+    `storage_writer_backpressure`.
+
+    Requires a file-backed SQLite URL: `:memory:` databases are private per connection.
+    """
+
+    def __init__(self, db_url: str, max_queue: int = 10000, max_batch: int = 512, name: str = "polybot-storage-writer", block_when_full: bool = False):
+        scheme, target = parse_db_url(db_url)
+        if scheme == "sqlite" and target == ":memory:":
+            raise ValueError("StorageWriter needs a file-backed database; :memory: is per-connection")
+        self.db_url = db_url
+        self.max_batch = max(1, int(max_batch))
+        self.block_when_full = bool(block_when_full)
+        self.max_queue = max(1, int(max_queue))
+        self._q: "queue.Queue[Optional[_Job]]" = queue.Queue()
+        self._depth: Dict[str, int] = {}
+        self._total = 0
+        self._depth_gauges: Dict[str, Gauge] = {}
+        self._depth_lock = threading.Lock()
+        self._room = threading.Condition(self._depth_lock)
+        self._ready = threading.Event()
+        self._init_error: Optional[BaseException] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._init_error is not None:
+            raise self._init_error
+
+    # Producer side
+    def _track(self, table: str, delta: int) -> None:
+        with self._depth_lock:
+            depth = self._depth[table] = self._depth.get(table, 0) + delta
+            self._total += delta
+            g = self._depth_gauges.get(table)
+            if g is None:
+                g = self._depth_gauges[table] = gauge("storage_writer_queue_depth", table=table)
+            g.set(depth)
+            if delta < 0 and self._total < self.max_queue:
+                self._room.notify_all()
+
+    def _wait_for_room(self) -> None:
+        with self._room:
+            while self._total >= self.max_queue and not self._closed:
+                self._room.wait(0.1)
+
+    def queue_depth(self, table: Optional[str] = None) -> int:
+        with self._depth_lock:
+            if table is not None:
+                return self._depth.get(table, 0)
+            return sum(self._depth.values())
+
+    def submit(self, table: str, fn: Callable[..., Any], *args: Any, block: Optional[bool] = None) -> Future:
+        """Enqueue `fn(con, *args)`; returns a Future of fn's result.
+
+        Never blocks unless `block` (default `block_when_full`), in which case it waits until
+        the queue is below `max_queue`. Without it, a job past the limit is still enqueued.
+        """
+        if self._closed:
+            raise RuntimeError("StorageWriter is closed")
+        if self._total >= self.max_queue:
+            if self.block_when_full if block is None else block:
+                inc("storage_writer_backpressure")
+                inc_labelled("storage_writer_backpressure", {"table": table}, 1)
+                self._wait_for_room()
+            else:
+                inc("storage_writer_over_limit")
+                inc_labelled("storage_writer_over_limit", {"table": table}, 1)
+        job = _Job(table, fn, args)
+        self._track(table, 1)
+        self._q.put_nowait(job)
+        return job.future
+
+    async def submit_async(self, table: str, fn: Callable[..., Any], *args: Any) -> Any:
+        """Enqueue without blocking the event loop and await the job's result."""
+        if self._closed:
+            raise RuntimeError("StorageWriter is closed")
+        if self._total >= self.max_queue:
+            inc("storage_writer_backpressure")
+            inc_labelled("storage_writer_backpressure", {"table": table}, 1)
+            await asyncio.to_thread(self._wait_for_room)
+        job = _Job(table, fn, args)
+        self._track(table, 1)
+        self._q.put_nowait(job)
+        return await asyncio.wrap_future(job.future)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        """Block until every job enqueued before this call has been committed."""
+        barrier = _Job("_barrier", None)
+        self._q.put(barrier)
+        barrier.future.result(timeout=timeout)
+
+    async def flush_async(self) -> None:
+        """Awaitable flush barrier: resolves once all earlier jobs are committed."""
+        barrier = _Job("_barrier", None)
+        self._q.put_nowait(barrier)
+        await asyncio.wrap_future(barrier.future)
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._closed:
+            return
+        self._closed = True
+        self._q.put(None)
+        self._thread.join(timeout)
+
+    # Writer thread
+    def _run(self) -> None:
+        try:
+            con = connect(self.db_url)
+            enable_wal(con)
+        except BaseException as e:  # noqa: BLE001 - surfaced to the constructor
+            self._init_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            stop = False
+            while not stop:
+                first = self._q.get()
+                batch: List[Optional[_Job]] = [first]
+                while len(batch) < self.max_batch:
+                    try:
+                        batch.append(self._q.get_nowait())
+                    except queue.Empty:
+                        break
+                stop = self._write_batch(con, batch)
+        finally:
+            try:
+                con.close()
+            except Exception:
+                pass
+
+    def _write_batch(self, con: sqlite3.Connection, batch: List[Optional[_Job]]) -> bool:
+        stop = False
+        done: List[tuple[_Job, Any]] = []
+        barriers: List[_Job] = []
+        tables: Dict[str, int] = {}
+        for job in batch:
+            if job is None:
+                stop = True
+                continue
+            if job.fn is None:
+                barriers.append(job)
+                continue
+            tables[job.table] = tables.get(job.table, 0) + 1
+            try:
+                if not con.in_transaction:
+                    con.execute("BEGIN")
+                con.execute("SAVEPOINT job")
+                try:
+                    result = job.fn(con, *job.args)
+                except BaseException:
+                    if con.in_transaction:
+                        con.execute("ROLLBACK TO job")
+                        con.execute("RELEASE job")
+                    raise
+                # a job that committed by itself has already ended the transaction
+                if con.in_transaction:
+                    try:
+                        con.execute("RELEASE job")
+                    except sqlite3.OperationalError:
+                        pass  # committed, then wrote again: the savepoint is gone
+                done.append((job, result))
+            except Exception as e:  # noqa: BLE001
+                inc_labelled("storage_writer_errors", {"table": job.table}, 1)
+                self._track(job.table, -1)
+                tables[job.table] -= 1
+                job.future.set_exception(e)
+        start = time.perf_counter()
+        try:
+            con.commit()
+        except Exception as e:  # noqa: BLE001
+            for job, _ in done:
+                inc_labelled("storage_writer_errors", {"table": job.table}, 1)
+                self._track(job.table, -1)
+                job.future.set_exception(e)
+            done = []
+        dur_ms = int((time.perf_counter() - start) * 1000)
+        for table, n in tables.items():
+            if n <= 0:
+                continue
+            inc_labelled("storage_writer_commit_ms_sum", {"table": table}, dur_ms)
+            inc_labelled("storage_writer_commit_count", {"table": table}, 1)
+        for job, result in done:
+            self._track(job.table, -1)
+            job.future.set_result(result)
+        for b in barriers:
+            b.future.set_result(None)
+        return stop
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Dict, List, Tuple
+import heapq
+from math import floor
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
 
 from polybot.core.pricing import round_to_tick, is_valid_price, sum_prices
 from polybot.exec.planning import ExecutionPlan, OrderIntent
@@ -105,3 +107,247 @@ def plan_dutch_book_with_safety(
     if eff_margin <= min_profit_usdc:
         return None
     return plan_dutch_book(quotes, min_profit_usdc=min_profit_usdc, allow_other=allow_other, default_size=default_size)
+
+
+_NANO = 1_000_000_000  # price units for exact running sums
+
+
+def _nano(x: float) -> int:
+    return int(round(x * _NANO))
+
+
+class DutchEvaluator:
+    """Incremental Dutch-book detection for one market.
+
+    Keeps the best ask per outcome and running sums of asks and tick sizes (integer nano
+    units, so repeated updates do not drift), plus counts of outcomes without a valid ask or
+    excluded as 'Other'. `update` changes one outcome in O(1). Eligibility is the same test
+    as `plan_dutch_book_with_safety`: both `margin()` (1 minus the raw sum of best asks) and
+    `effective_margin()` (that minus safety margin, fees on the asks and slippage ticks) must
+    exceed `min_profit_usdc`. Like the batch planner, `plan` prices the basket at the top of
+    book and reports the raw margin as `expected_profit`; costs only gate eligibility.
+
+    `update` returns True when a plan should be built: the market just crossed into
+    eligibility, or a best ask moved while it stays eligible. Messages that leave the top of
+    book unchanged, or keep the market below the threshold, never re-plan.
+    """
+
+    def __init__(
+        self,
+        market_id: str,
+        outcome_ids: List[str],
+        min_profit_usdc: float = 0.02,
+        safety_margin_usdc: float = 0.0,
+        fee_bps: float = 0.0,
+        slippage_ticks: int = 0,
+        allow_other: bool = False,
+    ):
+        self.market_id = market_id
+        self.outcome_ids = list(outcome_ids)
+        self.min_profit_usdc = float(min_profit_usdc)
+        self.safety_margin_usdc = float(safety_margin_usdc)
+        self.fee_bps = float(fee_bps)
+        self.slippage_ticks = int(slippage_ticks)
+        self.allow_other = bool(allow_other)
+        self._asks: Dict[str, float | None] = {oid: None for oid in self.outcome_ids}
+        self._ticks: Dict[str, float] = {oid: 0.01 for oid in self.outcome_ids}
+        self._mins: Dict[str, float] = {oid: 1.0 for oid in self.outcome_ids}
+        self._names: Dict[str, str | None] = {oid: None for oid in self.outcome_ids}
+        self._ask_sum = 0
+        self._tick_sum = _nano(0.01) * len(self.outcome_ids)
+        self._missing = len(self.outcome_ids)
+        self._blocked = 0
+
+    def set_meta(self, outcome_id: str, tick_size: float = 0.01, min_size: float = 1.0, name: str | None = None) -> None:
+        if outcome_id not in self._asks:
+            return
+        self._tick_sum += _nano(tick_size) - _nano(self._ticks[outcome_id])
+        self._ticks[outcome_id] = float(tick_size)
+        self._mins[outcome_id] = float(min_size)
+        was_blocked = _is_other(self._names[outcome_id])
+        now_blocked = _is_other(name)
+        self._blocked += int(now_blocked) - int(was_blocked)
+        self._names[outcome_id] = name
+
+    def update(self, outcome_id: str, best_ask: float | None) -> bool:
+        if outcome_id not in self._asks:
+            return False
+        old = self._asks[outcome_id]
+        new = best_ask if best_ask is not None and is_valid_price(best_ask) else None
+        if new == old:
+            return False
+        if old is None:
+            self._missing -= 1
+        else:
+            self._ask_sum -= _nano(old)
+        if new is None:
+            self._missing += 1
+        else:
+            self._ask_sum += _nano(new)
+        self._asks[outcome_id] = new
+        return self.eligible()
+
+    def total_ask(self) -> float:
+        return self._ask_sum / _NANO
+
+    def margin(self) -> float:
+        # raw margin, before costs; same float arithmetic as `detect_dutch_book`, so both
+        # paths agree at the threshold
+        return 1.0 - self.total_ask()
+
+    def effective_margin(self) -> float:
+        """`margin()` net of safety margin, fees on the total ask and slippage ticks."""
+        total_ask = self._ask_sum / _NANO
+        fee_cost = (max(0.0, self.fee_bps) / 10000.0) * total_ask
+        slippage_cost = max(0, self.slippage_ticks) * (self._tick_sum / _NANO)
+        return self.margin() - self.safety_margin_usdc - fee_cost - slippage_cost
+
+    def eligible(self) -> bool:
+        if self._missing or (self._blocked and not self.allow_other):
+            return False
+        return self.margin() > self.min_profit_usdc and self.effective_margin() > self.min_profit_usdc
+
+    def quotes(self) -> MarketQuotes:
+        """Current `MarketQuotes` (O(outcomes); build it only when planning)."""
+        return MarketQuotes(
+            market_id=self.market_id,
+            outcomes=[
+                OutcomeQuote(outcome_id=oid, best_ask=self._asks[oid] or 0.0, tick_size=self._ticks[oid], min_size=self._mins[oid], name=self._names[oid])
+                for oid in self.outcome_ids
+            ],
+        )
+
+    def plan(self, default_size: float = 1.0) -> ExecutionPlan | None:
+        if not self.eligible():
+            return None
+        return plan_dutch_book(self.quotes(), min_profit_usdc=self.min_profit_usdc, allow_other=self.allow_other, default_size=default_size)
+
+
+@dataclass
+class DutchSizing:
+    size: float  # basket size: units bought of every outcome
+    limit_prices: List[float]  # per outcome, the worst ask level the basket reaches
+    cost: float  # total cost of the basket across all levels, fees included
+    expected_profit: float  # size - cost - estimated slippage (one outcome pays 1 per unit)
+
+
+def size_dutch_book(
+    ladders: Sequence[Iterable[Tuple[float, float]]],
+    min_profit_usdc: float = 0.02,
+    max_size: float | None = None,
+    fee_bps: float = 0.0,
+    size_step: float = 0.01,
+    safety_margin_usdc: float = 0.0,
+    slippage_ticks: int = 0,
+    tick_sizes: Sequence[float] | None = None,
+) -> DutchSizing | None:
+    """Largest basket size whose marginal unit cost stays below `1 - min_profit_usdc`.
+
+    The marginal unit costs the sum of the current level prices plus `fee_bps`, the
+    estimated slippage (`slippage_ticks` x the sum of `tick_sizes`, default 0.01 each) and
+    `safety_margin_usdc`: the per-unit form of `plan_dutch_book_with_safety`'s test.
+
+    `ladders` are the outcomes' ask levels, best first (e.g. `OrderbookAssembler.walk("ask")`).
+    All ladders are swept together: a heap holds each outcome's cumulative depth at the end
+    of its current level, so the basket only stops at level boundaries and the marginal
+    cost changes in O(log outcomes) per level consumed. Ladders are read lazily and only as
+    deep as the basket goes. The size is capped by `max_size` (e.g. the exposure headroom)
+    and floored to `size_step`; cost and limit prices are those of the floored size.
+    """
+    n = len(ladders)
+    if n == 0:
+        return None
+    ticks = list(tick_sizes) if tick_sizes is not None else [0.01] * n
+    slip = max(0, int(slippage_ticks)) * sum(ticks)
+    limit = 1.0 - min_profit_usdc - max(0.0, safety_margin_usdc) - slip
+    fee = max(0.0, fee_bps) / 10000.0
+    its: List[Iterator[Tuple[float, float]]] = [iter(ld) for ld in ladders]
+    prices: List[float] = [0.0] * n
+    heap: List[Tuple[float, int]] = []
+    for i, it in enumerate(its):
+        lvl = next(it, None)
+        if lvl is None or not is_valid_price(lvl[0]):
+            return None
+        prices[i] = float(lvl[0])
+        heap.append((float(lvl[1]), i))
+    heapq.heapify(heap)
+    unit = sum(prices)
+    cap = float("inf") if max_size is None else max(0.0, float(max_size))
+    size = 0.0
+    # (start, end, unit price, level prices) per stretch of constant marginal cost
+    segments: List[Tuple[float, float, float, Tuple[float, ...]]] = []
+    while unit * (1.0 + fee) < limit and size < cap:
+        edge = min(heap[0][0], cap)
+        if edge > size:
+            segments.append((size, edge, unit, tuple(prices)))
+            size = edge
+        if size >= cap:
+            break
+        # advance every outcome whose current level is exhausted at this depth
+        exhausted = False
+        while heap and heap[0][0] <= size:
+            _, i = heapq.heappop(heap)
+            lvl = next(its[i], None)
+            if lvl is None:
+                exhausted = True
+                break
+            unit += float(lvl[0]) - prices[i]
+            prices[i] = float(lvl[0])
+            heapq.heappush(heap, (size + float(lvl[1]), i))
+        if exhausted:
+            break
+    if size_step > 0:
+        size = round(floor(size / size_step + 1e-9) * size_step, 10)
+    if size <= 0:
+        return None
+    # cost and limits of the (floored) size: trimmed units may drop whole deep levels
+    cost = 0.0
+    limits: List[float] = []
+    for start, end, seg_unit, seg_prices in segments:
+        if start >= size:
+            break
+        cost += seg_unit * (min(end, size) - start)
+        limits = list(seg_prices)
+    cost *= 1.0 + fee
+    return DutchSizing(size=size, limit_prices=limits, cost=cost, expected_profit=size * (1.0 - slip) - cost)
+
+
+def plan_dutch_book_depth(
+    quotes: MarketQuotes,
+    ladders: Dict[str, Iterable[Tuple[float, float]]],
+    min_profit_usdc: float = 0.02,
+    max_size: float | None = None,
+    fee_bps: float = 0.0,
+    allow_other: bool = False,
+    safety_margin_usdc: float = 0.0,
+    slippage_ticks: int = 0,
+) -> ExecutionPlan | None:
+    """Dutch-book plan sized from full ask depth (`size_dutch_book`), one IOC per outcome at its limit price.
+
+    Returns None when the basket would be smaller than any outcome's `min_size`.
+    """
+    if not allow_other and any(_is_other(o.name) for o in quotes.outcomes):
+        return None
+    sizing = size_dutch_book(
+        [ladders[o.outcome_id] for o in quotes.outcomes],
+        min_profit_usdc,
+        max_size,
+        fee_bps,
+        safety_margin_usdc=safety_margin_usdc,
+        slippage_ticks=slippage_ticks,
+        tick_sizes=[o.tick_size for o in quotes.outcomes],
+    )
+    if sizing is None or any(sizing.size < o.min_size for o in quotes.outcomes):
+        return None
+    intents = [
+        OrderIntent(
+            market_id=quotes.market_id,
+            outcome_id=o.outcome_id,
+            side="buy",
+            price=round_to_tick(price, o.tick_size),
+            size=sizing.size,
+            tif="IOC",
+        )
+        for o, price in zip(quotes.outcomes, sizing.limit_prices)
+    ]
+    return ExecutionPlan(intents=intents, expected_profit=sizing.expected_profit, rationale="dutch_book_depth")
@@ -3,12 +3,17 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Dict, Any, AsyncIterator, List, Optional
 import sqlite3
+import time
 
 from polybot.adapters.polymarket.orderbook import OrderbookAssembler
-from polybot.strategy.dutch_book import MarketQuotes, OutcomeQuote, plan_dutch_book
+from polybot.strategy.dutch_book import DutchEvaluator, plan_dutch_book_depth
 from polybot.exec.engine import ExecutionEngine
 from polybot.exec.risk import will_exceed_exposure
-from polybot.observability.metrics import inc_labelled
+from polybot.observability import tracing
+from polybot.observability.metrics import counter_family, histogram, inc_labelled
+from polybot.storage.metadata import MarketMeta, MetadataCache, metadata_cache
+
+_ORDERS_PLACED = counter_family("dutch_orders_placed", "market")
 
 
 @dataclass
@@ -22,6 +27,21 @@ class DutchRunner:
 
     Expected message format (internal):
       {"type": "snapshot|delta", "seq": int, "bids": [...], "asks": [...], "outcome_id": "..."}
+
+    Detection is incremental (`DutchEvaluator`): each message updates only its outcome's best
+    ask, and a plan is built only when the market becomes eligible (raw and cost-adjusted
+    margin both above `min_profit_usdc`, see `DutchEvaluator`) or a best ask moves while it
+    stays eligible. `dutch_detect_us{market}` records message-to-plan latency; traced
+    messages (see `polybot.observability.tracing`) that lead to an order are finished here.
+
+    With `depth_sizing` the basket is sized from each outcome's full ask ladder
+    (`plan_dutch_book_depth`) instead of `default_size` at the top of book, bounded by the
+    exposure headroom (`exposure_cap` minus the largest held position).
+
+    Metadata changes written by other processes are picked up by checking the DB-side
+    metadata version at most every `meta_check_interval_ms` while messages flow, and always
+    right before a plan goes out, so the rule_hash guard never acts on stale metadata.
+    Failed checks count `dutch_meta_check_errors{market}`.
     """
 
     def __init__(
@@ -36,6 +56,8 @@ class DutchRunner:
         slippage_ticks: int = 0,
         guard_rule_hash: bool = True,
         allow_other: bool = False,
+        depth_sizing: bool = False,
+        meta_check_interval_ms: int = 1000,
     ):
         self.spec = spec
         self.engine = engine
@@ -48,35 +70,85 @@ class DutchRunner:
         self.meta_db = meta_db
         self.guard_rule_hash = bool(guard_rule_hash)
         self.allow_other = bool(allow_other)
+        self.depth_sizing = bool(depth_sizing)
+        self.meta_check_interval_ms = max(0, int(meta_check_interval_ms))
+        self._meta_checked = time.perf_counter()
+        self.exposure_cap = self.default_size * 10
         self._rule_hash_known: Optional[str] = None
-        if self.meta_db is not None and self.guard_rule_hash:
+        # market metadata is read through the shared cache (refreshed by market sync)
+        self._meta: Optional[MetadataCache] = metadata_cache(meta_db) if meta_db is not None else None
+        if self.guard_rule_hash:
             try:
-                row = self.meta_db.execute("SELECT rule_hash FROM markets WHERE market_id=?", (self.spec.market_id,)).fetchone()
-                self._rule_hash_known = row[0] if row else None
+                meta = self._market_meta()
+                self._rule_hash_known = meta.rule_hash if meta else None
             except Exception:
                 self._rule_hash_known = None
+        self.evaluator = DutchEvaluator(
+            spec.market_id,
+            spec.outcomes,
+            min_profit_usdc=self.min_profit_usdc,
+            safety_margin_usdc=self.safety_margin_usdc,
+            fee_bps=self.fee_bps,
+            slippage_ticks=self.slippage_ticks,
+            allow_other=self.allow_other,
+        )
+        self._meta_version: Optional[int] = None
+        self._sync_meta()
+
+    def _market_meta(self) -> Optional[MarketMeta]:
+        if self._meta is None:
+            return None
+        return self._meta.market(self.meta_db, self.spec.market_id)
 
-    def _market_quotes(self) -> Optional[MarketQuotes]:
-        outs: List[OutcomeQuote] = []
-        names: Dict[str, str] = {}
-        ticks: Dict[str, float] = {}
-        mins: Dict[str, float] = {}
-        if self.meta_db is not None:
-            cur = self.meta_db.execute("SELECT outcome_id, name, tick_size, min_size FROM outcomes WHERE market_id=?", (self.spec.market_id,))
-            for oid, name, tick, mn in cur.fetchall():
-                names[str(oid)] = name
-                ticks[str(oid)] = float(tick)
-                mins[str(oid)] = float(mn)
-        for oid, asm in self.books.items():
-            ob = asm.apply_delta({"seq": asm._seq})  # materialize
-            ba = ob.best_ask()
-            if not ba:
-                return None
-            outs.append(OutcomeQuote(outcome_id=oid, best_ask=ba.price, tick_size=ticks.get(oid, 0.01), min_size=mins.get(oid, 1.0), name=names.get(oid)))
-        return MarketQuotes(market_id=self.spec.market_id, outcomes=outs)
+    def _sync_meta(self, force: bool = False) -> None:
+        """Push tick/min-size/name metadata into the evaluator when the cache version moved.
+
+        With `force`, or once `meta_check_interval_ms` has passed, the DB-side metadata
+        version is checked first, so rule_hash/tick changes written by other connections
+        (or raw SQL) reach the guard and the evaluator.
+        """
+        if self._meta is None:
+            return
+        now = time.perf_counter()
+        if force or (now - self._meta_checked) * 1000 >= self.meta_check_interval_ms:
+            self._meta_checked = now
+            try:
+                self._meta.check(self.meta_db)
+            except Exception:
+                inc_labelled("dutch_meta_check_errors", {"market": self.spec.market_id}, 1)
+        if self._meta.version == self._meta_version:
+            return
+        self._meta_version = self._meta.version
+        meta = self._market_meta()
+        by_id = {o.outcome_id: o for o in meta.outcomes} if meta is not None else {}
+        for oid in self.books:
+            o = by_id.get(oid)
+            if o is None and meta is None:
+                # outcomes without a markets row are still cached per outcome
+                o = self._meta.outcome(self.meta_db, oid)
+            if o is not None:
+                self.evaluator.set_meta(oid, tick_size=o.tick_size, min_size=o.min_size, name=o.name)
+
+    def _depth_plan(self):
+        """Size the basket from the full ask ladders, up to the remaining exposure headroom."""
+        ledger = getattr(self.engine, "ledger", None)
+        held = max((ledger.position(self.spec.market_id, oid) for oid in self.books), default=0.0) if ledger is not None else 0.0
+        return plan_dutch_book_depth(
+            self.evaluator.quotes(),
+            {oid: asm.walk("ask") for oid, asm in self.books.items()},
+            min_profit_usdc=self.min_profit_usdc,
+            max_size=max(0.0, self.exposure_cap - held),
+            fee_bps=self.fee_bps,
+            allow_other=self.allow_other,
+            safety_margin_usdc=self.safety_margin_usdc,
+            slippage_ticks=self.slippage_ticks,
+        )
 
     async def run(self, messages: AsyncIterator[Dict[str, Any]], now_ms) -> None:
+        labels = {"market": self.spec.market_id}
+        detect_us = histogram("dutch_detect_us", market=self.spec.market_id)
         async for m in messages:
+            t0 = time.perf_counter()
             oid = m.get("outcome_id")
             if not oid or oid not in self.books:
                 continue
@@ -87,39 +159,46 @@ class DutchRunner:
                 self.books[oid].apply_delta(m)
             else:
                 continue
+            trace = m.get(tracing.TRACE_KEY)
+            if trace is not None:
+                trace.stamp(tracing.APPLY)
 
-            quotes = self._market_quotes()
-            if quotes is None:
+            self._sync_meta()
+            ba = self.books[oid].best_ask()
+            if not self.evaluator.update(oid, ba.price if ba else None):
                 continue
-            from polybot.strategy.dutch_book import plan_dutch_book_with_safety
-            # rule_hash guard (detect change mid-run)
-            if self.meta_db is not None and self.guard_rule_hash:
-                row = self.meta_db.execute("SELECT rule_hash FROM markets WHERE market_id=?", (self.spec.market_id,)).fetchone()
-                cur_hash = row[0] if row else None
+            # rule_hash guard (detect change mid-run); a plan is about to go out, so check the DB
+            self._sync_meta(force=True)
+            if self._meta is not None and self.guard_rule_hash:
+                meta = self._market_meta()
+                cur_hash = meta.rule_hash if meta else None
                 if self._rule_hash_known is None:
                     self._rule_hash_known = cur_hash
                 elif cur_hash != self._rule_hash_known:
-                    inc_labelled("dutch_rulehash_changed", {"market": self.spec.market_id}, 1)
+                    inc_labelled("dutch_rulehash_changed", labels, 1)
                     continue
 
-            from polybot.strategy.dutch_book import plan_dutch_book_with_safety
-            plan = plan_dutch_book_with_safety(
-                quotes,
-                min_profit_usdc=self.min_profit_usdc,
-                safety_margin_usdc=self.safety_margin_usdc,
-                fee_bps=self.fee_bps,
-                slippage_ticks=self.slippage_ticks,
-                allow_other=self.allow_other,
-                default_size=self.default_size,
-            )
+            plan = self._depth_plan() if self.depth_sizing else self.evaluator.plan(default_size=self.default_size)
             if plan is None:
                 continue
+            detect_us.record(int((time.perf_counter() - t0) * 1e6))
+            if trace is not None:
+                trace.stamp(tracing.DECIDE)
             # Deterministic plan_id for idempotency based on current outcome seqs
             seqsig = "+".join([f"{oid}:{asm._seq}" for oid, asm in sorted(self.books.items())])
             plan.plan_id = f"dutch:{self.spec.market_id}:{seqsig}"
             if getattr(self.engine, "audit_db", None) is not None:
-                blocked, _ = will_exceed_exposure(self.engine.audit_db, plan, cap_per_outcome=self.default_size * 10)
+                blocked, _ = will_exceed_exposure(self.engine.audit_db, plan, cap_per_outcome=self.exposure_cap, ledger=getattr(self.engine, "ledger", None))
                 if blocked:
                     continue
-            res = self.engine.execute_plan(plan)
-            inc_labelled("dutch_orders_placed", {"market": self.spec.market_id}, len(res.acks))
+            execute_async = getattr(self.engine, "execute_plan_async", None)
+            token = tracing.activate(trace)
+            try:
+                if execute_async is not None:
+                    res = await execute_async(plan)
+                else:
+                    res = self.engine.execute_plan(plan)
+            finally:
+                tracing.deactivate(token)
+            tracing.finish(trace, self.spec.market_id)
+            _ORDERS_PLACED.labels(self.spec.market_id).inc(len(res.acks))
@@ -0,0 +1,355 @@
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+import logging
+import sqlite3
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+from polybot.core.pricing import round_to_tick
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.exec.risk import will_exceed_exposure
+from polybot.observability.metrics import counter_family, histogram, inc, inc_labelled
+from polybot.storage.metadata import metadata_cache
+
+
+# Basket kinds: buy YES on every market (pays 1), buy NO on every market (pays n-1),
+# sell YES on every market (collects the bids, owes 1).
+BASKET_KINDS: Tuple[str, ...] = ("buy_yes", "buy_no", "sell_yes")
+
+_NANO = 1_000_000_000
+
+_log = logging.getLogger("polybot.negrisk")
+_OPPORTUNITIES = counter_family("negrisk_opportunities", "group", "kind")
+_ORDERS_PLACED = counter_family("negrisk_orders_placed", "group")
+
+
+@dataclass(frozen=True)
+class GroupMember:
+    market_id: str
+    yes_id: str
+    no_id: str
+    tick_size: float = 0.01
+    min_size: float = 1.0
+
+
+@dataclass
+class BasketOpportunity:
+    group: str
+    kind: str
+    edge: float  # profit per basket unit before fees
+    plan: ExecutionPlan
+
+
+def load_neg_risk_groups(con: sqlite3.Connection) -> Dict[str, List[GroupMember]]:
+    """Binary (Yes/No) markets grouped by `markets.neg_risk_group`, via the metadata cache."""
+    cache = metadata_cache(con)
+    cache.refresh(con)
+    groups: Dict[str, List[GroupMember]] = {}
+    for meta in sorted(cache.snapshot().values(), key=lambda m: m.market_id):
+        if not meta.neg_risk_group:
+            continue
+        by_name = {(o.name or "").strip().lower(): o for o in meta.outcomes}
+        yes, no = by_name.get("yes"), by_name.get("no")
+        if yes is None or no is None:
+            continue
+        groups.setdefault(meta.neg_risk_group, []).append(
+            GroupMember(market_id=meta.market_id, yes_id=yes.outcome_id, no_id=no.outcome_id, tick_size=yes.tick_size, min_size=max(yes.min_size, no.min_size))
+        )
+    return {g: members for g, members in groups.items() if len(members) >= 2}
+
+
+class GroupBasket:
+    """Running best-price sums for one neg-risk group, updated in O(1) per token change.
+
+    Sums are kept in integer nano units per leg (YES asks, YES bids, NO asks) together with
+    the number of members missing a price on that leg, so a group evaluation never touches
+    its members unless a plan is built.
+    """
+
+    def __init__(self, group: str, members: List[GroupMember]):
+        self.group = group
+        self.members = list(members)
+        n = len(self.members)
+        # token -> (member index, is_yes)
+        self.tokens: Dict[str, Tuple[int, bool]] = {}
+        for i, m in enumerate(self.members):
+            self.tokens[m.yes_id] = (i, True)
+            self.tokens[m.no_id] = (i, False)
+        self._yes_ask: List[Optional[int]] = [None] * n
+        self._yes_bid: List[Optional[int]] = [None] * n
+        self._no_ask: List[Optional[int]] = [None] * n
+        self._sums = {"yes_ask": 0, "yes_bid": 0, "no_ask": 0}
+        self._missing = {"yes_ask": n, "yes_bid": n, "no_ask": n}
+
+    def _set(self, leg: str, values: List[Optional[int]], i: int, price: Optional[float]) -> None:
+        new = int(round(price * _NANO)) if price is not None else None
+        old = values[i]
+        if new == old:
+            return
+        if old is None:
+            self._missing[leg] -= 1
+        else:
+            self._sums[leg] -= old
+        if new is None:
+            self._missing[leg] += 1
+        else:
+            self._sums[leg] += new
+        values[i] = new
+
+    def update(self, token: str, best_bid: Optional[float], best_ask: Optional[float]) -> None:
+        i, is_yes = self.tokens[token]
+        if is_yes:
+            self._set("yes_ask", self._yes_ask, i, best_ask)
+            self._set("yes_bid", self._yes_bid, i, best_bid)
+        else:
+            self._set("no_ask", self._no_ask, i, best_ask)
+
+    def edge(self, kind: str) -> Optional[float]:
+        """Per-unit profit of basket `kind`, or None while any member lacks a price."""
+        n = len(self.members)
+        if kind == "buy_yes":
+            return None if self._missing["yes_ask"] else 1.0 - self._sums["yes_ask"] / _NANO
+        if kind == "buy_no":
+            return None if self._missing["no_ask"] else (n - 1) - self._sums["no_ask"] / _NANO
+        if kind == "sell_yes":
+            return None if self._missing["yes_bid"] else self._sums["yes_bid"] / _NANO - 1.0
+        raise ValueError(f"unknown basket kind: {kind!r}")
+
+    def basket_size(self, size: float) -> float:
+        """`size` raised to every member's `min_size`: one size for all legs keeps the basket hedged."""
+        return max([size] + [m.min_size for m in self.members])
+
+    def plan(self, kind: str, size: float) -> ExecutionPlan:
+        size = self.basket_size(size)
+        intents: List[OrderIntent] = []
+        for i, m in enumerate(self.members):
+            if kind == "buy_yes":
+                token, side, px = m.yes_id, "buy", self._yes_ask[i]
+            elif kind == "buy_no":
+                token, side, px = m.no_id, "buy", self._no_ask[i]
+            else:
+                token, side, px = m.yes_id, "sell", self._yes_bid[i]
+            intents.append(
+                OrderIntent(
+                    market_id=m.market_id,
+                    outcome_id=token,
+                    side=side,
+                    price=round_to_tick((px or 0) / _NANO, m.tick_size),
+                    size=size,
+                    tif="IOC",
+                )
+            )
+        return ExecutionPlan(intents=intents, expected_profit=(self.edge(kind) or 0.0) * size, rationale=f"neg_risk_{kind}")
+
+
+class NegRiskScanner:
+    """Basket arbitrage across every market of every neg-risk group.
+
+    One `OrderbookAssembler` per token lives in a single shared store (`books`), read in
+    place by the group evaluators. Applying a message only updates its group's running sums
+    and marks the group dirty; a separate evaluator task drains dirty groups in FIFO order,
+    at most `max_groups_per_cycle` per cycle before yielding. Updates to a group that is
+    already queued coalesce into one evaluation and a busy group cannot starve the others,
+    so the evaluation rate is bounded by changed groups, not by message or token count.
+
+    Every leg of a basket has the same size (`GroupBasket.basket_size`). `sell_yes` only
+    sells YES inventory held on every member per the engine's ledger, sized to the smallest
+    holding; without enough inventory the opportunity is skipped. Plans that would push an
+    outcome past `exposure_cap` (default `default_size * 10`) are not sent. A basket that
+    fails to execute is counted and logged; evaluation carries on with the next one. `run_ws`
+    drives the scanner from live WS books of every token.
+
+    Metrics: `negrisk_evaluations`, `negrisk_updates_coalesced`, `negrisk_eval_lag_us`
+    histogram (dirty mark to evaluation), `negrisk_opportunities{group,kind}`,
+    `negrisk_orders_placed{group}`, `negrisk_sell_no_inventory{group}`,
+    `negrisk_execute_errors{group}`, `negrisk_ws_errors{group}`.
+    """
+
+    def __init__(
+        self,
+        groups: Dict[str, List[GroupMember]],
+        engine: Any = None,
+        min_profit_usdc: float = 0.02,
+        default_size: float = 1.0,
+        kinds: Tuple[str, ...] = BASKET_KINDS,
+        max_groups_per_cycle: int = 256,
+        exposure_cap: Optional[float] = None,
+    ):
+        for k in kinds:
+            if k not in BASKET_KINDS:
+                raise ValueError(f"unknown basket kind: {k!r}")
+        self.engine = engine
+        self.min_profit_usdc = float(min_profit_usdc)
+        self.default_size = float(default_size)
+        self.exposure_cap = self.default_size * 10 if exposure_cap is None else float(exposure_cap)
+        self.kinds = tuple(kinds)
+        self.max_groups_per_cycle = max(1, int(max_groups_per_cycle))
+        self.baskets: Dict[str, GroupBasket] = {g: GroupBasket(g, members) for g, members in groups.items()}
+        self.books: Dict[str, OrderbookAssembler] = {}
+        self._group_of: Dict[str, GroupBasket] = {}
+        for basket in self.baskets.values():
+            for token in basket.tokens:
+                self.books[token] = OrderbookAssembler(basket.members[basket.tokens[token][0]].market_id)
+                self._group_of[token] = basket
+        self.found: Dict[str, int] = {k: 0 for k in self.kinds}  # opportunities seen per kind
+        self._dirty: Dict[str, float] = {}  # group -> perf_counter when first marked (insertion-ordered FIFO)
+        self._wake = asyncio.Event()
+        self._eval_lag = histogram("negrisk_eval_lag_us")
+        self._closed = False
+
+    def tokens(self) -> List[str]:
+        """Every token to subscribe to."""
+        return sorted(self.books)
+
+    def apply(self, msg: Dict[str, Any]) -> Optional[str]:
+        """Apply one book message; returns the group marked dirty (None when ignored)."""
+        token = msg.get("outcome_id")
+        asm = self.books.get(token) if token else None
+        if asm is None:
+            return None
+        typ = msg.get("type")
+        if typ == "snapshot":
+            asm.apply_snapshot(msg)
+        elif typ == "delta":
+            asm.apply_delta(msg)
+        else:
+            return None
+        basket = self._group_of[token]
+        bb, ba = asm.best_bid(), asm.best_ask()
+        basket.update(token, bb.price if bb else None, ba.price if ba else None)
+        if basket.group in self._dirty:
+            inc("negrisk_updates_coalesced", 1)
+        else:
+            self._dirty[basket.group] = time.perf_counter()
+            self._wake.set()
+        return basket.group
+
+    def evaluate(self, group: str) -> List[BasketOpportunity]:
+        basket = self.baskets[group]
+        inc("negrisk_evaluations", 1)
+        out: List[BasketOpportunity] = []
+        for kind in self.kinds:
+            edge = basket.edge(kind)
+            if edge is None or edge <= self.min_profit_usdc:
+                continue
+            size = self.default_size
+            if kind == "sell_yes":
+                size = min(size, self._held_yes(basket))
+                if size <= 0 or basket.basket_size(size) > size:
+                    inc_labelled("negrisk_sell_no_inventory", {"group": group}, 1)
+                    continue
+            plan = basket.plan(kind, size)
+            seqsig = "+".join(f"{t}:{self.books[t]._seq}" for t in sorted(basket.tokens))
+            plan.plan_id = f"negrisk:{group}:{kind}:{seqsig}"
+            _OPPORTUNITIES.labels(group, kind).inc(1)
+            self.found[kind] += 1
+            out.append(BasketOpportunity(group=group, kind=kind, edge=edge, plan=plan))
+        return out
+
+    def _held_yes(self, basket: GroupBasket) -> float:
+        """Smallest YES position held across the group's members (0 without a ledger)."""
+        ledger = getattr(self.engine, "ledger", None)
+        if ledger is None:
+            return 0.0
+        return min(ledger.position(m.market_id, m.yes_id) for m in basket.members)
+
+    def evaluate_dirty(self, budget: Optional[int] = None) -> List[BasketOpportunity]:
+        """Evaluate up to `budget` (default `max_groups_per_cycle`) dirty groups, oldest first."""
+        budget = self.max_groups_per_cycle if budget is None else budget
+        out: List[BasketOpportunity] = []
+        while self._dirty and budget > 0:
+            group = next(iter(self._dirty))
+            marked = self._dirty.pop(group)
+            self._eval_lag.record(int((time.perf_counter() - marked) * 1e6))
+            out.extend(self.evaluate(group))
+            budget -= 1
+        return out
+
+    async def _execute(self, opp: BasketOpportunity) -> None:
+        if self.engine is None:
+            return
+        if getattr(self.engine, "audit_db", None) is not None:
+            blocked, _ = will_exceed_exposure(self.engine.audit_db, opp.plan, cap_per_outcome=self.exposure_cap, ledger=getattr(self.engine, "ledger", None))
+            if blocked:
+                return
+        execute_async = getattr(self.engine, "execute_plan_async", None)
+        if execute_async is not None:
+            res = await execute_async(opp.plan)
+        else:
+            res = self.engine.execute_plan(opp.plan)
+        _ORDERS_PLACED.labels(opp.group).inc(len(res.acks))
+
+    async def _evaluator(self) -> None:
+        while True:
+            if not self._dirty:
+                if self._closed:
+                    return
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+            for opp in self.evaluate_dirty():
+                try:
+                    await self._execute(opp)
+                except Exception:
+                    inc_labelled("negrisk_execute_errors", {"group": opp.group}, 1)
+                    _log.exception("neg-risk basket %s failed", opp.plan.plan_id)
+            await asyncio.sleep(0)
+
+    async def run(self, messages: AsyncIterator[Dict[str, Any]]) -> None:
+        """Apply `messages` while a concurrent task evaluates dirty groups; returns after both finish."""
+        self._closed = False
+        task = asyncio.create_task(self._evaluator())
+        try:
+            async for m in messages:
+                self.apply(m)
+        finally:
+            self._closed = True
+            self._wake.set()
+            await task
+
+    async def run_ws(self, manager: Any, max_messages: Optional[int] = None) -> None:
+        """Subscribe every token on `manager` (a `WSConnectionManager`) and `run` on the merged stream."""
+        group_of = {t: b.group for t, b in self._group_of.items()}
+        await self.run(_merge_token_streams(manager, self.tokens(), max_messages, group_of))
+
+
+async def _merge_token_streams(
+    manager: Any,
+    tokens: List[str],
+    max_messages: Optional[int] = None,
+    group_of: Optional[Dict[str, str]] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """One iterator over the WS messages of all `tokens`, each tagged with its `outcome_id`.
+
+    Ends when every token's stream has ended, or after `max_messages` in total. Stream errors
+    are counted per group (`group_of[token]`), so the label set stays bounded by group count.
+    """
+    merged: asyncio.Queue = asyncio.Queue(maxsize=max(1, len(tokens)) * 16)
+
+    async def pump(token: str) -> None:
+        try:
+            async for m in manager.messages(token):
+                await merged.put(m if m.get("outcome_id") == token else dict(m, outcome_id=token))
+        except Exception:
+            inc_labelled("negrisk_ws_errors", {"group": (group_of or {}).get(token, "")}, 1)
+        await merged.put(None)
+
+    tasks = [asyncio.create_task(pump(t)) for t in tokens]
+    live, count = len(tasks), 0
+    try:
+        while live:
+            m = await merged.get()
+            if m is None:
+                live -= 1
+                continue
+            yield m
+            count += 1
+            if max_messages is not None and count >= max_messages:
+                break
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,19 +1,99 @@
 from __future__ import annotations
 
-from typing import Dict, Any, AsyncIterator
+import asyncio
+from typing import Dict, Any, AsyncIterator, Optional
 
 from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+from polybot.observability import tracing
+from polybot.observability.metrics import counter
 from polybot.strategy.spread_quoter import SpreadQuoter
 
 
+class LatestBookSlot:
+    """Conflating single-slot handoff between a book reader and a strategy task.
+
+    The reader `publish`es after every applied update; the strategy `wait`s for a version
+    it has not seen yet. Versions published while the strategy is busy collapse into one,
+    so the strategy only ever acts on the freshest state.
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.seen = 0
+        self.closed = False
+        self.last_update_ts_ms = 0
+        self.trace: Optional[tracing.TraceContext] = None  # trace of the latest version
+        self._event = asyncio.Event()
+
+    def publish(self, ts_ms: int, trace: Optional[tracing.TraceContext] = None) -> bool:
+        """Announce a new book version; returns True if an unseen version was superseded."""
+        conflated = self.version > self.seen
+        self.version += 1
+        self.last_update_ts_ms = ts_ms
+        self.trace = trace
+        self._event.set()
+        return conflated
+
+    def close(self) -> None:
+        self.closed = True
+        self._event.set()
+
+    async def wait(self) -> bool:
+        """Wait for an unseen version; returns False once closed with nothing left to see."""
+        while self.version == self.seen:
+            if self.closed:
+                return False
+            self._event.clear()
+            await self._event.wait()
+        self.seen = self.version
+        return True
+
+
 class QuoterRunner:
-    def __init__(self, market_id: str, quoter: SpreadQuoter):
+    """Feed orderbook messages to a `SpreadQuoter`.
+
+    By default every message is applied and immediately followed by a quoter step. With
+    `conflate=True` a reader task applies messages to the book as they arrive and a separate
+    strategy task steps on the latest state via a `LatestBookSlot`; updates that arrive while
+    a step is in flight collapse into one, so the strategy never works through a backlog of
+    stale states. Metrics (labelled by market): `quoter_updates_conflated`,
+    `quoter_updates_dropped` (stale/duplicate seq), `quoter_steps`.
+
+    Steps run on the event loop. When the quoter's engine is an `AsyncExecutionEngine`,
+    steps are awaited via `SpreadQuoter.step_async`, so the reader keeps applying messages
+    during relayer round-trips and only the decision itself runs inline. With a synchronous
+    engine the whole step, order placement included, blocks the loop (and with it the
+    reader) until it returns; conflation then bounds the work done afterwards, not the delay.
+
+    Messages carrying a tick-to-trade trace (`tracing.TRACE_KEY`) get their book-apply stamp
+    here; the trace is current while the quoter steps and is finished afterwards. In
+    conflated mode only the version the strategy acts on is finished.
+    """
+
+    def __init__(self, market_id: str, quoter: SpreadQuoter, conflate: bool = False):
         self.market_id = market_id
         self.quoter = quoter
         self.assembler = OrderbookAssembler(market_id)
         self.last_update_ts_ms = 0
+        self.conflate = bool(conflate)
+        self._async_steps = hasattr(quoter, "step_async") and hasattr(getattr(quoter, "engine", None), "execute_plan_async")
+
+    async def _step(self, ob, now_ts_ms: int, last_update_ts_ms: int, trace: Optional[tracing.TraceContext] = None) -> None:
+        token = tracing.activate(trace) if trace is not None else None
+        try:
+            if self._async_steps:
+                await self.quoter.step_async(ob, now_ts_ms=now_ts_ms, last_update_ts_ms=last_update_ts_ms)
+            else:
+                self.quoter.step(ob, now_ts_ms=now_ts_ms, last_update_ts_ms=last_update_ts_ms)
+        finally:
+            if token is not None:
+                tracing.deactivate(token)
+                tracing.finish(trace, self.market_id)
 
     async def run(self, messages: AsyncIterator[Dict[str, Any]], now_ms) -> None:
+        if self.conflate:
+            await self._run_conflated(messages, now_ms)
+            return
         async for msg in messages:
             typ = msg.get("type")
             if typ == "snapshot":
@@ -22,6 +102,59 @@ class QuoterRunner:
                 ob = self.assembler.apply_delta(msg)
             else:
                 continue
+            trace = msg.get(tracing.TRACE_KEY)
+            if trace is not None:
+                trace.stamp(tracing.APPLY)
             ts = now_ms()
-            self.quoter.step(ob, now_ts_ms=ts, last_update_ts_ms=ts)
+            await self._step(ob, ts, ts, trace)
+
+    async def _run_conflated(self, messages: AsyncIterator[Dict[str, Any]], now_ms) -> None:
+        slot = LatestBookSlot()
+        dropped = counter("quoter_updates_dropped", market=self.market_id)
+        conflated = counter("quoter_updates_conflated", market=self.market_id)
+        steps = counter("quoter_steps", market=self.market_id)
+        asm = self.assembler
+
+        async def _reader() -> None:
+            try:
+                async for msg in messages:
+                    typ = msg.get("type")
+                    if typ == "snapshot":
+                        asm.apply_snapshot(msg)
+                    elif typ == "delta":
+                        before = asm._seq
+                        asm.apply_delta(msg)
+                        if asm._seq == before:
+                            dropped.inc(1)
+                            continue
+                    else:
+                        continue
+                    trace = msg.get(tracing.TRACE_KEY)
+                    if trace is not None:
+                        trace.stamp(tracing.APPLY)
+                    self.last_update_ts_ms = now_ms()
+                    if slot.publish(self.last_update_ts_ms, trace):
+                        conflated.inc(1)
+            finally:
+                slot.close()
+
+        async def _strategy() -> None:
+            while await slot.wait():
+                await self._step(asm.view(), now_ms(), slot.last_update_ts_ms, slot.trace)
+                steps.inc(1)
+                # let the reader drain whatever arrived while we were stepping
+                await asyncio.sleep(0)
 
+        reader = asyncio.create_task(_reader(), name=f"market:{self.market_id}:reader")
+        strategy = asyncio.create_task(_strategy(), name=f"market:{self.market_id}:strategy")
+        try:
+            done, _ = await asyncio.wait({reader, strategy}, return_when=asyncio.FIRST_EXCEPTION)
+            for t in done:
+                if t.exception() is not None:
+                    raise t.exception()
+            await strategy
+        finally:
+            for t in (reader, strategy):
+                if not t.done():
+                    t.cancel()
+            await asyncio.gather(reader, strategy, return_exceptions=True)
@@ -3,7 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Optional
 
-from polybot.core.models import OrderBook
+from polybot.core.models import OrderBook, OrderBookView
 from polybot.core.pricing import round_to_tick, is_valid_price
 from polybot.exec.planning import ExecutionPlan, OrderIntent
 
@@ -25,6 +25,7 @@ class SpreadParams:
     min_side_replace_interval_ms: int = 200
     cancel_rate_capacity: float = 5.0
     cancel_rate_refill_per_sec: float = 2.0
+    presign_levels: int = 0  # pre-sign quotes this many ticks either side of the last quote
 
 
 def should_refresh_quotes(
@@ -48,7 +49,7 @@ def plan_spread_quotes(
     market_id: str,
     outcome_buy_id: str,
     outcome_sell_id: str,
-    ob: OrderBook,
+    ob: OrderBook | OrderBookView,
     now_ts_ms: int,
     last_update_ts_ms: int,
     params: SpreadParams = SpreadParams(),
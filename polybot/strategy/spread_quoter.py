@@ -1,15 +1,27 @@
 from __future__ import annotations
 
-import time
-from dataclasses import dataclass, replace
+from dataclasses import dataclass, field, replace
 from typing import Optional
 
-from polybot.core.models import OrderBook
+from polybot.core.models import OrderBook, OrderBookView
+from polybot.exec.planning import ExecutionPlan, OrderIntent
 from polybot.strategy.spread import plan_spread_quotes, SpreadParams, should_refresh_quotes
 from polybot.exec.engine import ExecutionEngine
 from polybot.exec.risk import will_exceed_exposure
-from polybot.observability.metrics import inc_labelled
+from polybot.observability import tracing
+from polybot.observability.metrics import counter_family
+from polybot.core.clock import WALL_CLOCK
 from polybot.core.ratelimit import TokenBucket
+from polybot.storage.metadata import metadata_cache
+
+# per-market quoting counters, cached per market (registered on first use)
+_QUOTES_CANCELED = counter_family("quotes_canceled", "market")
+_QUOTES_RATE_LIMITED = counter_family("quotes_rate_limited", "market")
+_QUOTES_SKIPPED = counter_family("quotes_skipped", "market")
+_QUOTES_SKIPPED_SAME = counter_family("quotes_skipped_same", "market")
+_QUOTES_CANCEL_RATE_LIMITED = counter_family("quotes_cancel_rate_limited", "market")
+_QUOTES_PLACED = counter_family("quotes_placed", "market")
+_QUOTES_PRESIGNED = counter_family("quotes_presigned", "market")
 
 
 @dataclass
@@ -31,16 +43,74 @@ class QuoterState:
     cancel_rate: TokenBucket | None = None
 
 
+@dataclass
+class _QuoteDecision:
+    plan: ExecutionPlan
+    now_ts_ms: int
+    seq: int
+    bid: float
+    ask: float
+    mid: float
+    tick: float
+    intended: dict
+    replace_sides: list[str]
+    to_cancel: list[str] = field(default_factory=list)
+
+
 class SpreadQuoter:
-    def __init__(self, market_id: str, outcome_yes_id: str, params: SpreadParams, engine: ExecutionEngine):
+    """Two-sided spread quoting with requote, replace and rate-limit policies.
+
+    Time comes from the `now_ts_ms` passed to `step`, else from `clock` (wall clock by
+    default; a `polybot.core.clock.VirtualClock` for replays), which also drives the quote
+    and cancel `TokenBucket`s.
+    """
+
+    def __init__(self, market_id: str, outcome_yes_id: str, params: SpreadParams, engine: ExecutionEngine, clock=None):
         self.market_id = market_id
         self.outcome_yes_id = outcome_yes_id
         self.params = params
         self.engine = engine
+        self.clock = clock or WALL_CLOCK
         self.state = QuoterState(open_client_oids=[])
+        self._meta: tuple | None = None  # (db, MetadataCache) resolved on first use
 
-    def step(self, ob: OrderBook, now_ts_ms: Optional[int] = None, last_update_ts_ms: Optional[int] = None):
-        now_ts_ms = now_ts_ms or int(time.time() * 1000)
+    def step(self, ob: OrderBook | OrderBookView, now_ts_ms: Optional[int] = None, last_update_ts_ms: Optional[int] = None):
+        d = self._decide(ob, now_ts_ms, last_update_ts_ms)
+        tracing.stamp(tracing.DECIDE)
+        if d is None:
+            return None
+        if d.to_cancel:
+            self.engine.cancel_client_orders(d.to_cancel)
+            _QUOTES_CANCELED.labels(self.market_id).inc(len(d.to_cancel))
+        if not self._admit(d):
+            return None
+        res = self.engine.execute_plan(d.plan)
+        return self._commit(d, res)
+
+    async def step_async(self, ob: OrderBook | OrderBookView, now_ts_ms: Optional[int] = None, last_update_ts_ms: Optional[int] = None):
+        """Same decision logic as `step`, awaiting an `AsyncExecutionEngine` for cancels/placement."""
+        d = self._decide(ob, now_ts_ms, last_update_ts_ms)
+        tracing.stamp(tracing.DECIDE)
+        if d is None:
+            return None
+        if d.to_cancel:
+            cancel_async = getattr(self.engine, "cancel_client_orders_async", None)
+            if cancel_async is not None:
+                await cancel_async(d.to_cancel)
+            else:
+                self.engine.cancel_client_orders(d.to_cancel)
+            _QUOTES_CANCELED.labels(self.market_id).inc(len(d.to_cancel))
+        if not self._admit(d):
+            return None
+        execute_async = getattr(self.engine, "execute_plan_async", None)
+        if execute_async is not None:
+            res = await execute_async(d.plan)
+        else:
+            res = self.engine.execute_plan(d.plan)
+        return self._commit(d, res)
+
+    def _decide(self, ob: OrderBook | OrderBookView, now_ts_ms: Optional[int], last_update_ts_ms: Optional[int]) -> Optional[_QuoteDecision]:
+        now_ts_ms = now_ts_ms or self.clock.now_ms()
         last_update_ts_ms = last_update_ts_ms or now_ts_ms
         bb = ob.best_bid()
         ba = ob.best_ask()
@@ -58,9 +128,9 @@ class SpreadQuoter:
         )
         # Rate limit
         if self.state.rate is None:
-            self.state.rate = TokenBucket(capacity=self.params.rate_capacity, refill_per_sec=self.params.rate_refill_per_sec, tokens=self.params.rate_capacity)
+            self.state.rate = TokenBucket(capacity=self.params.rate_capacity, refill_per_sec=self.params.rate_refill_per_sec, tokens=self.params.rate_capacity, clock=self.clock)
         if not self.state.rate.allow(1.0, now_ms=now_ts_ms):
-            inc_labelled("quotes_rate_limited", {"market": self.market_id})
+            _QUOTES_RATE_LIMITED.labels(self.market_id).inc()
             return None
         if self.state.last_bid is not None and self.state.last_ask is not None:
             movement = should_refresh_quotes(
@@ -72,19 +142,19 @@ class SpreadQuoter:
                 self.params.max_mid_jump,
             )
             if not movement and not elapsed_ok:
-                inc_labelled("quotes_skipped", {"market": self.market_id})
+                _QUOTES_SKIPPED.labels(self.market_id).inc()
                 return None
 
         # Optionally override tick_size using market metadata from DB (if available)
         effective_tick = self.params.tick_size
-        if getattr(self.engine, "audit_db", None) is not None:
+        db = getattr(self.engine, "audit_db", None)
+        if db is not None:
             try:
-                row = self.engine.audit_db.execute(
-                    "SELECT tick_size FROM outcomes WHERE outcome_id=? LIMIT 1",
-                    (self.outcome_yes_id,),
-                ).fetchone()
-                if row and float(row[0]) > 0:
-                    effective_tick = float(row[0])
+                if self._meta is None or self._meta[0] is not db:
+                    self._meta = (db, metadata_cache(db))
+                meta = self._meta[1].outcome(db, self.outcome_yes_id)
+                if meta is not None and meta.tick_size > 0:
+                    effective_tick = meta.tick_size
             except Exception:
                 pass
         eff_params = replace(self.params, tick_size=effective_tick)
@@ -142,60 +212,75 @@ class SpreadQuoter:
         replace_sides = side_intervals_ok
 
         if not replace_sides:
-            inc_labelled("quotes_skipped_same", {"market": self.market_id})
+            _QUOTES_SKIPPED_SAME.labels(self.market_id).inc()
             return None
 
-        # Cancel only sides to be replaced
+        # Cancel only sides to be replaced (issued by the caller)
+        to_cancel: list[str] = []
         if self.state.open_client_oids:
             # Init cancel rate bucket
             if self.state.cancel_rate is None:
-                self.state.cancel_rate = TokenBucket(capacity=self.params.cancel_rate_capacity, refill_per_sec=self.params.cancel_rate_refill_per_sec, tokens=self.params.cancel_rate_capacity)
+                self.state.cancel_rate = TokenBucket(capacity=self.params.cancel_rate_capacity, refill_per_sec=self.params.cancel_rate_refill_per_sec, tokens=self.params.cancel_rate_capacity, clock=self.clock)
             # Decide which sides we are allowed to cancel now
             permitted_sides: list[str] = []
             for side in replace_sides:
                 if self.state.cancel_rate.allow(1.0, now_ms=now_ts_ms):
                     permitted_sides.append(side)
                 else:
-                    inc_labelled("quotes_cancel_rate_limited", {"market": self.market_id})
+                    _QUOTES_CANCEL_RATE_LIMITED.labels(self.market_id).inc()
             # remove non-permitted sides from replacement
             replace_sides = permitted_sides
-            to_cancel = []
             for oid in self.state.open_client_oids:
                 if oid.endswith(":bid") and "bid" in replace_sides:
                     to_cancel.append(oid)
                 if oid.endswith(":ask") and "ask" in replace_sides:
                     to_cancel.append(oid)
-            if to_cancel:
-                self.engine.cancel_client_orders(to_cancel)
-                inc_labelled("quotes_canceled", {"market": self.market_id}, len(to_cancel))
+        return _QuoteDecision(
+            plan=plan,
+            now_ts_ms=now_ts_ms,
+            seq=ob.seq,
+            bid=bb.price,
+            ask=ba.price,
+            mid=mid,
+            tick=tick,
+            intended=intended,
+            replace_sides=replace_sides,
+            to_cancel=to_cancel,
+        )
 
+    def _admit(self, d: _QuoteDecision) -> bool:
+        plan = d.plan
         # Enforce inventory cap by suppressing side that increases exposure further
         if self.state.inventory >= self.params.max_inventory:
             plan.intents = [i for i in plan.intents if i.side != "buy"]
-            replace_sides = [s for s in replace_sides if s != "bid"]
+            d.replace_sides = [s for s in d.replace_sides if s != "bid"]
         elif self.state.inventory <= -self.params.max_inventory:
             plan.intents = [i for i in plan.intents if i.side != "sell"]
-            replace_sides = [s for s in replace_sides if s != "ask"]
+            d.replace_sides = [s for s in d.replace_sides if s != "ask"]
+        replace_sides = d.replace_sides
         # Retain only intents for sides that require replacement and are permitted (after cancel throttle)
         if replace_sides:
             plan.intents = [i for i in plan.intents if ((i.side == "buy" and "bid" in replace_sides) or (i.side == "sell" and "ask" in replace_sides))]
         # Risk check: do not execute if exposure cap would be exceeded
         if not plan.intents:
-            return None
+            return False
         blocked, _ = (False, 0.0)
         if getattr(self.engine, "audit_db", None) is not None:
-            blocked, _ = will_exceed_exposure(self.engine.audit_db, plan, cap_per_outcome=self.params.max_inventory)
-        if blocked:
-            return None
+            blocked, _ = will_exceed_exposure(self.engine.audit_db, plan, cap_per_outcome=self.params.max_inventory, ledger=getattr(self.engine, "ledger", None))
+        return not blocked
 
-        res = self.engine.execute_plan(plan)
-        inc_labelled("quotes_placed", {"market": self.market_id}, len(plan.intents))
+    def _commit(self, d: _QuoteDecision, res):
+        plan = d.plan
+        now_ts_ms = d.now_ts_ms
+        replace_sides = d.replace_sides
+        intended = d.intended
+        _QUOTES_PLACED.labels(self.market_id).inc(len(plan.intents))
         self.state.open_client_oids = [i.client_order_id for i in plan.intents if i.client_order_id]
         # Update state with current levels regardless of fill
-        self.state.last_bid = bb.price
-        self.state.last_ask = ba.price
-        self.state.last_mid = mid
-        self.state.last_seq = ob.seq
+        self.state.last_bid = d.bid
+        self.state.last_ask = d.ask
+        self.state.last_mid = d.mid
+        self.state.last_seq = d.seq
         self.state.last_quote_ts_ms = now_ts_ms
         # Update last quoted levels for replaced sides
         if "bid" in replace_sides and "bid" in intended:
@@ -209,4 +294,26 @@ class SpreadQuoter:
                 self.state.inventory += ack.filled_size
             else:
                 self.state.inventory -= ack.filled_size
+        if self.params.presign_levels > 0:
+            self._presign_ladder(d)
         return res
+
+    def _presign_ladder(self, d: _QuoteDecision) -> None:
+        """Pre-sign the quotes we would send if the book moves by up to `presign_levels` ticks."""
+        presign = getattr(self.engine, "presign_orders", None)
+        if presign is None or not d.tick > 0:
+            return
+        intents: list[OrderIntent] = []
+        for side_tag, side in (("bid", "buy"), ("ask", "sell")):
+            if side_tag not in d.intended:
+                continue
+            price, size = d.intended[side_tag]
+            for k in range(1, self.params.presign_levels + 1):
+                for p in (price - k * d.tick, price + k * d.tick):
+                    p = round(round(p / d.tick) * d.tick, 10)
+                    if 0.0 < p < 1.0:
+                        intents.append(OrderIntent(market_id=self.market_id, outcome_id=self.outcome_yes_id, side=side, price=p, size=size, tif="GTC"))
+        if intents:
+            queued = presign(intents)
+            if queued:
+                _QUOTES_PRESIGNED.labels(self.market_id).inc(queued)
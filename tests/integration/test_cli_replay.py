@@ -24,3 +24,75 @@ def test_cli_cmd_replay(tmp_path: Path):
     cur = con.execute("SELECT COUNT(*) FROM orderbook_events WHERE market_id='m1'")
     assert cur.fetchone()[0] == 1
 
+
+
+def test_cli_cmd_replay_into_event_log(tmp_path: Path):
+    from polybot.observability.replay import apply_orderbook_events
+    from polybot.storage.eventlog import EventLog
+
+    file = tmp_path / "m1.jsonl"
+    file.write_text(
+        "\n".join(
+            [
+                '{"type":"snapshot","seq":10,"bids":[[0.4,100.0]],"asks":[[0.47,50.0]]}',
+                '{"type":"delta","seq":11,"bids":[[0.41,20.0]]}',
+            ]
+        ),
+        encoding="utf-8",
+    )
+    dbfile = tmp_path / "test.db"
+    cmd_replay(str(file), market_id="m1", db_url=f"sqlite:///{dbfile}", event_log_dir=str(tmp_path / "log"))
+
+    con = connect_sqlite(f"sqlite:///{dbfile}")
+    assert con.execute("SELECT COUNT(*) FROM orderbook_events").fetchone()[0] == 0
+    assert con.execute("SELECT COUNT(*) FROM orderbook_snapshots WHERE market_id='m1'").fetchone()[0] == 1
+    book = apply_orderbook_events("m1", EventLog(tmp_path / "log", con))
+    assert book.seq == 11
+    assert book.best_bid().price == 0.41
+
+
+def test_cli_cmd_replay_through_storage_writer(tmp_path: Path):
+    file = tmp_path / "m1.jsonl"
+    file.write_text(
+        "\n".join(['{"type":"snapshot","seq":1,"bids":[[0.4,1.0]],"asks":[[0.5,1.0]]}'] + [f'{{"type":"delta","seq":{s},"bids":[[0.41,1.0]]}}' for s in range(2, 50)]),
+        encoding="utf-8",
+    )
+    dbfile = tmp_path / "test.db"
+    cmd_replay(str(file), market_id="m1", db_url=f"sqlite:///{dbfile}", storage_writer=True)
+
+    con = connect_sqlite(f"sqlite:///{dbfile}")
+    assert con.execute("SELECT COUNT(*) FROM orderbook_events WHERE market_id='m1'").fetchone()[0] == 48
+    assert con.execute("SELECT last_seq FROM market_status WHERE market_id='m1'").fetchone()[0] == 49
+
+
+def test_cli_cmd_replay_from_event_log(tmp_path: Path):
+    import pytest
+
+    file = tmp_path / "m1.jsonl"
+    file.write_text(
+        "\n".join(
+            [
+                '{"type":"snapshot","seq":10,"bids":[[0.4,100.0]],"asks":[[0.47,50.0]]}',
+                '{"type":"delta","seq":11,"bids":[[0.41,20.0]]}',
+                '{"type":"delta","seq":12,"asks":[[0.46,5.0]]}',
+            ]
+        ),
+        encoding="utf-8",
+    )
+    db_url = f"sqlite:///{tmp_path / 'test.db'}"
+    log_dir = str(tmp_path / "log")
+    cmd_replay(str(file), market_id="m1", db_url=db_url, event_log_dir=log_dir)
+    con = connect_sqlite(db_url)
+    assert con.execute("SELECT COUNT(*) FROM orderbook_events").fetchone()[0] == 0
+    recorded = [r[0] for r in con.execute("SELECT ts_ms FROM orderbook_snapshots WHERE market_id='m1'")]
+
+    # the columnar log is the source: rows land in the tables with their recorded timestamps
+    cmd_replay(log_dir, market_id="m1", db_url=db_url, from_event_log=True)
+    rows = con.execute("SELECT seq, ts_ms FROM orderbook_events WHERE market_id='m1' ORDER BY seq").fetchall()
+    assert [r[0] for r in rows] == [11, 12]
+    snaps = [r[0] for r in con.execute("SELECT ts_ms FROM orderbook_snapshots WHERE market_id='m1'")]
+    assert snaps == recorded * 2
+    assert con.execute("SELECT last_seq FROM market_status WHERE market_id='m1'").fetchone()[0] == 12
+
+    with pytest.raises(ValueError):
+        cmd_replay(log_dir, market_id="m1", db_url=db_url, from_event_log=True, event_log_dir=log_dir)
@@ -42,3 +42,33 @@ async def test_rulehash_change_blocks_execution():
     assert after == before
     assert get_counter_labelled("dutch_rulehash_changed", {"market": "m1"}) >= 1
 
+
+
+@pytest.mark.asyncio
+async def test_metadata_version_is_read_per_plan_not_per_message():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    con.execute("INSERT INTO markets (market_id, title, status, rule_hash) VALUES (?,?,?,?)", ("m-chk", "T", "active", "H1"))
+    for oid in ("c1", "c2"):
+        con.execute("INSERT INTO outcomes (outcome_id, market_id, name, tick_size, min_size) VALUES (?,?,?,?,?)", (oid, "m-chk", "X", 0.01, 1.0))
+    con.commit()
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    runner = DutchRunner(DutchSpec(market_id="m-chk", outcomes=["c1", "c2"]), engine, meta_db=con, meta_check_interval_ms=60_000)
+    reads = []
+    con.set_trace_callback(lambda sql: reads.append(sql) if "metadata_version" in sql else None)
+    # 40 messages that never cross the threshold: no metadata reads at all
+    msgs = [{"type": "snapshot", "seq": i, "bids": [], "asks": [[0.6, 10.0]], "outcome_id": ("c1", "c2")[i % 2]} for i in range(1, 41)]
+    await runner.run(_aiter(msgs), now_ms=lambda: 0)
+    assert reads == []
+    # a crossing update checks once before the plan goes out
+    await runner.run(_aiter([{"type": "snapshot", "seq": 50, "bids": [], "asks": [[0.3, 10.0]], "outcome_id": "c1"}]), now_ms=lambda: 0)
+    assert len(reads) == 1
+    con.set_trace_callback(None)
+
+    errors = get_counter_labelled("dutch_meta_check_errors", {"market": "m-chk"})
+    def broken(con):
+        raise RuntimeError("database is locked")
+
+    runner._meta.check = broken
+    await runner.run(_aiter([{"type": "snapshot", "seq": 51, "bids": [], "asks": [[0.31, 10.0]], "outcome_id": "c1"}]), now_ms=lambda: 0)
+    assert get_counter_labelled("dutch_meta_check_errors", {"market": "m-chk"}) == errors + 1
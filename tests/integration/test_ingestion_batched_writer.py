@@ -0,0 +1,52 @@
+import asyncio
+
+from polybot.storage.db import connect_sqlite
+from polybot.storage import schema
+from polybot.ingestion.orderbook import OrderbookIngestor
+from polybot.ingestion.runner import run_orderbook_stream
+from polybot.ingestion.snapshot import FakeSnapshotProvider
+from polybot.observability.metrics import get_counter_labelled
+
+
+def _count(con, table: str) -> int:
+    return con.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_batched_ingestor_group_commits_on_size_threshold():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    ing = OrderbookIngestor(con, "mb1", batch_size=4)
+    before = get_counter_labelled("ingestion_flush_count", {"market": "mb1"})
+    ing.process({"type": "snapshot", "seq": 1, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]]}, ts_ms=1000)
+    ing.process({"type": "delta", "seq": 2, "bids": [[0.41, 1.0]]}, ts_ms=1001)
+    # below threshold: nothing written yet
+    assert _count(con, "orderbook_events") == 0 and _count(con, "market_status") == 0
+    ing.process({"type": "delta", "seq": 3, "bids": [[0.42, 1.0]], "asks": [[0.59, 1.0]]}, ts_ms=1002)
+    assert _count(con, "orderbook_events") == 3
+    assert _count(con, "orderbook_snapshots") == 1
+    row = con.execute("SELECT last_seq, snapshots, deltas FROM market_status WHERE market_id='mb1'").fetchone()
+    assert row == (3, 1, 2)
+    assert get_counter_labelled("ingestion_flush_count", {"market": "mb1"}) == before + 1
+    assert get_counter_labelled("ingestion_flush_rows_sum", {"market": "mb1"}) >= 4
+
+
+def test_batched_ingestor_flushes_before_prune_and_on_stream_end():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    ing = OrderbookIngestor(con, "mb2", batch_size=1000)
+    ing.process({"type": "snapshot", "seq": 10, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]]}, ts_ms=1000)
+    ing.process({"type": "delta", "seq": 11, "bids": [[0.41, 1.0]]}, ts_ms=1100)
+    assert ing.pending_rows() == 2
+    assert ing.prune_events_before(1150) == 1
+    assert ing.pending_rows() == 0 and _count(con, "orderbook_snapshots") == 1
+
+    async def _aiter():
+        for m in [{"type": "delta", "seq": 12, "asks": [[0.59, 1.0]]}, {"type": "delta", "seq": 13, "asks": [[0.58, 1.0]]}]:
+            await asyncio.sleep(0)
+            yield m
+
+    provider = FakeSnapshotProvider({"type": "snapshot", "seq": 11, "bids": [], "asks": []})
+    asyncio.run(run_orderbook_stream("mb2", _aiter(), ing, provider, now_ms=lambda: 2000))
+    assert ing.pending_rows() == 0
+    assert _count(con, "orderbook_events") == 2
+    assert con.execute("SELECT last_seq FROM market_status WHERE market_id='mb2'").fetchone()[0] == 13
@@ -50,3 +50,30 @@ async def test_scheduler_takes_snapshots_and_prunes():
     assert snaps >= 1
     events = con.execute("SELECT COUNT(*) FROM orderbook_events").fetchone()[0]
     assert events == 0
+
+
+@pytest.mark.asyncio
+async def test_buffered_rows_flush_on_timer_without_further_messages(tmp_path):
+    con = connect_sqlite(f"sqlite:///{tmp_path / 'flush.db'}")
+    schema.create_all(con)
+    ing = OrderbookIngestor(con, "m1", batch_size=1000, flush_interval_ms=20)
+    provider = FakeSnapshotProvider({"type": "snapshot", "seq": 1, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]]})
+    quiet, done = asyncio.Event(), asyncio.Event()
+
+    async def stream():
+        yield {"type": "snapshot", "seq": 1, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]]}
+        yield {"type": "delta", "seq": 2, "bids": [[0.41, 1.0]]}
+        quiet.set()
+        await done.wait()  # the market goes quiet
+
+    task = asyncio.create_task(run_ingestion_session("m1", stream(), ing, provider, snapshot_interval_ms=60_000, prune_interval_ms=60_000, retention_ms=60_000, now_ms=lambda: 1_000))
+    await quiet.wait()
+    assert ing.pending_rows() == 2  # buffered, below batch_size
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if ing.pending_rows() == 0:
+            break
+    assert con.execute("SELECT COUNT(*) FROM orderbook_events WHERE market_id='m1'").fetchone()[0] == 1
+    assert con.execute("SELECT last_seq, last_update_ts_ms FROM market_status WHERE market_id='m1'").fetchone() == (2, 1_000)
+    done.set()
+    await task
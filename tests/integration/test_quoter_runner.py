@@ -43,3 +43,60 @@ async def test_quoter_runner_places_and_cancels_quotes():
     assert cnt >= 2
     canceled = con.execute("SELECT COUNT(*) FROM orders WHERE status='canceled'").fetchone()[0]
     assert canceled >= 2
+
+
+@pytest.mark.asyncio
+async def test_conflating_runner_steps_on_latest_book_only():
+    from polybot.observability.metrics import get_counter_labelled
+
+    class RecordingQuoter:
+        def __init__(self):
+            self.seen = []
+
+        def step(self, ob, now_ts_ms=None, last_update_ts_ms=None):
+            self.seen.append((ob.seq, ob.best_bid().price))
+
+    async def burst():
+        # all messages arrive without yielding, as when the socket buffer is drained
+        yield {"type": "snapshot", "seq": 1, "bids": [[0.40, 100.0]], "asks": [[0.47, 100.0]]}
+        yield {"type": "delta", "seq": 2, "bids": [[0.41, 10.0]]}
+        yield {"type": "delta", "seq": 2, "bids": [[0.45, 10.0]]}  # duplicate seq -> dropped
+        yield {"type": "delta", "seq": 3, "bids": [[0.42, 10.0]]}
+
+    quoter = RecordingQuoter()
+    runner = QuoterRunner("mc", quoter, conflate=True)
+    labels = {"market": "mc"}
+    before_c = get_counter_labelled("quoter_updates_conflated", labels)
+    before_d = get_counter_labelled("quoter_updates_dropped", labels)
+    await runner.run(burst(), lambda: 1000)
+
+    assert quoter.seen == [(3, 0.42)]
+    assert get_counter_labelled("quoter_updates_conflated", labels) - before_c == 2
+    assert get_counter_labelled("quoter_updates_dropped", labels) - before_d == 1
+
+
+@pytest.mark.asyncio
+async def test_quoter_runner_with_async_engine_places_and_cancels_quotes():
+    from polybot.exec.engine import AsyncExecutionEngine
+
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    engine = AsyncExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con, max_workers=1)
+    params = SpreadParams(size=1.0, min_requote_interval_ms=0, min_side_replace_interval_ms=0)
+    quoter = SpreadQuoter("m1", "yes", params, engine)
+    runner = QuoterRunner("m1", quoter)
+
+    msgs = [
+        {"type": "snapshot", "seq": 1, "bids": [[0.40, 100.0]], "asks": [[0.47, 100.0]]},
+        {"type": "delta", "seq": 2},
+        {"type": "delta", "seq": 3, "bids": [[0.41, 10.0]]},
+    ]
+    base = int(time.time() * 1000)
+    try:
+        await runner.run(_aiter_messages(msgs), lambda: base)
+        await asyncio.sleep(0)
+    finally:
+        engine.close()
+
+    assert con.execute("SELECT COUNT(*) FROM orders").fetchone()[0] >= 2
+    assert con.execute("SELECT COUNT(*) FROM orders WHERE status='canceled'").fetchone()[0] >= 2
@@ -38,3 +38,26 @@ async def test_checksum_match_avoids_resync():
     after = get_counter_labelled("ingestion_resync_checksum", {"market": "m1"})
     assert after == before
 
+
+@pytest.mark.asyncio
+async def test_checksum_drift_does_not_resync():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    ing = OrderbookIngestor(con, "m2")
+    snap = {"type": "snapshot", "seq": 10, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]]}
+    delta = {"type": "delta", "seq": 11, "bids": [[0.41, 1.0]]}
+    asm = OrderbookAssembler("m2")
+    asm.apply_snapshot(snap)
+    asm.apply_delta(delta)
+    delta_with_checksum = dict(delta, checksum=orderbook_checksum(asm._bids, asm._asks))
+
+    async def _msgs() -> AsyncIterator[Dict[str, Any]]:
+        yield snap
+        # incremental sums have drifted away from the exact book notional
+        ing.assembler._bids._notional += 1e-3
+        yield delta_with_checksum
+
+    before = get_counter_labelled("ingestion_resync_checksum", {"market": "m2"})
+    await run_orderbook_stream("m2", _msgs(), ing, snapshot_provider=type("SP", (), {"get_snapshot": lambda _self, _mid: snap})())
+    assert get_counter_labelled("ingestion_resync_checksum", {"market": "m2"}) == before
+    assert get_counter_labelled("ingestion_checksum_exact_recompute", {"market": "m2"}) >= 1
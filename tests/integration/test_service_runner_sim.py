@@ -57,3 +57,44 @@ def test_service_runner_two_markets(tmp_path):
     cnt = con.execute("SELECT COUNT(*) FROM orders").fetchone()[0]
     assert cnt >= 4
 
+
+
+def test_service_runner_multiplexes_markets_over_one_socket(tmp_path):
+    connections = []
+    subscribed = []
+
+    async def handler(websocket):
+        connections.append(websocket)
+        for _ in range(2):
+            try:
+                sub = json.loads(await asyncio.wait_for(websocket.recv(), timeout=1.0))
+                subscribed.append(sub["market"])
+            except Exception:
+                break
+        for mid, bid in (("m1", 0.40), ("m2", 0.30)):
+            await websocket.send(json.dumps({"type": "l2_snapshot", "seq": 1, "market": mid, "bids": [[bid, 100.0]], "asks": [[bid + 0.07, 100.0]]}))
+        for mid in ("m1", "m2"):
+            await websocket.send(json.dumps({"type": "l2_update", "seq": 2, "market": mid}))
+        await asyncio.sleep(0.2)
+
+    async def run():
+        server = await websockets.serve(handler, "127.0.0.1", 0)
+        host, port = server.sockets[0].getsockname()[:2]
+        url = f"ws://{host}:{port}"
+        try:
+            sr = ServiceRunner(db_url=f"sqlite:///{tmp_path / 'mux.db'}", ws_connections=1)
+            specs = [
+                MarketSpec(market_id="m1", outcome_yes_id="yes", ws_url=url, max_messages=2),
+                MarketSpec(market_id="m2", outcome_yes_id="yes", ws_url=url, max_messages=2),
+            ]
+            await asyncio.wait_for(sr.run_markets(specs), timeout=5)
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+    assert len(connections) == 1
+    assert sorted(subscribed) == ["m1", "m2"]
+    con = connect_sqlite(f"sqlite:///{tmp_path / 'mux.db'}")
+    markets = {r[0] for r in con.execute("SELECT DISTINCT market_id FROM orders")}
+    assert markets == {"m1", "m2"}
@@ -0,0 +1,159 @@
+import asyncio
+import json
+import os
+from contextlib import asynccontextmanager
+
+import pytest
+import websockets
+
+from polybot.observability.metrics import get_counter, get_counter_labelled, get_histogram, share as share_metrics
+from polybot.service.runner import MarketSpec
+from polybot.service.shards import CoordinatorEngine, ShardCoordinator, ShardSupervisor, assign_shards, shard_main
+from polybot.storage.db import connect_sqlite
+
+
+MESSAGES = [
+    {"type": "l2_snapshot", "seq": 1, "bids": [[0.40, 100.0]], "asks": [[0.47, 100.0]]},
+    {"type": "l2_update", "seq": 2},
+    {"type": "l2_update", "seq": 3, "bids": [[0.41, 10.0]]},
+]
+
+
+@asynccontextmanager
+async def ws_server(messages):
+    async def handler(websocket):
+        try:
+            await asyncio.wait_for(websocket.recv(), timeout=0.05)
+        except Exception:
+            pass
+        for m in messages:
+            await websocket.send(json.dumps(m))
+        await asyncio.sleep(0.05)
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    try:
+        yield f"ws://{host}:{port}"
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def crash_first_incarnation(shard_id, incarnation, *args):
+    if shard_id == 0 and incarnation == 0:
+        os._exit(3)
+    shard_main(shard_id, incarnation, *args)
+
+
+def overflow_segment(shard_id, incarnation, markets, runner_kwargs, requests, responses, metrics_segment):
+    from polybot.observability.metrics import inc
+
+    share_metrics(metrics_segment, create=False)
+    for i in range(20):
+        inc(f"shard_overflow_probe_{i}")
+
+
+def many_market_histograms(shard_id, incarnation, markets, runner_kwargs, requests, responses, metrics_segment):
+    from polybot.observability.metrics import histogram
+
+    share_metrics(metrics_segment, create=False)
+    for i in range(100):
+        for name in ("engine_place_call_us", "engine_ack_us", "service_market_runtime_us", "trace_stage_us"):
+            h = histogram(name, market=f"h{i}")
+            for v in range(1, 1001):
+                h.record(v)
+
+
+def test_assign_shards_by_hash_and_weight():
+    specs = [MarketSpec(market_id=f"m{i}", outcome_yes_id="yes", ws_url="ws://x", weight=w) for i, w in enumerate([5.0, 1.0, 1.0, 1.0, 2.0])]
+    by_hash = assign_shards(specs, 3)
+    assert sorted(ms.market_id for shard in by_hash for ms in shard) == sorted(ms.market_id for ms in specs)
+    assert assign_shards(list(reversed(specs)), 3)[0] == list(reversed(by_hash[0]))  # stable per market id
+    by_weight = assign_shards(specs, 2, by="weight")
+    assert [sum(ms.weight for ms in shard) for shard in by_weight] == [5.0, 5.0]
+    with pytest.raises(ValueError):
+        assign_shards(specs, 2, by="round-robin")
+    with pytest.raises(ValueError):
+        ShardSupervisor({"db_url": ":memory:"})
+
+
+def test_sharded_service_shares_coordinator_and_restarts(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'shards.db'}"
+
+    async def run():
+        async with ws_server(MESSAGES) as url:
+            specs = [MarketSpec(market_id=f"s{i}", outcome_yes_id="yes", ws_url=url, max_messages=3) for i in range(4)]
+            sup = ShardSupervisor({"db_url": db_url}, shards=2, worker_target=crash_first_incarnation)
+            await asyncio.wait_for(sup.run(specs), timeout=60)
+            return sup, specs
+
+    sup, specs = asyncio.run(run())
+    assert sup.restarts == {0: 1}
+    assert get_counter_labelled("shard_restarts", {"shard": "0"}) >= 1
+    # every market ran in some shard, executed through the one coordinator, and its
+    # worker-side counters were folded into this process
+    con = connect_sqlite(db_url)
+    for ms in specs:
+        assert con.execute("SELECT COUNT(*) FROM orders WHERE market_id=?", (ms.market_id,)).fetchone()[0] >= 1
+        assert get_counter_labelled("service_market_done", {"market": ms.market_id}) >= 1
+    assert get_counter_labelled("shard_coordinator_requests", {"op": "execute"}) >= 4
+
+
+def test_supervisor_segment_capacity_and_worker_overflow_are_visible(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'cap.db'}"
+    before = get_counter("metrics_registry_overflow")
+    sup = ShardSupervisor({"db_url": db_url}, shards=1, worker_target=overflow_segment, metrics_capacity=8)
+    asyncio.run(asyncio.wait_for(sup.run([MarketSpec(market_id="c0", outcome_yes_id="yes", ws_url="ws://unused")]), timeout=60))
+    # 8 slots: 12 of the worker's 20 probes overflowed, counted in the segment header and folded here
+    assert get_counter("metrics_registry_overflow") - before == 12
+
+
+def test_sharded_percentiles_survive_many_markets(tmp_path):
+    db_url = f"sqlite:///{tmp_path / 'hists.db'}"
+    before = get_counter("metrics_registry_overflow")
+    sup = ShardSupervisor({"db_url": db_url}, shards=1, worker_target=many_market_histograms)
+    asyncio.run(asyncio.wait_for(sup.run([MarketSpec(market_id="h0", outcome_yes_id="yes", ws_url="ws://unused")]), timeout=60))
+    # 400 series fit the default segment whole, tail buckets included
+    assert get_counter("metrics_registry_overflow") == before
+    for i in (0, 57, 99):
+        for name in ("engine_place_call_us", "trace_stage_us"):
+            snap = get_histogram(name, {"market": f"h{i}"})
+            assert snap.count >= 1000
+            assert 990 <= snap.percentile(0.99) <= 990 * 17 / 16
+            assert snap.percentile(1.0) >= 1000
+
+
+def test_worker_risk_checks_use_a_ledger_fed_by_coordinator_replies(tmp_path):
+    import queue
+
+    from polybot.adapters.polymarket.relayer import FakeRelayer
+    from polybot.exec.engine import ExecutionEngine
+    from polybot.exec.planning import ExecutionPlan, OrderIntent
+    from polybot.exec.risk import will_exceed_exposure
+    from polybot.service.runner import ServiceRunner
+    from polybot.storage.db import connect
+
+    db_url = f"sqlite:///{tmp_path / 'ledger.db'}"
+    ServiceRunner(db_url=db_url).con.close()
+    requests, responses = queue.Queue(), {0: queue.Queue()}
+    coordinator = ShardCoordinator(requests, responses, lambda: ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=connect(db_url)))
+    coordinator.start()
+    con = connect_sqlite(db_url)
+    engine = CoordinatorEngine(0, 0, requests, responses[0], audit_db=con, timeout_s=5.0)
+    try:
+        plan = ExecutionPlan(intents=[OrderIntent(market_id="lw", outcome_id="yes", side="buy", price=0.4, size=3.0)], expected_profit=0, rationale="r")
+        engine.execute_plan(plan)
+        assert engine.ledger.position("lw", "yes") == pytest.approx(3.0)
+        reads = []
+        con.set_trace_callback(reads.append)
+        blocked, inv = will_exceed_exposure(engine.audit_db, plan, cap_per_outcome=5.0, ledger=engine.ledger)
+        con.set_trace_callback(None)
+        assert blocked and inv == pytest.approx(3.0)
+        assert reads == []
+        # a new worker incarnation starts from the committed fills
+        restarted = CoordinatorEngine(0, 1, requests, queue.Queue(), audit_db=con)
+        restarted.close()
+        assert restarted.ledger.position("lw", "yes") == pytest.approx(3.0)
+    finally:
+        engine.close()
+        coordinator.stop()
@@ -0,0 +1,155 @@
+import threading
+
+import pytest
+
+from polybot.exec.engine import ExecutionEngine
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.adapters.polymarket.relayer import FakeRelayer
+from polybot.ingestion.orderbook import OrderbookIngestor
+from polybot.observability.metrics import get_counter, get_counter_labelled, get_gauge, reset as metrics_reset
+from polybot.observability.prometheus import export_text
+from polybot.storage.db import connect_sqlite
+from polybot.storage.writer import StorageWriter
+from polybot.storage import schema
+
+
+def _db(tmp_path):
+    url = f"sqlite:///{tmp_path / 'w.db'}"
+    con = connect_sqlite(url)
+    schema.create_all(con)
+    return con, url
+
+
+def test_storage_writer_rejects_memory_db():
+    with pytest.raises(ValueError):
+        StorageWriter("sqlite:///:memory:")
+
+
+def test_engine_with_writer_persists_after_flush(tmp_path):
+    metrics_reset()
+    con, url = _db(tmp_path)
+    writer = StorageWriter(url, max_queue=4)
+    try:
+        engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con, writer=writer)
+        plan = ExecutionPlan(
+            intents=[
+                OrderIntent(market_id="m1", outcome_id="o1", side="buy", price=0.4, size=2.0, tif="IOC", client_order_id="c1"),
+                OrderIntent(market_id="m1", outcome_id="o2", side="buy", price=0.5, size=2.0, tif="IOC", client_order_id="c2"),
+            ],
+            expected_profit=0.1,
+            rationale="test",
+        )
+        engine.execute_plan(plan)
+        writer.flush(timeout=5)
+        assert writer.queue_depth() == 0
+        assert con.execute("SELECT COUNT(*) FROM orders").fetchone()[0] == 2
+        assert con.execute("SELECT COUNT(*) FROM fills").fetchone()[0] == 2
+        assert con.execute("SELECT COUNT(*) FROM exec_audit").fetchone()[0] == 1
+        assert get_counter_labelled("storage_writer_commit_count", {"table": "orders"}) >= 1
+        assert get_gauge("storage_writer_queue_depth", {"table": "orders"}) == 0
+        assert 'storage_writer_queue_depth{table="orders"} 0' in export_text()
+    finally:
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_ingestor_with_writer_flushes_and_prunes(tmp_path):
+    con, url = _db(tmp_path)
+    writer = StorageWriter(url)
+    try:
+        ing = OrderbookIngestor(con, "m1", batch_size=2, writer=writer)
+        ing.process({"type": "snapshot", "seq": 1, "bids": [[0.4, 10.0]], "asks": [[0.6, 10.0]]}, ts_ms=1000)
+        ing.process({"type": "delta", "seq": 2, "bids": [[0.41, 1.0]], "asks": []}, ts_ms=1001)
+        ing.process({"type": "delta", "seq": 3, "bids": [[0.42, 1.0]], "asks": []}, ts_ms=3000)
+        assert ing.pending_rows() == 1
+        ing.flush()
+        await writer.flush_async()
+        assert con.execute("SELECT COUNT(*) FROM orderbook_events").fetchone()[0] == 2
+        assert con.execute("SELECT last_seq FROM market_status WHERE market_id='m1'").fetchone()[0] == 3
+        removed = await ing.prune_events_before_async(2000)
+        assert removed == 1
+        assert con.execute("SELECT COUNT(*) FROM orderbook_events").fetchone()[0] == 1
+    finally:
+        writer.close()
+
+
+def test_writer_group_commits_and_isolates_failing_jobs(tmp_path):
+    con, url = _db(tmp_path)
+    writer = StorageWriter(url)
+    started, release = threading.Event(), threading.Event()
+
+    def hold(c):
+        started.set()
+        release.wait(5)
+
+    def insert(c, oid):
+        c.execute("INSERT INTO markets (market_id, title, status) VALUES (?,?,?)", (oid, "T", "active"))
+        assert c.in_transaction  # nothing committed until the batch ends
+
+    def bad(c):
+        c.execute("INSERT INTO markets (market_id, title, status) VALUES ('bad','T','active')")
+        raise RuntimeError("job failed")
+
+    try:
+        writer.submit("hold", hold)
+        started.wait(5)
+        commits = get_counter_labelled("storage_writer_commit_count", {"table": "markets"})
+        futs = [writer.submit("markets", insert, "a"), writer.submit("markets", bad), writer.submit("markets", insert, "b")]
+        release.set()
+        writer.flush(timeout=5)
+        assert futs[0].exception() is None and isinstance(futs[1].exception(), RuntimeError)
+        # one transaction for the drained batch; the failed job's row was rolled back alone
+        assert get_counter_labelled("storage_writer_commit_count", {"table": "markets"}) == commits + 1
+        assert [r[0] for r in con.execute("SELECT market_id FROM markets ORDER BY market_id")] == ["a", "b"]
+    finally:
+        release.set()
+        writer.close()
+
+
+def test_submit_never_drops_or_blocks_past_the_limit(tmp_path):
+    _, url = _db(tmp_path)
+    writer = StorageWriter(url, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hold(c):
+        started.set()
+        release.wait(5)
+
+    try:
+        writer.submit("hold", hold)
+        started.wait(5)
+        over_before = get_counter("storage_writer_over_limit")
+        futs = [writer.submit("t", lambda c, i=i: i) for i in range(3)]  # returns at once
+        assert get_counter("storage_writer_over_limit") == over_before + 3
+        assert get_gauge("storage_writer_queue_depth", {"table": "t"}) == 3
+        release.set()
+        assert [f.result(timeout=5) for f in futs] == [0, 1, 2]
+        assert writer.submit("t", lambda c: 3, block=True).result(timeout=5) == 3
+    finally:
+        release.set()
+        writer.close()
+
+
+def test_fills_survive_a_saturated_queue(tmp_path):
+    con, url = _db(tmp_path)
+    writer = StorageWriter(url, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def hold(c):
+        started.set()
+        release.wait(5)
+
+    try:
+        writer.submit("hold", hold)
+        started.wait(5)
+        engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con, writer=writer)
+        for i in range(20):
+            engine.execute_plan(ExecutionPlan(intents=[OrderIntent(market_id="m-sat", outcome_id=f"o{i}", side="buy", price=0.4, size=1.0)], expected_profit=0.0, rationale="sat"))
+        release.set()
+        writer.flush(timeout=5)
+        assert con.execute("SELECT COUNT(*) FROM orders WHERE market_id='m-sat'").fetchone()[0] == 20
+        fills = con.execute("SELECT COUNT(*) FROM fills f JOIN orders o ON f.order_id=o.order_id WHERE o.market_id='m-sat'").fetchone()[0]
+        assert fills == 20
+    finally:
+        release.set()
+        writer.close()
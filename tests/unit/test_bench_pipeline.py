@@ -0,0 +1,57 @@
+import json
+
+from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+from polybot.bench.pipeline import compare_results, run_pipeline_benchmark
+from polybot.bench.synthetic import StreamSpec, generate_dutch_streams, generate_stream
+
+
+def test_synthetic_stream_is_deterministic_and_checksums_match():
+    spec = StreamSpec(deltas=300, depth=5, gap_rate=0.02, checksum_fail_rate=0.02, seed=7)
+    a = generate_stream(spec, "m1")
+    assert a.messages == generate_stream(spec, "m1").messages
+    assert a.messages != generate_stream(StreamSpec(deltas=300, depth=5, seed=8), "m1").messages
+    assert a.gaps > 0 and a.checksum_failures > 0
+    # a consumer that resyncs from the provided snapshots always agrees with the checksum
+    asm = OrderbookAssembler("m1")
+    asm.apply_snapshot(a.messages[0])
+    for i, m in enumerate(a.messages[1:], start=1):
+        if m["seq"] != asm._seq + 1:
+            asm.apply_snapshot(a.snapshots[i])
+            continue
+        asm.apply_delta(m)
+        if m["checksum"].startswith("x"):
+            asm.apply_snapshot(a.snapshots[i])
+        assert asm.checksum(exact=True) == m["checksum"].lstrip("x")
+        bb, ba = asm.best_bid(), asm.best_ask()
+        assert bb is None or ba is None or bb.price < ba.price
+
+
+def test_dutch_streams_interleave_outcomes_by_time():
+    (market_id, outcomes, msgs), = generate_dutch_streams(StreamSpec(markets=1, deltas=50, outcomes=3))
+    assert len(outcomes) == 3 and len(msgs) == 3 * 51
+    assert [m["ts_ms"] for m in msgs] == sorted(m["ts_ms"] for m in msgs)
+    assert {m["outcome_id"] for m in msgs[:3]} == set(outcomes)
+
+
+def test_pipeline_benchmark_reports_and_compares():
+    spec = StreamSpec(markets=2, deltas=400, gap_rate=0.01, checksum_fail_rate=0.01)
+    res = run_pipeline_benchmark(spec, alloc=True)
+    json.dumps(res)  # JSON-serialisable
+    ingest, quoter, dutch = (res["scenarios"][s] for s in ("ingest", "quoter", "dutch"))
+    assert ingest["messages"] == ingest["checks"]["applied"]
+    assert ingest["checks"]["resync_gap"] > 0 and ingest["checks"]["resync_checksum"] > 0
+    assert ingest["db_bytes"] > 0 and ingest["msg_us"]["count"] == ingest["messages"]
+    assert quoter["checks"]["quotes_placed"] > 0 and "apply" in quoter["stages_us"]
+    assert dutch["checks"]["orders_placed"] > 0 and dutch["tick_to_trade_us"]["count"] > 0
+    assert all(r["alloc_peak_bytes"] > 0 and r["msgs_per_sec"] > 0 for r in res["scenarios"].values())
+
+    again = run_pipeline_benchmark(spec, scenarios=("ingest", "dutch"))
+    assert again["scenarios"]["ingest"]["checks"] == ingest["checks"]
+    assert again["scenarios"]["dutch"]["checks"] == dutch["checks"]
+    assert not compare_results(res, res)
+    slower = json.loads(json.dumps(res))
+    slower["scenarios"]["ingest"]["msgs_per_sec"] = ingest["msgs_per_sec"] / 2
+    slower["scenarios"]["dutch"]["checks"]["orders_placed"] += 1
+    regs = compare_results(res, slower, tolerance=0.1)
+    assert any(r.startswith("ingest: msgs_per_sec") for r in regs)
+    assert any(r.startswith("dutch: checks") for r in regs)
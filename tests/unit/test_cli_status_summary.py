@@ -1,7 +1,7 @@
 from polybot.cli.commands import cmd_status_summary
 from polybot.storage.db import connect_sqlite
 from polybot.storage import schema
-from polybot.observability.metrics import inc_labelled, reset as metrics_reset
+from polybot.observability.metrics import histogram, inc_labelled, reset as metrics_reset
 
 
 def test_status_summary_outputs_expected_columns(tmp_path):
@@ -19,8 +19,7 @@ def test_status_summary_outputs_expected_columns(tmp_path):
     inc_labelled("ingestion_resync_gap", {"market": "m1"}, 2)
     inc_labelled("relayer_acks_rejected", {"market": "m1"}, 1)
     inc_labelled("relayer_place_errors", {"market": "m1"}, 3)
-    inc_labelled("service_market_runtime_ms_sum", {"market": "m1"}, 50)
-    inc_labelled("service_market_runtime_count", {"market": "m1"}, 1)
+    histogram("service_market_runtime_us", market="m1").record(50_000)
     inc_labelled("relayer_builder_errors", {"market": "m1"}, 4)
     out = cmd_status_summary(db_url=db)
     lines = out.splitlines()
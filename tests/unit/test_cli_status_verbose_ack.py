@@ -1,7 +1,7 @@
 from polybot.cli.commands import cmd_status
 from polybot.storage.db import connect_sqlite
 from polybot.storage import schema
-from polybot.observability.metrics import inc_labelled, reset as metrics_reset
+from polybot.observability.metrics import histogram, inc_labelled, reset as metrics_reset
 
 
 def test_status_verbose_includes_ack_avg_ms(tmp_path):
@@ -18,8 +18,9 @@ def test_status_verbose_includes_ack_avg_ms(tmp_path):
     inc_labelled("ingestion_msg_applied", {"market": "m1"}, 1)
     inc_labelled("engine_execute_plan_ms_sum", {"market": "m1"}, 10)
     inc_labelled("engine_execute_plan_count", {"market": "m1"}, 1)
-    inc_labelled("engine_ack_ms_sum", {"market": "m1"}, 7)
-    inc_labelled("engine_ack_count", {"market": "m1"}, 1)
+    histogram("engine_ack_us", market="m1").record(7000)
     out = cmd_status(db_url=db_url, verbose=True)
     assert "ack_avg_ms=7.0" in out
+    # 7000us falls in the [6912, 7167] log bucket
+    assert "ack_p50_us=7167 ack_p99_us=7167 ack_p999_us=7167" in out
 
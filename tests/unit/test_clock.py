@@ -0,0 +1,88 @@
+import asyncio
+import time
+
+import pytest
+
+from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+from polybot.adapters.polymarket.relayer import FakeRelayer
+from polybot.core.clock import VirtualClock, replay_events
+from polybot.core.ratelimit import TokenBucket
+from polybot.exec.engine import ExecutionEngine
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.ingestion.orderbook import OrderbookIngestor
+from polybot.ingestion.scheduler import run_ingestion_session
+from polybot.ingestion.snapshot import FakeSnapshotProvider
+from polybot.storage import schema
+from polybot.storage.db import connect_sqlite
+from polybot.strategy.spread import SpreadParams
+from polybot.strategy.spread_quoter import SpreadQuoter
+
+
+@pytest.mark.asyncio
+async def test_virtual_sleepers_wake_in_deadline_order_at_their_deadline():
+    clock = VirtualClock(1_000)
+    woke = []
+
+    async def sleeper(name, seconds):
+        await clock.sleep(seconds)
+        woke.append((name, clock.now_ms()))
+
+    tasks = [asyncio.create_task(sleeper("b", 2.0)), asyncio.create_task(sleeper("a", 0.5))]
+    await asyncio.sleep(0)
+    await clock.advance_to(1_400)
+    assert woke == []
+    await clock.advance_to(5_000)
+    assert woke == [("a", 1_500), ("b", 3_000)] and clock.now_ms() == 5_000
+    await asyncio.gather(*tasks)
+    await clock.advance_to(4_000)  # never goes backwards
+    assert clock.now_ms() == 5_000
+
+
+@pytest.mark.asyncio
+async def test_day_of_events_replays_fast_with_periodic_tasks_on_replayed_time():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    ing = OrderbookIngestor(con, "m1")
+    provider = FakeSnapshotProvider({"type": "snapshot", "seq": 1, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]]})
+    day_ms = 86_400_000
+    start = 1_700_000_000_000
+    events = [{"type": "snapshot", "seq": 1, "bids": [[0.4, 1.0]], "asks": [[0.6, 1.0]], "ts_ms": start}]
+    events += [{"type": "delta", "seq": i + 1, "bids": [[0.41, 1.0 if i % 2 else -1.0]], "ts_ms": start + i * day_ms // 1440} for i in range(1, 1441)]
+    clock = VirtualClock()
+    t0 = time.perf_counter()
+    await run_ingestion_session("m1", replay_events(events, clock), ing, provider, snapshot_interval_ms=3_600_000, prune_interval_ms=day_ms * 2, retention_ms=day_ms * 2, clock=clock)
+    assert time.perf_counter() - t0 < 10
+    # one scheduled snapshot per replayed hour, stamped with replayed time
+    rows = con.execute("SELECT ts_ms FROM orderbook_snapshots WHERE checksum IS NULL ORDER BY ts_ms").fetchall()
+    assert [r[0] for r in rows] == [start + h * 3_600_000 for h in range(1, 25)]
+    assert clock.now_ms() == start + day_ms
+
+
+@pytest.mark.asyncio
+async def test_quoter_rate_limit_and_engine_backoff_use_virtual_time():
+    clock = VirtualClock(10_000)
+    bucket = TokenBucket(capacity=1.0, refill_per_sec=1.0, tokens=1.0, clock=clock)
+    assert bucket.allow() and not bucket.allow()
+    clock.advance_ms(1_000)
+    assert bucket.allow()
+
+    class Flaky(FakeRelayer):
+        calls = 0
+
+        def place_orders(self, reqs, idempotency_prefix=None):
+            Flaky.calls += 1
+            if Flaky.calls == 1:
+                raise RuntimeError("transient")
+            return super().place_orders(reqs, idempotency_prefix)
+
+    engine = ExecutionEngine(Flaky(), max_retries=1, retry_sleep_ms=5_000, sleeper=clock.advance_ms)
+    t0 = time.perf_counter()
+    engine.execute_plan(ExecutionPlan(intents=[OrderIntent(market_id="m1", outcome_id="yes", side="buy", price=0.4, size=1.0)], expected_profit=0.0, rationale="test"))
+    assert time.perf_counter() - t0 < 1 and clock.now_ms() == 16_000
+
+    # quoter steps without an explicit time read the clock, as do its rate limiters
+    clock = VirtualClock(1_000)
+    quoter = SpreadQuoter("m1", "yes", SpreadParams(), ExecutionEngine(FakeRelayer(fill_ratio=0.0)), clock=clock)
+    ob = OrderbookAssembler("m1").apply_snapshot({"seq": 1, "bids": [[0.4, 10.0]], "asks": [[0.5, 10.0]]})
+    quoter.step(ob)
+    assert quoter.state.last_quote_ts_ms == 1_000 and quoter.state.rate.clock is clock
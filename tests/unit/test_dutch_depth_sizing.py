@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+from polybot.adapters.polymarket.relayer import FakeRelayer
+from polybot.exec.engine import ExecutionEngine
+from polybot.storage import schema
+from polybot.storage.db import connect_sqlite
+from polybot.strategy.dutch_book import MarketQuotes, OutcomeQuote, plan_dutch_book_depth, size_dutch_book
+from polybot.strategy.dutch_runner import DutchRunner, DutchSpec
+
+
+def test_size_walks_levels_until_marginal_cost_too_high():
+    a = [(0.30, 5.0), (0.33, 5.0), (0.40, 100.0)]
+    b = [(0.60, 3.0), (0.62, 100.0)]
+    # units 0-3: 0.90, 3-5: 0.92, 5-10: 0.95 (< 0.98), then 1.02 stops
+    sz = size_dutch_book([a, b], min_profit_usdc=0.02)
+    assert sz.size == pytest.approx(10.0)
+    assert sz.limit_prices == [0.33, 0.62]
+    assert sz.cost == pytest.approx(3 * 0.90 + 2 * 0.92 + 5 * 0.95)
+    assert sz.expected_profit == pytest.approx(10.0 - sz.cost)
+
+
+def test_size_respects_cap_fees_and_exhausted_books():
+    a = [(0.30, 5.0), (0.33, 5.0)]
+    b = [(0.60, 3.0), (0.62, 100.0)]
+    assert size_dutch_book([a, b], max_size=4.5).size == pytest.approx(4.5)
+    assert size_dutch_book([a, b], max_size=4.5).limit_prices == [0.30, 0.62]
+    # book a runs out after 10 units
+    assert size_dutch_book([a, b]).size == pytest.approx(10.0)
+    # 0.90 * 1.1 = 0.99 already too expensive
+    assert size_dutch_book([a, b], fee_bps=1000) is None
+    assert size_dutch_book([[(0.5, 1.0)], []]) is None
+
+
+def test_size_matches_unit_by_unit_reference():
+    a = [(0.20, 1.5), (0.21, 0.7), (0.25, 2.0), (0.30, 9.0)]
+    b = [(0.30, 0.4), (0.33, 3.1), (0.36, 9.0)]
+    c = [(0.40, 2.2), (0.41, 0.9), (0.44, 9.0)]
+
+    def price_at(ladder, q):
+        cum = 0.0
+        for p, s in ladder:
+            cum += s
+            if q < cum - 1e-12:
+                return p
+        return None
+
+    q, step = 0.0, 0.01
+    while True:
+        ps = [price_at(ld, q) for ld in (a, b, c)]
+        if None in ps or sum(ps) >= 0.98:
+            break
+        q += step
+    assert size_dutch_book([a, b, c], min_profit_usdc=0.02).size == pytest.approx(q, abs=0.011)
+
+
+def test_depth_plan_uses_assembler_ladders_and_min_size():
+    books = {oid: OrderbookAssembler("m1", tick_size=0.01) for oid in ("y", "n")}
+    books["y"].apply_snapshot({"seq": 1, "asks": [[0.45, 2.0], [0.46, 8.0]], "bids": []})
+    books["n"].apply_snapshot({"seq": 1, "asks": [[0.50, 20.0]], "bids": []})
+    quotes = MarketQuotes("m1", [OutcomeQuote("y", 0.45, 0.01, 1.0), OutcomeQuote("n", 0.50, 0.01, 1.0)])
+    plan = plan_dutch_book_depth(quotes, {oid: b.walk("ask") for oid, b in books.items()}, max_size=6.0)
+    assert [(i.outcome_id, i.price, i.size, i.tif) for i in plan.intents] == [("y", 0.46, 6.0, "IOC"), ("n", 0.50, 6.0, "IOC")]
+    big_min = MarketQuotes("m1", [OutcomeQuote("y", 0.45, 0.01, 50.0), OutcomeQuote("n", 0.50, 0.01, 1.0)])
+    assert plan_dutch_book_depth(big_min, {oid: b.walk("ask") for oid, b in books.items()}) is None
+
+
+@pytest.mark.asyncio
+async def test_runner_depth_sizing_is_bounded_by_exposure():
+    async def feed(msgs):
+        for m in msgs:
+            await asyncio.sleep(0)
+            yield m
+
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    runner = DutchRunner(DutchSpec("m1", ["o1", "o2"]), engine, default_size=1.0, depth_sizing=True)
+    msgs = [
+        {"type": "snapshot", "seq": 1, "bids": [], "asks": [[0.40, 100.0]], "outcome_id": "o1"},
+        {"type": "snapshot", "seq": 1, "bids": [], "asks": [[0.50, 100.0]], "outcome_id": "o2"},
+        {"type": "delta", "seq": 2, "bids": [], "asks": [[0.40, -100.0], [0.41, 50.0]], "outcome_id": "o1"},
+    ]
+    await runner.run(feed(msgs), now_ms=lambda: 0)
+    # exposure cap = 10 * default_size: the first basket takes all of it, the second has no headroom
+    assert engine.ledger.position("m1", "o1") == pytest.approx(10.0)
+    assert engine.ledger.position("m1", "o2") == pytest.approx(10.0)
+
+
+def test_size_charges_safety_margin_and_slippage_per_unit():
+    a = [(0.30, 5.0), (0.33, 5.0), (0.40, 100.0)]
+    b = [(0.60, 3.0), (0.62, 100.0)]
+    # limit 0.98 - 0.02 safety - 1 tick x (0.01 + 0.01) = 0.94: the 0.95 stretch is excluded
+    sz = size_dutch_book([a, b], min_profit_usdc=0.02, safety_margin_usdc=0.02, slippage_ticks=1, tick_sizes=[0.01, 0.01])
+    assert sz.size == pytest.approx(5.0)
+    assert sz.limit_prices == [0.30, 0.62]
+    assert sz.expected_profit == pytest.approx(5.0 * (1 - 0.02) - (3 * 0.90 + 2 * 0.92))
+    # a top of book that only clears the bare threshold is rejected once costs are counted
+    assert size_dutch_book([[(0.45, 10.0)], [(0.52, 10.0)]], safety_margin_usdc=0.01) is None
+
+
+def test_size_step_floor_recomputes_cost_and_limits():
+    a = [(0.30, 1.0), (0.40, 0.005), (0.45, 100.0)]
+    b = [(0.50, 100.0)]
+    # the sweep ends at 1.005 units with a on its 0.40 level; flooring to 1.0 drops that level
+    sz = size_dutch_book([a, b], min_profit_usdc=0.02, max_size=1.005, size_step=0.01)
+    assert sz.size == pytest.approx(1.0)
+    assert sz.limit_prices == [0.30, 0.50]
+    assert sz.cost == pytest.approx(0.80)
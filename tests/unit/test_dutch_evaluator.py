@@ -0,0 +1,89 @@
+import asyncio
+import random
+
+import pytest
+
+from polybot.adapters.polymarket.relayer import FakeRelayer
+from polybot.exec.engine import ExecutionEngine
+from polybot.observability.metrics import get_histogram
+from polybot.strategy.dutch_book import DutchEvaluator, MarketQuotes, OutcomeQuote, plan_dutch_book_with_safety
+from polybot.strategy.dutch_runner import DutchRunner, DutchSpec
+
+
+def test_evaluator_matches_batch_planner():
+    rng = random.Random(7)
+    oids = [f"o{i}" for i in range(6)]
+    ev = DutchEvaluator("m1", oids, min_profit_usdc=0.02, safety_margin_usdc=0.01, fee_bps=10, slippage_ticks=1)
+    ev.set_meta("o3", tick_size=0.001, min_size=2.0, name="Three")
+    asks = {}
+    for _ in range(2000):
+        oid = rng.choice(oids)
+        asks[oid] = None if rng.random() < 0.05 else round(rng.uniform(0.10, 0.18), 2)
+        ev.update(oid, asks[oid])
+        if any(asks.get(o) is None for o in oids):
+            assert not ev.eligible()
+            continue
+        quotes = MarketQuotes(
+            market_id="m1",
+            outcomes=[
+                OutcomeQuote(outcome_id=o, best_ask=asks[o], tick_size=0.001 if o == "o3" else 0.01, min_size=2.0 if o == "o3" else 1.0)
+                for o in oids
+            ],
+        )
+        expected = plan_dutch_book_with_safety(quotes, min_profit_usdc=0.02, safety_margin_usdc=0.01, fee_bps=10, slippage_ticks=1)
+        got = ev.plan()
+        assert (got is None) == (expected is None)
+        if got is not None:
+            assert [(i.outcome_id, i.price, i.size) for i in got.intents] == [(i.outcome_id, i.price, i.size) for i in expected.intents]
+        assert ev.total_ask() == pytest.approx(sum(asks.values()))
+
+
+def test_evaluator_replans_only_on_crossing_or_move():
+    ev = DutchEvaluator("m1", ["a", "b"], min_profit_usdc=0.02)
+    assert ev.update("a", 0.50) is False
+    assert ev.update("b", 0.49) is False  # margin 0.01: below threshold
+    assert ev.update("b", 0.45) is True  # crossed
+    assert ev.update("b", 0.45) is False  # top unchanged
+    assert ev.update("a", 0.49) is True  # moved while eligible
+    assert ev.update("a", 0.60) is False  # fell below
+    ev.set_meta("b", name="Other")
+    assert ev.update("a", 0.40) is False  # 'Other' outcomes block unless allowed
+
+
+def test_evaluator_threshold_is_net_of_costs():
+    ev = DutchEvaluator("m1", ["a", "b"], min_profit_usdc=0.02, safety_margin_usdc=0.01, fee_bps=100, slippage_ticks=2)
+    assert ev.update("a", 0.45) is False
+    # raw margin 0.07 clears 0.02, but 0.07 - 0.01 safety - 0.0093 fees - 0.04 slippage does not
+    assert ev.update("b", 0.48) is False
+    assert ev.margin() == pytest.approx(0.07) and ev.effective_margin() == pytest.approx(0.0107)
+    assert ev.update("b", 0.45) is True
+    plan = ev.plan()
+    assert plan is not None and plan.expected_profit == pytest.approx(ev.margin())
+
+
+@pytest.mark.asyncio
+async def test_runner_skips_unchanged_top_and_records_latency():
+    class CountingEngine(ExecutionEngine):
+        plans = 0
+
+        def execute_plan(self, plan):
+            CountingEngine.plans += 1
+            return super().execute_plan(plan)
+
+    async def feed(msgs):
+        for m in msgs:
+            await asyncio.sleep(0)
+            yield m
+
+    spec = DutchSpec(market_id="m-inc", outcomes=["o1", "o2"])
+    runner = DutchRunner(spec, CountingEngine(FakeRelayer(fill_ratio=0.0)), min_profit_usdc=0.02)
+    msgs = [
+        {"type": "snapshot", "seq": 1, "bids": [], "asks": [[0.45, 10.0]], "outcome_id": "o1"},
+        {"type": "snapshot", "seq": 1, "bids": [], "asks": [[0.45, 10.0]], "outcome_id": "o2"},
+        # deeper level only: top of book unchanged, no re-plan
+        {"type": "delta", "seq": 2, "bids": [], "asks": [[0.50, 5.0]], "outcome_id": "o1"},
+        {"type": "delta", "seq": 3, "bids": [], "asks": [[0.44, 5.0]], "outcome_id": "o1"},
+    ]
+    await runner.run(feed(msgs), now_ms=lambda: 0)
+    assert CountingEngine.plans == 2
+    assert get_histogram("dutch_detect_us", {"market": "m-inc"}).count == 2
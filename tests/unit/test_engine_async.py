@@ -0,0 +1,124 @@
+import asyncio
+import threading
+
+import pytest
+
+from polybot.exec.engine import AsyncExecutionEngine
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.adapters.polymarket.relayer import FakeRelayer, OrderAck, RelayerCapabilities
+from polybot.observability.metrics import get_counter_labelled, get_histogram
+from polybot.storage.db import connect_sqlite
+from polybot.storage import schema
+from polybot.storage.writer import StorageWriter
+
+
+def _plan(market_id="m-async"):
+    return ExecutionPlan(intents=[OrderIntent(market_id=market_id, outcome_id="o1", side="buy", price=0.4, size=1.0)], expected_profit=0, rationale="r")
+
+
+class ThreadRecordingRelayer:
+    def __init__(self, fail_first=0):
+        self.threads = []
+        self.calls = 0
+        self.fail_first = fail_first
+
+    def place_orders(self, reqs, idempotency_prefix=None):
+        self.calls += 1
+        self.threads.append(threading.current_thread().name)
+        if self.calls <= self.fail_first:
+            raise RuntimeError("temporary")
+        return [OrderAck(order_id=f"o{self.calls}", accepted=True, filled_size=0.0, remaining_size=r.size, status="accepted") for r in reqs]
+
+
+@pytest.mark.asyncio
+async def test_async_engine_places_off_loop_thread_and_keeps_metrics():
+    rel = ThreadRecordingRelayer()
+    engine = AsyncExecutionEngine(rel, max_workers=2)
+    base = get_histogram("engine_place_call_us", {"market": "m-async"}).count
+    try:
+        res = await engine.execute_plan_async(_plan())
+    finally:
+        engine.close()
+    assert len(res.acks) == 1
+    assert rel.threads[0].startswith("polybot-engine")
+    assert get_histogram("engine_place_call_us", {"market": "m-async"}).count == base + 1
+    assert get_counter_labelled("engine_execute_plan_count", {"market": "m-async"}) >= 1
+
+
+@pytest.mark.asyncio
+async def test_async_engine_retries_with_async_sleeper():
+    slept = []
+
+    async def sleeper(ms):
+        slept.append(ms)
+
+    rel = ThreadRecordingRelayer(fail_first=1)
+    engine = AsyncExecutionEngine(rel, max_retries=1, retry_sleep_ms=7, sleeper=sleeper)
+    base = get_counter_labelled("engine_retries", {"market": "m-retry"})
+    res = await engine.execute_plan_async(_plan("m-retry"))
+    engine.close()
+    assert len(res.acks) == 1 and rel.calls == 2
+    assert slept == [7]
+    assert get_counter_labelled("engine_retries", {"market": "m-retry"}) == base + 1
+
+
+@pytest.mark.asyncio
+async def test_async_engine_raises_after_retries_exhausted():
+    rel = ThreadRecordingRelayer(fail_first=5)
+    engine = AsyncExecutionEngine(rel, max_retries=1, retry_sleep_ms=0)
+    with pytest.raises(RuntimeError):
+        await engine.execute_plan_async(_plan("m-fail"))
+    engine.close()
+    assert rel.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_async_engine_defers_audit_writes_until_after_result():
+    con = connect_sqlite("sqlite:///:memory:")
+    schema.create_all(con)
+    engine = AsyncExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    await engine.execute_plan_async(_plan("m-audit"))
+    assert con.execute("SELECT COUNT(*) FROM exec_audit").fetchone()[0] == 0
+    await asyncio.sleep(0)
+    assert con.execute("SELECT COUNT(*) FROM exec_audit").fetchone()[0] == 1
+    assert con.execute("SELECT COUNT(*) FROM orders WHERE market_id='m-audit'").fetchone()[0] == 1
+    await engine.cancel_client_orders_async([r[0] for r in con.execute("SELECT client_oid FROM orders").fetchall()])
+    await asyncio.sleep(0)
+    engine.close()
+    assert con.execute("SELECT COUNT(*) FROM orders WHERE status='canceled'").fetchone()[0] == 1
+
+
+@pytest.mark.asyncio
+async def test_async_engine_prefers_native_async_relayer():
+    class NativeRelayer:
+        capabilities = RelayerCapabilities(idempotency=True, async_place=True)
+
+        def __init__(self):
+            self.prefix = None
+
+        def place_orders(self, reqs, idempotency_prefix=None):  # pragma: no cover - must not be used
+            raise AssertionError("sync path used")
+
+        async def place_orders_async(self, reqs, idempotency_prefix=None):
+            self.prefix = idempotency_prefix
+            return [OrderAck(order_id="n1", accepted=True, filled_size=r.size, remaining_size=0.0, status="filled") for r in reqs]
+
+    rel = NativeRelayer()
+    engine = AsyncExecutionEngine(rel)
+    plan = _plan("m-native")
+    plan.plan_id = "pid-1"
+    res = await engine.execute_plan_async(plan)
+    assert res.fully_filled and rel.prefix == "pid-1"
+    assert engine._executor is None
+
+
+def test_async_engine_requires_writer_for_file_backed_audit_db(tmp_path):
+    con = connect_sqlite(f"sqlite:///{tmp_path / 'audit.db'}")
+    schema.create_all(con)
+    with pytest.raises(ValueError):
+        AsyncExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con)
+    writer = StorageWriter(f"sqlite:///{tmp_path / 'audit.db'}")
+    try:
+        AsyncExecutionEngine(FakeRelayer(fill_ratio=0.0), audit_db=con, writer=writer).close()
+    finally:
+        writer.close()
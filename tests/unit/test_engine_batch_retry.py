@@ -0,0 +1,62 @@
+import pytest
+
+from polybot.adapters.polymarket.relayer import OrderAck, RelayerCapabilities
+from polybot.exec.engine import AsyncExecutionEngine, ExecutionEngine
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.storage import schema
+from polybot.storage.db import connect_sqlite
+
+
+def _plan(n=4):
+    return ExecutionPlan(
+        intents=[OrderIntent(market_id="m-batch", outcome_id=f"o{i}", side="buy", price=0.4, size=1.0) for i in range(n)],
+        expected_profit=0,
+        rationale="r",
+    )
+
+
+class FailingBatchRelayer:
+    """max_batch=2 relayer whose second batch call fails `failures` times."""
+
+    capabilities = RelayerCapabilities(idempotency=True, max_batch=2)
+
+    def __init__(self, failures=1):
+        self.batches = []
+        self.failures = failures
+
+    def place_orders(self, reqs, idempotency_prefix=None):
+        self.batches.append([r.outcome_id for r in reqs])
+        if reqs[0].outcome_id == "o2" and self.failures > 0:
+            self.failures -= 1
+            raise RuntimeError("batch failed")
+        return [OrderAck(order_id=r.client_order_id or "", accepted=True, filled_size=r.size, remaining_size=0.0, client_order_id=r.client_order_id) for r in reqs]
+
+
+def test_retry_resends_only_the_failed_batch_and_later_ones():
+    rel = FailingBatchRelayer(failures=1)
+    res = ExecutionEngine(rel, max_retries=1).execute_plan(_plan())
+    assert rel.batches == [["o0", "o1"], ["o2", "o3"], ["o2", "o3"]]
+    assert [a.client_order_id.rsplit("-", 1)[1] for a in res.acks] == ["o0", "o1", "o2", "o3"]
+
+
+def test_exhausted_retries_keep_acks_of_batches_that_went_through():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    rel = FailingBatchRelayer(failures=5)
+    engine = ExecutionEngine(rel, audit_db=con, max_retries=1)
+    with pytest.raises(RuntimeError):
+        engine.execute_plan(_plan())
+    assert rel.batches == [["o0", "o1"], ["o2", "o3"], ["o2", "o3"]]
+    rows = con.execute("SELECT outcome_id FROM orders ORDER BY outcome_id").fetchall()
+    assert [r[0] for r in rows] == ["o0", "o1"]
+    assert engine.ledger.position("m-batch", "o0") == 1.0 and engine.ledger.position("m-batch", "o2") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_async_retry_resumes_at_the_failed_batch():
+    rel = FailingBatchRelayer(failures=5)
+    engine = AsyncExecutionEngine(rel, max_retries=2)
+    with pytest.raises(RuntimeError):
+        await engine.execute_plan_async(_plan())
+    assert rel.batches == [["o0", "o1"]] + [["o2", "o3"]] * 3
+    assert engine.ledger.position("m-batch", "o1") == 1.0 and engine.ledger.position("m-batch", "o3") == 0.0
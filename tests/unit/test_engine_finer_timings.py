@@ -1,7 +1,7 @@
 from polybot.exec.engine import ExecutionEngine
 from polybot.exec.planning import ExecutionPlan, OrderIntent
 from polybot.adapters.polymarket.relayer import FakeRelayer
-from polybot.observability.metrics import get_counter_labelled
+from polybot.observability.metrics import get_histogram
 
 
 def test_engine_records_place_call_timing():
@@ -11,8 +11,7 @@ def test_engine_records_place_call_timing():
         expected_profit=0.0,
         rationale="t",
     )
-    base = get_counter_labelled("engine_place_call_ms_sum", {"market": "m1"})
+    base = get_histogram("engine_place_call_us", {"market": "m1"}).count
     eng.execute_plan(plan)
-    now = get_counter_labelled("engine_place_call_ms_sum", {"market": "m1"})
-    assert now >= base
+    assert get_histogram("engine_place_call_us", {"market": "m1"}).count == base + 1
 
@@ -0,0 +1,88 @@
+from polybot.observability.replay import apply_orderbook_events
+from polybot.storage.db import connect_sqlite
+from polybot.storage.eventlog import EventLog, RECORD_SIZE
+
+
+EVENTS = [
+    {"type": "snapshot", "seq": 10, "bids": [[0.4, 100.0]], "asks": [[0.47, 50.0]]},
+    {"type": "delta", "seq": 11, "bids": [[0.41, 20.0]]},
+    {"type": "delta", "seq": 12, "asks": [[0.47, -50.0], [0.46, 40.0]]},
+]
+
+
+def test_event_log_roundtrip_matches_message_replay(tmp_path):
+    con = connect_sqlite(":memory:")
+    log = EventLog(tmp_path / "log", con, segment_records=2, index_stride=1)
+    for i, e in enumerate(EVENTS):
+        log.append_message("m1", e, ts_ms=1000 + i)
+    log.append_message("m2", {"type": "delta", "seq": 1, "bids": [[0.5, 1.0]]}, ts_ms=1001)
+    assert RECORD_SIZE == 40
+    # one boundary record per message plus one per level
+    assert log.count() == 10
+    # 10 records at 2 per segment roll over into 5 segments
+    assert len(log.segments()) == 5
+    msgs = list(log.iter_messages("m1"))
+    assert msgs[0] == {"type": "snapshot", "seq": 10, "bids": [[0.4, 100.0]], "asks": [[0.47, 50.0]], "ts_ms": 1000}
+    assert msgs[2]["asks"] == [[0.47, -50.0], [0.46, 40.0]]
+    book = apply_orderbook_events("m1", log)
+    expected = apply_orderbook_events("m1", EVENTS)
+    assert book.seq == expected.seq == 12
+    assert dict(book.bids) == dict(expected.bids)
+    assert dict(book.asks) == dict(expected.asks)
+    assert [m["seq"] for m in log.iter_messages("m1", start_ts_ms=1002)] == [12]
+    log.close()
+
+
+def test_event_log_reopen_and_prune_by_segment(tmp_path):
+    con = connect_sqlite(":memory:")
+    log = EventLog(tmp_path, con, segment_records=4)
+    for i in range(5):
+        log.append_message("m1", {"type": "delta", "seq": i + 1, "bids": [[0.4, 1.0]]}, ts_ms=1000 * (i + 1))
+    log.close()
+
+    log = EventLog(tmp_path, con, segment_records=4)
+    assert log.count() == 10
+    # segments hold ts [1000,2000], [3000,4000], [5000]; only the first is entirely older than 3500
+    assert log.prune_before(3500) == 4
+    assert [m["seq"] for m in log.iter_messages("m1")] == [3, 4, 5]
+    assert con.execute("SELECT COUNT(*) FROM event_log_segments").fetchone()[0] == 2
+    assert not (tmp_path / "seg-00000000.log").exists()
+    log.append_message("m1", {"type": "delta", "seq": 6, "bids": [[0.4, 1.0]]}, ts_ms=6000)
+    assert [m["seq"] for m in log.iter_messages("m1")] == [3, 4, 5, 6]
+    log.close()
+
+
+def test_replay_equals_live_with_duplicate_and_empty_deltas(tmp_path):
+    from polybot.ingestion.orderbook import OrderbookIngestor
+
+    con = connect_sqlite(":memory:")
+    from polybot.storage import schema
+
+    schema.create_all(con)
+    log = EventLog(tmp_path / "log", con)
+    ing = OrderbookIngestor(con, "m1", event_log=log)
+    msgs = [
+        {"type": "snapshot", "seq": 1, "bids": [[0.4, 10.0]], "asks": []},
+        {"type": "delta", "seq": 2, "bids": [[0.4, 5.0]]},
+        {"type": "delta", "seq": 2, "bids": [[0.4, 5.0]]},  # duplicate: ignored live
+        {"type": "delta", "seq": 3},  # empty
+        {"type": "delta", "seq": 4, "asks": [[0.6, 1.0]]},
+        {"type": "snapshot", "seq": 4, "bids": [], "asks": []},  # empty snapshot clears the book
+        {"type": "delta", "seq": 5, "bids": [[0.3, 2.0]]},
+    ]
+    for i, m in enumerate(msgs):
+        ing.process(m, ts_ms=1000 + i)
+        if i == 4:
+            mid = apply_orderbook_events("m1", log)
+            assert dict(mid.bids) == dict(ing.assembler.view().bids) == {0.4: 15.0}
+            assert dict(mid.asks) == {0.6: 1.0}
+    replayed = list(log.iter_messages("m1"))
+    assert [(m["type"], m["seq"], m["ts_ms"]) for m in replayed] == [
+        ("snapshot", 1, 1000), ("delta", 2, 1001), ("delta", 3, 1003), ("delta", 4, 1004), ("snapshot", 4, 1005), ("delta", 5, 1006)
+    ]
+    book = apply_orderbook_events("m1", log)
+    live = ing.assembler.view()
+    assert book.seq == live.seq == 5
+    assert dict(book.bids) == dict(live.bids) == {0.3: 2.0}
+    assert dict(book.asks) == dict(live.asks) == {}
+    log.close()
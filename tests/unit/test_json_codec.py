@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+
+from polybot.core.codec import available_codecs, get_codec, set_default_codec, STDLIB_JSON
+from polybot.observability.metrics import get_counter_labelled
+from polybot.observability.recording import read_jsonl, write_jsonl
+
+
+MSG = {"type": "delta", "seq": 3, "bids": [[0.41, 10.0]], "market": "mkt-é"}
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_codecs_roundtrip_bytes_and_str(name):
+    codec = get_codec(name)
+    data = codec.dumps(MSG)
+    assert isinstance(data, bytes)
+    assert codec.loads(data) == MSG
+    assert codec.loads(data.decode("utf-8")) == MSG
+
+
+def test_default_codec_is_orjson_and_switchable():
+    assert "orjson" in available_codecs()
+    assert get_codec().name == "orjson"
+    try:
+        assert set_default_codec("json") is STDLIB_JSON
+        assert get_codec().name == "json"
+    finally:
+        set_default_codec("orjson")
+    with pytest.raises(ValueError):
+        get_codec("nope")
+
+
+@pytest.mark.parametrize("name", available_codecs())
+def test_jsonl_recording_is_codec_independent(tmp_path, name):
+    file = tmp_path / "rec.jsonl"
+    write_jsonl(file, [MSG, {"type": "snapshot", "seq": 1}], codec=name)
+    for reader in available_codecs():
+        assert list(read_jsonl(file, codec=reader)) == [MSG, {"type": "snapshot", "seq": 1}]
+
+
+def test_ws_client_decodes_bytes_frames_and_records_metrics(monkeypatch):
+    import polybot.adapters.polymarket.ws as wsmod
+
+    frames = [get_codec().dumps(MSG), b"not-json", '{"type":"delta","seq":4}', '{"type":"note","text":"é€"}']
+
+    class FakeWS:
+        def __aiter__(self):
+            self._it = iter(frames)
+            return self
+
+        async def __anext__(self):
+            try:
+                return next(self._it)
+            except StopIteration:
+                raise StopAsyncIteration
+
+        async def send(self, data):
+            return None
+
+        async def close(self):
+            return None
+
+    async def fake_connect(url, ping_interval=20.0):
+        return FakeWS()
+
+    monkeypatch.setattr(wsmod.websockets, "connect", fake_connect)
+    labels = {"conn": "codec-test"}
+    before = get_counter_labelled("ws_decode_count", labels)
+    bytes_before = get_counter_labelled("ws_bytes_in", labels)
+
+    async def run():
+        async with wsmod.OrderbookWSClient("ws://x", name="codec-test") as client:
+            return [m.raw async for m in client.messages()]
+
+    out = asyncio.run(run())
+    assert out == [MSG, {"type": "delta", "seq": 4}, {"type": "note", "text": "é€"}]
+    assert get_counter_labelled("ws_decode_count", labels) - before == 3
+    assert get_counter_labelled("ws_decode_errors", labels) >= 1
+    # text frames count UTF-8 bytes, not characters
+    decoded = [frames[0], frames[2], frames[3]]
+    assert get_counter_labelled("ws_bytes_in", labels) - bytes_before == sum(len(f if isinstance(f, bytes) else f.encode()) for f in decoded)
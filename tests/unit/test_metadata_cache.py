@@ -0,0 +1,110 @@
+import pytest
+
+from polybot.observability.metrics import get_counter
+from polybot.storage import schema
+from polybot.storage.db import connect_sqlite
+from polybot.storage.markets import upsert_markets
+from polybot.storage.metadata import MetadataCache, metadata_cache
+
+
+def _db():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    return con
+
+
+def _market(rule_hash="H1", group=None):
+    return {
+        "market_id": "m1",
+        "title": "T",
+        "status": "active",
+        "rule_hash": rule_hash,
+        "neg_risk_group": group,
+        "outcomes": [{"outcome_id": "yes", "name": "Yes", "tick_size": 0.05, "min_size": 5.0}, {"outcome_id": "no", "name": "No"}],
+    }
+
+
+def test_cache_is_scoped_per_database(tmp_path):
+    a, b = _db(), _db()
+    assert metadata_cache(a) is metadata_cache(a)
+    assert metadata_cache(a) is not metadata_cache(b)
+    url = f"sqlite:///{tmp_path / 'meta.db'}"
+    assert metadata_cache(connect_sqlite(url)) is metadata_cache(connect_sqlite(url))
+    assert not a.in_transaction
+
+
+def test_miss_loads_then_hits():
+    con = _db()
+    con.execute("INSERT INTO markets (market_id, title, status, rule_hash) VALUES ('m1','T','active','H1')")
+    con.execute("INSERT INTO outcomes (outcome_id, market_id, name, tick_size, min_size) VALUES ('yes','m1','Yes',0.05,2.0)")
+    con.commit()
+    cache = MetadataCache()
+    hits, misses = get_counter("metadata_cache_hits"), get_counter("metadata_cache_misses")
+    o = cache.outcome(con, "yes")
+    assert o.tick_size == pytest.approx(0.05) and o.min_size == pytest.approx(2.0)
+    meta = cache.market(con, "m1")
+    assert meta.rule_hash == "H1" and [x.outcome_id for x in meta.outcomes] == ["yes"]
+    assert get_counter("metadata_cache_misses") == misses + 1
+    assert get_counter("metadata_cache_hits") == hits + 1
+    assert cache.outcome(con, "missing") is None
+
+
+def test_upsert_refreshes_cache_and_bumps_version():
+    con = _db()
+    upsert_markets(con, [_market()])
+    cache = metadata_cache(con)
+    v1 = cache.version
+    before = cache.market(con, "m1")
+    assert before.rule_hash == "H1" and before.version == v1
+    refreshes = get_counter("metadata_cache_refresh_count")
+    upsert_markets(con, [_market(rule_hash="H2", group="g1")])
+    after = cache.market(con, "m1")
+    assert cache.version == v1 + 1 and after.version == v1 + 1
+    assert after.rule_hash == "H2" and after.neg_risk_group == "g1"
+    assert before.rule_hash == "H1"  # snapshots handed out earlier are immutable
+    assert get_counter("metadata_cache_refresh_count") == refreshes + 1
+    # a sync without rule_hash keeps the known one
+    upsert_markets(con, [_market(rule_hash=None)])
+    assert cache.market(con, "m1").rule_hash == "H2"
+
+
+def test_invalidate_picks_up_out_of_band_writes():
+    con = _db()
+    upsert_markets(con, [_market()])
+    cache = metadata_cache(con)
+    con.execute("UPDATE outcomes SET tick_size=0.001 WHERE outcome_id='yes'")
+    con.commit()
+    assert cache.outcome(con, "yes").tick_size == pytest.approx(0.05)
+    cache.invalidate("m1")
+    assert cache.outcome(con, "yes").tick_size == pytest.approx(0.001)
+    assert cache.outcome(con, "no").min_size == pytest.approx(1.0)
+
+
+def test_check_sees_writes_from_other_connections(tmp_path):
+    url = f"sqlite:///{tmp_path / 'meta.db'}"
+    a, b = connect_sqlite(url), connect_sqlite(url)
+    schema.create_all(a)
+    upsert_markets(a, [_market()])
+    cache = metadata_cache(a)
+    assert cache.market(a, "m1").rule_hash == "H1"
+    assert not cache.check(a)
+    v = cache.version
+    b.execute("UPDATE markets SET rule_hash='H2' WHERE market_id='m1'")
+    b.commit()
+    assert cache.market(a, "m1").rule_hash == "H1"  # cached until checked
+    assert cache.check(a) and cache.version == v + 1
+    assert cache.market(a, "m1").rule_hash == "H2"
+    assert not cache.check(a)
+
+
+def test_unknown_ids_are_cached_negatively():
+    con = _db()
+    cache = MetadataCache()
+    assert cache.outcome(con, "nope") is None and cache.market(con, "nope") is None
+    misses = get_counter("metadata_cache_misses")
+    for _ in range(3):
+        assert cache.outcome(con, "nope") is None and cache.market(con, "nope") is None
+    assert get_counter("metadata_cache_misses") == misses
+    upsert_markets(con, [dict(_market(), market_id="nope", outcomes=[{"outcome_id": "nope", "name": "Yes"}])])
+    assert cache.check(con)
+    assert cache.market(con, "nope").market_id == "nope" and cache.outcome(con, "nope").market_id == "nope"
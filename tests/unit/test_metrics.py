@@ -1,4 +1,4 @@
-from polybot.observability.metrics import inc, get_counter, Timer
+from polybot.observability.metrics import inc, get_counter, get_histogram, Timer
 
 
 def test_counters_and_timer():
@@ -6,6 +6,18 @@ def test_counters_and_timer():
     assert get_counter("x") >= 3
     with Timer("foo"):
         pass
-    assert get_counter("foo_count") == 1
-    assert get_counter("foo_ms_sum") >= 0
+    assert get_histogram("foo_us").count == 1
 
+
+
+def test_counter_family_caches_handles_per_label_values():
+    from polybot.observability.metrics import counter, counter_family, get_counter_labelled
+
+    fam = counter_family("family_probe", "market", "kind")
+    h = fam.labels("m1", "buy")
+    assert fam.labels("m1", "buy") is h
+    assert h is counter("family_probe", market="m1", kind="buy")
+    h.inc(2)
+    fam.labels("m2", "sell").inc()
+    assert get_counter_labelled("family_probe", {"market": "m1", "kind": "buy"}) == 2
+    assert get_counter_labelled("family_probe", {"kind": "sell", "market": "m2"}) == 1
@@ -0,0 +1,190 @@
+import uuid
+
+from polybot.observability import metrics
+from polybot.observability.metrics import counter, get_counter, get_counter_labelled, get_histogram, histogram, inc, inc_labelled, list_counters, list_counters_labelled
+from polybot.observability.prometheus import export_text
+from polybot.observability.registry import _HIST_SLOTS, OVERFLOW_COUNTER, MetricsRegistry, SegmentReader, bucket_index, bucket_upper, create_segment
+
+
+def _name():
+    return f"pbt_{uuid.uuid4().hex[:12]}"
+
+
+def test_handles_share_storage_with_labelled_api():
+    metrics.reset()
+    h = counter("reg_hits", market="m1")
+    assert counter("reg_hits", market="m1") is h
+    h.inc()
+    inc_labelled("reg_hits", {"market": "m1"}, 2)
+    assert get_counter_labelled("reg_hits", {"market": "m1"}) == 3 == h.value
+    metrics.reset()
+    assert h.value == 0
+    h.inc(5)  # handles stay valid across reset
+    assert get_counter_labelled("reg_hits", {"market": "m1"}) == 5
+
+
+def test_reads_do_not_register_counters():
+    metrics.reset()
+    assert get_counter("reg_never_incremented") == 0
+    assert "reg_never_incremented" not in dict(list_counters())
+
+
+def test_share_rebinds_handles_and_reader_sees_values():
+    name = _name()
+    reg = MetricsRegistry()
+    before = reg.counter("a", conn="c1")
+    before.inc(4)
+    reg.share(name, capacity=8)
+    try:
+        before.inc(1)
+        reg.counter("b").inc(2)
+        reader = SegmentReader(name)
+        try:
+            assert sorted(reader.items()) == [("a", (("conn", "c1"),), 5), ("b", (), 2)]
+            reg.counter("c").inc(7)  # registered after the reader attached
+            assert ("c", (), 7) in reader.items()
+        finally:
+            reader.close()
+    finally:
+        reg._words.release()
+        reg._shm.close()
+        reg._shm.unlink()
+
+
+def test_share_overflow_stays_local():
+    name = _name()
+    reg = MetricsRegistry()
+    reg.share(name, capacity=1)
+    try:
+        reg.counter("x").inc(1)
+        reg.counter("y").inc(2)
+        assert dict(((n, v) for n, _, v in reg.items())) == {"x": 1, "y": 2, "metrics_registry_overflow": 1}
+        reader = SegmentReader(name)
+        assert reader.items() == [("x", (), 1), ("metrics_registry_overflow", (), 1)]
+        reader.close()
+    finally:
+        reg._words.release()
+        reg._shm.close()
+        reg._shm.unlink()
+
+
+def test_overflow_is_counted_and_warned_once(caplog):
+    name = _name()
+    reg = MetricsRegistry()
+    reg.counter(OVERFLOW_COUNTER).inc(2)  # overflow from before sharing carries over
+    reg.share(name, capacity=2)
+    try:
+        with caplog.at_level("WARNING", logger="polybot.metrics"):
+            for i in range(5):
+                reg.counter(f"ov{i}").inc()
+        assert reg.value(OVERFLOW_COUNTER) == 5
+        assert len([r for r in caplog.records if "metrics segment" in r.message]) == 1
+        reader = SegmentReader(name)
+        assert (OVERFLOW_COUNTER, (), 5) in reader.items()
+        reader.close()
+    finally:
+        reg._words.release()
+        reg._shm.close()
+        reg._shm.unlink()
+
+
+def test_attached_segments_aggregate_into_exports():
+    metrics.reset()
+    name = _name()
+    create_segment(name, capacity=16)
+    worker = MetricsRegistry()  # stands in for a worker process
+    worker.share(name, create=False)
+    try:
+        worker.counter("reg_orders", market="m1").inc(3)
+        worker.counter("reg_total").inc(10)
+        inc("reg_total", 1)
+        metrics.attach_segment(name)
+        assert dict(list_counters())["reg_total"] == 11
+        assert ("reg_orders", (("market", "m1"),), 3) in list_counters_labelled()
+        assert 'reg_orders{market="m1"} 3' in export_text()
+        worker.counter("reg_total").inc(1)
+        metrics.detach_segments([name], fold=True, unlink=True)
+        # final segment values were folded into local counters
+        assert get_counter("reg_total") == 12
+        assert get_counter_labelled("reg_orders", {"market": "m1"}) == 3
+    finally:
+        worker._words.release()
+        worker._shm.close()
+        metrics.detach_segments([name], fold=False)
+
+
+def test_histogram_percentiles_and_export():
+    metrics.reset()
+    h = histogram("reg_lat_us", market="m1")
+    assert histogram("reg_lat_us", market="m1") is h
+    for v in range(1, 1001):
+        h.record(v)
+    h.record(250_000)  # one slow outlier
+    snap = get_histogram("reg_lat_us", {"market": "m1"})
+    assert snap.count == 1001 and snap.sum == sum(range(1, 1001)) + 250_000
+    # log buckets keep relative error within 1/16
+    assert 500 <= snap.percentile(0.5) <= 500 * 17 / 16
+    assert 990 <= snap.percentile(0.99) <= 990 * 17 / 16
+    assert snap.percentile(0.9999) >= 250_000
+    # histogram storage is not listed as plain counters
+    assert not [n for n, _, _ in list_counters_labelled() if n == "reg_lat_us"]
+    text = export_text()
+    assert "# TYPE reg_lat_us histogram" in text
+    assert 'reg_lat_us_bucket{market="m1",le="+Inf"} 1001' in text
+    assert 'reg_lat_us_count{market="m1"} 1001' in text
+    les = [line for line in text.splitlines() if line.startswith('reg_lat_us_bucket{market="m1",le="') and "+Inf" not in line]
+    cums = [int(line.rsplit(" ", 1)[1]) for line in les]
+    assert cums == sorted(cums) and cums[-1] == 1001
+
+
+def test_histogram_is_one_slot_block_in_shared_segment():
+    name = _name()
+    reg = MetricsRegistry()
+    early = reg.histogram("blk_us", market="m0")
+    early.record(7)  # recorded before sharing: carried into the block
+    reg.share(name, capacity=3 * _HIST_SLOTS)
+    try:
+        hists = [early] + [reg.histogram("blk_us", market=f"m{i}") for i in range(1, 3)]
+        for i, h in enumerate(hists):
+            for v in range(1, 1001):
+                h.record(v * (i + 1))  # every series spreads over ~100 buckets
+        assert reg._used == 3 * _HIST_SLOTS and reg.value(OVERFLOW_COUNTER) == 0
+        reg.histogram("blk_us", market="m3").record(1)  # no room for a 4th block
+        assert reg.value(OVERFLOW_COUNTER) == 1
+        reader = SegmentReader(name)
+        try:
+            snaps = {s.labels: s for s in _snapshots(reader.items())}
+            assert len(snaps) == 3
+            m0 = snaps[(("market", "m0"),)]
+            assert m0.count == 1001 and m0.sum == sum(range(1, 1001)) + 7
+            assert 990 <= snaps[(("market", "m2"),)].percentile(0.33) <= 990 * 17 / 16
+        finally:
+            reader.close()
+        reg.reset()
+        assert early.count == 0 and hists[2].count == 0
+    finally:
+        reg._words.release()
+        reg._shm.close()
+        reg._shm.unlink()
+
+
+def _snapshots(items):
+    out = {}
+    for name, labels, val in items:
+        if labels and labels[-1][0] == "__hist":
+            snap = out.setdefault(labels[:-1], metrics.HistogramSnapshot(name=name, labels=labels[:-1], counts={}))
+            part = labels[-1][1]
+            if part == "count":
+                snap.count += val
+            elif part == "sum":
+                snap.sum += val
+            else:
+                snap.counts[int(part)] = val
+    return list(out.values())
+
+
+def test_bucket_bounds_cover_values():
+    for v in list(range(0, 300)) + [10**3, 10**6, 10**9]:
+        idx = bucket_index(v)
+        assert bucket_upper(idx) >= v
+        assert idx == 0 or bucket_upper(idx - 1) < v
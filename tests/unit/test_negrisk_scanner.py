@@ -0,0 +1,215 @@
+import asyncio
+import json
+
+import pytest
+
+from polybot.adapters.polymarket.relayer import FakeRelayer
+from polybot.cli.commands import cmd_negrisk_scan_replay_async, cmd_negrisk_scan_ws_async
+from polybot.exec.engine import ExecutionEngine
+from polybot.observability.metrics import get_counter, get_counter_labelled
+from polybot.storage import schema
+from polybot.storage.db import connect_sqlite
+from polybot.storage.markets import upsert_markets
+from polybot.strategy.negrisk import GroupMember, NegRiskScanner, load_neg_risk_groups
+
+
+def _members(n=3):
+    return [GroupMember(market_id=f"m{i}", yes_id=f"y{i}", no_id=f"n{i}") for i in range(n)]
+
+
+def _book(token, bid=None, ask=None, seq=1):
+    return {"type": "snapshot", "seq": seq, "outcome_id": token, "bids": [[bid, 10.0]] if bid else [], "asks": [[ask, 10.0]] if ask else []}
+
+
+def _markets(group="g1"):
+    return [
+        {"market_id": f"m{i}", "title": f"M{i}", "status": "active", "neg_risk_group": group, "outcomes": [{"outcome_id": f"y{i}", "name": "Yes"}, {"outcome_id": f"n{i}", "name": "No"}]}
+        for i in range(3)
+    ] + [{"market_id": "solo", "title": "S", "status": "active", "outcomes": [{"outcome_id": "sy", "name": "Yes"}, {"outcome_id": "sn", "name": "No"}]}]
+
+
+def test_load_groups_from_markets_table():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    upsert_markets(con, _markets())
+    groups = load_neg_risk_groups(con)
+    assert list(groups) == ["g1"]
+    assert [(m.yes_id, m.no_id) for m in groups["g1"]] == [("y0", "n0"), ("y1", "n1"), ("y2", "n2")]
+
+
+def test_buy_yes_buy_no_and_sell_yes_baskets():
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0))
+    for i in range(3):
+        engine.ledger.apply_fill(f"m{i}", f"y{i}", "buy", 5.0)  # YES inventory to sell
+    scanner = NegRiskScanner({"g": _members()}, engine=engine, min_profit_usdc=0.02)
+    for i, (yb, ya, na) in enumerate([(0.30, 0.31, 0.60), (0.33, 0.30, 0.60), (0.40, 0.33, 0.70)]):
+        scanner.apply(_book(f"y{i}", bid=yb, ask=ya))
+        scanner.apply(_book(f"n{i}", ask=na))
+    opps = {o.kind: o for o in scanner.evaluate_dirty()}
+    # yes asks 0.94 < 1; no asks 1.90 < 2; yes bids 1.03 > 1
+    assert set(opps) == {"buy_yes", "buy_no", "sell_yes"}
+    assert opps["buy_yes"].edge == pytest.approx(0.06)
+    assert opps["buy_no"].edge == pytest.approx(0.10)
+    assert opps["sell_yes"].edge == pytest.approx(0.03)
+    assert [(i.outcome_id, i.side, i.price) for i in opps["sell_yes"].plan.intents] == [("y0", "sell", 0.30), ("y1", "sell", 0.33), ("y2", "sell", 0.40)]
+    assert {i.outcome_id for i in opps["buy_no"].plan.intents} == {"n0", "n1", "n2"}
+
+
+def test_sell_yes_only_sells_held_inventory():
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=0.0))
+    scanner = NegRiskScanner({"g-sell": _members(2)}, engine=engine, default_size=3.0, kinds=("sell_yes",))
+
+    def bids(seq):
+        scanner.apply(_book("y0", bid=0.55, seq=seq))
+        scanner.apply(_book("y1", bid=0.55, seq=seq))
+        return scanner.evaluate_dirty()
+
+    assert bids(1) == []  # no naked YES sells
+    assert get_counter_labelled("negrisk_sell_no_inventory", {"group": "g-sell"}) == 1
+    engine.ledger.apply_fill("m0", "y0", "buy", 5.0)
+    engine.ledger.apply_fill("m1", "y1", "buy", 2.0)
+    (opp,) = bids(2)
+    assert [i.size for i in opp.plan.intents] == [2.0, 2.0]  # smallest holding
+    assert opp.plan.expected_profit == pytest.approx(0.10 * 2.0)
+
+
+def test_basket_legs_share_one_size():
+    members = [GroupMember("m0", "y0", "n0", min_size=1.0), GroupMember("m1", "y1", "n1", min_size=5.0)]
+    scanner = NegRiskScanner({"g-min": members}, kinds=("buy_yes",))
+    scanner.apply(_book("y0", ask=0.40))
+    scanner.apply(_book("y1", ask=0.50))
+    (opp,) = scanner.evaluate_dirty()
+    assert [i.size for i in opp.plan.intents] == [5.0, 5.0]
+    assert opp.plan.expected_profit == pytest.approx(0.10 * 5.0)
+
+
+def test_dirty_groups_coalesce_and_respect_budget():
+    groups = {f"g{k}": [GroupMember(f"g{k}m{i}", f"g{k}y{i}", f"g{k}n{i}") for i in range(2)] for k in range(3)}
+    scanner = NegRiskScanner(groups, max_groups_per_cycle=2)
+    coalesced = get_counter("negrisk_updates_coalesced")
+    for seq in range(1, 4):
+        scanner.apply(_book("g0y0", ask=0.5, seq=seq))
+    scanner.apply(_book("g1y0", ask=0.5))
+    scanner.apply(_book("g2y0", ask=0.5))
+    assert get_counter("negrisk_updates_coalesced") == coalesced + 2
+    evals = get_counter("negrisk_evaluations")
+    scanner.evaluate_dirty()
+    assert get_counter("negrisk_evaluations") == evals + 2  # budget
+    scanner.evaluate_dirty()
+    assert get_counter("negrisk_evaluations") == evals + 3
+    assert scanner.evaluate_dirty() == []
+
+
+@pytest.mark.asyncio
+async def test_scanner_run_executes_baskets():
+    async def feed(msgs):
+        for m in msgs:
+            await asyncio.sleep(0)
+            yield m
+
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    scanner = NegRiskScanner({"grp-run": _members(2)}, engine=engine, kinds=("buy_yes",))
+    await scanner.run(feed([_book("y0", ask=0.40), _book("y1", ask=0.50)]))
+    assert get_counter_labelled("negrisk_orders_placed", {"group": "grp-run"}) == 2
+    assert engine.ledger.position("m0", "y0") == pytest.approx(1.0)
+
+
+@pytest.mark.asyncio
+async def test_execute_error_is_counted_and_evaluation_continues():
+    class FlakyEngine:
+        def __init__(self):
+            self.plans = []
+
+        def execute_plan(self, plan):
+            self.plans.append(plan)
+            if len(self.plans) == 1:
+                raise RuntimeError("relayer down")
+            return ExecutionEngine(FakeRelayer(fill_ratio=0.0)).execute_plan(plan)
+
+    async def feed(msgs):
+        for m in msgs:
+            await asyncio.sleep(0)
+            yield m
+
+    engine = FlakyEngine()
+    scanner = NegRiskScanner({"grp-err-a": _members(2), "grp-err-b": [GroupMember("m8", "y8", "n8"), GroupMember("m9", "y9", "n9")]}, engine=engine, kinds=("buy_yes",))
+    await scanner.run(feed([_book("y0", ask=0.40), _book("y1", ask=0.50), _book("y8", ask=0.40), _book("y9", ask=0.50)]))
+    assert len(engine.plans) == 2
+    assert get_counter_labelled("negrisk_execute_errors", {"group": "grp-err-a"}) == 1
+    assert get_counter_labelled("negrisk_orders_placed", {"group": "grp-err-b"}) == 2
+
+
+@pytest.mark.asyncio
+async def test_exposure_cap_blocks_baskets_past_the_cap():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    scanner = NegRiskScanner({"grp-cap": _members(2)}, engine=engine, kinds=("buy_yes",), default_size=1.0, exposure_cap=0.5)
+    assert scanner.exposure_cap == 0.5
+    for m in (_book("y0", ask=0.40), _book("y1", ask=0.50)):
+        scanner.apply(m)
+    for opp in scanner.evaluate_dirty():
+        await scanner._execute(opp)
+    assert get_counter_labelled("negrisk_orders_placed", {"group": "grp-cap"}) == 0
+    assert engine.ledger.position("m0", "y0") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_ws_stream_errors_are_labelled_by_group():
+    class BrokenManager:
+        async def messages(self, token):
+            if token == "y1":
+                raise ConnectionError("socket closed")
+            yield _book(token, ask=0.40)
+
+    scanner = NegRiskScanner({"grp-ws-err": _members(2)}, kinds=("buy_yes",))
+    await scanner.run_ws(BrokenManager())
+    assert get_counter_labelled("negrisk_ws_errors", {"group": "grp-ws-err"}) == 1
+    assert get_counter_labelled("negrisk_ws_errors", {"token": "y1"}) == 0
+
+@pytest.mark.asyncio
+async def test_cli_negrisk_scan_replay(tmp_path, capsys):
+    db = f"sqlite:///{tmp_path / 'nr.db'}"
+    con = connect_sqlite(db)
+    schema.create_all(con)
+    upsert_markets(con, _markets())
+    con.close()
+    events = [_book(f"y{i}", ask=0.30) for i in range(3)]
+    path = tmp_path / "ev.jsonl"
+    path.write_text("\n".join(json.dumps(e) for e in events), encoding="utf-8")
+    found = await cmd_negrisk_scan_replay_async(str(path), db_url=db, kinds_csv="buy_yes")
+    assert found == {"buy_yes": 1}
+    assert "groups=1" in capsys.readouterr().out
+
+
+@pytest.mark.asyncio
+async def test_cli_negrisk_scan_live_ws(tmp_path, capsys):
+    import websockets
+
+    db = f"sqlite:///{tmp_path / 'nrws.db'}"
+    con = connect_sqlite(db)
+    schema.create_all(con)
+    upsert_markets(con, _markets())
+    con.close()
+    subscribed = []
+
+    async def handler(websocket):
+        # one socket carries every token's subscription; frames are routed by `market`
+        while len(subscribed) < 6:
+            subscribed.append(json.loads(await asyncio.wait_for(websocket.recv(), 1))["market"])
+        for i in range(3):
+            await websocket.send(json.dumps({"type": "l2_snapshot", "seq": 1, "market": f"y{i}", "bids": [], "asks": [[0.30, 10.0]]}))
+        await asyncio.sleep(0.05)
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    try:
+        found = await asyncio.wait_for(cmd_negrisk_scan_ws_async(f"ws://{host}:{port}", db_url=db, kinds_csv="buy_yes"), 10)
+    finally:
+        server.close()
+        await server.wait_closed()
+    assert sorted(subscribed) == ["n0", "n1", "n2", "y0", "y1", "y2"]
+    assert found == {"buy_yes": 1}
+    assert "groups=1 tokens=6" in capsys.readouterr().out
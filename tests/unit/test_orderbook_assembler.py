@@ -1,3 +1,5 @@
+import pytest
+
 from polybot.adapters.polymarket.orderbook import OrderbookAssembler
 
 
@@ -25,3 +27,49 @@ def test_orderbook_assembler_snapshot_and_delta():
     assert 0.45 not in book2.asks
     assert book2.best_ask().price == 0.44
 
+
+
+def test_orderbook_view_is_live_and_freeze_copies():
+    ob = OrderbookAssembler(market_id="m1")
+    view = ob.apply_snapshot({"seq": 1, "bids": [[0.40, 10.0]], "asks": [[0.45, 5.0]]})
+    frozen = view.freeze()
+    view2 = ob.apply_delta({"seq": 2, "bids": [[0.41, 1.0]]})
+    # same live view object; no per-message copy of the book
+    assert view2 is view and ob.view() is view
+    assert view.seq == 2 and view.best_bid().price == 0.41
+    # the frozen copy keeps the state it was taken at
+    assert frozen.seq == 1 and frozen.best_bid().price == 0.40 and 0.41 not in frozen.bids
+    with pytest.raises(AttributeError):
+        view.seq = 3  # type: ignore[misc]
+
+
+def test_incremental_checksum_matches_full_recompute():
+    import random
+
+    from polybot.core.checksum import orderbook_checksum
+
+    rng = random.Random(7)
+    asm = OrderbookAssembler("m1", checksum_recompute_every=0)
+    asm.apply_snapshot({"seq": 1, "bids": [[0.40, 10.0], [0.39, 5.0]], "asks": [[0.60, 8.0]]})
+    assert asm.checksum() == orderbook_checksum(asm._bids, asm._asks)
+    for seq in range(2, 300):
+        side = "bids" if rng.random() < 0.5 else "asks"
+        base = 0.30 if side == "bids" else 0.55
+        price = round(base + rng.randrange(0, 15) * 0.01, 2)
+        asm.apply_delta({"seq": seq, side: [[price, rng.choice([-5.0, -1.5, 2.0, 3.25])]]})
+        assert asm.checksum() == orderbook_checksum(asm._bids, asm._asks)
+
+
+def test_checksum_exact_recompute_sheds_drift():
+    from polybot.core.checksum import orderbook_checksum
+
+    asm = OrderbookAssembler("m1", checksum_recompute_every=2)
+    asm.apply_snapshot({"seq": 1, "bids": [[0.40, 10.0]], "asks": [[0.60, 8.0]]})
+    asm._bids._notional += 1e-3  # simulate accumulated float error
+    assert asm.checksum() != orderbook_checksum(asm._bids, asm._asks)
+    assert asm.checksum(exact=True) == orderbook_checksum(asm._bids, asm._asks)
+    asm._asks._notional += 1e-3
+    asm.apply_delta({"seq": 2, "bids": [[0.41, 1.0]]})
+    asm.apply_delta({"seq": 3, "bids": [[0.42, 1.0]]})
+    # periodic recompute kicks in after `checksum_recompute_every` deltas
+    assert asm.checksum() == orderbook_checksum(asm._bids, asm._asks)
@@ -6,7 +6,7 @@ def test_large_snapshot_and_delta_apply():
     bids = [[0.10 + i * 0.0001, 1.0] for i in range(1000)]
     asks = [[0.60 + i * 0.0001, 1.0] for i in range(1000)]
     snap = {"seq": 1, "bids": bids, "asks": asks}
-    book = ob.apply_snapshot(snap)
+    book = ob.apply_snapshot(snap).freeze()
     assert round(book.best_bid().price, 4) == round(bids[-1][0], 4)
     assert round(book.best_ask().price, 4) == round(asks[0][0], 4)
     # Apply a delta that improves best bid and removes a level from asks
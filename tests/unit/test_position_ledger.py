@@ -0,0 +1,89 @@
+import pytest
+
+from polybot.adapters.polymarket.relayer import FakeRelayer
+from polybot.exec.engine import AsyncExecutionEngine, ExecutionEngine
+from polybot.exec.ledger import PositionLedger, compute_positions, reconcile_ledger
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+from polybot.exec.risk import compute_inventory, will_exceed_exposure
+from polybot.storage import schema
+from polybot.storage.db import connect_sqlite
+from polybot.storage.writer import StorageWriter
+
+
+def _plan(side="buy", size=5.0, outcome="o1"):
+    return ExecutionPlan(intents=[OrderIntent(market_id="m1", outcome_id=outcome, side=side, price=0.4, size=size)], expected_profit=0, rationale="t")
+
+
+def _db():
+    con = connect_sqlite(":memory:")
+    schema.create_all(con)
+    return con
+
+
+def test_engine_keeps_ledger_in_step_with_fills():
+    con = _db()
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    engine.execute_plan(_plan(size=5.0))
+    engine.execute_plan(_plan(side="sell", size=2.0))
+    engine.execute_plan(_plan(size=1.0, outcome="o2"))
+    assert engine.ledger.position("m1", "o1") == pytest.approx(3.0)
+    assert compute_positions(con) == pytest.approx(engine.ledger.positions())
+    assert compute_inventory(con, "m1", "o1") == pytest.approx(3.0)
+    # a fresh engine rebuilds the same positions from the DB
+    assert ExecutionEngine(FakeRelayer(), audit_db=con).ledger.positions() == pytest.approx({("m1", "o1"): 3.0, ("m1", "o2"): 1.0})
+
+
+def test_exposure_check_matches_sql_path():
+    con = _db()
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    engine.execute_plan(_plan(size=5.0))
+    for plan in (_plan(size=6.0), _plan(side="sell", size=3.0)):
+        assert will_exceed_exposure(con, plan, 10.0, ledger=engine.ledger) == will_exceed_exposure(con, plan, 10.0)
+
+
+def test_reconcile_adopts_db_and_reports_drift():
+    con = _db()
+    engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    engine.execute_plan(_plan(size=5.0))
+    engine.ledger.apply_fill("m1", "o1", "buy", 2.0)  # e.g. a fill that never got persisted
+    drift = engine.ledger.reconcile(con)
+    assert drift == [(("m1", "o1"), 7.0, 5.0)]
+    assert engine.ledger.position("m1", "o1") == pytest.approx(5.0)
+    assert engine.ledger.reconcile(con) == []
+
+
+def test_correct_keeps_fills_applied_after_snapshot():
+    ledger = PositionLedger({("m", "o"): 1.0})
+    snapshot = ledger.positions()
+    ledger.apply_fill("m", "o", "buy", 4.0)
+    ledger.correct(snapshot, {("m", "o"): 2.0})
+    assert ledger.position("m", "o") == pytest.approx(6.0)
+
+
+@pytest.mark.asyncio
+async def test_reconcile_with_writer_sees_queued_writes(tmp_path):
+    url = f"sqlite:///{tmp_path / 'ledger.db'}"
+    con = connect_sqlite(url)
+    schema.create_all(con)
+    writer = StorageWriter(url)
+    try:
+        engine = ExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con, writer=writer)
+        for _ in range(5):
+            engine.execute_plan(_plan(size=1.0))
+        # writes may still be queued: no drift must be reported
+        assert await reconcile_ledger(engine.ledger, con, writer=writer) == []
+        assert engine.ledger.position("m1", "o1") == pytest.approx(5.0)
+    finally:
+        writer.close()
+
+
+@pytest.mark.asyncio
+async def test_reconcile_with_async_engine_deferred_writes():
+    con = _db()
+    engine = AsyncExecutionEngine(FakeRelayer(fill_ratio=1.0), audit_db=con)
+    try:
+        await engine.execute_plan_async(_plan(size=2.0))
+        assert await reconcile_ledger(engine.ledger, con) == []
+        assert engine.ledger.position("m1", "o1") == pytest.approx(2.0)
+    finally:
+        engine.close()
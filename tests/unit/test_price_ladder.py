@@ -0,0 +1,51 @@
+import random
+
+from polybot.core.ladder import PriceLadder
+from polybot.adapters.polymarket.orderbook import OrderbookAssembler
+
+
+def test_ladder_tracks_best_and_depth_incrementally():
+    bids = PriceLadder("bid", tick_size=0.01)
+    asks = PriceLadder("ask", tick_size=0.01)
+    for p in (0.40, 0.38, 0.39):
+        bids.set(p, 10.0)
+    for p in (0.45, 0.47, 0.46):
+        asks.set(p, 5.0)
+    assert bids.best() == (0.40, 10.0)
+    assert asks.best() == (0.45, 5.0)
+    assert [p for p, _ in bids.depth(2)] == [0.40, 0.39]
+    assert [p for p, _ in asks.depth(10)] == [0.45, 0.46, 0.47]
+
+    # removing the top promotes the next level
+    bids.add(0.40, -10.0)
+    asks.add(0.45, -100.0)
+    assert bids.best() == (0.39, 10.0)
+    assert asks.best() == (0.46, 5.0)
+    assert 0.40 not in bids and len(bids) == 2
+    assert bids[0.39] == 10.0
+
+
+def test_ladder_matches_dict_reference_under_random_deltas():
+    rng = random.Random(7)
+    asm = OrderbookAssembler("m1", tick_size=0.001)
+    ref_bids: dict[float, float] = {}
+    ref_asks: dict[float, float] = {}
+    asm.apply_snapshot({"seq": 1, "bids": [], "asks": []})
+    for seq in range(2, 400):
+        side = rng.choice(["bids", "asks"])
+        price = round(rng.randint(1, 999) * 0.001, 3)
+        size = rng.choice([-5.0, -1.0, 1.0, 2.5, 7.0])
+        asm.apply_delta({"seq": seq, side: [[price, size]]})
+        ref = ref_bids if side == "bids" else ref_asks
+        new = max(0.0, ref.get(price, 0.0) + size)
+        if new == 0.0:
+            ref.pop(price, None)
+        else:
+            ref[price] = new
+        bb = asm.best_bid()
+        ba = asm.best_ask()
+        assert (bb.price if bb else None) == (max(ref_bids) if ref_bids else None)
+        assert (ba.price if ba else None) == (min(ref_asks) if ref_asks else None)
+    assert dict(asm._bids.items()) == ref_bids
+    assert dict(asm._asks.items()) == ref_asks
+    assert asm.depth("ask", 3) == sorted(ref_asks.items())[:3]
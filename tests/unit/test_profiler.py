@@ -0,0 +1,99 @@
+import asyncio
+import sys
+import threading
+import time
+
+import httpx
+
+from polybot.cli.__main__ import main
+from polybot.observability.profiler import SamplingProfiler, profile_for
+from polybot.observability.server import start_metrics_server, stop_metrics_server
+
+
+def _burn(seconds):
+    end = time.perf_counter() + seconds
+    n = 0
+    while time.perf_counter() < end:
+        n += 1
+    return n
+
+
+async def _market_work():
+    for _ in range(20):
+        _burn(0.01)
+        await asyncio.sleep(0)
+
+
+def test_samples_are_tagged_by_asyncio_task():
+    async def run():
+        await asyncio.create_task(_market_work(), name="market:m1")
+
+    with SamplingProfiler(interval_s=0.002) as prof:
+        asyncio.run(run())
+    out = prof.collapsed()
+    assert prof.samples > 0
+    lines = [line for line in out.splitlines() if line.startswith("task:market:m1;") and "_burn (test_profiler.py:" in line]
+    assert lines
+    stack, count = lines[0].rsplit(" ", 1)
+    # root (outermost) frame first, leaf last
+    assert int(count) >= 1 and stack.index("_market_work (") < stack.index("_burn (")
+
+
+def test_profile_endpoint_returns_collapsed_stacks():
+    server, _ = start_metrics_server("127.0.0.1", 0)
+    port = server.server_address[1]
+    try:
+        with httpx.Client(trust_env=False, timeout=10.0) as client:
+            result = {}
+            t = threading.Thread(target=lambda: result.setdefault("r", client.get(f"http://127.0.0.1:{port}/debug/profile?seconds=0.3&interval_ms=2")))
+            t.start()
+            time.sleep(0.05)
+            # a capture in progress neither blocks scrapes nor allows a second capture
+            assert client.get(f"http://127.0.0.1:{port}/health").status_code == 200
+            assert client.get(f"http://127.0.0.1:{port}/debug/profile?seconds=0.1").status_code == 409
+            t.join()
+        r = result["r"]
+        assert r.status_code == 200
+        # the main thread is the default target; it is blocked in join/sleep here
+        assert r.text and all(line.rsplit(" ", 1)[1].isdigit() for line in r.text.splitlines())
+    finally:
+        stop_metrics_server(server)
+
+
+def test_profile_for_targets_a_thread():
+    burner = threading.Thread(target=_burn, args=(0.3,))
+    burner.start()
+    out = profile_for(0.2, thread_id=burner.ident, interval_s=0.002)
+    burner.join()
+    assert "_burn (test_profiler.py:" in out and out.startswith("task:-;")
+
+
+def test_cli_profile_out_on_replay(tmp_path, monkeypatch):
+    events = tmp_path / "events.jsonl"
+    events.write_text(
+        "\n".join(['{"type":"snapshot","seq":1,"bids":[[0.4,100.0]],"asks":[[0.47,100.0]]}'] + [f'{{"type":"delta","seq":{i},"bids":[[0.41,{i}.0]]}}' for i in range(2, 400)]),
+        encoding="utf-8",
+    )
+    out = tmp_path / "replay.folded"
+    monkeypatch.setattr(sys, "argv", ["polybot", "--profile-out", str(out), "--profile-interval-ms", "1", "quoter-run-replay", str(events), "m1", "yes", "--db-url", f"sqlite:///{tmp_path / 'p.db'}"])
+    main()
+    text = out.read_text(encoding="utf-8")
+    assert text and "main (__main__.py:" in text
+
+
+def test_task_tag_falls_back_when_asyncio_internals_change(monkeypatch):
+    from polybot.observability.metrics import get_counter
+
+    class Broken:
+        def items(self):
+            raise RuntimeError("dictionary changed size during iteration")
+
+    before = get_counter("profiler_task_tag_errors")
+    prof = SamplingProfiler(interval_s=0.002)
+    monkeypatch.setattr(asyncio.tasks, "_current_tasks", Broken(), raising=False)
+    assert prof._task_tag() == "task:?"
+    monkeypatch.delattr(asyncio.tasks, "_current_tasks", raising=False)
+    assert prof._task_tag() == "task:?"
+    prof.sample()
+    assert prof.collapsed().startswith("task:?;")
+    assert get_counter("profiler_task_tag_errors") - before == 3
@@ -0,0 +1,100 @@
+import pytest
+
+from polybot.adapters.polymarket.relayer import (
+    FakeRelayer,
+    OrderAck,
+    RelayerCapabilities,
+    RelayerClient,
+    RelayerProtocol,
+    RetryRelayer,
+    resolve_capabilities,
+)
+from polybot.adapters.polymarket.pyclob_adapter import PyClobRelayer
+from polybot.exec.engine import ExecutionEngine, benchmark_plan_overhead
+from polybot.exec.planning import ExecutionPlan, OrderIntent
+
+
+def _plan(n=1):
+    return ExecutionPlan(
+        intents=[OrderIntent(market_id="m1", outcome_id=f"o{i}", side="buy", price=0.4, size=1.0) for i in range(n)],
+        expected_profit=0,
+        rationale="r",
+    )
+
+
+def test_relayers_declare_capabilities():
+    for rel in (FakeRelayer(), RelayerClient(object()), PyClobRelayer(object()), RetryRelayer(FakeRelayer())):
+        assert isinstance(rel, RelayerProtocol)
+        assert isinstance(rel.capabilities, RelayerCapabilities)
+    assert FakeRelayer.capabilities.idempotency is False
+    assert RelayerClient(object()).capabilities.idempotency is True
+    assert PyClobRelayer(object(), max_batch=15).capabilities.max_batch == 15
+    # RetryRelayer mirrors its inner relayer
+    assert RetryRelayer(PyClobRelayer(object(), max_batch=3)).capabilities.max_batch == 3
+    assert RetryRelayer(FakeRelayer()).capabilities.idempotency is False
+
+
+def test_duck_typed_relayer_detected_once():
+    class Legacy:
+        def __init__(self):
+            self.calls = 0
+
+        def place_orders(self, reqs):
+            self.calls += 1
+            return [OrderAck(order_id="x", accepted=True, remaining_size=r.size) for r in reqs]
+
+    caps = resolve_capabilities(Legacy())
+    assert caps == RelayerCapabilities(idempotency=False, cancel=False)
+    rel = Legacy()
+    engine = ExecutionEngine(rel)
+    engine.execute_plan(_plan())
+    engine.cancel_client_orders(["c1"])  # no cancel support: skipped without error
+    assert rel.calls == 1
+
+
+def test_relayer_error_is_not_resubmitted():
+    class Bad:
+        capabilities = RelayerCapabilities(idempotency=True)
+
+        def __init__(self):
+            self.calls = 0
+
+        def place_orders(self, reqs, idempotency_prefix=None):
+            self.calls += 1
+            raise ValueError("bad order")
+
+    rel = Bad()
+    with pytest.raises(ValueError):
+        ExecutionEngine(rel).execute_plan(_plan())
+    assert rel.calls == 1
+
+
+def test_engine_splits_requests_by_max_batch():
+    class Batched:
+        capabilities = RelayerCapabilities(idempotency=True, max_batch=2)
+
+        def __init__(self):
+            self.batches = []
+
+        def place_orders(self, reqs, idempotency_prefix=None):
+            self.batches.append(len(reqs))
+            return [OrderAck(order_id=r.client_order_id or "", accepted=True, remaining_size=r.size) for r in reqs]
+
+    rel = Batched()
+    res = ExecutionEngine(rel).execute_plan(_plan(5))
+    assert rel.batches == [2, 2, 1]
+    assert len(res.acks) == 5
+
+
+def test_capabilities_follow_relayer_reassignment():
+    engine = ExecutionEngine(FakeRelayer())
+    assert engine.capabilities.idempotency is False
+    engine.relayer = RelayerClient(object())
+    assert engine.capabilities.idempotency is True
+
+
+def test_benchmark_plan_overhead_reports_both_paths():
+    out = benchmark_plan_overhead(rounds=20, intents=2)
+    assert out["rounds"] == 20 and out["intents"] == 2
+    assert out["reflect_ns_per_plan"] > 0 and out["cached_ns_per_plan"] > 0
+    assert "dispatch_speedup" in out
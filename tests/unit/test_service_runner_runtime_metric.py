@@ -5,7 +5,7 @@ from contextlib import asynccontextmanager
 import websockets
 
 from polybot.service.runner import ServiceRunner, MarketSpec
-from polybot.observability.metrics import get_counter_labelled, reset as metrics_reset
+from polybot.observability.metrics import get_histogram, reset as metrics_reset
 
 
 @asynccontextmanager
@@ -42,6 +42,6 @@ def test_service_runner_marks_runtime_ms(tmp_path):
             await sr.run_markets(specs)
 
     asyncio.run(run())
-    assert get_counter_labelled("service_market_runtime_ms_sum", {"market": "m_rt"}) >= 0
-    assert get_counter_labelled("service_market_runtime_count", {"market": "m_rt"}) == 1
+    h = get_histogram("service_market_runtime_us", {"market": "m_rt"})
+    assert h.count == 1 and h.sum > 0
 
@@ -0,0 +1,189 @@
+import threading
+
+import pytest
+from py_clob_client.clob_types import OrderArgs
+
+from polybot.adapters.polymarket.real_client import wrap_clob_client
+from polybot.adapters.polymarket.relayer import FakeRelayer, OrderRequest, RelayerCapabilities
+from polybot.adapters.polymarket.pyclob_adapter import PyClobRelayer
+from polybot.adapters.polymarket.signing import SigningPipeline
+from polybot.core.models import OrderBook
+from polybot.exec.engine import ExecutionEngine
+from polybot.observability.metrics import get_counter, get_counter_labelled, get_histogram
+from polybot.strategy.spread import SpreadParams
+from polybot.strategy.spread_quoter import SpreadQuoter
+
+
+class StubSigner:
+    def __init__(self):
+        self.signed = []
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def create_order(self, args, options=None):
+        with self._lock:
+            self.signed.append((args.token_id, args.side, args.price, args.size))
+            self.threads.add(threading.current_thread().name)
+        return {"token": args.token_id, "side": args.side, "price": args.price, "n": len(self.signed)}
+
+
+def make_stub_signer():
+    return StubSigner()
+
+
+class StubClob(StubSigner):
+    def __init__(self):
+        super().__init__()
+        self.posted = []
+        self.creds = None
+
+    def post_orders(self, orders):
+        self.posted.append(orders)
+        return [{"orderID": f"o{i}", "status": "accepted", "success": True} for i, _ in enumerate(orders)]
+
+
+def _args(price=0.4, side="BUY", token="t1", size=5.0):
+    return OrderArgs(token_id=token, price=price, size=size, side=side)
+
+
+def test_inline_signing_records_histogram():
+    signer = StubSigner()
+    pipe = SigningPipeline(signer)
+    base = get_histogram("relayer_sign_us")
+    out = pipe.sign_batch([_args(0.4), _args(0.41)])
+    assert [o["price"] for o in out] == [0.4, 0.41]
+    h = get_histogram("relayer_sign_us")
+    assert h.count == base.count + 2
+    assert sum(h.counts.values()) == sum(base.counts.values()) + 2
+    assert signer.threads == {threading.current_thread().name}
+
+
+def test_thread_pool_signs_batch_and_keeps_order():
+    signer = StubSigner()
+    pipe = SigningPipeline(signer, workers=3)
+    try:
+        out = pipe.sign_batch([_args(0.40), _args(0.41), _args(0.42)])
+    finally:
+        pipe.close()
+    assert [o["price"] for o in out] == [0.40, 0.41, 0.42]
+    assert all(name.startswith("polybot-sign") for name in signer.threads)
+
+
+def test_presigned_orders_are_consumed_once():
+    signer = StubSigner()
+    pipe = SigningPipeline(signer, workers=2)
+    try:
+        assert pipe.presign([_args(0.40), _args(0.60, side="SELL")]) == 2
+        assert pipe.presign([_args(0.40)]) == 0  # already cached
+        pipe.drain()
+        hits = get_counter("relayer_presign_hits")
+        pipe.sign_batch([_args(0.40)])
+        assert get_counter("relayer_presign_hits") == hits + 1
+        assert len(signer.signed) == 2
+        # consumed: the same order is signed afresh (new salt) next time
+        pipe.sign_batch([_args(0.40)])
+        assert len(signer.signed) == 3
+        assert pipe.cached() == 1
+    finally:
+        pipe.close()
+
+
+def test_presign_cache_invalidation_and_nonce_window():
+    now = {"t": 1000.0}
+    signer = StubSigner()
+    pipe = SigningPipeline(signer, workers=1, nonce_window_ms=1000, clock=lambda: now["t"])
+    try:
+        pipe.presign([_args(0.40, token="a"), _args(0.40, token="b")])
+        assert pipe.invalidate("a") == 1
+        assert pipe.cached() == 1
+        now["t"] += 2.0  # next nonce window: cached signatures are stale
+        hits = get_counter("relayer_presign_hits")
+        pipe.sign_batch([_args(0.40, token="b")])
+        assert pipe.cached() == 0
+        assert get_counter("relayer_presign_hits") == hits
+    finally:
+        pipe.close()
+
+
+def test_presign_cache_is_bounded():
+    pipe = SigningPipeline(StubSigner(), workers=1, cache_size=2)
+    try:
+        pipe.presign([_args(0.40), _args(0.41), _args(0.42)])
+        assert pipe.cached() == 2
+    finally:
+        pipe.close()
+
+
+def test_process_pool_signing():
+    pipe = SigningPipeline(None, workers=2, mode="process", signer_factory=make_stub_signer)
+    try:
+        out = pipe.sign_batch([_args(0.40), _args(0.41)])
+    finally:
+        pipe.close()
+    assert [o["price"] for o in out] == [0.40, 0.41]
+
+
+def test_bridge_uses_presigned_orders_via_relayer():
+    raw = StubClob()
+    bridge = wrap_clob_client(raw, dry_run=False, signing_workers=2)
+    rel = PyClobRelayer(bridge)
+    assert rel.capabilities.presign
+    req = OrderRequest(market_id="m1", outcome_id="tok", side="buy", price=0.45, size=3.0, tif="GTC", client_order_id="c1")
+    try:
+        assert rel.presign_orders([req]) == 1
+        acks = rel.place_orders([req])
+    finally:
+        bridge.close()
+    assert acks[0].accepted and len(raw.signed) == 1
+    assert raw.posted[0][0].order["price"] == 0.45
+
+
+def test_spread_quoter_presigns_neighbouring_ladder():
+    class PresignRelayer(FakeRelayer):
+        capabilities = RelayerCapabilities(cancel=True, presign=True)
+
+        def __init__(self):
+            super().__init__(fill_ratio=0.0)
+            self.presigned = []
+
+        def presign_orders(self, reqs):
+            self.presigned.extend(reqs)
+            return len(reqs)
+
+    rel = PresignRelayer()
+    params = SpreadParams(size=1.0, tick_size=0.01, presign_levels=2)
+    quoter = SpreadQuoter("m1", "yes", params, ExecutionEngine(rel))
+    ob = OrderBook(market_id="m1", seq=1, bids={0.40: 10.0}, asks={0.47: 10.0})
+    assert quoter.step(ob, now_ts_ms=1000, last_update_ts_ms=1000) is not None
+    # 2 sides x 2 levels x 2 directions
+    assert len(rel.presigned) == 8
+    assert {r.side for r in rel.presigned} == {"buy", "sell"}
+    assert get_counter_labelled("quotes_presigned", {"market": "m1"}) >= 8
+
+
+def test_signing_without_a_client_needs_process_workers():
+    with pytest.raises(ValueError):
+        SigningPipeline(None)
+    with pytest.raises(ValueError):
+        SigningPipeline(None, workers=2, mode="thread")
+
+
+def test_failed_background_sign_falls_back_inline_and_is_counted(caplog):
+    class FlakySigner(StubSigner):
+        def create_order(self, args, options=None):
+            if threading.current_thread().name.startswith("polybot-sign"):
+                raise RuntimeError("signer crashed")
+            return super().create_order(args, options)
+
+    signer = FlakySigner()
+    pipe = SigningPipeline(signer, workers=2)
+    before = get_counter("relayer_sign_fallback")
+    try:
+        with caplog.at_level("WARNING", logger="polybot.signing"):
+            out = pipe.sign_batch([_args(0.40), _args(0.41)])
+            pipe.sign_batch([_args(0.42), _args(0.43)])
+    finally:
+        pipe.close()
+    assert [o["price"] for o in out] == [0.40, 0.41]
+    assert get_counter("relayer_sign_fallback") - before == 4
+    assert len([r for r in caplog.records if r.name == "polybot.signing"]) == 1
@@ -0,0 +1,85 @@
+import asyncio
+import json
+from contextlib import asynccontextmanager
+
+import httpx
+import websockets
+
+from polybot.observability import tracing
+from polybot.observability.metrics import get_histogram, reset as metrics_reset
+from polybot.observability.server import start_metrics_server, stop_metrics_server
+from polybot.service.runner import MarketSpec, ServiceRunner
+
+
+@asynccontextmanager
+async def ws_server(messages):
+    async def handler(websocket):
+        try:
+            await websocket.recv()
+        except Exception:
+            pass
+        for m in messages:
+            await websocket.send(json.dumps(m))
+        await asyncio.sleep(0.02)
+
+    server = await websockets.serve(handler, "127.0.0.1", 0)
+    host, port = server.sockets[0].getsockname()[:2]
+    try:
+        yield f"ws://{host}:{port}"
+    finally:
+        server.close()
+        await server.wait_closed()
+
+
+def test_service_records_tick_to_trade_stages():
+    metrics_reset()
+    tracing.SLOWEST.clear()
+    events = [
+        {"type": "l2_snapshot", "seq": 1, "bids": [[0.40, 100.0]], "asks": [[0.47, 100.0]]},
+        {"type": "l2_update", "seq": 2},
+    ]
+
+    async def run():
+        async with ws_server(events) as url:
+            sr = ServiceRunner(db_url=":memory:")
+            await sr.run_markets([MarketSpec(market_id="m_tr", outcome_yes_id="yes", ws_url=url, max_messages=2)])
+
+    asyncio.run(run())
+    # every message is traced through book apply and the strategy decision
+    for stage in ("decode", "validate", "apply", "decide"):
+        assert get_histogram("trace_stage_us", {"market": "m_tr", "stage": stage}).count == 2
+    # the snapshot led to quotes: relayer send/ack and the end-to-end latency were recorded
+    assert get_histogram("trace_stage_us", {"market": "m_tr", "stage": "ack"}).count >= 1
+    total = get_histogram("tick_to_trade_us", {"market": "m_tr"})
+    assert total.count >= 1
+    slow = tracing.SLOWEST.snapshot()
+    assert slow and slow[0]["market"] == "m_tr"
+    assert list(slow[0]["stages_us"]) == ["decode", "validate", "apply", "decide", "send", "ack"]
+    # stage breakdown adds up to recv -> ack (up to per-stage rounding)
+    assert 0 <= slow[0]["total_us"] - sum(slow[0]["stages_us"].values()) <= 6
+
+
+def test_slow_traces_keep_the_slowest():
+    ring = tracing.SlowTraces(capacity=3)
+    for us in (5, 50, 1, 20, 40, 2):
+        t = tracing.TraceContext(recv_ns=0)
+        t.market = f"m{us}"
+        ring.offer(us, t)
+    assert [e["total_us"] for e in ring.snapshot()] == [50, 40, 20]
+
+
+def test_metrics_server_serves_slow_traces():
+    tracing.SLOWEST.clear()
+    t = tracing.TraceContext()
+    t.stamp(tracing.SEND)
+    t.stamp(tracing.ACK)
+    tracing.finish(t, "m_srv")
+    server, _ = start_metrics_server("127.0.0.1", 0)
+    try:
+        with httpx.Client(trust_env=False, timeout=5.0) as client:
+            r = client.get(f"http://127.0.0.1:{server.server_address[1]}/traces/slow")
+        assert r.status_code == 200
+        traces = r.json()["traces"]
+        assert traces[0]["market"] == "m_srv" and set(traces[0]["stages_us"]) == {"send", "ack"}
+    finally:
+        stop_metrics_server(server)
@@ -0,0 +1,86 @@
+import json
+from pathlib import Path
+
+from hypothesis import given, settings, strategies as st
+
+from polybot.ingestion.validator import (
+    benchmark_validators,
+    fast_validate,
+    validate_message,
+    validate_message_slow,
+)
+
+
+CASES = [
+    {"type": "snapshot", "seq": 1, "bids": [[0.4, 100.0]], "asks": [[0.47, 100.0]]},
+    {"type": "snapshot", "seq": 0},
+    {"type": "delta", "seq": 2},
+    {"type": "delta", "seq": 3, "bids": [[0.41, 10]], "checksum": "b1a1v0.0", "market": "m1"},
+    {"type": "delta", "seq": 3, "bids": None, "asks": [[1, 2]]},
+    {"type": "snapshot", "seq": -1},
+    {"type": "snapshot", "seq": 1, "bids": None},
+    {"type": "snapshot", "seq": "1"},
+    {"type": "snapshot", "seq": 1.0},
+    {"type": "snapshot", "seq": True},
+    {"type": "delta", "seq": 2, "bids": [[0.4]]},
+    {"type": "delta", "seq": 2, "bids": [[0.4, 1.0, 2.0]]},
+    {"type": "delta", "seq": 2, "bids": [(0.4, 1.0)]},
+    {"type": "delta", "seq": 2, "bids": [["0.4", "1.0"]]},
+    {"type": "delta", "seq": 2, "bids": [["x", 1.0]]},
+    {"type": "delta", "seq": 2, "checksum": 5},
+    {"type": "delta", "seq": 2, "ts_ms": -5},
+    {"type": "delta", "seq": 2, "market": 7},
+    {"type": "delta", "seq": 2, "extra": {"nested": 1}},
+    {"type": "trade", "seq": 2},
+    {"seq": 2},
+]
+
+
+def test_fast_path_agrees_with_pydantic_on_fixed_cases():
+    for msg in CASES:
+        slow_ok, _ = validate_message_slow(msg)
+        if fast_validate(msg):
+            assert slow_ok, msg
+        assert validate_message(msg)[0] == slow_ok, msg
+
+
+def test_fast_path_accepts_recorded_messages():
+    for line in Path("recordings/sample.jsonl").read_text(encoding="utf-8").splitlines():
+        assert fast_validate(json.loads(line))
+
+
+_scalar = st.one_of(
+    st.none(),
+    st.booleans(),
+    st.integers(min_value=-3, max_value=3),
+    st.floats(allow_nan=False, min_value=-1.0, max_value=2.0),
+    st.sampled_from(["", "1", "0.5", "x"]),
+)
+_level = st.one_of(st.lists(_scalar, min_size=0, max_size=3), st.tuples(_scalar, _scalar), _scalar)
+_levels = st.one_of(st.none(), st.lists(_level, max_size=3), _scalar)
+_msg = st.fixed_dictionaries(
+    {"type": st.sampled_from(["snapshot", "delta", "other"]), "seq": _scalar},
+    optional={
+        "bids": _levels,
+        "asks": _levels,
+        "checksum": _scalar,
+        "market": _scalar,
+        "channel": _scalar,
+        "ts_ms": _scalar,
+    },
+)
+
+
+@settings(max_examples=500, deadline=None)
+@given(_msg)
+def test_fast_path_equivalent_to_pydantic(msg):
+    slow_ok, _ = validate_message_slow(msg)
+    if fast_validate(msg):
+        assert slow_ok
+    assert validate_message(msg)[0] == slow_ok
+
+
+def test_benchmark_validators_reports_both_paths():
+    res = benchmark_validators(CASES[:4], rounds=5)
+    assert res["messages"] == 4 and res["rounds"] == 5
+    assert res["fast_ns_per_msg"] > 0 and res["pydantic_ns_per_msg"] > 0
@@ -0,0 +1,95 @@
+import asyncio
+
+from polybot.adapters.polymarket.ws import WSMessage
+from polybot.adapters.polymarket.ws_mux import WSConnectionManager
+from polybot.observability.metrics import get_counter_labelled, get_gauge
+
+
+class FakeClient:
+    """Stands in for OrderbookWSClient: records subscriptions, emits queued frames."""
+
+    instances = []
+
+    def __init__(self, name):
+        self.name = name
+        self.subs = []
+        self.unsubs = []
+        self.frames: asyncio.Queue = asyncio.Queue()
+        FakeClient.instances.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return None
+
+    async def subscribe(self, msg):
+        self.subs.append(msg["market"])
+
+    async def unsubscribe(self, msg, unsub=None):
+        self.subs.remove(msg["market"])
+        self.unsubs.append(unsub["market"])
+
+    async def messages(self):
+        while True:
+            raw = await self.frames.get()
+            if raw is None:
+                return
+            yield WSMessage(raw=raw)
+
+
+def _client(mgr, market):
+    conn = mgr._conn_of[market]
+    return next(c for c in FakeClient.instances if c.name == conn.name and market in c.subs)
+
+
+def test_mux_demultiplexes_and_rebalances():
+    FakeClient.instances = []
+
+    async def run():
+        mgr = WSConnectionManager("ws://x", max_connections=2, client_factory=FakeClient)
+        queues = {m: await mgr.subscribe(m) for m in ("a", "b", "c", "d")}
+        await asyncio.sleep(0)
+        assert mgr.open_connections() == 2
+        assert sorted(len(v) for v in mgr.assignments().values()) == [2, 2]
+        assert [get_gauge("ws_mux_subscriptions", {"conn": c.name}) for c in mgr._conns] == [2, 2]
+
+        cl = _client(mgr, "a")
+        cl.frames.put_nowait({"type": "l2_update", "seq": 2, "market": "a"})
+        cl.frames.put_nowait({"type": "l2_update", "seq": 3, "market": "zzz"})
+        msg = await asyncio.wait_for(queues["a"].get(), 1)
+        assert msg["type"] == "delta" and msg["market"] == "a"
+
+        # releasing both markets of one socket closes it and rebalances the rest onto two sockets
+        other = [m for m in "abcd" if mgr._conn_of[m] is not mgr._conn_of["a"]]
+        for m in other:
+            await mgr.release(m)
+        assert sorted(len(v) for v in mgr.assignments().values()) == [1, 1]
+        assert [get_gauge("ws_mux_subscriptions", {"conn": c.name}) for c in mgr._conns] == [len(c.markets) for c in mgr._conns]
+        assert get_counter_labelled("ws_mux_unrouted", {"conn": cl.name}) >= 1
+        await mgr.close()
+
+    asyncio.run(run())
+
+
+def test_mux_messages_iterator_ends_with_stream_and_drops_oldest():
+    FakeClient.instances = []
+
+    async def run():
+        mgr = WSConnectionManager("ws://y", max_connections=1, queue_size=2, client_factory=FakeClient)
+        await mgr.subscribe("m1")
+        await asyncio.sleep(0)
+        cl = FakeClient.instances[0]
+        for seq in (1, 2, 3):
+            # single-market socket routes messages without a market field
+            cl.frames.put_nowait({"type": "l2_update", "seq": seq})
+        await asyncio.sleep(0.01)
+        cl.frames.put_nowait(None)
+        await asyncio.sleep(0.01)
+        out = [m["seq"] async for m in mgr.messages("m1")]
+        assert out == [2, 3]
+        assert get_counter_labelled("ws_mux_dropped", {"market": "m1"}) >= 1
+        assert mgr.open_connections() == 0
+        await mgr.close()
+
+    asyncio.run(run())